@@ -1,26 +1,46 @@
 import multiprocessing
+from taskiq import TaskiqEvents, TaskiqState
 # On utilise les imports spécifiques à la version 1.2.1+
 from taskiq_redis import RedisAsyncResultBackend, ListQueueBroker
 from app.core.config import settings
+from app.services.live_sessions import LIVE_QUEUE
+from app.services.scheduler import token_queue
 
 # 🚨 SÉCURITÉ GPU (Mode Spawn obligatoire pour Torch/CUDA)
+# Nœuds CPU : app/worker/cpu_launcher.py forke les workers après avoir chargé les modèles
 try:
     multiprocessing.set_start_method("spawn", force=True)
 except RuntimeError:
     pass
 
 # 1. Initialisation du Broker avec la nouvelle classe ListQueueBroker
+# Avec ROUTING_ENABLED, le worker n'écoute que les jetons de son pool (WORKER_POOL)
+# Un worker en direct (LIVE_WORKER) n'écoute que les sessions WebSocket
 broker = ListQueueBroker(
     url=settings.REDIS_URL,
+    queue_name=LIVE_QUEUE if settings.LIVE_WORKER else token_queue(),
 ).with_result_backend(
     RedisAsyncResultBackend(redis_url=settings.REDIS_URL)
 )
 
 # 2. Cycle de vie
-@broker.on_event("startup")
-async def startup_event(state):
+# WORKER_STARTUP est attendu avant la consommation de la file : le worker ne prend
+# aucun job tant que le warm-up (modèles + identity-bank) n'est pas terminé.
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def startup_event(state: TaskiqState):
     print("🚀 [Taskiq 0.12.1] Worker démarré")
     print(f"🔌 Transport: Redis List Queue sur {settings.REDIS_URL}")
+    from app.worker.warmup import warm_up
+    await warm_up()
+    if not settings.LIVE_WORKER:
+        from app.worker.tasks.audio_tasks import start_delayed_promotion
+        start_delayed_promotion()
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def shutdown_event(state: TaskiqState):
+    from app.worker.warmup import mark_stopped
+    await mark_stopped()
 
 # 3. Importation des tâches pour enregistrement
 import app.worker.tasks
\ No newline at end of file
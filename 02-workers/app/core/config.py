@@ -1,5 +1,46 @@
 import os
-import torch
+import glob
+import json
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """Détection GPU différée : importer torch coûte plusieurs secondes au démarrage."""
+    import torch
+    return torch.cuda.is_available()
+
+
+@dataclass(frozen=True)
+class CpuProfile:
+    """Part des cœurs du nœud attribuée à un processus worker CPU."""
+    index: int
+    workers: int
+    threads: int
+    interop_threads: int
+    whisper_threads: int
+    whisper_workers: int
+    cpus: Optional[Tuple[int, ...]] = None
+
+    def to_json(self) -> dict:
+        return {**asdict(self), "cpus": list(self.cpus) if self.cpus else None}
+
+
+def _numa_nodes() -> List[List[int]]:
+    """Cœurs de chaque nœud NUMA (sysfs Linux) ; un seul nœud si l'information manque."""
+    nodes = []
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        cpus = []
+        with open(path) as f:
+            for part in f.read().strip().split(","):
+                if part:
+                    start, _, end = part.partition("-")
+                    cpus.extend(range(int(start), int(end or start) + 1))
+        nodes.append(cpus)
+    return nodes
+
 
 class Settings:
     PROJECT_NAME: str = "Smart Meeting Scribe Worker V5"
@@ -21,13 +62,333 @@ class Settings:
     # --- IA HuggingFace ---
     HF_TOKEN: str = os.getenv("HF_TOKEN", "")
 
+    # --- Store local des modèles (app/core/model_store.py) ---
+    MODEL_STORE_DIR: str = os.getenv("MODEL_STORE_DIR", "/models")
+    # Aucun téléchargement au runtime : les modèles doivent être dans le store
+    MODEL_STORE_OFFLINE: bool = os.getenv("MODEL_STORE_OFFLINE", "false").lower() == "true"
+    # Révision Hugging Face par modèle (tag ou commit), ex: {"whisper": "a1b2c3"} ; défaut main
+    MODEL_REVISIONS: dict = json.loads(os.getenv("MODEL_REVISIONS", "{}"))
+
     # --- Hardware (GPU/CPU) ---
-    DEVICE: str = "cuda" if torch.cuda.is_available() else "cpu"
-    COMPUTE_TYPE: str = "float16" if torch.cuda.is_available() else "int8"
+    # DEVICE / COMPUTE_TYPE forcés par variable d'environnement, sinon détectés au premier accès
+    @property
+    def DEVICE(self) -> str:
+        return os.getenv("DEVICE") or ("cuda" if _cuda_available() else "cpu")
+
+    @property
+    def COMPUTE_TYPE(self) -> str:
+        return os.getenv("COMPUTE_TYPE") or ("float16" if self.DEVICE == "cuda" else "int8")
+
+    # --- Routage hétérogène (pools de workers GPU / CPU) ---
+    # Pool du worker : "gpu" (accélérateur) ou "cpu" ; défaut déduit du device
+    @property
+    def WORKER_POOL(self) -> str:
+        return os.getenv("WORKER_POOL") or ("gpu" if self.DEVICE == "cuda" else "cpu")
+
+    # Jetons de dispatch par pool (file Taskiq "sms:pool:{pool}") ; l'API choisit le pool du job
+    ROUTING_ENABLED: bool = os.getenv("ROUTING_ENABLED", "false").lower() == "true"
+    # Audio (secondes) transcrit au démarrage pour mesurer le RTF annoncé (0 = pas de mesure)
+    WARMUP_CALIBRATION_SECONDS: float = float(os.getenv("WARMUP_CALIBRATION_SECONDS", "30"))
+
+    # --- Ordonnancement équitable (Deficit Round Robin entre tenants) ---
+    # Un tenant = un groupe ("group:3") ou un propriétaire ("owner:12"), choisi par l'API.
+    # Quantum : secondes d'audio créditées à chaque tour pour un tenant de poids 1.0
+    FAIR_SHARE_QUANTUM_SECONDS: float = float(os.getenv("FAIR_SHARE_QUANTUM_SECONDS", "600"))
+    # Poids par tenant (JSON), ex: {"group:2": 3.0, "owner:7": 0.5}
+    FAIR_SHARE_WEIGHTS: dict = json.loads(os.getenv("FAIR_SHARE_WEIGHTS", "{}"))
+    FAIR_SHARE_DEFAULT_WEIGHT: float = float(os.getenv("FAIR_SHARE_DEFAULT_WEIGHT", "1.0"))
+    # Nombre max de jobs simultanés par tenant (JSON), ex: {"group:2": 4}
+    FAIR_SHARE_MAX_RUNNING: dict = json.loads(os.getenv("FAIR_SHARE_MAX_RUNNING", "{}"))
+    FAIR_SHARE_DEFAULT_MAX_RUNNING: int = int(os.getenv("FAIR_SHARE_DEFAULT_MAX_RUNNING", "2"))
+    # Délai avant de re-tenter un dispatch quand tous les tenants sont au plafond
+    FAIR_SHARE_RETRY_DELAY: float = float(os.getenv("FAIR_SHARE_RETRY_DELAY", "5"))
+    # Période de promotion des jobs différés (retries, uploads reportés) arrivés à échéance
+    DELAYED_PROMOTION_INTERVAL: float = float(os.getenv("DELAYED_PROMOTION_INTERVAL", "2"))
+
+    # --- Classes de file & préemption ---
+    # Ordre = priorité stricte (la première classe est servie avant les autres)
+    QUEUE_CLASSES: list = os.getenv("QUEUE_CLASSES", "urgent,normal,bulk").split(",")
+    DEFAULT_QUEUE_CLASS: str = os.getenv("DEFAULT_QUEUE_CLASS", "normal")
+    # Opt-in : classes dont les jobs cèdent la place aux classes plus prioritaires
+    PREEMPTIBLE_QUEUE_CLASSES: list = [c for c in os.getenv("PREEMPTIBLE_QUEUE_CLASSES", "").split(",") if c]
+    # Attente minimale d'un job prioritaire avant de préempter (laisse le temps à un worker libre)
+    PREEMPTION_GRACE_SECONDS: float = float(os.getenv("PREEMPTION_GRACE_SECONDS", "10"))
+    # Fenêtre (secondes d'audio) entre deux points de préemption pendant la transcription
+    PREEMPTION_WINDOW_SECONDS: float = float(os.getenv("PREEMPTION_WINDOW_SECONDS", "300"))
+    # Préfixe S3 (bucket résultats) des points de reprise
+    CHECKPOINT_PREFIX: str = "_checkpoints"
+
+    # --- Annulation ---
+    # Intervalle minimal (secondes) entre deux vérifications Redis dans les boucles longues
+    CANCEL_CHECK_INTERVAL: float = float(os.getenv("CANCEL_CHECK_INTERVAL", "2"))
+    # Secondes de calcul par seconde d'audio (estimation du temps récupéré par une annulation)
+    ESTIMATED_REALTIME_FACTOR: float = float(os.getenv("ESTIMATED_REALTIME_FACTOR", "0.2"))
+
+    # --- Fiabilité : retries, timeouts par étape, dead-letter ---
+    # Tentatives max d'un job pour une erreur transitoire (S3, réseau, timeout, worker perdu)
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    # Délai avant la 1ère nouvelle tentative (doublé à chaque échec)
+    RETRY_BACKOFF_SECONDS: float = float(os.getenv("RETRY_BACKOFF_SECONDS", "30"))
+    # Tentatives des appels S3 (botocore, mode "standard" avec backoff exponentiel)
+    S3_MAX_ATTEMPTS: int = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+    # Tentatives du webhook de fin de job
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "4"))
+    # Timeout par étape = base (JSON, secondes) + STAGE_TIMEOUT_FACTOR × durée audio estimée
+    STAGE_TIMEOUTS: dict = json.loads(os.getenv("STAGE_TIMEOUTS", json.dumps({
+        "download": 600,
+        "probe": 60,
+        "conversion": 300,
+        "diarization": 600,
+        "identification": 600,
+        "session_vectors": 600,
+        "speech_map": 300,
+        "transcription": 600,
+        "fusion": 300,
+    })))
+    STAGE_TIMEOUT_FACTOR: float = float(os.getenv("STAGE_TIMEOUT_FACTOR", "1.5"))
+    # Le watchdog redémarre le processus si une étape dépasse son timeout + cette marge
+    # sans atteindre de point de contrôle (appel modèle bloqué)
+    WATCHDOG_GRACE_SECONDS: float = float(os.getenv("WATCHDOG_GRACE_SECONDS", "60"))
+    WATCHDOG_INTERVAL: float = float(os.getenv("WATCHDOG_INTERVAL", "5"))
+    # Bail d'un job en cours : s'il n'est plus renouvelé (crash, OOM), le job est récupéré
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+    # --- Exécuteurs (étapes bloquantes hors de la boucle asyncio) ---
+    # Threads d'I/O (boto3, checkpoints) partagés par les jobs d'un processus
+    IO_EXECUTOR_THREADS: int = int(os.getenv("IO_EXECUTOR_THREADS", "8"))
+    # Threads d'inférence : 1 = un seul modèle actif à la fois par processus (VRAM)
+    INFERENCE_EXECUTOR_THREADS: int = int(os.getenv("INFERENCE_EXECUTOR_THREADS", "1"))
+    # Threads CPU (modèles placés sur CPU pendant qu'un autre modèle occupe le GPU)
+    CPU_EXECUTOR_THREADS: int = int(os.getenv("CPU_EXECUTOR_THREADS", "2"))
+
+    # --- Graphe d'étapes (app/worker/dag.py) ---
+    # Lance en parallèle les étapes indépendantes (identification pendant la transcription)
+    PIPELINE_CONCURRENT_STAGES: bool = os.getenv("PIPELINE_CONCURRENT_STAGES", "true").lower() == "true"
+    # Mémoire (Mo) disponible par ressource pour les étapes simultanées d'un job
+    PIPELINE_MEMORY_BUDGET_MB: dict = json.loads(os.getenv("PIPELINE_MEMORY_BUDGET_MB", json.dumps({
+        "gpu": 7500,
+        "cpu": 8000,
+    })))
+    # Device du modèle WeSpeaker d'identification ("cpu" : tourne pendant Whisper, ou "cuda")
+    IDENTIFICATION_DEVICE: str = os.getenv("IDENTIFICATION_DEVICE", "cpu")
+
+    # --- Profils de traitement vitesse / qualité (app/services/transcription.py) ---
+    # Options faster-whisper par profil ; batch_size > 1 : décodage par lots sur les
+    # fenêtres du VAD (BatchedInferencePipeline) ; language fixé : pas de détection
+    PROCESSING_PROFILES: dict = json.loads(os.getenv("PROCESSING_PROFILES", json.dumps({
+        "fast": {"beam_size": 1, "batch_size": 8, "vad_filter": True, "language": None,
+                 "condition_on_previous_text": False},
+        "balanced": {"beam_size": 5, "batch_size": 1, "vad_filter": False, "language": None},
+        "accurate": {"beam_size": 8, "batch_size": 1, "vad_filter": True, "language": None, "patience": 1.5},
+    })))
+    # Profil d'un job qui n'en précise pas (ou dont le profil est inconnu du Worker)
+    DEFAULT_PROCESSING_PROFILE: str = os.getenv("DEFAULT_PROCESSING_PROFILE", "balanced")
+    # Carte de parole (VAD Silero, app/services/speech_map.py) partagée par Whisper,
+    # le brouillon et sa passe de raffinement : silence minimal entre deux zones,
+    # marge ajoutée autour de la parole (ms)
+    SPEECH_MAP_MIN_SILENCE_MS: int = int(os.getenv("SPEECH_MAP_MIN_SILENCE_MS", "500"))
+    SPEECH_MAP_PAD_MS: int = int(os.getenv("SPEECH_MAP_PAD_MS", "400"))
+
+    # --- Transcription en direct (WebSocket de l'API, app/services/live.py) ---
+    # Worker dédié aux sessions en direct : écoute la file "sms:live" au lieu des jetons de dispatch
+    LIVE_WORKER: bool = os.getenv("LIVE_WORKER", "false").lower() == "true"
+    # Sessions simultanées par processus (lancer le worker avec --max-async-tasks identique)
+    LIVE_SESSIONS_PER_WORKER: int = int(os.getenv("LIVE_SESSIONS_PER_WORKER", "4"))
+    # Whisper réduit (dépôt CTranslate2) : une session doit décoder plus vite que le temps réel
+    LIVE_WHISPER_MODEL: str = os.getenv("LIVE_WHISPER_MODEL", "Systran/faster-whisper-small")
+    # Threads CTranslate2 par décodage (0 = threads du profil CPU / sessions par worker)
+    LIVE_WHISPER_THREADS: int = int(os.getenv("LIVE_WHISPER_THREADS", "0"))
+    LIVE_BEAM_SIZE: int = int(os.getenv("LIVE_BEAM_SIZE", "1"))
+    # Langue forcée (ex: "fr") ; vide = détectée sur le premier segment puis fixée pour la session
+    LIVE_LANGUAGE: Optional[str] = os.getenv("LIVE_LANGUAGE") or None
+    # Audio reçu entre deux passages du VAD (secondes)
+    LIVE_STEP_SECONDS: float = float(os.getenv("LIVE_STEP_SECONDS", "1.0"))
+    # Intervalle minimal entre deux segments provisoires (partial) d'une parole en cours
+    LIVE_PARTIAL_INTERVAL_SECONDS: float = float(os.getenv("LIVE_PARTIAL_INTERVAL_SECONDS", "1.0"))
+    # Parole continue au-delà de laquelle les segments sont validés sans attendre un silence
+    # (le dernier segment est gardé et redécodé avec la suite : recouvrement)
+    LIVE_MAX_BUFFER_SECONDS: float = float(os.getenv("LIVE_MAX_BUFFER_SECONDS", "15"))
+    # Silence qui clôt une zone de parole (ms) et marge gardée autour de la parole (ms)
+    LIVE_VAD_MIN_SILENCE_MS: int = int(os.getenv("LIVE_VAD_MIN_SILENCE_MS", "600"))
+    LIVE_VAD_PAD_MS: int = int(os.getenv("LIVE_VAD_PAD_MS", "200"))
+    # Locuteurs en ligne : similarité minimale avec un locuteur déjà entendu de la session,
+    # durée minimale d'un segment pour son propre embedding (sinon : locuteur précédent)
+    LIVE_SPEAKER_THRESHOLD: float = float(os.getenv("LIVE_SPEAKER_THRESHOLD", "0.6"))
+    LIVE_SPEAKER_MIN_SECONDS: float = float(os.getenv("LIVE_SPEAKER_MIN_SECONDS", "1.0"))
+    # Fenêtre max (secondes, au centre du segment) passée à WeSpeaker
+    LIVE_EMBEDDING_MAX_SECONDS: float = float(os.getenv("LIVE_EMBEDDING_MAX_SECONDS", "5.0"))
+    # Durée max d'une session, et session close si aucun audio n'arrive pendant N secondes
+    LIVE_MAX_SESSION_SECONDS: float = float(os.getenv("LIVE_MAX_SESSION_SECONDS", str(4 * 3600)))
+    LIVE_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("LIVE_IDLE_TIMEOUT_SECONDS", "60"))
+    # Durée de vie des flux Redis (audio, événements) d'une session terminée
+    LIVE_STREAM_TTL_SECONDS: int = int(os.getenv("LIVE_STREAM_TTL_SECONDS", "3600"))
+
+    # --- Profils des locuteurs (centroïdes sauvegardés avec les résultats, voir app/services/relabel.py) ---
+    # Calcule les centroïdes même sans banque de voix (renommage rétroactif possible)
+    SPEAKER_CENTROIDS_ENABLED: bool = os.getenv("SPEAKER_CENTROIDS_ENABLED", "true").lower() == "true"
+    # Tours (les plus longs) moyennés pour le centroïde d'un locuteur
+    SPEAKER_CENTROID_SEGMENTS: int = int(os.getenv("SPEAKER_CENTROID_SEGMENTS", "3"))
+    # Score minimal pour attribuer une identité lors d'un relabel
+    RELABEL_THRESHOLD: float = float(os.getenv("RELABEL_THRESHOLD", "0.5"))
+    # Meetings traités en parallèle par un relabel (lectures / écritures S3)
+    RELABEL_IO_THREADS: int = int(os.getenv("RELABEL_IO_THREADS", "16"))
+
+    # --- Session vectors : un embedding par tour de parole (app/services/session_vectors.py) ---
+    SESSION_VECTORS_ENABLED: bool = os.getenv("SESSION_VECTORS_ENABLED", "true").lower() == "true"
+    # "s3" (bucket SESSION_VECTORS_BUCKET) ou "local" (dossier, hors ligne : tests, dev)
+    SESSION_VECTORS_STORE: str = os.getenv("SESSION_VECTORS_STORE", "s3")
+    SESSION_VECTORS_BUCKET: str = os.getenv("SESSION_VECTORS_BUCKET", "session-vectors")
+    SESSION_VECTORS_LOCAL_DIR: str = os.getenv("SESSION_VECTORS_LOCAL_DIR", "/tmp/session-vectors")
+    # Fenêtre (secondes) extraite au centre de chaque tour ; tours plus courts ignorés
+    SESSION_VECTOR_WINDOW_SECONDS: float = float(os.getenv("SESSION_VECTOR_WINDOW_SECONDS", "2.0"))
+    # Fenêtres passées ensemble au modèle d'embedding
+    SESSION_VECTOR_BATCH_SIZE: int = int(os.getenv("SESSION_VECTOR_BATCH_SIZE", "32"))
+    # Regroupement des voix inconnues (app/services/speaker_clusters.py)
+    UNKNOWN_CLUSTER_THRESHOLD: float = float(os.getenv("UNKNOWN_CLUSTER_THRESHOLD", "0.65"))
+    # Secondes de parole minimales d'un locuteur inconnu pour entrer dans un cluster
+    UNKNOWN_CLUSTER_MIN_SECONDS: float = float(os.getenv("UNKNOWN_CLUSTER_MIN_SECONDS", "10"))
+    # Meetings distincts à partir desquels une voix inconnue est signalée comme récurrente
+    UNKNOWN_CLUSTER_MIN_MEETINGS: int = int(os.getenv("UNKNOWN_CLUSTER_MIN_MEETINGS", "3"))
+    # Voix vue dans un seul meeting oubliée après N jours sans réapparaître
+    UNKNOWN_CLUSTER_TTL_DAYS: int = int(os.getenv("UNKNOWN_CLUSTER_TTL_DAYS", "180"))
+
+    # --- Shortlist d'identités des groupes récurrents (app/services/shortlist.py) ---
+    # Score minimal d'un match dans la shortlist (sinon : banque complète)
+    SHORTLIST_CONFIDENCE_THRESHOLD: float = float(os.getenv("SHORTLIST_CONFIDENCE_THRESHOLD", "0.7"))
+    SHORTLIST_MAX_IDENTITIES: int = int(os.getenv("SHORTLIST_MAX_IDENTITIES", "30"))
+    # Identité retirée si elle n'a pas été reconnue depuis N jours
+    SHORTLIST_TTL_DAYS: int = int(os.getenv("SHORTLIST_TTL_DAYS", "90"))
+    # Poids du dernier meeting dans l'embedding conservé (moyenne mobile)
+    SHORTLIST_EMBEDDING_ALPHA: float = float(os.getenv("SHORTLIST_EMBEDDING_ALPHA", "0.3"))
+
+    # --- Enregistrements multipistes : un locuteur par canal (app/services/channels.py) ---
+    # Trame d'analyse de l'énergie par canal (secondes)
+    CHANNEL_FRAME_SECONDS: float = float(os.getenv("CHANNEL_FRAME_SECONDS", "0.03"))
+    # Parole : énergie au-dessus du bruit de fond du canal (dB)
+    CHANNEL_VAD_THRESHOLD_DB: float = float(os.getenv("CHANNEL_VAD_THRESHOLD_DB", "12"))
+    # Diaphonie : un canal à plus de X dB sous le canal le plus fort est ignoré
+    CHANNEL_CROSSTALK_DB: float = float(os.getenv("CHANNEL_CROSSTALK_DB", "10"))
+    CHANNEL_MIN_GAP_SECONDS: float = float(os.getenv("CHANNEL_MIN_GAP_SECONDS", "0.3"))
+    CHANNEL_MIN_TURN_SECONDS: float = float(os.getenv("CHANNEL_MIN_TURN_SECONDS", "0.25"))
+
+    # --- Nœuds CPU : modèles partagés en copy-on-write (app/worker/cpu_launcher.py) ---
+    # Modèles chargés une fois dans le processus parent avant le fork des workers
+    SHARED_MODELS: list = [m for m in os.getenv("SHARED_MODELS", "pyannote,embedding").split(",") if m]
+    # Threads torch par processus worker (0 = cœurs / nombre de workers)
+    CPU_THREADS_PER_WORKER: int = int(os.getenv("CPU_THREADS_PER_WORKER", "0"))
+
+    # --- Profil d'exécution CPU (cpu_profile, appliqué au démarrage de chaque worker CPU) ---
+    # Processus worker du nœud entre lesquels les cœurs sont répartis (--workers du lanceur)
+    CPU_WORKERS: int = int(os.getenv("CPU_WORKERS", os.getenv("WORKER_CONCURRENCY", "1")))
+    # Threads inter-op torch (parallélisme entre opérateurs) par processus
+    CPU_INTEROP_THREADS: int = int(os.getenv("CPU_INTEROP_THREADS", "1"))
+    # faster-whisper : threads de calcul (0 = threads du worker) et décodages simultanés
+    WHISPER_CPU_THREADS: int = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+    WHISPER_NUM_WORKERS: int = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+    # Épinglage des processus : "none", "cores" (bloc de cœurs contigus) ou "numa" (un nœud NUMA)
+    CPU_AFFINITY: str = os.getenv("CPU_AFFINITY", "none")
+
+    # --- Backend du modèle d'embedding WeSpeaker (app/core/embedding_backend.py) ---
+    # "torch" (Model Pyannote) ou "onnx" (ONNX Runtime, nœuds CPU)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    # Poids du graphe ONNX quantifiés en int8 (quantification dynamique)
+    EMBEDDING_ONNX_QUANTIZE: bool = os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() == "true"
+    # Threads ONNX Runtime (0 = threads du profil CPU du worker)
+    EMBEDDING_ONNX_THREADS: int = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+
+    # --- Serveur d'inférence local partagé (app/inference/server.py) ---
+    # Les workers délèguent segmentation, embeddings et Whisper au serveur du nœud
+    INFERENCE_SERVER_ENABLED: bool = os.getenv("INFERENCE_SERVER_ENABLED", "false").lower() == "true"
+    INFERENCE_SOCKET: str = os.getenv("INFERENCE_SOCKET", "/run/sms/inference.sock")
+    # Backend du serveur : models (modèles réels) ou stub (CPU factice, tests)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "models")
+    # Taille max d'un batch (éléments) et attente max du premier élément avant exécution
+    INFERENCE_BATCH_MAX_ITEMS: int = int(os.getenv("INFERENCE_BATCH_MAX_ITEMS", "64"))
+    INFERENCE_BATCH_MAX_WAIT_MS: float = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "10"))
+    # Publication des métriques du serveur dans Redis (secondes)
+    INFERENCE_STATS_INTERVAL: float = float(os.getenv("INFERENCE_STATS_INTERVAL", "30"))
+
+    # --- Scratch (fichiers temporaires par job) ---
+    # Racine rapide (ex: tmpfs /dev/shm/sms) pour les petits fichiers, volumineuse (ex: NVMe) pour les médias
+    SCRATCH_FAST_ROOT: str = os.getenv("SCRATCH_FAST_ROOT", "/tmp/sms-scratch")
+    SCRATCH_LARGE_ROOT: str = os.getenv("SCRATCH_LARGE_ROOT", "/tmp/sms-scratch")
+    # Taille max d'un fichier placé sur la racine rapide
+    SCRATCH_FAST_MAX_FILE_BYTES: int = int(os.getenv("SCRATCH_FAST_MAX_FILE_BYTES", str(64 * 1024**2)))
+    SCRATCH_JOB_QUOTA_BYTES: int = int(os.getenv("SCRATCH_JOB_QUOTA_BYTES", str(8 * 1024**3)))
+    # Quota par racine pour l'ensemble des jobs du nœud
+    SCRATCH_NODE_QUOTA_BYTES: int = int(os.getenv("SCRATCH_NODE_QUOTA_BYTES", str(50 * 1024**3)))
+
+    # --- Démarrage à chaud (warm-up) ---
+    # Modèles chargés + inférence factice au démarrage (pyannote, embedding, whisper ; vide = aucun)
+    # (worker en direct : whisper_live, embedding)
+    WARMUP_MODELS: list = [m for m in os.getenv(
+        "WARMUP_MODELS", "whisper_live,embedding" if LIVE_WORKER else "pyannote,embedding,whisper"
+    ).split(",") if m]
+    # Calcule les embeddings de l'identity-bank au démarrage
+    WARMUP_IDENTITY_BANK: bool = os.getenv("WARMUP_IDENTITY_BANK", "true").lower() == "true"
+    # Garde les modèles en mémoire entre les étapes et les jobs (GPU avec assez de VRAM)
+    KEEP_MODELS_LOADED: bool = os.getenv("KEEP_MODELS_LOADED", "false").lower() == "true"
+    # Fichier créé quand le worker est prêt (healthcheck Docker)
+    WORKER_READY_FILE: str = os.getenv("WORKER_READY_FILE", "/tmp/sms-worker-ready")
+    # Republication de l'entrée « prêt » (sms:workers:ready, sms:live:workers) ; doit rester
+    # sous le WORKER_READY_STALE_SECONDS de l'API
+    WORKER_HEARTBEAT_INTERVAL: float = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "15"))
+
+    # --- Estimation des temps de traitement (ETA côté API) ---
+    # Poids d'une nouvelle mesure dans le RTF lissé de chaque étape
+    ETA_RTF_SMOOTHING: float = float(os.getenv("ETA_RTF_SMOOTHING", "0.2"))
+
+    def cpu_profile(self, index: Optional[int] = None, workers: Optional[int] = None) -> CpuProfile:
+        """
+        Profil CPU du worker `index` parmi `workers` : les cœurs disponibles (cpuset du
+        conteneur) sont partagés sans recouvrement, pour que N processus torch /
+        CTranslate2 ne se disputent pas les mêmes cœurs.
+
+        Args:
+            index: Rang du processus worker (défaut : rang Taskiq du processus, "worker-N")
+            workers: Processus du nœud (défaut CPU_WORKERS)
+        """
+        if index is None:
+            import multiprocessing
+            name = multiprocessing.current_process().name
+            index = int(name.rpartition("-")[2]) if name.startswith("worker-") else 0
+        workers = max(1, workers or self.CPU_WORKERS)
+        index = index % workers
+        cores = sorted(os.sched_getaffinity(0))
+        threads = self.CPU_THREADS_PER_WORKER or max(1, len(cores) // workers)
+
+        cpus = None
+        if self.CPU_AFFINITY == "cores":
+            start = (index * threads) % len(cores)
+            cpus = tuple(cores[start:start + threads]) or None
+        elif self.CPU_AFFINITY == "numa":
+            nodes = [[c for c in node if c in cores] for node in _numa_nodes()]
+            nodes = [node for node in nodes if node] or [cores]
+            node = nodes[index % len(nodes)]
+            # Workers du même nœud NUMA : le nœud est découpé entre eux
+            local, per_node = index // len(nodes), -(-workers // len(nodes))
+            share = max(1, len(node) // per_node)
+            cpus = tuple(node[local * share:(local + 1) * share]) or tuple(node)
+            threads = min(threads, len(cpus))
+
+        return CpuProfile(
+            index=index,
+            workers=workers,
+            threads=threads,
+            interop_threads=max(1, self.CPU_INTEROP_THREADS),
+            whisper_threads=self.WHISPER_CPU_THREADS or threads,
+            whisper_workers=max(1, self.WHISPER_NUM_WORKERS),
+            cpus=cpus,
+        )
 
 settings = Settings()
 
 # Exports pour compatibilité avec ton code existant
-DEVICE = settings.DEVICE
-COMPUTE_TYPE = settings.COMPUTE_TYPE
-HF_TOKEN = settings.HF_TOKEN
\ No newline at end of file
+HF_TOKEN = settings.HF_TOKEN
+
+
+def __getattr__(name: str):
+    # DEVICE / COMPUTE_TYPE résolus à la demande (évite d'importer torch avec la config)
+    if name in ("DEVICE", "COMPUTE_TYPE"):
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
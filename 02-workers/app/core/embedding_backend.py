@@ -0,0 +1,131 @@
+"""
+Backends du modèle d'embedding WeSpeaker (identification, session vectors, banque de voix).
+
+    torch  Model Pyannote (défaut), GPU ou CPU
+    onnx   ResNet34 exporté en graphe ONNX et exécuté par ONNX Runtime (nœuds CPU),
+           poids int8 (quantification dynamique) si EMBEDDING_ONNX_QUANTIZE
+
+La quantification dynamique int8 remplace les convolutions par des ConvInteger : plus
+rapide sur les CPU à instructions int8 dédiées (VNNI), nettement plus lente ailleurs.
+Elle est donc désactivée par défaut ; le banc indique ce qu'elle apporte sur le nœud.
+
+Seul le ResNet est exporté : les fbank (FFT Kaldi, une fraction du coût) restent
+calculées par torch. Le graphe est généré une fois par révision du modèle dans le
+store (model_store.embedding_onnx) puis partagé par les workers du nœud.
+
+Le backend ONNX se branche comme le serveur d'inférence : `forward` du Model Pyannote
+est remplacé, l'objet Inference et ses appelants ne changent pas. Un appel avec
+`weights` (pooling pondéré) reste sur torch.
+
+Concordance des deux backends : tests/test_embedding_onnx_parity.py ; débit :
+scripts/embedding_backend_bench.py.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+BACKENDS = ("torch", "onnx")
+ONNX_OPSET = 17
+
+
+def export_onnx(model, path: str, quantize: bool) -> None:
+    """Exporte le ResNet de WeSpeaker (fbank -> embedding, batch et durée variables)."""
+    import torch
+
+    class _ResNet(torch.nn.Module):
+        def __init__(self, resnet):
+            super().__init__()
+            self.resnet = resnet
+
+        def forward(self, fbank):
+            return self.resnet(fbank)[1]
+
+    wrapper = _ResNet(model.resnet).eval()
+    example = torch.randn(2, 200, model.hparams.num_mel_bins)
+    graph_path = f"{path}.fp32" if quantize else path
+    with torch.inference_mode():
+        torch.onnx.export(
+            wrapper,
+            (example,),
+            graph_path,
+            input_names=["fbank"],
+            output_names=["embedding"],
+            dynamic_axes={"fbank": {0: "batch", 1: "frames"}, "embedding": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(graph_path, path, weight_type=QuantType.QInt8)
+        os.remove(graph_path)
+
+
+def onnx_threads() -> int:
+    """Threads intra-op ONNX Runtime : EMBEDDING_ONNX_THREADS, sinon la part du worker."""
+    return settings.EMBEDDING_ONNX_THREADS or settings.cpu_profile().threads
+
+
+class OnnxEmbedding:
+    """
+    Session ONNX Runtime du ResNet : fbank (batch, trames, 80) -> embeddings (batch, 256).
+
+    La session est créée au premier appel dans chaque processus : avec le lanceur CPU,
+    le modèle est chargé dans le parent puis forké, et le pool de threads d'ONNX
+    Runtime (comme celui de CTranslate2) ne survit pas au fork.
+
+    Args:
+        path: Graphe ONNX
+        threads: Threads intra-op (défaut : `onnx_threads()` du processus qui l'utilise)
+    """
+
+    def __init__(self, path: str, threads: Optional[int] = None):
+        self.path = path
+        self.threads = threads
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads or onnx_threads()
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+            self._pid = os.getpid()
+        return self._session
+
+    def __call__(self, fbank: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {"fbank": np.ascontiguousarray(fbank, dtype=np.float32)})[0]
+
+
+def onnx_forward(model, session: OnnxEmbedding):
+    """`forward` du Model Pyannote exécuté par ONNX Runtime (fbank torch, ResNet ONNX)."""
+    import torch
+
+    torch_forward = model.forward
+
+    def forward(waveforms, weights=None):
+        if weights is not None:
+            return torch_forward(waveforms, weights=weights)
+        with torch.inference_mode():
+            fbank = model.compute_fbank(waveforms)
+        return torch.from_numpy(session(fbank.cpu().numpy())).to(waveforms.device)
+
+    return forward
+
+
+def attach_onnx(inference) -> OnnxEmbedding:
+    """Branche le backend ONNX sur l'Inference WeSpeaker (graphe exporté au premier usage)."""
+    from app.core import model_store
+
+    model = inference.model
+    session = OnnxEmbedding(model_store.embedding_onnx(model, settings.EMBEDDING_ONNX_QUANTIZE))
+    model.forward = onnx_forward(model, session)
+    print(f"   ⚙️ WeSpeaker sur ONNX Runtime ({os.path.basename(session.path)})")
+    return session
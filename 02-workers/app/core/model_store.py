@@ -0,0 +1,287 @@
+"""
+Store local des modèles (poids résolus une fois, versions figées, chargement hors ligne).
+
+Chaque modèle est téléchargé une seule fois depuis Hugging Face dans MODEL_STORE_DIR
+(révision de MODEL_REVISIONS, sinon `main`). Le commit obtenu est inscrit dans le
+manifeste : les chargements suivants lisent directement le snapshot local, sans
+aucun appel réseau. Avec MODEL_STORE_OFFLINE, un modèle absent du manifeste est une
+erreur (le store se remplit avec `scripts/fetch_models.py`).
+
+Chargement :
+- checkpoints PyTorch (Pyannote, WeSpeaker) chargés par `torch.load(mmap=True)` : les
+  poids sont mappés depuis le page cache au lieu d'être relus et copiés ;
+- Whisper (CTranslate2) chargé depuis son répertoire local.
+Après un `release_models()`, un rechargement ne relit donc (presque) rien du disque.
+
+Structure disque :
+    {MODEL_STORE_DIR}/hub/                          cache Hugging Face (snapshots)
+    {MODEL_STORE_DIR}/manifest.json                 {modèle: {"repo", "revision", "path"}}
+    {MODEL_STORE_DIR}/pinned/diarization/config.yaml   pipeline Pyannote sur chemins locaux
+    {MODEL_STORE_DIR}/onnx/embedding-{commit}[-int8].onnx  WeSpeaker exporté (EMBEDDING_BACKEND=onnx)
+
+Structure Redis :
+    sms:models:loads   HASH  {hôte}:{modèle} -> {"seconds", "bytes_read", "loads", "revision", "loaded_at"}
+"""
+import fcntl
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from app.core.config import settings
+from app.core.redis_client import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+LOADS_KEY = "sms:models:loads"
+
+# Nom interne -> dépôt Hugging Face
+MODEL_REPOS = {
+    # Whisper Turbo optimisé CTranslate2 (Gain VRAM ~1.5GB)
+    "whisper": "deepdml/faster-whisper-large-v3-turbo-ct2",
+    "pyannote": "pyannote/speaker-diarization-3.1",
+    "segmentation": "pyannote/segmentation-3.0",
+    "embedding": "pyannote/wespeaker-voxceleb-resnet34-LM",
+    # Whisper réduit des sessions en direct (workers LIVE_WORKER)
+    "whisper_live": settings.LIVE_WHISPER_MODEL,
+}
+
+TORCH_CHECKPOINT = "pytorch_model.bin"
+
+
+class ModelNotInStore(RuntimeError):
+    """Modèle absent du store alors que le worker tourne hors ligne."""
+
+
+def _hub_dir() -> str:
+    return os.path.join(settings.MODEL_STORE_DIR, "hub")
+
+
+def _manifest_path() -> str:
+    return os.path.join(settings.MODEL_STORE_DIR, "manifest.json")
+
+
+def read_manifest() -> Dict[str, dict]:
+    try:
+        with open(_manifest_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def _store_lock():
+    """Plusieurs processus du nœud peuvent remplir le store en même temps."""
+    os.makedirs(settings.MODEL_STORE_DIR, exist_ok=True)
+    with open(os.path.join(settings.MODEL_STORE_DIR, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _configure_hub() -> None:
+    """Cache Hugging Face dans le store (à faire avant le premier import de huggingface_hub)."""
+    os.environ.setdefault("HF_HUB_CACHE", _hub_dir())
+    if settings.MODEL_STORE_OFFLINE:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+
+
+# =============================================================================
+# RÉSOLUTION
+# =============================================================================
+
+def resolve(name: str) -> str:
+    """
+    Chemin local du snapshot d'un modèle (téléchargé au premier appel si autorisé).
+
+    Raises:
+        ModelNotInStore: modèle absent du manifeste avec MODEL_STORE_OFFLINE
+    """
+    _configure_hub()
+    entry = read_manifest().get(name)
+    if entry and os.path.isdir(entry["path"]):
+        return entry["path"]
+
+    if settings.MODEL_STORE_OFFLINE:
+        raise ModelNotInStore(
+            f"Modèle '{name}' absent de {settings.MODEL_STORE_DIR} (MODEL_STORE_OFFLINE) : "
+            f"lancer scripts/fetch_models.py"
+        )
+    return fetch(name)
+
+
+def fetch(name: str) -> str:
+    """Télécharge la révision configurée d'un modèle et l'inscrit au manifeste."""
+    _configure_hub()
+    from huggingface_hub import snapshot_download
+
+    repo = MODEL_REPOS[name]
+    revision = settings.MODEL_REVISIONS.get(name)
+    with _store_lock():
+        entry = read_manifest().get(name)
+        if entry and os.path.isdir(entry["path"]) and revision in (None, entry["revision"]):
+            return entry["path"]
+
+        logger.info(f"📥 [Models] Téléchargement de {repo} ({revision or 'main'})...")
+        path = snapshot_download(
+            repo,
+            revision=revision,
+            cache_dir=_hub_dir(),
+            token=settings.HF_TOKEN or None,
+        )
+        manifest = read_manifest()
+        # Le répertoire du snapshot porte le hash du commit : c'est la version figée
+        manifest[name] = {"repo": repo, "revision": os.path.basename(path), "path": path}
+        tmp_path = _manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, _manifest_path())
+    logger.info(f"✅ [Models] {repo} figé au commit {os.path.basename(path)[:12]}")
+    return path
+
+
+def diarization_config() -> str:
+    """
+    config.yaml du pipeline Pyannote dont les sous-modèles pointent vers le store.
+
+    Le config.yaml publié référence la segmentation et WeSpeaker par identifiant
+    Hugging Face (résolus en ligne, sur `main`) ; la copie figée utilise les
+    checkpoints locaux du manifeste.
+    """
+    import yaml
+
+    pipeline_dir = resolve("pyannote")
+    segmentation = os.path.join(resolve("segmentation"), TORCH_CHECKPOINT)
+    # Le chemin contient "pyannote" (models--pyannote--...) : Pyannote y reconnaît son backend natif
+    embedding = os.path.join(resolve("embedding"), TORCH_CHECKPOINT)
+
+    pinned_dir = os.path.join(settings.MODEL_STORE_DIR, "pinned", "diarization")
+    pinned_path = os.path.join(pinned_dir, "config.yaml")
+    with open(os.path.join(pipeline_dir, "config.yaml")) as f:
+        config = yaml.safe_load(f)
+    config["pipeline"]["params"]["segmentation"] = segmentation
+    config["pipeline"]["params"]["embedding"] = embedding
+
+    os.makedirs(pinned_dir, exist_ok=True)
+    tmp_path = f"{pinned_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        yaml.safe_dump(config, f)
+    os.replace(tmp_path, pinned_path)
+    return pinned_path
+
+
+def embedding_checkpoint() -> str:
+    return os.path.join(resolve("embedding"), TORCH_CHECKPOINT)
+
+
+def embedding_onnx(model, quantize: bool) -> str:
+    """
+    Graphe ONNX de WeSpeaker pour la révision figée du store, exporté au premier appel.
+
+    Args:
+        model: Model Pyannote WeSpeaker chargé (source de l'export)
+        quantize: Poids int8 (quantification dynamique)
+    """
+    from app.core.embedding_backend import export_onnx
+
+    revision = read_manifest().get("embedding", {}).get("revision", "local")[:12]
+    path = os.path.join(settings.MODEL_STORE_DIR, "onnx", f"embedding-{revision}{'-int8' if quantize else ''}.onnx")
+    if os.path.exists(path):
+        return path
+    with _store_lock():
+        # Un autre worker du nœud a pu l'exporter pendant l'attente du verrou
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            export_onnx(model, tmp_path, quantize=quantize)
+            os.replace(tmp_path, path)
+            logger.info(f"✅ [Models] WeSpeaker exporté en ONNX : {path}")
+    return path
+
+
+# =============================================================================
+# CHARGEMENT MAPPÉ ET TÉLÉMÉTRIE
+# =============================================================================
+
+@contextmanager
+def torch_load_mmap():
+    """
+    Patch temporaire de torch.load pendant le chargement d'un modèle.
+
+    - weights_only=False : checkpoints Pyannote (objets Python), compatible PyTorch 2.6 ;
+    - mmap=True quand le checkpoint est un fichier local au format zip : les tenseurs
+      restent adossés au page cache au lieu d'être désérialisés en mémoire anonyme.
+    """
+    import torch
+
+    original_load = torch.load
+
+    def mapped_load(f, *args, **kwargs):
+        kwargs["weights_only"] = False
+        path = f if isinstance(f, (str, os.PathLike)) else getattr(f, "name", None) or getattr(f, "path", None)
+        if isinstance(path, (str, os.PathLike)) and os.path.isfile(path):
+            try:
+                return original_load(path, *args, mmap=True, **kwargs)
+            except (RuntimeError, ValueError) as e:
+                # Ancien format (non zip) : chargement classique
+                logger.debug(f"mmap impossible pour {path} : {e}")
+                if hasattr(f, "seek"):
+                    f.seek(0)
+        return original_load(f, *args, **kwargs)
+
+    torch.load = mapped_load
+    try:
+        yield
+    finally:
+        torch.load = original_load
+
+
+def _io_read_bytes() -> int:
+    """Octets lus depuis le stockage par le processus (hors page cache), 0 si indisponible."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("read_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+@contextmanager
+def measure_load(name: str):
+    """
+    Mesure un chargement de modèle : durée et octets réellement lus sur le disque.
+
+    Un rechargement servi par le page cache lit ~0 octet. La mesure couvre tout le
+    processus (un téléchargement concurrent n'écrit pas, il ne fausse pas la lecture).
+    """
+    started = time.monotonic()
+    read_before = _io_read_bytes()
+    yield
+    seconds = time.monotonic() - started
+    bytes_read = _io_read_bytes() - read_before
+    logger.info(f"   📦 [Models] {name} chargé en {seconds:.2f}s ({bytes_read / 1024**2:.0f} Mo lus sur disque)")
+    _publish_load(name, seconds, bytes_read)
+
+
+def _publish_load(name: str, seconds: float, bytes_read: int) -> None:
+    field = f"{socket.gethostname()}:{name}"
+    try:
+        redis = get_sync_redis()
+        previous = json.loads(redis.hget(LOADS_KEY, field) or "{}")
+        entry = read_manifest().get(name, {})
+        redis.hset(LOADS_KEY, field, json.dumps({
+            "seconds": round(seconds, 3),
+            "bytes_read": bytes_read,
+            "loads": int(previous.get("loads", 0)) + 1,
+            "revision": entry.get("revision"),
+            "loaded_at": time.time(),
+        }))
+    except Exception as e:
+        logger.warning(f"⚠️ [Models] Télémétrie de chargement non publiée : {e}")
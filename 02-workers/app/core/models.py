@@ -1,25 +1,32 @@
 """
 Gestionnaire de modèles IA (Cycle de vie & VRAM).
+
+torch, faster_whisper et pyannote sont importés au premier chargement d'un modèle :
+importer ce module (broker, tâches, outils CLI) reste rapide. Les poids viennent du
+store local (version figée, hors ligne, checkpoints mappés en mémoire).
 """
-from faster_whisper import WhisperModel
-from pyannote.audio import Pipeline, Model, Inference
-import torch
 import gc
-from app.core.config import DEVICE, COMPUTE_TYPE, HF_TOKEN
+import sys
+from app.core import model_store
+from app.core.config import settings
 
 # Variables globales (Singletons)
 current_whisper = None
 current_pipeline = None
 current_embedding = None
+# Whisper des sessions en direct : partagé par les sessions simultanées du processus,
+# jamais libéré par release_models (une session peut durer des heures)
+current_live_whisper = None
 
-# ID Spécifique pour Whisper Turbo optimisé CTranslate2 (Gain VRAM ~1.5GB)
-WHISPER_MODEL_ID = "deepdml/faster-whisper-large-v3-turbo-ct2"
+# Poids résolus et chargés via le store local (app/core/model_store.py)
+WHISPER_MODEL_ID = model_store.MODEL_REPOS["whisper"]
 
 # ══════════════════════════════════════════════════════════════════════════════
 # UTILITAIRE VRAM
 # ══════════════════════════════════════════════════════════════════════════════
 def log_vram(action: str, model_name: str):
     """Affiche l'état de la mémoire GPU."""
+    import torch
     if torch.cuda.is_available():
         free_mem, total_mem = torch.cuda.mem_get_info()
         free_gb = free_mem / 1024**3
@@ -36,91 +43,142 @@ def log_vram(action: str, model_name: str):
 def load_whisper():
     global current_whisper
     if current_whisper is None:
-        print(f"   ⏳ Initialisation du chargement de Whisper Turbo ({WHISPER_MODEL_ID}) en {COMPUTE_TYPE}...")
-        # On charge le modèle Turbo optimisé (CTranslate2)
+        from faster_whisper import WhisperModel
+        model_path = model_store.resolve("whisper")
+        print(f"   ⏳ Initialisation du chargement de Whisper Turbo ({WHISPER_MODEL_ID}) en {settings.COMPUTE_TYPE}...")
+        # On charge le modèle Turbo optimisé (CTranslate2) depuis le store local
         # Note : compute_type="int8" est recommandé pour maximiser le gain VRAM sur la RTX 4070
-        current_whisper = WhisperModel(
-            WHISPER_MODEL_ID, 
-            device=DEVICE, 
-            compute_type=COMPUTE_TYPE
-        )
+        options = {}
+        if settings.DEVICE == "cpu":
+            # Part des cœurs du processus (profil CPU) : pas de sur-souscription entre workers
+            profile = settings.cpu_profile()
+            options = {"cpu_threads": profile.whisper_threads, "num_workers": profile.whisper_workers}
+        with model_store.measure_load("whisper"):
+            current_whisper = WhisperModel(
+                model_path,
+                device=settings.DEVICE,
+                compute_type=settings.COMPUTE_TYPE,
+                **options
+            )
         # On loggue l'état APRÈS le chargement pour voir le poids réel
         log_vram("✅ Modèle Chargé :", "Whisper Large-v3-Turbo")
     return current_whisper
 
+def load_live_whisper():
+    """
+    Charge le Whisper réduit des sessions en direct (LIVE_WHISPER_MODEL).
+
+    num_workers = LIVE_SESSIONS_PER_WORKER : CTranslate2 décode les sessions du
+    processus en parallèle, chacune avec LIVE_WHISPER_THREADS threads.
+    """
+    global current_live_whisper
+    if current_live_whisper is None:
+        from faster_whisper import WhisperModel
+        sessions = max(1, settings.LIVE_SESSIONS_PER_WORKER)
+        threads = settings.LIVE_WHISPER_THREADS or max(1, settings.cpu_profile().threads // sessions)
+        print(f"   ⏳ Initialisation du chargement de Whisper direct ({settings.LIVE_WHISPER_MODEL}), "
+              f"{sessions} session(s) × {threads} thread(s)...")
+        with model_store.measure_load("whisper_live"):
+            current_live_whisper = WhisperModel(
+                model_store.resolve("whisper_live"),
+                device=settings.DEVICE,
+                compute_type=settings.COMPUTE_TYPE,
+                cpu_threads=threads,
+                num_workers=sessions,
+            )
+        log_vram("✅ Modèle Chargé :", "Whisper direct")
+    return current_live_whisper
+
 def load_pyannote():
-    """Charge Pyannote avec un patch de sécurité compatible PyTorch 2.6."""
+    """Charge Pyannote depuis le store local (checkpoints mappés en mémoire)."""
     global current_pipeline
     if current_pipeline is None:
+        import torch
+        from pyannote.audio import Pipeline
+        config_path = model_store.diarization_config()
         print("   ⏳ Initialisation du chargement de Pyannote (Segmentation)...")
-        
-        # Patch sécurité pour torch.load
-        original_load = torch.load
-        def robust_load(*args, **kwargs):
-            kwargs["weights_only"] = False
-            return original_load(*args, **kwargs)
-        torch.load = robust_load
-        
-        try:
-            current_pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1", 
-                token=HF_TOKEN
-            )
-            current_pipeline.to(torch.device(DEVICE))
-            # On loggue l'état APRÈS l'envoi sur le GPU
-            log_vram("✅ Modèle Chargé :", "Pyannote Diarization")
-        finally:
-            torch.load = original_load 
-            
+
+        # torch.load patché (weights_only=False, mmap) le temps du chargement
+        with model_store.measure_load("pyannote"), model_store.torch_load_mmap():
+            current_pipeline = Pipeline.from_pretrained(config_path)
+            current_pipeline.to(torch.device(settings.DEVICE))
+        if settings.INFERENCE_SERVER_ENABLED:
+            # Pyannote orchestre localement, les forward partent au serveur d'inférence
+            from app.inference.client import attach_pipeline
+            attach_pipeline(current_pipeline)
+        # On loggue l'état APRÈS l'envoi sur le GPU
+        log_vram("✅ Modèle Chargé :", "Pyannote Diarization")
+
     return current_pipeline
 
 def load_embedding_model():
-    """Charge WeSpeaker (Natif Pyannote)."""
+    """Charge WeSpeaker (Natif Pyannote) depuis le store local."""
     global current_embedding
     if current_embedding is None:
+        import torch
+        from pyannote.audio import Model, Inference
+        checkpoint = model_store.embedding_checkpoint()
         print("   ⏳ Initialisation du chargement de WeSpeaker (Identification)...")
-        
-        original_load = torch.load
-        def robust_load(*args, **kwargs):
-            kwargs["weights_only"] = False
-            return original_load(*args, **kwargs)
-        torch.load = robust_load
-        
-        try:
-            model = Model.from_pretrained(
-                "pyannote/wespeaker-voxceleb-resnet34-LM", 
-                token=HF_TOKEN
-            )
+
+        with model_store.measure_load("embedding"), model_store.torch_load_mmap():
+            model = Model.from_pretrained(checkpoint)
             current_embedding = Inference(model, window="whole")
-            current_embedding.to(torch.device(DEVICE))
-            # On loggue l'état APRÈS l'envoi sur le GPU
-            log_vram("✅ Modèle Chargé :", "WeSpeaker (ResNet34)")
-        finally:
-            torch.load = original_load
-            
+            # Identification sur CPU par défaut : elle tourne pendant la transcription GPU
+            current_embedding.to(torch.device(settings.IDENTIFICATION_DEVICE))
+        if settings.INFERENCE_SERVER_ENABLED:
+            from app.inference.client import attach_embedding
+            attach_embedding(current_embedding)
+        elif settings.EMBEDDING_BACKEND == "onnx":
+            # Nœuds CPU : ResNet exécuté par ONNX Runtime (int8), fbank toujours en torch
+            from app.core.embedding_backend import attach_onnx
+            attach_onnx(current_embedding)
+        # On loggue l'état APRÈS l'envoi sur le GPU
+        log_vram("✅ Modèle Chargé :", "WeSpeaker (ResNet34)")
+
     return current_embedding
 
 # ══════════════════════════════════════════════════════════════════════════════
 # NETTOYAGE
 # ══════════════════════════════════════════════════════════════════════════════
 
-def release_models():
-    """Vide la VRAM proprement et loggue ce qui a été libéré."""
+def release_models(force: bool = False, only=None):
+    """
+    Vide la VRAM proprement et loggue ce qui a été libéré.
+
+    Avec KEEP_MODELS_LOADED, les modèles préchargés au démarrage restent en mémoire
+    (seul le cache CUDA est vidé), sauf `force`.
+
+    Args:
+        force: Libère même avec KEEP_MODELS_LOADED
+        only: Modèles à libérer ("whisper", "pyannote", "embedding") ; None = tous.
+              Le DAG ne libère pas un modèle utilisé par une étape encore en cours.
+    """
     global current_whisper, current_pipeline, current_embedding
+
+    # Aucun modèle n'a jamais été chargé dans ce processus : rien à libérer
+    if "torch" not in sys.modules:
+        return
+    import torch
+
+    if settings.KEEP_MODELS_LOADED and not force:
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return
     
     freed_models = []
     
-    if current_whisper is not None:
+    if current_whisper is not None and (only is None or "whisper" in only):
         del current_whisper
         current_whisper = None
         freed_models.append("Whisper Turbo")
     
-    if current_pipeline is not None:
+    if current_pipeline is not None and (only is None or "pyannote" in only):
         del current_pipeline
         current_pipeline = None
         freed_models.append("Pyannote")
     
-    if current_embedding is not None:
+    if current_embedding is not None and (only is None or "embedding" in only):
         del current_embedding
         current_embedding = None
         freed_models.append("WeSpeaker")
@@ -0,0 +1,34 @@
+"""
+Clients Redis (asynchrone et synchrone) partagés par le Worker.
+
+Redis sert déjà de broker Taskiq ; on l'utilise aussi pour l'état
+d'ordonnancement (files virtuelles par tenant, compteurs, métriques).
+"""
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Singleton (un client par processus worker)
+_client = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Retourne le client Redis du processus (créé à la demande)."""
+    global _client
+    if _client is None:
+        _client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+# Client synchrone : pour les vérifications faites depuis du code bloquant
+# (boucles de transcription, hooks entre étapes)
+_sync_client = None
+
+
+def get_sync_redis() -> redis.Redis:
+    """Retourne le client Redis synchrone du processus (créé à la demande)."""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _sync_client
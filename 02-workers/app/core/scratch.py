@@ -0,0 +1,286 @@
+"""
+Espace de travail temporaire (scratch) par job.
+
+Chaque job dispose de son propre répertoire sur une ou deux racines configurables :
+- racine rapide (SCRATCH_FAST_ROOT, ex: tmpfs /dev/shm) pour les petits fichiers,
+- racine volumineuse (SCRATCH_LARGE_ROOT, ex: NVMe) pour les médias et WAV convertis.
+
+L'espace est réservé AVANT d'écrire un fichier (taille annoncée) :
+- quota par job (SCRATCH_JOB_QUOTA_BYTES),
+- quota par nœud et par racine (SCRATCH_NODE_QUOTA_BYTES, borné par l'espace libre réel).
+Les réservations sont stockées sur disque (`.reservation` dans le répertoire du job)
+et modifiées sous verrou fichier : elles sont partagées par tous les processus du nœud.
+
+Un répertoire dont le processus propriétaire n'existe plus (crash, OOM, watchdog)
+est un orphelin : il est supprimé au démarrage du worker.
+
+Structure disque :
+    {racine}/.lock                      verrou des réservations
+    {racine}/job-{meeting_id}/          fichiers du job
+    {racine}/job-{meeting_id}/.reservation   {"pid", "token", "bytes"}
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from app.core.config import settings
+from app.core.redis_client import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_FILE = ".reservation"
+LOCK_FILE = ".lock"
+USAGE_KEY = "sms:scratch:usage"
+
+
+class ScratchQuotaExceeded(Exception):
+    """
+    Levée quand une réservation dépasse un quota.
+
+    `transient` vaut True si seul le quota du nœud est atteint (l'espace se libère
+    quand les autres jobs se terminent), False si le job dépasse son propre quota.
+    """
+
+    def __init__(self, message: str, transient: bool):
+        super().__init__(message)
+        self.transient = transient
+
+
+def scratch_roots() -> List[str]:
+    """Racines distinctes configurées (la racine rapide peut être la même que la volumineuse)."""
+    return list(dict.fromkeys([settings.SCRATCH_FAST_ROOT, settings.SCRATCH_LARGE_ROOT]))
+
+
+def _process_token(pid: int) -> str:
+    """Date de démarrage du processus (/proc) : distingue un PID réutilisé après redémarrage."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ""
+
+
+def _is_alive(pid: int, token: str) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return not token or _process_token(pid) == token
+
+
+@contextmanager
+def _root_lock(root: str):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_reservation(job_dir: str) -> dict:
+    try:
+        with open(os.path.join(job_dir, RESERVATION_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _reserved_on_root(root: str) -> int:
+    """Total réservé par tous les jobs d'une racine (à appeler sous verrou)."""
+    total = 0
+    for entry in os.scandir(root):
+        if entry.is_dir():
+            total += int(_read_reservation(entry.path).get("bytes", 0))
+    return total
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+# =============================================================================
+# ESPACE DE TRAVAIL D'UN JOB
+# =============================================================================
+
+class JobWorkspace:
+    """
+    Répertoires temporaires d'un job, sur chaque racine de scratch.
+
+    Args:
+        meeting_id: ID du meeting (un répertoire par meeting : une reprise ou un
+                    retry retrouve le même emplacement)
+    """
+
+    def __init__(self, meeting_id: str):
+        sweep_orphans_once()
+        self.meeting_id = meeting_id
+        self.name = f"job-{meeting_id}"
+        self._reclaim_stale()
+
+    def _reclaim_stale(self) -> None:
+        """Un retry peut retrouver le répertoire d'une tentative morte : on repart de zéro."""
+        for root in scratch_roots():
+            job_dir = self.job_dir(root)
+            if not os.path.isdir(job_dir):
+                continue
+            reservation = _read_reservation(job_dir)
+            pid = int(reservation.get("pid", 0))
+            if pid and _is_alive(pid, reservation.get("token", "")):
+                continue
+            with _root_lock(root):
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def job_dir(self, root: str) -> str:
+        return os.path.join(root, self.name)
+
+    def path(self, filename: str, size_hint: int = 0) -> str:
+        """
+        Réserve `size_hint` octets et retourne le chemin du fichier dans l'espace du job.
+
+        Les fichiers annoncés sous SCRATCH_FAST_MAX_FILE_BYTES vont sur la racine rapide.
+
+        Raises:
+            ScratchQuotaExceeded: si un quota (job ou nœud) serait dépassé
+        """
+        fast = size_hint <= settings.SCRATCH_FAST_MAX_FILE_BYTES
+        root = settings.SCRATCH_FAST_ROOT if fast else settings.SCRATCH_LARGE_ROOT
+        self.reserve(root, size_hint)
+        return os.path.join(self.job_dir(root), filename)
+
+    def reserve(self, root: str, nbytes: int) -> None:
+        """Ajoute `nbytes` à la réservation du job sur une racine (quotas vérifiés sous verrou)."""
+        job_dir = self.job_dir(root)
+        with _root_lock(root):
+            current = _read_reservation(job_dir)
+            job_total = sum(self._reserved_bytes(r) for r in scratch_roots() if r != root)
+            job_total += int(current.get("bytes", 0)) + nbytes
+
+            if job_total > settings.SCRATCH_JOB_QUOTA_BYTES:
+                raise ScratchQuotaExceeded(
+                    f"Quota scratch du job dépassé ({job_total / 1024**3:.1f} Go > "
+                    f"{settings.SCRATCH_JOB_QUOTA_BYTES / 1024**3:.1f} Go)",
+                    transient=False,
+                )
+
+            node_total = _reserved_on_root(root) + nbytes
+            free = shutil.disk_usage(root).free
+            if node_total > settings.SCRATCH_NODE_QUOTA_BYTES or nbytes > free:
+                raise ScratchQuotaExceeded(
+                    f"Scratch du nœud saturé sur {root} ({node_total / 1024**3:.1f} Go réservés, "
+                    f"{free / 1024**3:.1f} Go libres)",
+                    transient=True,
+                )
+
+            # Répertoire créé seulement une fois la réservation acceptée (sinon il passerait pour un orphelin)
+            os.makedirs(job_dir, exist_ok=True)
+            reservation = {
+                "pid": os.getpid(),
+                "token": _process_token(os.getpid()),
+                "bytes": int(current.get("bytes", 0)) + nbytes,
+            }
+            with open(os.path.join(job_dir, RESERVATION_FILE), "w") as f:
+                json.dump(reservation, f)
+        publish_usage()
+
+    def _reserved_bytes(self, root: str) -> int:
+        return int(_read_reservation(self.job_dir(root)).get("bytes", 0))
+
+    def release(self) -> None:
+        """Supprime les répertoires du job et sa réservation sur toutes les racines."""
+        for root in scratch_roots():
+            job_dir = self.job_dir(root)
+            if not os.path.isdir(job_dir):
+                continue
+            with _root_lock(root):
+                shutil.rmtree(job_dir, ignore_errors=True)
+            logger.info(f"   🧹 [JOB {self.meeting_id}] Scratch libéré : {job_dir}")
+        publish_usage()
+
+
+# =============================================================================
+# ORPHELINS ET MÉTRIQUES
+# =============================================================================
+
+_swept = False
+
+
+def sweep_orphans() -> int:
+    """
+    Supprime les répertoires de jobs dont le processus propriétaire est mort.
+
+    Returns:
+        int: Nombre de répertoires supprimés
+    """
+    removed = 0
+    for root in scratch_roots():
+        with _root_lock(root):
+            for entry in os.scandir(root):
+                if not entry.is_dir():
+                    continue
+                reservation = _read_reservation(entry.path)
+                pid = int(reservation.get("pid", 0))
+                if pid and _is_alive(pid, reservation.get("token", "")):
+                    continue
+                size = _dir_size(entry.path)
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+                logger.info(f"🧹 [Scratch] Orphelin supprimé : {entry.path} ({size / 1024**2:.0f} Mo)")
+    return removed
+
+
+def sweep_orphans_once() -> None:
+    """Nettoyage des orphelins au premier usage du scratch dans le processus."""
+    global _swept
+    if not _swept:
+        _swept = True
+        sweep_orphans()
+
+
+def scratch_usage() -> Dict[str, dict]:
+    """
+    Usage du scratch par racine.
+
+    Returns:
+        dict: {racine: {"reserved_bytes", "used_bytes", "free_bytes", "quota_bytes", "jobs"}}
+    """
+    usage = {}
+    for root in scratch_roots():
+        os.makedirs(root, exist_ok=True)
+        job_dirs = [entry.path for entry in os.scandir(root) if entry.is_dir()]
+        usage[root] = {
+            "reserved_bytes": sum(int(_read_reservation(d).get("bytes", 0)) for d in job_dirs),
+            "used_bytes": sum(_dir_size(d) for d in job_dirs),
+            "free_bytes": shutil.disk_usage(root).free,
+            "quota_bytes": settings.SCRATCH_NODE_QUOTA_BYTES,
+            "jobs": len(job_dirs),
+        }
+    return usage
+
+
+def publish_usage() -> None:
+    """Publie l'usage du scratch de ce nœud dans Redis (lu par l'API d'administration)."""
+    try:
+        get_sync_redis().hset(
+            USAGE_KEY,
+            socket.gethostname(),
+            json.dumps({"roots": scratch_usage(), "updated_at": time.time()}),
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ [Scratch] Usage non publié : {e}")
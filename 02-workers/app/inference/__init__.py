@@ -0,0 +1 @@
+# Inference module - Serveur d'inférence local partagé (batching dynamique)
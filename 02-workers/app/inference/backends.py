@@ -0,0 +1,117 @@
+"""
+Backends du serveur d'inférence.
+
+- ModelBackend : modèles réels (segmentation Pyannote, WeSpeaker, Whisper), chargés
+  depuis le store local sur settings.DEVICE.
+- StubBackend : backend CPU factice (tests, bancs d'essai) ; sorties déterministes et
+  coût simulé « fixe + par élément » pour observer l'effet du batching.
+
+Un backend expose :
+    MODELS                                  modèles servis par `forward`
+    load()                                  chargement (bloquant)
+    forward(model, inputs, weights) -> np   un batch (dimension 0 = éléments)
+    transcribe(path, options)  -> Iterator  segments {"start", "end", "text"}
+"""
+import os
+import time
+import wave
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+SAMPLE_RATE = 16000
+
+
+class ModelBackend:
+    """Modèles réels, chargés une seule fois pour tous les jobs du nœud."""
+
+    MODELS = ("segmentation", "embedding")
+
+    def __init__(self):
+        self.models = {}
+        self.whisper = None
+
+    def load(self) -> None:
+        import torch
+        from pyannote.audio import Model
+        from app.core import model_store
+        from app.core.models import load_whisper
+
+        checkpoints = {
+            "segmentation": os.path.join(model_store.resolve("segmentation"), model_store.TORCH_CHECKPOINT),
+            "embedding": model_store.embedding_checkpoint(),
+        }
+        for name, checkpoint in checkpoints.items():
+            with model_store.measure_load(name), model_store.torch_load_mmap():
+                model = Model.from_pretrained(checkpoint)
+                model.eval()
+                self.models[name] = model.to(torch.device(settings.DEVICE))
+        self.whisper = load_whisper()
+
+    def forward(self, model: str, inputs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        import torch
+
+        device = torch.device(settings.DEVICE)
+        with torch.inference_mode():
+            kwargs = {} if weights is None else {"weights": torch.from_numpy(weights).to(device)}
+            outputs = self.models[model](torch.from_numpy(inputs).to(device), **kwargs)
+        return outputs.cpu().numpy()
+
+    def transcribe(self, path: str, options: dict) -> Iterator[dict]:
+        from app.services.transcription import whisper_segments
+
+        # Générateur : le décodage (et l'extraction des features) a lieu au premier next()
+        for segment in whisper_segments(self.whisper, path, options):
+            yield segment.to_json()
+
+
+class StubBackend:
+    """
+    Backend CPU factice, sans torch ni modèle.
+
+    Args:
+        overhead: Coût fixe d'un batch (secondes)
+        per_item: Coût par élément du batch (secondes)
+        per_window: Coût d'une fenêtre Whisper de 30 s (secondes)
+    """
+
+    MODELS = ("segmentation", "embedding")
+    EMBEDDING_DIM = 256
+    # Sortie de la segmentation Pyannote : 589 trames / 10 s, 7 classes (powerset)
+    SEGMENTATION_FRAMES_PER_SAMPLE = 589 / 160000
+    SEGMENTATION_CLASSES = 7
+
+    def __init__(self, overhead: float = 0.005, per_item: float = 0.0005, per_window: float = 0.01):
+        self.overhead = overhead
+        self.per_item = per_item
+        self.per_window = per_window
+
+    def load(self) -> None:
+        pass
+
+    def forward(self, model: str, inputs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        time.sleep(self.overhead + self.per_item * len(inputs))
+        flat = inputs.reshape(len(inputs), -1)
+        if model == "segmentation":
+            frames = max(1, int(flat.shape[1] * self.SEGMENTATION_FRAMES_PER_SAMPLE))
+            return np.zeros((len(inputs), frames, self.SEGMENTATION_CLASSES), dtype=np.float32)
+        # Embedding déterministe : chaque élément garde sa propre signature
+        return np.repeat(flat.mean(axis=1, keepdims=True), self.EMBEDDING_DIM, axis=1).astype(np.float32)
+
+    def transcribe(self, path: str, options: dict) -> Iterator[dict]:
+        try:
+            with wave.open(path) as wav:
+                duration = wav.getnframes() / wav.getframerate()
+        except (OSError, wave.Error, EOFError):
+            duration = 60.0
+        start = float((options.get("clip_timestamps") or [0.0])[0])
+        while start < duration:
+            time.sleep(self.per_window)
+            end = min(start + 30.0, duration)
+            yield {"start": start, "end": end, "text": f" [stub {start:.0f}-{end:.0f}]"}
+            start = end
+
+
+BACKENDS = {"models": ModelBackend, "stub": StubBackend}
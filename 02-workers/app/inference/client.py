@@ -0,0 +1,115 @@
+"""
+Client du serveur d'inférence local (appelé depuis les threads d'inférence du worker).
+
+Avec INFERENCE_SERVER_ENABLED, le worker garde Pyannote comme orchestrateur
+(découpage, clustering) mais le `forward` de ses modèles est redirigé vers le
+serveur du nœud, qui regroupe les appels de tous les jobs en batches. Whisper n'est
+plus chargé dans le worker : la transcription est lue en flux depuis le serveur.
+"""
+import logging
+import socket
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.inference.protocol import recv_frame, send_frame
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceError(RuntimeError):
+    """Erreur renvoyée par le serveur d'inférence (entrée invalide, modèle en échec)."""
+
+
+def _connect() -> socket.socket:
+    # ConnectionError (serveur absent ou redémarré) : erreur transitoire, le job est retenté
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(settings.INFERENCE_SOCKET)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise ConnectionError(f"Serveur d'inférence injoignable ({settings.INFERENCE_SOCKET}) : {e}") from e
+    return sock
+
+
+def _check(response: dict) -> dict:
+    if "error" in response:
+        raise InferenceError(response["error"])
+    return response
+
+
+def _call(message: dict) -> dict:
+    sock = _connect()
+    try:
+        send_frame(sock, message)
+        return _check(recv_frame(sock))
+    finally:
+        sock.close()
+
+
+def forward(model: str, inputs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Exécute le forward d'un modèle du serveur (dimension 0 = batch)."""
+    return _call({"op": "forward", "model": model, "inputs": inputs, "weights": weights})["outputs"]
+
+
+def transcribe(path: str, options: dict) -> Iterator[dict]:
+    """
+    Transcription Whisper en flux (le fichier doit être lisible par le serveur).
+
+    Fermer le générateur (annulation, préemption) ferme la connexion : le serveur
+    arrête le décodage.
+    """
+    sock = _connect()
+    try:
+        send_frame(sock, {"op": "transcribe", "path": path, "options": options})
+        while True:
+            response = _check(recv_frame(sock))
+            if response.get("done"):
+                return
+            yield response["segment"]
+    finally:
+        sock.close()
+
+
+def stats() -> dict:
+    return _call({"op": "stats"})
+
+
+def ping() -> None:
+    _call({"op": "ping"})
+
+
+# =============================================================================
+# REDIRECTION DES MODÈLES PYANNOTE
+# =============================================================================
+
+def remote_forward(model: str):
+    """`forward` de remplacement pour un nn.Module : le calcul a lieu sur le serveur."""
+    import torch
+
+    def _forward(inputs, weights=None):
+        outputs = forward(
+            model,
+            inputs.detach().cpu().numpy(),
+            None if weights is None else weights.detach().cpu().numpy(),
+        )
+        return torch.from_numpy(outputs).to(inputs.device)
+
+    return _forward
+
+
+def attach_pipeline(pipeline) -> None:
+    """Redirige la segmentation et les embeddings du pipeline de diarisation."""
+    segmentation = getattr(getattr(pipeline, "_segmentation", None), "model", None)
+    embedding = getattr(getattr(pipeline, "_embedding", None), "model_", None)
+    if segmentation is None or embedding is None:
+        logger.warning("⚠️ [Inference] Pipeline Pyannote non reconnu : inférence locale")
+        return
+    segmentation.forward = remote_forward("segmentation")
+    embedding.forward = remote_forward("embedding")
+
+
+def attach_embedding(inference) -> None:
+    """Redirige le modèle WeSpeaker (Inference Pyannote) utilisé pour l'identification."""
+    inference.model.forward = remote_forward("embedding")
@@ -0,0 +1,54 @@
+"""
+Protocole IPC du serveur d'inférence local (socket Unix).
+
+Une connexion par requête. Trame = longueur (4 octets, big-endian) + message pickle
+(dict contenant des tableaux numpy). Le socket n'est ouvert qu'aux processus du nœud :
+pickle n'y circule qu'entre processus de confiance.
+
+Requêtes :
+    {"op": "forward", "model": "segmentation"|"embedding", "inputs": ndarray, "weights": ndarray|None}
+        -> {"outputs": ndarray}
+    {"op": "transcribe", "path": str, "options": dict}
+        -> {"segment": {"start", "end", "text"}} ... puis {"done": True}
+    {"op": "stats"} -> métriques du serveur
+    {"op": "ping"}  -> {"ok": True}
+Toute erreur côté serveur : {"error": str}
+"""
+import asyncio
+import pickle
+import struct
+
+HEADER = struct.Struct(">I")
+
+
+def send_frame(sock, message: dict) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(HEADER.pack(len(data)))
+    sock.sendall(data)
+
+
+def recv_frame(sock) -> dict:
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return pickle.loads(_recv_exact(sock, size))
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(min(size - len(buffer), 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connexion fermée par le serveur d'inférence")
+        buffer += chunk
+    return bytes(buffer)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return pickle.loads(await reader.readexactly(size))
+
+
+async def write_frame(writer: asyncio.StreamWriter, message: dict) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(HEADER.pack(len(data)))
+    writer.write(data)
+    await writer.drain()
@@ -0,0 +1,347 @@
+"""
+Serveur d'inférence local partagé par les workers d'un nœud.
+
+Un seul processus possède la segmentation Pyannote, WeSpeaker et Whisper. Les
+workers lui envoient leurs appels de modèle par socket Unix (app/inference/client.py) :
+- forward (segmentation, embedding) : les requêtes de jobs différents sont regroupées
+  en un batch par modèle et par forme d'entrée, dans une fenêtre d'attente bornée
+  (INFERENCE_BATCH_MAX_WAIT_MS) et jusqu'à INFERENCE_BATCH_MAX_ITEMS éléments ;
+- transcribe (Whisper) : segments renvoyés au fil de l'eau ; les fenêtres de décodage
+  des différents jobs s'intercalent avec les batches des autres modèles.
+Toute l'inférence passe par un thread unique : un seul modèle actif à la fois.
+
+Métriques (op "stats", publiées dans Redis toutes les INFERENCE_STATS_INTERVAL s) :
+distribution des tailles de batch, délai d'attente en file, débit.
+
+Structure Redis :
+    sms:inference:stats   HASH  hôte -> métriques JSON
+
+Usage :
+    python -m app.inference.server [--backend stub] [--socket /run/sms/inference.sock]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.inference.backends import BACKENDS
+from app.inference.protocol import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "sms:inference:stats"
+
+
+def _percentile(values, q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+# =============================================================================
+# MÉTRIQUES
+# =============================================================================
+
+class BatchStats:
+    """Tailles de batch, délais d'attente en file et débit d'un modèle."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.compute_seconds = 0.0
+        self.batch_sizes = Counter()
+        self.queue_delays = deque(maxlen=2000)
+
+    def record(self, size: int, delays: list, compute_seconds: float) -> None:
+        self.requests += len(delays)
+        self.items += size
+        self.batches += 1
+        self.compute_seconds += compute_seconds
+        self.batch_sizes[size] += 1
+        self.queue_delays.extend(delays)
+
+    def to_json(self) -> dict:
+        uptime = max(time.monotonic() - self.started, 1e-9)
+        delays = list(self.queue_delays)
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "batches": self.batches,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "queue_delay_ms": {
+                "p50": _percentile(delays, 50),
+                "p95": _percentile(delays, 95),
+                "max": round(max(delays) * 1000, 2) if delays else 0.0,
+            },
+            "items_per_second": round(self.items / uptime, 2),
+            "busy_ratio": round(self.compute_seconds / uptime, 3),
+        }
+
+
+class TranscriptionStats:
+    """Flux Whisper : flux actifs, segments produits, débit en secondes d'audio."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.active = 0
+        self.streams = 0
+        self.segments = 0
+        self.audio_seconds = 0.0
+
+    def to_json(self) -> dict:
+        uptime = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "active": self.active,
+            "streams": self.streams,
+            "segments": self.segments,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "audio_seconds_per_second": round(self.audio_seconds / uptime, 2),
+        }
+
+
+# =============================================================================
+# BATCHING DYNAMIQUE
+# =============================================================================
+
+@dataclass
+class _Pending:
+    inputs: np.ndarray
+    weights: Optional[np.ndarray]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return len(self.inputs)
+
+    @property
+    def key(self) -> tuple:
+        """Requêtes concaténables : même forme hors dimension de batch."""
+        weights_shape = None if self.weights is None else self.weights.shape[1:]
+        return self.inputs.shape[1:], str(self.inputs.dtype), weights_shape
+
+
+class DynamicBatcher:
+    """
+    Regroupe les requêtes d'un modèle en batches.
+
+    Le batch part dès qu'il atteint `max_items` éléments, ou quand la requête la plus
+    ancienne a attendu `max_wait` secondes. Une requête plus grande que `max_items`
+    part seule.
+    """
+
+    def __init__(self, name: str, run_batch, executor: ThreadPoolExecutor, max_items: int, max_wait: float):
+        self.name = name
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.stats = BatchStats()
+
+    async def submit(self, inputs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_Pending(inputs, weights, future))
+        return await future
+
+    async def run(self) -> None:
+        pending = []
+        while True:
+            if not pending:
+                pending.append(await self.queue.get())
+            key = pending[0].key
+            deadline = pending[0].enqueued_at + self.max_wait
+
+            while sum(p.size for p in pending if p.key == key) < self.max_items:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+
+            batch, rest, size = [], [], 0
+            for item in pending:
+                if item.key == key and (not batch or size + item.size <= self.max_items):
+                    batch.append(item)
+                    size += item.size
+                else:
+                    rest.append(item)
+            pending = rest
+            await self._execute(batch)
+
+    async def _execute(self, batch: list) -> None:
+        # Clients partis (connexion fermée) : inutile de calculer leur part
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        inputs = np.concatenate([item.inputs for item in batch])
+        weights = None if batch[0].weights is None else np.concatenate([item.weights for item in batch])
+        try:
+            outputs = await loop.run_in_executor(self.executor, self.run_batch, inputs, weights)
+        except Exception as e:
+            logger.error(f"❌ [Inference] Batch {self.name} ({len(inputs)} éléments) en échec : {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.stats.record(len(inputs), [started - item.enqueued_at for item in batch], time.monotonic() - started)
+        offset = 0
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(outputs[offset:offset + item.size])
+            offset += item.size
+
+
+# =============================================================================
+# SERVEUR
+# =============================================================================
+
+class InferenceServer:
+    """
+    Args:
+        backend: Backend chargé (ModelBackend ou StubBackend)
+        socket_path: Chemin du socket Unix
+        publish: Publie les métriques dans Redis
+    """
+
+    def __init__(self, backend, socket_path: str, publish: bool = True):
+        self.backend = backend
+        self.socket_path = socket_path
+        self.publish = publish
+        # Un seul thread : un modèle actif à la fois (VRAM), batches et décodages intercalés
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sms-inference-server")
+        self.batchers = {
+            name: DynamicBatcher(
+                name,
+                lambda inputs, weights, model=name: backend.forward(model, inputs, weights),
+                self.executor,
+                settings.INFERENCE_BATCH_MAX_ITEMS,
+                settings.INFERENCE_BATCH_MAX_WAIT_MS / 1000,
+            )
+            for name in backend.MODELS
+        }
+        self.transcription = TranscriptionStats()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "models": {name: batcher.stats.to_json() for name, batcher in self.batchers.items()},
+            "transcription": self.transcription.to_json(),
+            "updated_at": time.time(),
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_frame(reader)
+            op = request.get("op")
+            if op == "forward":
+                batcher = self.batchers.get(request.get("model"))
+                if batcher is None:
+                    raise ValueError(f"Modèle inconnu : {request.get('model')}")
+                outputs = await batcher.submit(request["inputs"], request.get("weights"))
+                await write_frame(writer, {"outputs": outputs})
+            elif op == "transcribe":
+                await self._transcribe(request, writer)
+            elif op == "stats":
+                await write_frame(writer, self.stats())
+            elif op == "ping":
+                await write_frame(writer, {"ok": True})
+            else:
+                raise ValueError(f"Opération inconnue : {op}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client parti (job annulé, worker arrêté)
+        except Exception as e:
+            logger.warning(f"⚠️ [Inference] Requête en échec : {e}")
+            try:
+                await write_frame(writer, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _transcribe(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        segments = self.backend.transcribe(request["path"], request.get("options", {}))
+        self.transcription.active += 1
+        self.transcription.streams += 1
+        try:
+            while True:
+                # Une fenêtre de décodage par passage : les autres jobs s'intercalent
+                segment = await loop.run_in_executor(self.executor, next, segments, None)
+                if segment is None:
+                    break
+                self.transcription.segments += 1
+                self.transcription.audio_seconds += segment["end"] - segment["start"]
+                await write_frame(writer, {"segment": segment})
+            await write_frame(writer, {"done": True})
+        finally:
+            self.transcription.active -= 1
+            await loop.run_in_executor(self.executor, segments.close)
+
+    async def _publish_stats(self) -> None:
+        from app.core.redis_client import get_redis
+
+        while True:
+            await asyncio.sleep(settings.INFERENCE_STATS_INTERVAL)
+            try:
+                await get_redis().hset(STATS_KEY, socket.gethostname(), json.dumps(self.stats()))
+            except Exception as e:
+                logger.warning(f"⚠️ [Inference] Métriques non publiées : {e}")
+
+    async def serve(self, ready: Optional[asyncio.Event] = None) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        await loop.run_in_executor(self.executor, self.backend.load)
+        logger.info(f"🔥 [Inference] Backend {type(self.backend).__name__} prêt en {time.monotonic() - started:.1f}s")
+
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+
+        tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+        if self.publish:
+            tasks.append(asyncio.create_task(self._publish_stats()))
+        logger.info(f"✅ [Inference] En écoute sur {self.socket_path}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serveur d'inférence local partagé")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=settings.INFERENCE_BACKEND)
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    server = InferenceServer(BACKENDS[args.backend](), args.socket)
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
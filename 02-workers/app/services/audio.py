@@ -1,14 +1,140 @@
-import subprocess
+import asyncio
+import json
 import os
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
 
-def convert_to_wav(input_path: str) -> str:
+# Intervalle (secondes) entre deux appels au callback de surveillance pendant FFmpeg
+FFMPEG_POLL_SECONDS = 1.0
+
+# Octets par seconde du WAV produit (PCM 16 bits, mono, 16 kHz)
+WAV_BYTES_PER_SECOND = 32000
+
+# Délai max d'ffprobe (lecture des en-têtes, plus du fichier entier si la durée est absente)
+FFPROBE_TIMEOUT_SECONDS = 60.0
+
+
+class UnusableMediaError(ValueError):
+    """Fichier sans piste audio exploitable (vidéo muette, durée nulle, format illisible)."""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Caractéristiques d'un fichier source lues par ffprobe."""
+    container: str
+    codec: str
+    sample_rate: int
+    channels: int
+    duration_seconds: float
+    stream_index: int
+
+    @property
+    def analysis_ready(self) -> bool:
+        """Déjà au format d'analyse (WAV PCM 16 bits, 16 kHz, mono) : pas de conversion."""
+        return (
+            self.container == "wav"
+            and self.codec == "pcm_s16le"
+            and self.sample_rate == 16000
+            and self.channels == 1
+        )
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "MediaInfo":
+        return cls(**data)
+
+
+async def probe_media(input_path: str) -> MediaInfo:
+    """
+    Inspecte un fichier avec ffprobe (conteneur, codec, fréquence, canaux, durée).
+
+    Appelé avant la conversion : un fichier inutilisable échoue en quelques
+    millisecondes au lieu d'échouer après le chargement des modèles.
+
+    Raises:
+        UnusableMediaError: format illisible, aucune piste audio ou durée nulle
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-show_format", "-show_streams",
+        input_path,
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), FFPROBE_TIMEOUT_SECONDS)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    if process.returncode != 0:
+        error_msg = stderr.decode().strip() if stderr else "format inconnu"
+        raise UnusableMediaError(f"Fichier illisible : {error_msg}")
+
+    probe = json.loads(stdout or b"{}")
+    fmt = probe.get("format", {})
+    audio_streams = [s for s in probe.get("streams", []) if s.get("codec_type") == "audio"]
+    if not audio_streams:
+        raise UnusableMediaError("Aucune piste audio dans le fichier")
+    # Première piste audio (celle que FFmpeg retiendrait), sauf si une autre est marquée par défaut
+    stream = next(
+        (s for s in audio_streams if s.get("disposition", {}).get("default")),
+        audio_streams[0],
+    )
+
+    # Durée : celle de la piste, sinon celle du conteneur
+    duration = float(stream.get("duration") or fmt.get("duration") or 0.0)
+    if duration <= 0:
+        raise UnusableMediaError("Durée audio nulle")
+
+    return MediaInfo(
+        # "mov,mp4,m4a,3gp,3g2,mj2" : on garde le premier nom
+        container=(fmt.get("format_name") or "").split(",")[0],
+        codec=stream.get("codec_name") or "",
+        sample_rate=int(stream.get("sample_rate") or 0),
+        channels=int(stream.get("channels") or 0),
+        duration_seconds=duration,
+        stream_index=int(stream.get("index", 0)),
+    )
+
+async def convert_to_wav(
+    input_path: str,
+    on_poll: Optional[Callable[[], None]] = None,
+    output_path: Optional[str] = None,
+    media: Optional[MediaInfo] = None,
+    channels_output_path: Optional[str] = None,
+) -> str:
     """
     Convertit l'entrée en WAV 16kHz Mono via FFmpeg.
     Nécessaire pour la précision de Whisper et Pyannote.
+
+    FFmpeg tourne dans un sous-processus asyncio : la boucle du worker reste libre
+    (jetons, webhooks, autres jobs) pendant la conversion.
+
+    Args:
+        input_path: Fichier source
+        on_poll: Appelé périodiquement pendant la conversion. S'il lève une exception
+                 (ex: job annulé), le processus FFmpeg est tué et l'exception propagée.
+        output_path: Fichier WAV produit (par défaut à côté de l'entrée)
+        media: Résultat de probe_media. Entrée déjà au format d'analyse : retournée
+               telle quelle, sans passer par FFmpeg. Sinon seule sa piste audio est décodée.
+        channels_output_path: Produit aussi (même décodage) un WAV 16 kHz qui garde
+               les canaux séparés (enregistrement multipiste, un locuteur par canal)
     """
-    output_path = f"{input_path}_converted.wav"
+    if media is not None and media.analysis_ready and channels_output_path is None:
+        return input_path
+
+    output_path = output_path or f"{input_path}_converted.wav"
+    # Piste audio retenue par le probe (sinon choix par défaut de FFmpeg)
+    stream_map = ["-map", f"0:{media.stream_index}"] if media is not None else []
     command = [
-        "ffmpeg", "-i", input_path, 
+        "ffmpeg", "-i", input_path, *stream_map,
         "-vn",               # Pas de flux vidéo
         "-acodec", "pcm_s16le", 
         "-ar", "16000",      # Fréquence d'échantillonnage 16kHz
@@ -16,13 +142,130 @@ def convert_to_wav(input_path: str) -> str:
         "-y",                # Écrase si existe déjà
         output_path
     ]
+    if channels_output_path:
+        # Options par fichier de sortie : même piste, canaux conservés
+        command += [*stream_map, "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-y", channels_output_path]
+    # On capture stderr pour avoir le détail en cas d'erreur FFmpeg
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    communicate = asyncio.ensure_future(process.communicate())
     try:
-        # On capture stderr pour avoir le détail en cas d'erreur FFmpeg
-        subprocess.run(command, check=True, capture_output=True)
-        return output_path
-    except subprocess.CalledProcessError as e:
-        error_msg = e.stderr.decode() if e.stderr else "Erreur FFmpeg inconnue"
+        while True:
+            done, _ = await asyncio.wait({communicate}, timeout=FFMPEG_POLL_SECONDS)
+            if done:
+                _, stderr = communicate.result()
+                break
+            if on_poll is not None:
+                on_poll()
+    except BaseException:
+        # Le job s'arrête (annulation, timeout, tâche annulée) : on ne laisse pas FFmpeg en orphelin
+        if process.returncode is None:
+            process.kill()
+        await asyncio.shield(communicate)
+        cleanup_files(output_path, channels_output_path)
+        raise
+
+    if process.returncode != 0:
+        error_msg = stderr.decode() if stderr else "Erreur FFmpeg inconnue"
         raise RuntimeError(f"Erreur Conversion Audio : {error_msg}")
+    return output_path
+
+# =============================================================================
+# FLUX EN DIRECT (sessions WebSocket, app/services/live.py)
+# =============================================================================
+
+# Encodages acceptés par les sessions en direct
+STREAM_ENCODINGS = ("pcm", "opus")
+# Octets lus par FFmpeg avant de décoder un flux : l'en-tête Ogg / WebM suffit,
+# les valeurs par défaut (5 Mo, 5 s d'analyse) retarderaient les premiers sous-titres
+STREAM_PROBE_BYTES = 4096
+
+
+class PcmStream:
+    """Flux PCM 16 bits little-endian, mono 16 kHz : aucun décodage, blocs réalignés sur l'échantillon."""
+
+    def __init__(self):
+        self._pending = b""
+
+    async def start(self) -> None:
+        pass
+
+    async def feed(self, data: bytes) -> bytes:
+        data = self._pending + data
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        return data[:usable]
+
+    async def close(self) -> bytes:
+        self._pending = b""
+        return b""
+
+    def kill(self) -> None:
+        pass
+
+
+class FfmpegStream:
+    """
+    Flux compressé (Opus en Ogg ou WebM, ex: MediaRecorder du navigateur) décodé par un
+    FFmpeg qui vit le temps de la session : les blocs reçus sont écrits sur son entrée,
+    le PCM 16 kHz mono est lu sur sa sortie au fur et à mesure.
+    """
+
+    def __init__(self):
+        self.process = None
+        self._output = bytearray()
+        self._reader = None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error",
+            "-fflags", "nobuffer", "-probesize", str(STREAM_PROBE_BYTES), "-analyzeduration", "0",
+            "-i", "pipe:0",
+            "-vn", "-f", "s16le", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
+            "-flush_packets", "1", "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        # Sortie lue en continu : FFmpeg ne bloque jamais sur un tube plein
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            chunk = await self.process.stdout.read(65536)
+            if not chunk:
+                return
+            self._output += chunk
+
+    def _take(self) -> bytes:
+        usable = len(self._output) - len(self._output) % 2
+        data = bytes(self._output[:usable])
+        del self._output[:usable]
+        return data
+
+    async def feed(self, data: bytes) -> bytes:
+        """Écrit un bloc compressé ; retourne le PCM décodé depuis le dernier appel."""
+        self.process.stdin.write(data)
+        await self.process.stdin.drain()
+        return self._take()
+
+    async def close(self) -> bytes:
+        """Fin du flux : FFmpeg vide ses tampons puis s'arrête."""
+        self.process.stdin.close()
+        await self._reader
+        await self.process.wait()
+        return self._take()
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+
+
+def stream_decoder(encoding: str):
+    """Décodeur d'un flux en direct vers du PCM 16 bits mono 16 kHz."""
+    if encoding not in STREAM_ENCODINGS:
+        raise UnusableMediaError(f"Encodage de flux inconnu : {encoding} (attendu : {', '.join(STREAM_ENCODINGS)})")
+    return PcmStream() if encoding == "pcm" else FfmpegStream()
+
 
 def cleanup_files(*files):
     """Supprime les fichiers temporaires après usage."""
@@ -31,4 +274,4 @@ def cleanup_files(*files):
             try:
                 os.remove(f)
             except OSError:
-                pass
\ No newline at end of file
+                pass
@@ -0,0 +1,63 @@
+"""
+Annulation des jobs.
+
+L'API marque un meeting comme annulé dans Redis (suppression du meeting ou
+annulation explicite). Le Worker :
+- saute les jobs annulés au moment du dequeue,
+- vérifie l'annulation entre les étapes et pendant les boucles longues
+  (conversion FFmpeg, transcription) puis libère le slot.
+
+Structure Redis (partagée avec l'API) :
+    sms:cancel:{meeting_id}   STRING  marqueur d'annulation (avec TTL)
+    sms:cancel:metrics        HASH    compteurs + secondes de calcul récupérées
+"""
+import logging
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "sms:cancel:metrics"
+
+
+def cancel_key(meeting_id: str) -> str:
+    return f"sms:cancel:{meeting_id}"
+
+
+def is_cancelled(meeting_id: str) -> bool:
+    """Vérification synchrone (utilisable depuis du code bloquant)."""
+    return bool(get_sync_redis().exists(cancel_key(meeting_id)))
+
+
+async def is_cancelled_async(meeting_id: str) -> bool:
+    return bool(await get_redis().exists(cancel_key(meeting_id)))
+
+
+def estimate_processing_seconds(job: dict) -> float:
+    """Temps de calcul estimé d'un job complet (durée audio × facteur temps réel)."""
+    return float(job.get("cost", 0.0)) * settings.ESTIMATED_REALTIME_FACTOR
+
+
+async def record_cancellation(job: dict, running: bool, elapsed: float = 0.0) -> float:
+    """
+    Comptabilise le temps de calcul évité par une annulation.
+
+    Args:
+        job: Payload du job annulé
+        running: True si le job était en cours (sinon il était encore en file)
+        elapsed: Secondes déjà consommées par le job en cours
+
+    Returns:
+        float: Secondes de calcul récupérées (estimation)
+    """
+    reclaimed = max(0.0, estimate_processing_seconds(job) - elapsed)
+    redis = get_redis()
+    await redis.hincrby(METRICS_KEY, "cancelled_running" if running else "cancelled_queued", 1)
+    await redis.hincrbyfloat(METRICS_KEY, "reclaimed_seconds", reclaimed)
+    await redis.hincrbyfloat(METRICS_KEY, "wasted_seconds", elapsed)
+    logger.info(
+        f"🛑 [JOB {job['meeting_id']}] Annulé ({'en cours' if running else 'en file'}) : "
+        f"~{reclaimed:.0f}s de calcul récupérées"
+    )
+    return reclaimed
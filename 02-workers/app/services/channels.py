@@ -0,0 +1,110 @@
+"""
+Tours de parole déduits des canaux d'un enregistrement multipiste.
+
+Quand chaque micro est enregistré sur son propre canal (un locuteur par canal),
+"qui parle quand" se lit directement dans l'énergie de chaque canal : pas de
+diarisation Pyannote. Un canal est actif sur une trame de CHANNEL_FRAME_SECONDS si :
+
+- son énergie dépasse son bruit de fond (10e percentile) de CHANNEL_VAD_THRESHOLD_DB,
+- et elle est à moins de CHANNEL_CROSSTALK_DB du canal le plus fort de la trame :
+  la voix d'un participant captée par le micro du voisin (diaphonie) est écartée,
+  deux participants qui parlent en même temps restent actifs tous les deux.
+
+Les silences plus courts que CHANNEL_MIN_GAP_SECONDS sont comblés, puis les tours
+plus courts que CHANNEL_MIN_TURN_SECONDS supprimés (bruits, toux).
+"""
+import wave
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.diarization import SpeakerTimeline, Turn
+
+# Trames lues par bloc (≈ 1 min à 30 ms) : mémoire bornée quelle que soit la durée
+FRAMES_PER_BLOCK = 2000
+
+
+def channel_label(index: int, speakers: List[Optional[str]]) -> str:
+    """Nom du locuteur d'un canal, ou label anonyme (identifié ensuite par la banque de voix)."""
+    name = speakers[index] if index < len(speakers) else None
+    return name or f"SPEAKER_{index:02d}"
+
+
+def _frame_energies(path: str, on_block: Optional[Callable[[], None]] = None):
+    """Énergie (dB) de chaque trame de chaque canal : tableau (trames, canaux)."""
+    with wave.open(path, "rb") as wav:
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path} : PCM 16 bits attendu")
+        frame = max(1, int(rate * settings.CHANNEL_FRAME_SECONDS))
+        blocks = []
+        while True:
+            raw = wav.readframes(frame * FRAMES_PER_BLOCK)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype=np.int16).reshape(-1, channels)
+            count = len(samples) // frame
+            if count == 0:
+                break
+            frames = samples[: count * frame].astype(np.float32).reshape(count, frame, channels)
+            rms = np.sqrt(np.mean(frames ** 2, axis=1))
+            blocks.append(20 * np.log10(rms + 1e-6))
+            if on_block is not None:
+                on_block()
+    if not blocks:
+        return np.zeros((0, channels), dtype=np.float32)
+    return np.concatenate(blocks)
+
+
+def _segments(active: np.ndarray, frame_seconds: float) -> List[tuple]:
+    """Tours (début, fin) d'un canal à partir de son masque d'activité par trame."""
+    padded = np.concatenate([[False], active, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    turns = []
+    for start, end in zip(edges[::2] * frame_seconds, edges[1::2] * frame_seconds):
+        if turns and start - turns[-1][1] < settings.CHANNEL_MIN_GAP_SECONDS:
+            turns[-1] = (turns[-1][0], end)
+        else:
+            turns.append((start, end))
+    return [(start, end) for start, end in turns if end - start >= settings.CHANNEL_MIN_TURN_SECONDS]
+
+
+def channel_turns(
+    path: str,
+    speakers: List[Optional[str]],
+    on_block: Optional[Callable[[], None]] = None,
+) -> SpeakerTimeline:
+    """
+    Timeline des locuteurs d'un WAV multicanal (PCM 16 bits).
+
+    Args:
+        path: WAV multicanal
+        speakers: Nom du locuteur de chaque canal (None = anonyme) ; les canaux
+                  au-delà de la liste (micro d'ambiance...) sont ignorés
+        on_block: Appelé après chaque bloc lu (point de contrôle d'annulation)
+
+    Returns:
+        SpeakerTimeline: Tours triés par début, au format de la diarisation
+    """
+    energies = _frame_energies(path, on_block)
+    used = min(len(speakers), energies.shape[1])
+    energies = energies[:, :used]
+    if len(energies) == 0:
+        return SpeakerTimeline()
+
+    floor = np.percentile(energies, 10, axis=0)
+    loudest = energies.max(axis=1, keepdims=True)
+    active = (energies > floor + settings.CHANNEL_VAD_THRESHOLD_DB) & (
+        energies >= loudest - settings.CHANNEL_CROSSTALK_DB
+    )
+
+    turns = []
+    for index in range(used):
+        label = channel_label(index, speakers)
+        turns.extend(
+            (Turn(round(float(start), 3), round(float(end), 3)), label)
+            for start, end in _segments(active[:, index], settings.CHANNEL_FRAME_SECONDS)
+        )
+    turns.sort(key=lambda item: item[0].start)
+    return SpeakerTimeline(turns)
@@ -0,0 +1,68 @@
+"""
+Points de reprise des jobs (préemption).
+
+Quand un job cède sa place, son état partiel (étapes terminées, timeline de
+diarisation, mapping des locuteurs, segments déjà transcrits) et le WAV converti
+sont sauvegardés sur MinIO. Le job repris repart de là sans refaire le travail fini.
+
+Structure S3 :
+    s3://processed/_checkpoints/{meeting_id}/state.json
+    s3://processed/_checkpoints/{meeting_id}/audio.wav
+"""
+import json
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.services.storage import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+
+def _checkpoint_key(meeting_id: str, filename: str) -> str:
+    return f"{settings.CHECKPOINT_PREFIX}/{meeting_id}/{filename}"
+
+
+def load_checkpoint(meeting_id: str) -> Optional[dict]:
+    """Charge l'état sauvegardé d'un job, ou None s'il n'y en a pas."""
+    s3 = get_s3_client()
+    try:
+        response = s3.get_object(
+            Bucket=settings.MINIO_BUCKET_RESULTS,
+            Key=_checkpoint_key(meeting_id, "state.json")
+        )
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(response["Body"].read().decode("utf-8"))
+
+
+def save_checkpoint(meeting_id: str, state: dict) -> None:
+    """Sauvegarde l'état d'un job (écrase le précédent)."""
+    s3 = get_s3_client()
+    s3.put_object(
+        Bucket=settings.MINIO_BUCKET_RESULTS,
+        Key=_checkpoint_key(meeting_id, "state.json"),
+        Body=json.dumps(state, ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json"
+    )
+    logger.info(f"   📌 [JOB {meeting_id}] Point de reprise sauvegardé (étapes : {state.get('completed')})")
+
+
+def save_checkpoint_audio(meeting_id: str, local_wav: str) -> str:
+    """Sauvegarde le WAV converti pour éviter de refaire téléchargement + conversion."""
+    key = _checkpoint_key(meeting_id, "audio.wav")
+    get_s3_client().upload_file(local_wav, settings.MINIO_BUCKET_RESULTS, key)
+    return f"s3://{settings.MINIO_BUCKET_RESULTS}/{key}"
+
+
+def delete_checkpoint(meeting_id: str) -> None:
+    """Supprime le point de reprise une fois le job terminé."""
+    s3 = get_s3_client()
+    for filename in ("state.json", "audio.wav"):
+        try:
+            s3.delete_object(
+                Bucket=settings.MINIO_BUCKET_RESULTS,
+                Key=_checkpoint_key(meeting_id, filename)
+            )
+        except Exception as e:
+            logger.warning(f"   ⚠️ [JOB {meeting_id}] Suppression checkpoint {filename} impossible: {e}")
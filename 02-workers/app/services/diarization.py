@@ -1,5 +1,61 @@
+from dataclasses import dataclass
+
 from app.core.models import load_pyannote  # On importe la fonction, pas le modèle
 
+
+@dataclass
+class Turn:
+    """Tour de parole (même interface que pyannote.core.Segment : start, end, duration)."""
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class SpeakerTimeline:
+    """
+    Timeline "qui parle quand" sérialisable en JSON.
+
+    Expose `itertracks(yield_label=True)` comme une Annotation Pyannote : la fusion,
+    l'identification et le stockage l'utilisent sans dépendre de Pyannote, ce qui
+    permet de la sauvegarder dans un point de reprise et de la reconstruire.
+    """
+
+    def __init__(self, turns=None):
+        # Liste de tuples (Turn, speaker)
+        self.turns = list(turns or [])
+
+    def itertracks(self, yield_label: bool = False):
+        for track, (turn, speaker) in enumerate(self.turns):
+            if yield_label:
+                yield turn, track, speaker
+            else:
+                yield turn, track
+
+    def labels(self) -> list:
+        """Labels des locuteurs, dans l'ordre de première apparition."""
+        return list(dict.fromkeys(speaker for _, speaker in self.turns))
+
+    def to_json(self) -> list:
+        return [
+            {"start": turn.start, "end": turn.end, "speaker": speaker}
+            for turn, speaker in self.turns
+        ]
+
+    @classmethod
+    def from_json(cls, data: list) -> "SpeakerTimeline":
+        return cls((Turn(item["start"], item["end"]), item["speaker"]) for item in data)
+
+    @classmethod
+    def from_annotation(cls, annotation) -> "SpeakerTimeline":
+        return cls(
+            (Turn(float(turn.start), float(turn.end)), speaker)
+            for turn, _, speaker in annotation.itertracks(yield_label=True)
+        )
+
+
 def get_diarization_object(diarization_result):
     """Extrait l'objet annotation propre depuis le wrapper Pyannote."""
     if hasattr(diarization_result, 'speaker_diarization'):
@@ -8,10 +64,25 @@ def get_diarization_object(diarization_result):
         return diarization_result.annotation
     return diarization_result
 
-def run_diarization(wav_path):
-    """Lance le pipeline sur un fichier audio (charge Pyannote à la demande)."""
+def run_diarization(wav_path, min_speakers: int = None, max_speakers: int = None) -> SpeakerTimeline:
+    """
+    Lance le pipeline sur un fichier audio (charge Pyannote à la demande).
+
+    Args:
+        wav_path: WAV 16 kHz mono
+        min_speakers / max_speakers: Bornes du clustering (locuteurs attendus du meeting) ;
+            sans borne, le clustering explore tous les nombres de locuteurs et peut sur-découper
+    """
     # CHARGEMENT À LA DEMANDE
     pipeline = load_pyannote()
-    
-    raw_result = pipeline(wav_path)
-    return get_diarization_object(raw_result)
+
+    bounds = {}
+    if min_speakers and min_speakers == max_speakers:
+        bounds["num_speakers"] = min_speakers
+    else:
+        if min_speakers:
+            bounds["min_speakers"] = min_speakers
+        if max_speakers:
+            bounds["max_speakers"] = max_speakers
+    raw_result = pipeline(wav_path, **bounds)
+    return SpeakerTimeline.from_annotation(get_diarization_object(raw_result))
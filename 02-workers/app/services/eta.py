@@ -0,0 +1,82 @@
+"""
+Statistiques de durée par étape, utilisées par l'API pour estimer l'ETA des uploads.
+
+Pour chaque étape terminée, le Worker publie son facteur temps réel (RTF =
+secondes de calcul / seconde d'audio), lissé par moyenne mobile exponentielle.
+
+Le graphe des étapes (entrées de chaque étape) est publié au démarrage : les étapes
+concurrentes ne s'additionnent pas, l'API somme les RTF le long du chemin critique.
+
+Structure Redis (partagée avec l'API) :
+    sms:eta:rtf       HASH  étape -> RTF lissé
+    sms:eta:samples   HASH  étape -> nombre de mesures
+    sms:eta:dag       HASH  étape -> entrées JSON (["conversion", ...])
+    sms:eta:pool_rtf  HASH  pool -> RTF lissé d'un job complet (routage GPU / CPU)
+"""
+import json
+import logging
+
+from app.core.config import settings
+from app.core.redis_client import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+RTF_KEY = "sms:eta:rtf"
+SAMPLES_KEY = "sms:eta:samples"
+DAG_KEY = "sms:eta:dag"
+POOL_RTF_KEY = "sms:eta:pool_rtf"
+
+
+def _record_rtf(key: str, field: str, elapsed: float, audio_seconds: float) -> None:
+    sample = elapsed / audio_seconds
+    redis = get_sync_redis()
+    previous = redis.hget(key, field)
+    alpha = settings.ETA_RTF_SMOOTHING
+    rtf = sample if previous is None else alpha * sample + (1 - alpha) * float(previous)
+    redis.hset(key, field, rtf)
+
+
+def record_stage_rtf(stage: str, elapsed: float, audio_seconds: float) -> None:
+    """
+    Intègre la durée d'une étape dans le RTF lissé de cette étape.
+
+    Args:
+        stage: Nom de l'étape (download, conversion, diarization...)
+        elapsed: Durée de l'étape (secondes)
+        audio_seconds: Durée de l'audio traité (secondes)
+    """
+    if audio_seconds <= 0:
+        return
+    try:
+        _record_rtf(RTF_KEY, stage, elapsed, audio_seconds)
+        get_sync_redis().hincrby(SAMPLES_KEY, stage, 1)
+    except Exception as e:
+        # Les statistiques ne doivent jamais faire échouer un job
+        logger.warning(f"⚠️ [ETA] RTF de l'étape {stage} non enregistré : {e}")
+
+
+def record_pool_rtf(elapsed: float, audio_seconds: float) -> None:
+    """Intègre la durée d'un job complet dans le RTF lissé du pool du worker (routage)."""
+    if audio_seconds <= 0:
+        return
+    try:
+        _record_rtf(POOL_RTF_KEY, settings.WORKER_POOL, elapsed, audio_seconds)
+    except Exception as e:
+        logger.warning(f"⚠️ [ETA] RTF du pool {settings.WORKER_POOL} non enregistré : {e}")
+
+
+def publish_dag(stages) -> None:
+    """
+    Publie les dépendances effectives des étapes (voir app.worker.dag.dag_inputs).
+
+    Args:
+        stages: Étapes du pipeline (PIPELINE_STAGES)
+    """
+    from app.worker.dag import dag_inputs
+
+    try:
+        redis = get_sync_redis()
+        redis.delete(DAG_KEY)
+        redis.hset(DAG_KEY, mapping={stage: json.dumps(inputs) for stage, inputs in dag_inputs(stages).items()})
+    except Exception as e:
+        logger.warning(f"⚠️ [ETA] Graphe des étapes non publié : {e}")
@@ -0,0 +1,132 @@
+"""
+Politique d'échec des jobs : retry borné avec backoff, puis dead-letter queue (DLQ).
+
+- Erreur transitoire (S3/réseau, timeout d'étape, worker perdu) : le job est remis
+  en file après RETRY_BACKOFF_SECONDS × 2^(tentative-1), jusqu'à RETRY_MAX_ATTEMPTS.
+- Erreur définitive (fichier illisible, FFmpeg en échec, bug) ou tentatives épuisées :
+  le job part en DLQ sans rien retenter. Un mauvais fichier n'occupe donc pas les
+  slots plusieurs fois ; un administrateur peut l'inspecter puis le rejouer via l'API.
+
+Structure Redis (partagée avec l'API) :
+    sms:dlq            HASH  dlq_id -> entrée JSON {job, error, stage, attempts, failed_at}
+    sms:dlq:metrics    HASH  compteurs (retries, dead_letters, timeouts, orphans)
+"""
+import json
+import logging
+import time
+import uuid
+from typing import Optional
+
+import httpx
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.core.scratch import ScratchQuotaExceeded
+from app.services.scheduler import schedule_retry
+
+logger = logging.getLogger(__name__)
+
+DLQ_KEY = "sms:dlq"
+METRICS_KEY = "sms:dlq:metrics"
+
+TRANSIENT_ERRORS = (
+    EndpointConnectionError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+    httpx.TransportError,
+    RedisConnectionError,
+    RedisTimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+TRANSIENT_S3_CODES = {"SlowDown", "RequestTimeout", "ServiceUnavailable", "InternalError", "Throttling"}
+
+
+def is_transient(error: BaseException) -> bool:
+    """Indique si une erreur mérite un nouvel essai (infra indisponible vs entrée invalide)."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, ScratchQuotaExceeded):
+        # Nœud saturé : l'espace se libère ; job au-dessus de son propre quota : définitif
+        return error.transient
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_S3_CODES or status >= 500
+    return False
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff exponentiel (attempt commence à 1)."""
+    return settings.RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+
+
+async def handle_job_failure(job: dict, error: str, transient: bool, stage: Optional[str] = None) -> str:
+    """
+    Applique la politique d'échec à un job.
+
+    Args:
+        job: Payload du job (le compteur `attempt` y est incrémenté)
+        error: Message d'erreur
+        transient: True si l'erreur peut disparaître en réessayant
+        stage: Étape en cours au moment de l'échec
+
+    Returns:
+        str: "retry" (job remis en file différée), "dead_letter" (job en DLQ)
+             ou "failed" (appel direct hors ordonnanceur, rien à rejouer)
+    """
+    if not job.get("job_id"):
+        return "failed"
+
+    attempt = int(job.get("attempt", 0)) + 1
+    job = {**job, "attempt": attempt, "last_error": error}
+
+    if transient and attempt < settings.RETRY_MAX_ATTEMPTS:
+        delay = retry_delay(attempt)
+        await schedule_retry(job, delay)
+        await get_redis().hincrby(METRICS_KEY, "retries", 1)
+        logger.warning(
+            f"🔁 [JOB {job['meeting_id']}] Tentative {attempt}/{settings.RETRY_MAX_ATTEMPTS} "
+            f"échouée ({stage or '?'}) : nouvel essai dans {delay:.0f}s"
+        )
+        return "retry"
+
+    await push_dead_letter(job, error, stage)
+    return "dead_letter"
+
+
+async def push_dead_letter(job: dict, error: str, stage: Optional[str] = None) -> str:
+    """
+    Range un job en dead-letter queue.
+
+    Returns:
+        str: Identifiant de l'entrée DLQ
+    """
+    dlq_id = str(uuid.uuid4())
+    entry = {
+        "dlq_id": dlq_id,
+        "job": job,
+        "error": error,
+        "stage": stage,
+        "attempts": int(job.get("attempt", 1)),
+        "failed_at": time.time(),
+    }
+    redis = get_redis()
+    await redis.hset(DLQ_KEY, dlq_id, json.dumps(entry))
+    await redis.hincrby(METRICS_KEY, "dead_letters", 1)
+    logger.error(f"☠️ [JOB {job['meeting_id']}] Envoyé en DLQ ({dlq_id}) après {entry['attempts']} tentative(s) : {error}")
+    return dlq_id
+
+
+async def record_failure_metric(name: str) -> None:
+    """Incrémente un compteur de fiabilité (ex: timeouts, orphans)."""
+    await get_redis().hincrby(METRICS_KEY, name, 1)
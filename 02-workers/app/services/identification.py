@@ -4,25 +4,48 @@ Compare les segments audio avec une banque d'identités stockée sur S3/MinIO.
 
 Structure S3:
     s3://identity-bank/{user_id}/{person_id}/voice/sample.wav
+    s3://identity-bank/{user_id}/{person_id}/voice/embedding.json   {"embedding": [...]}
+
+Les embeddings sont mis en cache dans le processus, par échantillon et par ETag S3 :
+seuls les échantillons ajoutés ou modifiés sont recalculés (le warm-up du worker
+remplit ce cache avant le premier job).
 """
+import json
 import os
 import logging
-import tempfile
+import re
+import unicodedata
 import numpy as np
-from scipy.spatial.distance import cdist
 from app.core.models import load_embedding_model
-from app.worker.tasks.base import get_s3_client
+from app.core.scratch import JobWorkspace
+from app.services.storage import get_s3_client
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 IDENTITY_BANK_BUCKET = "identity-bank"
 DEFAULT_USER_ID = "default"  # À remplacer par l'ID réel quand auth sera en place
+SAMPLE_SUFFIX = "/voice/sample.wav"
+EMBEDDING_SUFFIX = "/voice/embedding.json"
+VOICE_SUFFIXES = (SAMPLE_SUFFIX, EMBEDDING_SUFFIX)
+
+# Cache des embeddings : {user_id: {s3_key: (etag, person_id, embedding)}}
+_bank_cache = {}
+
+
+def _person_id(s3_key: str):
+    """default/homme/voice/sample.wav -> homme"""
+    parts = s3_key.split("/")
+    return parts[1] if len(parts) >= 3 else None
 
 
 def get_voice_bank_embeddings(user_id: str = DEFAULT_USER_ID):
     """
     Télécharge les échantillons vocaux depuis S3 et génère les embeddings.
+
+    Une identité peut avoir un échantillon audio (voice/sample.wav) et/ou un
+    embedding déjà calculé (voice/embedding.json, créé quand un utilisateur nomme un
+    locuteur d'un meeting passé) ; plusieurs signatures sont moyennées.
     
     Args:
         user_id: ID de l'utilisateur/organisation
@@ -30,64 +53,167 @@ def get_voice_bank_embeddings(user_id: str = DEFAULT_USER_ID):
     Returns:
         dict: {person_id: embedding_vector}
     """
-    embeddings = {}
     s3 = get_s3_client()
     
     try:
         # Lister tous les objets dans identity-bank/{user_id}/
         prefix = f"{user_id}/"
-        response = s3.list_objects_v2(Bucket=IDENTITY_BANK_BUCKET, Prefix=prefix)
-        
-        if "Contents" not in response:
-            logger.info(f"   ℹ️ Aucune identité trouvée pour user_id={user_id}")
-            return {}
-        
-        # Trouver les fichiers voice/sample.wav
-        voice_files = [
-            obj["Key"] for obj in response["Contents"]
-            if obj["Key"].endswith("/voice/sample.wav")
-        ]
+        voice_files = {}
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=IDENTITY_BANK_BUCKET, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(VOICE_SUFFIXES) and _person_id(obj["Key"]):
+                    voice_files[obj["Key"]] = obj
         
         if not voice_files:
-            logger.info("   ⚠️ Aucun échantillon vocal trouvé dans l'identity-bank")
+            logger.info(f"   ℹ️ Aucune signature vocale trouvée pour user_id={user_id}")
             return {}
-        
-        # Charger le modèle d'embedding
-        model = load_embedding_model()
-        
-        # Télécharger et traiter chaque échantillon
-        for s3_key in voice_files:
-            # Extraire person_id du chemin: default/homme/voice/sample.wav -> homme
-            parts = s3_key.split("/")
-            if len(parts) >= 3:
-                person_id = parts[1]  # Ex: "homme", "femme"
-            else:
-                continue
-            
-            # Télécharger dans un fichier temporaire
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                
+
+        # Signatures inchangées depuis le dernier calcul : embeddings en cache
+        cached = _bank_cache.get(user_id, {})
+        fresh = {
+            s3_key: cached[s3_key] for s3_key, obj in voice_files.items()
+            if s3_key in cached and cached[s3_key][0] == obj.get("ETag")
+        }
+        to_compute = {k: obj for k, obj in voice_files.items() if k not in fresh}
+
+        # Embeddings pré-calculés : simple lecture
+        for s3_key, obj in list(to_compute.items()):
+            if s3_key.endswith(EMBEDDING_SUFFIX):
+                body = s3.get_object(Bucket=IDENTITY_BANK_BUCKET, Key=s3_key)["Body"].read()
+                emb = np.asarray(json.loads(body)["embedding"], dtype=np.float32)
+                fresh[s3_key] = (obj.get("ETag"), _person_id(s3_key), emb)
+                del to_compute[s3_key]
+
+        if to_compute:
+            # Charger le modèle d'embedding
+            model = load_embedding_model()
+
+            # Échantillons téléchargés dans un espace scratch propre au processus
+            workspace = JobWorkspace(f"voice-bank-{os.getpid()}")
             try:
-                s3.download_file(IDENTITY_BANK_BUCKET, s3_key, tmp_path)
-                
-                # Calculer l'embedding
-                emb = model(tmp_path)
-                embeddings[person_id] = emb
-                logger.info(f"   👤 Signature vocale chargée : {person_id}")
-                
+                # Télécharger et traiter chaque échantillon
+                for s3_key, obj in to_compute.items():
+                    person_id = _person_id(s3_key)  # Ex: "homme", "femme"
+
+                    # Télécharger dans un fichier temporaire
+                    tmp_path = workspace.path(f"{person_id}.wav", size_hint=obj["Size"])
+                    try:
+                        s3.download_file(IDENTITY_BANK_BUCKET, s3_key, tmp_path)
+
+                        # Calculer l'embedding
+                        emb = model(tmp_path)
+                        fresh[s3_key] = (obj.get("ETag"), person_id, emb)
+                        logger.info(f"   👤 Signature vocale chargée : {person_id}")
+                    finally:
+                        # Nettoyer le fichier temporaire
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
             finally:
-                # Nettoyer le fichier temporaire
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-        
-        return embeddings
+                workspace.release()
+
+        _bank_cache[user_id] = fresh
+
+        # Plusieurs signatures pour une personne : moyenne des vecteurs normalisés
+        signatures = {}
+        for _, person_id, emb in fresh.values():
+            emb = np.asarray(emb, dtype=np.float32).reshape(-1)
+            signatures.setdefault(person_id, []).append(emb / (np.linalg.norm(emb) + 1e-12))
+        return {person_id: np.mean(vectors, axis=0) for person_id, vectors in signatures.items()}
         
     except Exception as e:
         logger.warning(f"   ⚠️ Erreur lecture identity-bank: {e}")
         return {}
 
 
+def batch_embeddings(audio_wav: str, turns: list, inference, window_seconds: float, batch_size: int, on_batch=None):
+    """
+    Un embedding par tour de parole, calculé par lots.
+
+    Une fenêtre de `window_seconds` est lue au centre de chaque tour (lecture directe
+    dans le WAV, sans fichier temporaire) ; les fenêtres de même longueur passent
+    ensemble dans le modèle (`Inference.infer`, serveur d'inférence partagé compris).
+
+    Args:
+        audio_wav: WAV 16 kHz mono
+        turns: Tours (start, end, duration) d'au moins `window_seconds`
+        inference: Modèle WeSpeaker (load_embedding_model)
+        on_batch: Appelé après chaque lot (point de contrôle d'annulation)
+
+    Returns:
+        np.ndarray: (tours, dimension)
+    """
+    import soundfile as sf
+    import torch
+
+    vectors = []
+    with sf.SoundFile(audio_wav) as wav:
+        frames = int(window_seconds * wav.samplerate)
+        for offset in range(0, len(turns), batch_size):
+            chunks = []
+            for turn in turns[offset:offset + batch_size]:
+                center = (turn.start + turn.end) / 2
+                wav.seek(max(0, int((center - window_seconds / 2) * wav.samplerate)))
+                chunk = wav.read(frames, dtype="float32", always_2d=True)[:, 0]
+                chunks.append(np.pad(chunk, (0, frames - len(chunk))))
+            batch = torch.from_numpy(np.stack(chunks)).unsqueeze(1)
+            vectors.append(np.asarray(inference.infer(batch), dtype=np.float32).reshape(len(chunks), -1))
+            if on_batch is not None:
+                on_batch()
+    return np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+def identity_key(value: str) -> str:
+    """Forme normalisée d'un nom ("Émile Durand" -> "emile-durand"), alignée avec l'API."""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9@.]+", "-", ascii_value.lower()).strip("-")
+
+
+def restrict_to_identities(bank_embeddings: dict, expected_identities) -> dict:
+    """
+    Restreint la banque aux identités attendues (membres des groupes du meeting).
+
+    Returns:
+        dict: Banque restreinte, ou banque complète si aucune identité attendue n'y figure
+              (membres sans signature vocale : mieux vaut la banque entière que rien)
+    """
+    if not expected_identities:
+        return bank_embeddings
+    expected = set(expected_identities)
+    restricted = {
+        person_id: emb for person_id, emb in bank_embeddings.items()
+        if identity_key(person_id) in expected
+    }
+    if not restricted:
+        logger.info("   ℹ️ Aucun membre attendu dans l'identity-bank, banque complète")
+        return bank_embeddings
+    logger.info(f"   👥 Identités candidates restreintes aux membres : {sorted(restricted)}")
+    return restricted
+
+
+def bank_matrix(bank_embeddings: dict):
+    """
+    Banque sous forme matricielle : (noms, matrice des vecteurs normalisés).
+
+    À construire une fois quand la même banque sert à beaucoup de comparaisons (relabel).
+    """
+    names = list(bank_embeddings)
+    if not names:
+        return names, np.zeros((0, 0), dtype=np.float32)
+    matrix = np.stack([np.asarray(bank_embeddings[name], dtype=np.float32).reshape(-1) for name in names])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    return names, matrix
+
+
+def best_match(unknown_emb, names: list, matrix: np.ndarray):
+    """Identité la plus proche (similarité cosinus) : (nom ou None si banque vide, score)."""
+    if not names:
+        return None, 0.0
+    query = np.asarray(unknown_emb, dtype=np.float32).reshape(-1)
+    scores = matrix @ (query / (np.linalg.norm(query) + 1e-12))
+    best = int(np.argmax(scores))
+    return names[best], float(scores[best])
+
+
 def identify_speaker(unknown_emb, bank_embeddings, threshold=0.5):
     """
     Compare un vecteur inconnu avec la banque via Similarité Cosinus.
@@ -102,26 +228,12 @@ def identify_speaker(unknown_emb, bank_embeddings, threshold=0.5):
     """
     if not bank_embeddings:
         return None, 0.0
-    
-    best_match = None
-    best_score = 0.0
-    
-    for name, known_emb in bank_embeddings.items():
-        # Calcul de la similarité (1 - distance cosinus)
-        # cdist attend des tableaux 2D, on reshape donc les vecteurs
-        dist = cdist(
-            unknown_emb.reshape(1, -1), 
-            known_emb.reshape(1, -1), 
-            metric="cosine"
-        )[0, 0]
-        score = 1 - dist
-        
-        if score > best_score:
-            best_score = score
-            best_match = name
+
+    # Toute la banque en un produit matriciel (vecteurs normalisés)
+    best_name, best_score = best_match(unknown_emb, *bank_matrix(bank_embeddings))
             
     # On ne valide que si on dépasse le seuil de confiance
     if best_score > threshold:
-        return best_match, best_score
+        return best_name, best_score
     else:
         return None, best_score
@@ -0,0 +1,344 @@
+"""
+Transcription en direct : VAD au fil de l'eau, Whisper par morceaux avec recouvrement
+et attribution des locuteurs en ligne.
+
+L'audio arrive par petits blocs (PCM float32, 16 kHz mono). LiveTranscriber ne garde
+en mémoire que la parole pas encore validée (de l'ordre de LIVE_MAX_BUFFER_SECONDS) :
+toutes les LIVE_STEP_SECONDS d'audio, le VAD Silero de faster-whisper est relancé sur
+ce tampon, puis :
+
+- une zone de parole suivie d'un silence (LIVE_VAD_MIN_SILENCE_MS) est décodée et
+  validée (événements "final"), puis retirée du tampon ;
+- une parole continue plus longue que LIVE_MAX_BUFFER_SECONDS est décodée, et tous
+  ses segments sauf le dernier sont validés : le dernier reste dans le tampon et sera
+  redécodé avec la suite (recouvrement, pas de mot coupé en bout de morceau) ;
+- sinon la parole en cours est décodée pour l'affichage (événement "partial",
+  remplacé par le suivant), au plus toutes les LIVE_PARTIAL_INTERVAL_SECONDS.
+
+Chaque segment validé reçoit un locuteur (OnlineSpeakers) : l'embedding WeSpeaker du
+segment rejoint le locuteur de la session le plus proche, ou en ouvre un nouveau ; le
+centroïde d'un locuteur pas encore reconnu est comparé à la shortlist des groupes puis
+à la banque de voix à chacun de ses segments.
+
+Les modèles sont injectés (fonctions transcribe / vad / embed) : ce module n'en charge
+aucun et reste testable sans eux.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+SAMPLE_RATE = 16000
+# Texte validé rappelé à Whisper (initial_prompt) : continuité entre les morceaux
+PROMPT_CHARS = 200
+# Silence gardé en tête de tampon (début de parole que le VAD n'a pas encore vu)
+SILENCE_KEEP_SECONDS = 0.5
+
+
+def live_options() -> dict:
+    """Options faster-whisper des sessions en direct."""
+    return {
+        "beam_size": settings.LIVE_BEAM_SIZE,
+        "language": settings.LIVE_LANGUAGE,
+        "condition_on_previous_text": False,
+        "vad_filter": False,
+    }
+
+
+def live_profile() -> dict:
+    """Profil enregistré avec les résultats (metadata.json), au format de profile_metadata."""
+    options = {**live_options(), "model": settings.LIVE_WHISPER_MODEL}
+    digest = hashlib.sha1(json.dumps(options, sort_keys=True).encode()).hexdigest()[:12]
+    return {"name": "live", "options": options, "key": f"live-{digest}"}
+
+
+@dataclass
+class LiveSegment:
+    """Segment validé d'une session (horodatages absolus depuis le début de la session)."""
+    id: int
+    start: float
+    end: float
+    text: str
+    label: Optional[str]
+    embedding: Optional[np.ndarray] = None
+
+
+# =============================================================================
+# LOCUTEURS EN LIGNE
+# =============================================================================
+
+class OnlineSpeakers:
+    """
+    Locuteurs d'une session, regroupés au fil de l'eau (jamais reclusterisés).
+
+    Chaque locuteur garde la somme de ses embeddings normalisés pondérés par la durée ;
+    son centroïde est le profil sauvegardé dans speakers.json, comme en batch.
+    """
+
+    def __init__(self, identify: Optional[Callable] = None, threshold: Optional[float] = None):
+        """
+        Args:
+            identify: centroïde -> (nom ou None, score, source) ; None = pas d'identification
+            threshold: Similarité minimale pour rejoindre un locuteur (LIVE_SPEAKER_THRESHOLD)
+        """
+        self.identify = identify
+        self.threshold = settings.LIVE_SPEAKER_THRESHOLD if threshold is None else threshold
+        self.speakers: Dict[str, dict] = {}
+
+    def assign(self, embedding, seconds: float) -> Tuple[str, bool]:
+        """
+        Returns:
+            tuple: (label du locuteur, True si son nom vient d'être trouvé)
+        """
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        vector = vector / (np.linalg.norm(vector) + 1e-12)
+        label, best = None, -1.0
+        for candidate, speaker in self.speakers.items():
+            score = float(vector @ speaker["sum"]) / (float(np.linalg.norm(speaker["sum"])) + 1e-12)
+            if score > best:
+                label, best = candidate, score
+        if label is None or best < self.threshold:
+            label = f"SPEAKER_{len(self.speakers):02d}"
+            self.speakers[label] = {
+                "sum": np.zeros_like(vector), "seconds": 0.0, "name": None, "score": 0.0, "source": None,
+            }
+
+        speaker = self.speakers[label]
+        speaker["sum"] += seconds * vector
+        speaker["seconds"] += seconds
+        if speaker["name"] is not None or self.identify is None:
+            return label, False
+        # Tant qu'il n'est pas reconnu, le centroïde (plus de voix à chaque segment) est recomparé
+        name, score, source = self.identify(speaker["sum"])
+        speaker["score"] = float(score)
+        if name is None:
+            return label, False
+        speaker["name"], speaker["source"] = name, source
+        return label, True
+
+    def display(self, label: Optional[str]) -> str:
+        """Nom affiché : identité reconnue, sinon label de session ("Unknown" comme la fusion)."""
+        if label is None:
+            return "Unknown"
+        return self.speakers[label]["name"] or label
+
+    def mapping(self) -> Dict[str, str]:
+        """{label: nom} des locuteurs reconnus (speaker_mapping de la fusion)."""
+        return {label: s["name"] for label, s in self.speakers.items() if s["name"]}
+
+    def centroid(self, label: str) -> np.ndarray:
+        total = self.speakers[label]["sum"]
+        return total / (np.linalg.norm(total) + 1e-12)
+
+    def profiles(self) -> Dict[str, dict]:
+        """Profils au format de speakers.json (centroïde, secondes, nom, identité, score, source)."""
+        return {
+            label: {
+                "embedding": self.centroid(label).tolist(),
+                "seconds": round(s["seconds"], 1),
+                "name": s["name"],
+                "person_id": s["name"],
+                "score": round(s["score"], 4),
+                "source": s["source"],
+            }
+            for label, s in self.speakers.items()
+        }
+
+
+# =============================================================================
+# TRANSCRIPTION AU FIL DE L'EAU
+# =============================================================================
+
+class LiveTranscriber:
+    """
+    Transcription incrémentale d'une session.
+
+    `feed` et `finish` sont bloquants (modèles) : à appeler depuis un thread
+    (app/worker/executors.py, run_live), jamais en parallèle pour une même session.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable,
+        vad: Callable,
+        embed: Optional[Callable] = None,
+        speakers: Optional[OnlineSpeakers] = None,
+    ):
+        """
+        Args:
+            transcribe: (audio float32, prompt) -> [(début, fin, texte)] en secondes
+                relatives au début de l'audio
+            vad: audio float32 -> [(début, fin)] en échantillons
+            embed: audio float32 -> embedding WeSpeaker (None : pas de locuteurs)
+            speakers: Locuteurs de la session (identification comprise)
+        """
+        self.transcribe = transcribe
+        self.vad = vad
+        self.embed = embed
+        self.speakers = speakers or OnlineSpeakers()
+        self.segments: List[LiveSegment] = []
+        self.buffer = np.zeros(0, dtype=np.float32)
+        # Position (échantillons depuis le début de la session) du premier échantillon du tampon
+        self.buffer_offset = 0
+        self.received = 0
+        self.since_step = 0
+        self.last_partial = None
+        self.partial_shown = False
+        self.last_label = None
+        self.decoded_seconds = 0.0
+        self.compute_seconds = 0.0
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.received / SAMPLE_RATE
+
+    def stats(self) -> dict:
+        return {
+            "audio_seconds": round(self.audio_seconds, 1),
+            "decoded_seconds": round(self.decoded_seconds, 1),
+            "compute_seconds": round(self.compute_seconds, 1),
+            "segments": len(self.segments),
+            "speakers": len(self.speakers.speakers),
+        }
+
+    def feed(self, samples: np.ndarray) -> List[dict]:
+        """Ajoute un bloc audio ; événements produits (souvent aucun)."""
+        self.buffer = np.concatenate([self.buffer, samples.astype(np.float32, copy=False)])
+        self.received += len(samples)
+        self.since_step += len(samples)
+        if self.since_step < settings.LIVE_STEP_SECONDS * SAMPLE_RATE:
+            return []
+        self.since_step = 0
+        return self._step(final=False)
+
+    def finish(self) -> List[dict]:
+        """Fin de session : toute la parole restante est validée."""
+        return self._step(final=True)
+
+    # --- Étapes ---
+
+    def _step(self, final: bool) -> List[dict]:
+        events = []
+        regions = self.vad(self.buffer) if len(self.buffer) else []
+        if not regions:
+            # Silence : seule la fin du tampon est gardée (début de parole éventuel)
+            self._trim(len(self.buffer) - int(SILENCE_KEEP_SECONDS * SAMPLE_RATE))
+            return self._clear_partial()
+
+        min_silence = settings.LIVE_VAD_MIN_SILENCE_MS * SAMPLE_RATE // 1000
+        closed = regions if final or len(self.buffer) - regions[-1][1] >= min_silence else regions[:-1]
+        if closed:
+            # Parole suivie d'un silence : décodée et validée
+            start, end = closed[0][0], closed[-1][1]
+            events += self._commit(self._decode(start, end), start, keep_last=False)
+            self._trim(end)
+            events += self._clear_partial()
+            if len(closed) == len(regions):
+                return events
+            regions = [(s - end, e - end) for s, e in regions[len(closed):]]
+
+        # Parole en cours (zone ouverte) : recouvrement au-delà du tampon max, sinon affichage provisoire
+        start = regions[0][0]
+        if len(self.buffer) - start >= settings.LIVE_MAX_BUFFER_SECONDS * SAMPLE_RATE:
+            segments = self._decode(start, len(self.buffer))
+            events += self._commit(segments, start, keep_last=len(segments) > 1)
+            if len(segments) > 1:
+                self._trim(start + int(segments[-1][0] * SAMPLE_RATE))
+            else:
+                # Un seul segment (validé) ou aucun texte (bruit) : tout le morceau est consommé
+                self._trim(start + int(segments[-1][1] * SAMPLE_RATE) if segments else len(self.buffer))
+            events += self._clear_partial()
+        elif self._partial_due():
+            segments = self._decode(start, len(self.buffer))
+            text = " ".join(text.strip() for _, _, text in segments).strip()
+            if text:
+                self.partial_shown = True
+                events.append({
+                    "type": "partial",
+                    "start": round((self.buffer_offset + start) / SAMPLE_RATE, 2),
+                    "end": round((self.buffer_offset + len(self.buffer)) / SAMPLE_RATE, 2),
+                    "text": text,
+                })
+        return events
+
+    def _decode(self, start: int, end: int) -> list:
+        """Whisper sur buffer[start:end], avec le texte validé récent comme prompt."""
+        prompt = " ".join(segment.text for segment in self.segments[-10:])[-PROMPT_CHARS:] or None
+        started = time.monotonic()
+        segments = self.transcribe(self.buffer[start:end], prompt)
+        self.compute_seconds += time.monotonic() - started
+        self.decoded_seconds += (end - start) / SAMPLE_RATE
+        return [(s, e, text) for s, e, text in segments if text.strip()]
+
+    def _commit(self, segments: list, start: int, keep_last: bool) -> List[dict]:
+        """Valide les segments décodés depuis buffer[start:] (sauf le dernier si keep_last)."""
+        events = []
+        for seg_start, seg_end, text in segments[:-1] if keep_last else segments:
+            first = start + int(seg_start * SAMPLE_RATE)
+            last = min(len(self.buffer), start + int(seg_end * SAMPLE_RATE))
+            first = min(first, last)
+            label, embedding, named = self._speaker(first, last)
+            segment = LiveSegment(
+                id=len(self.segments),
+                start=round((self.buffer_offset + first) / SAMPLE_RATE, 2),
+                end=round((self.buffer_offset + last) / SAMPLE_RATE, 2),
+                text=text.strip(),
+                label=label,
+                embedding=embedding,
+            )
+            self.segments.append(segment)
+            events.append({
+                "type": "final",
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "label": label,
+                "speaker": self.speakers.display(label),
+            })
+            if named:
+                # Les segments déjà affichés sous ce label prennent le nom
+                speaker = self.speakers.speakers[label]
+                events.append({
+                    "type": "speaker", "label": label, "name": speaker["name"], "score": round(speaker["score"], 4),
+                })
+        return events
+
+    def _speaker(self, first: int, last: int):
+        """(label, embedding, nommé) d'un segment ; segment trop court : locuteur précédent."""
+        seconds = (last - first) / SAMPLE_RATE
+        if self.embed is None or seconds < settings.LIVE_SPEAKER_MIN_SECONDS:
+            return self.last_label, None, False
+        window = int(settings.LIVE_EMBEDDING_MAX_SECONDS * SAMPLE_RATE)
+        center = (first + last) // 2
+        audio = self.buffer[max(first, center - window // 2):min(last, center + window // 2)]
+        embedding = self.embed(audio)
+        if embedding is None:
+            return self.last_label, None, False
+        label, named = self.speakers.assign(embedding, seconds)
+        self.last_label = label
+        return label, np.asarray(embedding, dtype=np.float32).reshape(-1), named
+
+    def _partial_due(self) -> bool:
+        now = self.received / SAMPLE_RATE
+        if self.last_partial is not None and now - self.last_partial < settings.LIVE_PARTIAL_INTERVAL_SECONDS:
+            return False
+        self.last_partial = now
+        return True
+
+    def _clear_partial(self) -> List[dict]:
+        if not self.partial_shown:
+            return []
+        self.partial_shown = False
+        return [{"type": "partial", "text": ""}]
+
+    def _trim(self, samples: int) -> None:
+        """Retire les `samples` premiers échantillons du tampon."""
+        samples = max(0, min(samples, len(self.buffer)))
+        self.buffer = self.buffer[samples:]
+        self.buffer_offset += samples
@@ -0,0 +1,101 @@
+"""
+Transport des sessions en direct entre l'API (WebSocket) et le Worker : flux Redis.
+
+L'API reçoit l'audio du client et l'ajoute au flux audio de la session ; le worker
+en direct qui a pris la session (tâche `process_live_session`, file LIVE_QUEUE) le lit
+au fil de l'eau et publie ses segments dans le flux d'événements, relayé au client
+par l'API. Des flux (et non du pub/sub) : rien n'est perdu si l'un des deux côtés
+lit avec un peu de retard.
+
+Structure Redis (clés alignées avec 03-interface/backend/app/services/live.py) :
+    sms:live                         LIST    file Taskiq des sessions (workers LIVE_WORKER)
+    sms:live:{session_id}:audio      STREAM  {"data": base64 d'un bloc audio} | {"end": "1"}
+    sms:live:{session_id}:events     STREAM  {"event": JSON} (ready, partial, final, speaker, completed, error)
+    sms:live:sessions                HASH    session_id -> {"meeting_id", "worker", "started_at", "last_seen"}
+    sms:live:workers                 HASH    {hôte}:{pid} -> {"ready_at", "sessions", "steps", "device"}
+"""
+import base64
+import json
+import time
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+LIVE_QUEUE = "sms:live"
+SESSIONS_KEY = "sms:live:sessions"
+WORKERS_KEY = "sms:live:workers"
+# Événements gardés par session (le client n'en a besoin que des derniers)
+EVENTS_MAX_LENGTH = 10000
+# Attente max d'un XREAD (ms) : rythme des vérifications d'inactivité et des heartbeats
+READ_BLOCK_MS = 1000
+HEARTBEAT_SECONDS = 10
+
+
+def audio_key(session_id: str) -> str:
+    return f"{LIVE_QUEUE}:{session_id}:audio"
+
+
+def events_key(session_id: str) -> str:
+    return f"{LIVE_QUEUE}:{session_id}:events"
+
+
+async def publish_event(session_id: str, event: dict) -> None:
+    """Ajoute un événement au flux relayé au client par l'API."""
+    await get_redis().xadd(
+        events_key(session_id), {"event": json.dumps(event)}, maxlen=EVENTS_MAX_LENGTH, approximate=True,
+    )
+
+
+async def register_session(session_id: str, meeting_id: str, worker: str) -> None:
+    now = time.time()
+    await get_redis().hset(SESSIONS_KEY, session_id, json.dumps({
+        "meeting_id": meeting_id, "worker": worker, "started_at": now, "last_seen": now,
+    }))
+
+
+async def heartbeat(session_id: str) -> None:
+    """Session toujours vivante (l'API ignore les sessions muettes dans son décompte de capacité)."""
+    redis = get_redis()
+    raw = await redis.hget(SESSIONS_KEY, session_id)
+    if raw:
+        await redis.hset(SESSIONS_KEY, session_id, json.dumps({**json.loads(raw), "last_seen": time.time()}))
+
+
+async def close_session(session_id: str) -> None:
+    """Libère la place de la session et laisse expirer ses flux (LIVE_STREAM_TTL_SECONDS)."""
+    redis = get_redis()
+    await redis.hdel(SESSIONS_KEY, session_id)
+    for key in (audio_key(session_id), events_key(session_id)):
+        await redis.expire(key, settings.LIVE_STREAM_TTL_SECONDS)
+
+
+async def audio_chunks(session_id: str) -> AsyncIterator[bytes]:
+    """
+    Blocs audio de la session, dans l'ordre d'arrivée, jusqu'à la fin de la session :
+    message "end" de l'API, ou aucun audio pendant LIVE_IDLE_TIMEOUT_SECONDS (API
+    redémarrée, client perdu sans fermeture propre).
+
+    Les entrées lues sont retirées du flux : sa taille reste celle du retard du worker.
+    """
+    redis = get_redis()
+    key = audio_key(session_id)
+    last_id, last_audio, last_heartbeat = "0", time.monotonic(), time.monotonic()
+    while True:
+        entries = await redis.xread({key: last_id}, count=100, block=READ_BLOCK_MS)
+        now = time.monotonic()
+        if now - last_heartbeat >= HEARTBEAT_SECONDS:
+            await heartbeat(session_id)
+            last_heartbeat = now
+        if not entries:
+            if now - last_audio >= settings.LIVE_IDLE_TIMEOUT_SECONDS:
+                return
+            continue
+        last_audio = now
+        for entry_id, fields in entries[0][1]:
+            last_id = entry_id
+            if fields.get("end"):
+                return
+            # Clients Redis en decode_responses : l'audio voyage en base64
+            yield base64.b64decode(fields["data"])
+        await redis.xtrim(key, minid=last_id)
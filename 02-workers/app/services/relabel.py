@@ -0,0 +1,143 @@
+"""
+Renommage rétroactif des locuteurs, sans retraiter l'audio.
+
+Chaque résultat (s3://processed/{dossier}/) contient, en plus de fusion.json :
+- speakers.json : profil de chaque label de diarisation (centroïde, nom affiché,
+  identité person_id, score, source),
+- fusion_raw.json : segments avec les labels de diarisation.
+
+Quand une identité est ajoutée ("C'est Albert" sur un meeting passé) ou renommée,
+`relabel_results` compare les centroïdes de tous les meetings à la banque (un produit
+matriciel par meeting) et ne réécrit que speakers.json et fusion.json des meetings
+dont un nom change. Aucun modèle n'est chargé : quelques minutes de CPU et
+d'E/S S3 pour 10 000 meetings.
+
+Règles :
+- un nom attribué à la main (source "manual") n'est jamais remplacé par un match ;
+- un locuteur prend une identité si son score dépasse RELABEL_THRESHOLD et son score actuel ;
+- `renames` ({ancien: nouveau}, person_id) s'applique à tous les profils, y compris manuels ;
+- matches et renommages portent sur person_id : le nom affiché d'un locuteur nommé à
+  la main ("Émile Durand") est conservé tant que son identité ne change pas.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.identification import bank_matrix, best_match, get_voice_bank_embeddings
+from app.services.storage import RAW_FUSION_FILE, SPEAKERS_FILE, get_s3_client
+
+logger = logging.getLogger(__name__)
+
+
+def _read_json(s3, folder: str, filename: str):
+    body = s3.get_object(Bucket=settings.MINIO_BUCKET_RESULTS, Key=f"{folder}/{filename}")["Body"].read()
+    return json.loads(body)
+
+
+def _write_json(s3, folder: str, filename: str, data) -> None:
+    s3.put_object(
+        Bucket=settings.MINIO_BUCKET_RESULTS,
+        Key=f"{folder}/{filename}",
+        Body=json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+
+def relabel_speakers(speakers: dict, names: list, matrix: np.ndarray, renames: Dict[str, str]) -> bool:
+    """
+    Applique renommages et nouveaux matches aux profils d'un meeting (modifiés sur place).
+
+    Returns:
+        bool: True si au moins un nom a changé
+    """
+    changed = False
+    for profile in speakers.values():
+        # Profils écrits avant person_id : le nom est l'identité
+        person_id = profile.get("person_id") or profile.get("name")
+        if person_id in renames:
+            person_id = renames[person_id]
+            profile.update(name=person_id, person_id=person_id)
+            changed = True
+        if profile.get("source") == "manual" or not profile.get("embedding"):
+            continue
+        name, score = best_match(profile["embedding"], names, matrix)
+        if (name is not None and name != person_id and score > settings.RELABEL_THRESHOLD
+                and (person_id is None or score > profile.get("score", 0.0))):
+            profile.update(name=name, person_id=name, score=round(score, 4), source="relabel")
+            changed = True
+    return changed
+
+
+def apply_speaker_names(raw_segments: list, speakers: dict) -> list:
+    """fusion.json : segments bruts avec le nom de chaque label (label conservé si inconnu)."""
+    return [
+        {**segment, "speaker": (speakers.get(segment["speaker"]) or {}).get("name") or segment["speaker"]}
+        for segment in raw_segments
+    ]
+
+
+def _relabel_folder(s3, folder: str, names: list, matrix: np.ndarray, renames: Dict[str, str]) -> bool:
+    speakers = _read_json(s3, folder, SPEAKERS_FILE)
+    if not relabel_speakers(speakers, names, matrix, renames):
+        return False
+    fusion = apply_speaker_names(_read_json(s3, folder, RAW_FUSION_FILE), speakers)
+    _write_json(s3, folder, "fusion.json", fusion)
+    _write_json(s3, folder, SPEAKERS_FILE, speakers)
+    return True
+
+
+def result_folders(s3) -> List[str]:
+    """Dossiers de résultats qui ont des profils de locuteurs (meetings traités depuis leur ajout)."""
+    folders = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=settings.MINIO_BUCKET_RESULTS):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(f"/{SPEAKERS_FILE}"):
+                folders.append(obj["Key"].rsplit("/", 1)[0])
+    return folders
+
+
+def relabel_results(identities: Optional[List[str]] = None, renames: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Réattribue les noms des locuteurs de tous les meetings traités.
+
+    Args:
+        identities: Identités de la banque à rechercher (None = toute la banque)
+        renames: Renommages {ancien nom: nouveau nom}
+
+    Returns:
+        dict: {"meetings", "updated", "failed", "elapsed_seconds"}
+    """
+    started = time.monotonic()
+    renames = renames or {}
+    bank = get_voice_bank_embeddings()
+    if identities is not None:
+        bank = {person_id: emb for person_id, emb in bank.items() if person_id in set(identities)}
+    names, matrix = bank_matrix(bank)
+
+    s3 = get_s3_client()
+    folders = result_folders(s3)
+    logger.info(f"🏷️ [Relabel] {len(folders)} meeting(s), {len(names)} identité(s), {len(renames)} renommage(s)")
+
+    def _safe(folder: str):
+        try:
+            return _relabel_folder(s3, folder, names, matrix, renames)
+        except Exception as e:
+            logger.warning(f"⚠️ [Relabel] {folder} ignoré : {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=settings.RELABEL_IO_THREADS) as pool:
+        results = list(pool.map(_safe, folders))
+
+    stats = {
+        "meetings": len(folders),
+        "updated": sum(1 for result in results if result),
+        "failed": sum(1 for result in results if result is None),
+        "elapsed_seconds": round(time.monotonic() - started, 1),
+    }
+    logger.info(f"✅ [Relabel] {stats}")
+    return stats
@@ -0,0 +1,393 @@
+"""
+Ordonnanceur équitable (Fair-Share) entre tenants, avec classes de priorité.
+
+L'API ne pousse plus directement le pipeline dans la file Taskiq : elle dépose
+le job dans une file virtuelle par tenant (groupe ou propriétaire) puis envoie
+un "jeton" `dispatch_fair_share_job`. Chaque jeton consommé par un worker tire
+le prochain job :
+
+1. Les classes de file (QUEUE_CLASSES, ex: urgent > normal > bulk) sont servies
+   en priorité stricte.
+2. Au sein d'une classe, les tenants sont servis en Deficit Round Robin (DRR) :
+   - chaque tenant actif reçoit `quantum * poids` secondes de crédit par tour,
+   - il est servi tant que son crédit couvre le coût (durée audio estimée) du job
+     en tête de sa file,
+   - un tenant qui a atteint son plafond de jobs simultanés est sauté.
+
+Structure Redis (partagée avec l'API) :
+    sms:fair:{classe}:active          LIST  tenants ayant du backlog (ordre du tourniquet)
+    sms:fair:{classe}:queue:{tenant}  LIST  jobs JSON en attente
+    sms:fair:{classe}:deficit         HASH  tenant -> crédit DRR
+    sms:fair:running:{tenant}         SET   job_id en cours d'exécution (toutes classes)
+    sms:fair:served_seconds           HASH  tenant -> secondes de calcul consommées
+    sms:fair:weights                  HASH  tenant -> poids effectif (pour les métriques)
+    sms:fair:inflight                 HASH  job_id -> job JSON en cours (pour la récupération)
+    sms:fair:lease:{job_id}           STR   bail du job en cours, renouvelé par le watchdog
+    sms:fair:failures                 HASH  job_id -> cause d'un arrêt brutal (timeout watchdog)
+    sms:fair:delayed                  ZSET  jobs JSON en attente de retry (score = échéance)
+
+Jetons : un par job prêt. Un job différé (retry, upload reporté par l'admission de
+l'API) n'en a pas : chaque worker batch promeut les jobs arrivés à échéance
+(`promote_delayed_jobs`, toutes les DELAYED_PROMOTION_INTERVAL secondes) et émet
+alors un jeton par job promu. Aucun jeton ne tourne à vide en attendant l'échéance.
+
+Routage (ROUTING_ENABLED) : l'API attribue un pool ("gpu", "cpu") à chaque job et
+envoie son jeton dans la file Taskiq du pool (`token_queue`). Un worker ne tire que
+les jobs de son pool (WORKER_POOL) ; les jobs sans pool restent servis par tous.
+"""
+import json
+import logging
+import time
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+# Clés Redis (doivent rester alignées avec app/services/scheduler.py côté API)
+KEY_PREFIX = "sms:fair"
+SERVED_KEY = f"{KEY_PREFIX}:served_seconds"
+WEIGHTS_KEY = f"{KEY_PREFIX}:weights"
+LOCK_KEY = f"{KEY_PREFIX}:lock"
+INFLIGHT_KEY = f"{KEY_PREFIX}:inflight"
+FAILURES_KEY = f"{KEY_PREFIX}:failures"
+DELAYED_KEY = f"{KEY_PREFIX}:delayed"
+REAPER_KEY = f"{KEY_PREFIX}:reaper"
+
+POOL_QUEUE_PREFIX = "sms:pool"
+# File Taskiq par défaut (ListQueueBroker), utilisée sans routage
+DEFAULT_TOKEN_QUEUE = "taskiq"
+
+# Garde-fou contre une boucle infinie si la configuration est incohérente
+MAX_DRR_ITERATIONS = 1000
+
+
+def token_queue(pool: Optional[str] = None) -> str:
+    """File Taskiq des jetons de dispatch d'un pool (pool du worker par défaut)."""
+    if not settings.ROUTING_ENABLED:
+        return DEFAULT_TOKEN_QUEUE
+    return f"{POOL_QUEUE_PREFIX}:{pool or settings.WORKER_POOL}"
+
+
+def is_eligible(job: dict) -> bool:
+    """Le job peut-il être exécuté par ce worker (pool attribué par l'API) ?"""
+    if not settings.ROUTING_ENABLED:
+        return True
+    return job.get("pool") in (None, settings.WORKER_POOL)
+
+
+def active_key(queue_class: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:active"
+
+
+def queue_key(queue_class: str, tenant: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:queue:{tenant}"
+
+
+def deficit_key(queue_class: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:deficit"
+
+
+def running_key(tenant: str) -> str:
+    return f"{KEY_PREFIX}:running:{tenant}"
+
+
+def lease_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:lease:{job_id}"
+
+
+def get_weight(tenant: str) -> float:
+    """Poids configuré du tenant (FAIR_SHARE_WEIGHTS ou poids par défaut)."""
+    return float(settings.FAIR_SHARE_WEIGHTS.get(tenant, settings.FAIR_SHARE_DEFAULT_WEIGHT))
+
+
+def get_max_running(tenant: str) -> int:
+    """Plafond de jobs simultanés du tenant."""
+    return int(settings.FAIR_SHARE_MAX_RUNNING.get(tenant, settings.FAIR_SHARE_DEFAULT_MAX_RUNNING))
+
+
+def class_rank(queue_class: str) -> int:
+    """Rang de priorité d'une classe (0 = la plus prioritaire)."""
+    try:
+        return settings.QUEUE_CLASSES.index(queue_class)
+    except ValueError:
+        return len(settings.QUEUE_CLASSES)
+
+
+# =============================================================================
+# DEQUEUE (Priorité stricte entre classes, DRR entre tenants)
+# =============================================================================
+
+async def dequeue_next_job() -> Optional[dict]:
+    """
+    Tire le prochain job à exécuter.
+
+    Returns:
+        dict: Le job (payload JSON décodé) ou None si rien n'est exécutable
+              (backlog vide ou tous les tenants au plafond).
+    """
+    redis = get_redis()
+
+    async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+        for queue_class in settings.QUEUE_CLASSES:
+            job = await _dequeue_from_class(redis, queue_class)
+            if job is not None:
+                # Bail initial : couvre le délai avant que le watchdog ne prenne le relais
+                # (started_at sert à l'API pour estimer le travail restant des jobs en cours)
+                await redis.hset(INFLIGHT_KEY, job["job_id"], json.dumps({**job, "started_at": time.time()}))
+                await redis.set(lease_key(job["job_id"]), "1", ex=settings.JOB_LEASE_SECONDS)
+                return job
+        return None
+
+
+async def promote_delayed_jobs() -> List[dict]:
+    """
+    Remet en tête de file les jobs différés dont l'échéance est passée (tous pools).
+
+    Returns:
+        list: Jobs promus ; l'appelant émet un jeton pour chacun
+    """
+    redis = get_redis()
+    if not await redis.zcount(DELAYED_KEY, "-inf", time.time()):
+        return []
+
+    promoted = []
+    async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+        for raw in await redis.zrangebyscore(DELAYED_KEY, "-inf", time.time()):
+            # Un autre worker a pu le promouvoir entre-temps
+            if not await redis.zrem(DELAYED_KEY, raw):
+                continue
+            job = json.loads(raw)
+            queue_class = job.get("queue_class", settings.DEFAULT_QUEUE_CLASS)
+            await redis.lpush(queue_key(queue_class, job["tenant"]), raw)
+            if await redis.lpos(active_key(queue_class), job["tenant"]) is None:
+                await redis.rpush(active_key(queue_class), job["tenant"])
+            promoted.append(job)
+    return promoted
+
+
+async def _dequeue_from_class(redis, queue_class: str) -> Optional[dict]:
+    """Un tour de DRR sur les tenants d'une classe (appelé sous verrou)."""
+    ring = active_key(queue_class)
+    deficits = deficit_key(queue_class)
+    skipped = set()
+
+    for _ in range(MAX_DRR_ITERATIONS):
+        tenant = await redis.lindex(ring, 0)
+        if tenant is None:
+            return None
+
+        # Tenant sans backlog : il quitte le tourniquet et perd son crédit
+        raw_head = await redis.lindex(queue_key(queue_class, tenant), 0)
+        if raw_head is None:
+            await redis.lpop(ring)
+            await redis.hdel(deficits, tenant)
+            continue
+
+        head = json.loads(raw_head)
+
+        # Tenant au plafond, ou job de tête destiné à un autre pool : on passe au suivant sans créditer
+        if not is_eligible(head) or await redis.scard(running_key(tenant)) >= get_max_running(tenant):
+            skipped.add(tenant)
+            if len(skipped) >= await redis.llen(ring):
+                return None
+            await redis.lmove(ring, ring, "LEFT", "RIGHT")
+            continue
+
+        cost = float(head.get("cost", 1.0))
+        deficit = float(await redis.hget(deficits, tenant) or 0.0)
+
+        # Un job repris après préemption a déjà payé son coût : il repasse sans crédit
+        if head.get("resume"):
+            cost = 0.0
+
+        if deficit >= cost:
+            # Le crédit couvre le job : on le sert (le tenant garde la main)
+            await redis.lpop(queue_key(queue_class, tenant))
+            await redis.hset(deficits, tenant, deficit - cost)
+            await redis.sadd(running_key(tenant), head["job_id"])
+
+            if await redis.llen(queue_key(queue_class, tenant)) == 0:
+                await redis.lrem(ring, 1, tenant)
+                await redis.hdel(deficits, tenant)
+
+            logger.info(
+                f"🎟️ [DRR] {queue_class}/{tenant} servi : job {head['job_id']} "
+                f"(coût {cost:.0f}s, crédit restant {deficit - cost:.0f}s)"
+            )
+            return head
+
+        # Crédit insuffisant : fin du tour, on crédite et on passe en queue
+        weight = get_weight(tenant)
+        await redis.hset(deficits, tenant, deficit + settings.FAIR_SHARE_QUANTUM_SECONDS * weight)
+        await redis.hset(WEIGHTS_KEY, tenant, weight)
+        await redis.lmove(ring, ring, "LEFT", "RIGHT")
+
+    logger.warning(f"⚠️ [DRR] Nombre max d'itérations atteint ({queue_class}), aucun job servi")
+    return None
+
+
+async def pending_jobs_count() -> int:
+    """Nombre de jobs prêts exécutables par ce worker (hors jobs différés), toutes classes."""
+    redis = get_redis()
+    if not settings.ROUTING_ENABLED:
+        total = 0
+        for queue_class in settings.QUEUE_CLASSES:
+            for tenant in await redis.lrange(active_key(queue_class), 0, -1):
+                total += await redis.llen(queue_key(queue_class, tenant))
+        return total
+
+    jobs = []
+    for queue_class in settings.QUEUE_CLASSES:
+        for tenant in await redis.lrange(active_key(queue_class), 0, -1):
+            jobs += await redis.lrange(queue_key(queue_class, tenant), 0, -1)
+    return sum(1 for raw in jobs if is_eligible(json.loads(raw)))
+
+
+# =============================================================================
+# REMISE EN FILE / FIN DE JOB
+# =============================================================================
+
+async def requeue_job(job: dict, front: bool = True) -> None:
+    """
+    Remet un job dans la file de son tenant (ex: après préemption).
+
+    Args:
+        job: Payload du job
+        front: True pour le remettre en tête (il reprend dès que possible)
+    """
+    redis = get_redis()
+    queue_class = job.get("queue_class", settings.DEFAULT_QUEUE_CLASS)
+    tenant = job["tenant"]
+
+    async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+        if front:
+            await redis.lpush(queue_key(queue_class, tenant), json.dumps(job))
+        else:
+            await redis.rpush(queue_key(queue_class, tenant), json.dumps(job))
+        if await redis.lpos(active_key(queue_class), tenant) is None:
+            await redis.rpush(active_key(queue_class), tenant)
+
+
+async def complete_job(job: dict, served_seconds: float) -> None:
+    """
+    Libère le slot du tenant et comptabilise le temps de calcul consommé.
+
+    Args:
+        job: Payload du job (doit contenir tenant et job_id)
+        served_seconds: Durée réelle d'exécution (secondes)
+    """
+    redis = get_redis()
+    tenant = job["tenant"]
+    await redis.srem(running_key(tenant), job["job_id"])
+    await redis.hdel(INFLIGHT_KEY, job["job_id"])
+    await redis.delete(lease_key(job["job_id"]))
+    await redis.hincrbyfloat(SERVED_KEY, tenant, served_seconds)
+
+
+async def update_job_cost(job: dict, cost: float) -> None:
+    """
+    Remplace le coût estimé par l'API (taille du fichier) par la durée audio mesurée.
+
+    Le job en cours (sms:fair:inflight) porte alors la durée réelle : attente estimée
+    des pools (routage, ETA) et tentatives suivantes (retry, préemption) s'en servent.
+    """
+    job["cost"] = round(cost, 1)
+    redis = get_redis()
+    raw = await redis.hget(INFLIGHT_KEY, job["job_id"])
+    if raw is not None:
+        await redis.hset(INFLIGHT_KEY, job["job_id"], json.dumps({**json.loads(raw), "cost": job["cost"]}))
+
+
+async def schedule_retry(job: dict, delay: float) -> None:
+    """
+    Remet un job en file après `delay` secondes (backoff).
+
+    Le job attend dans sms:fair:delayed, sans jeton ; il est promu en tête de la file
+    de son tenant après l'échéance (`promote_delayed_jobs`), avec un nouveau jeton.
+    """
+    await get_redis().zadd(DELAYED_KEY, {json.dumps(job): time.time() + delay})
+
+
+# =============================================================================
+# RÉCUPÉRATION DES JOBS ORPHELINS (crash, OOM, redémarrage par le watchdog)
+# =============================================================================
+
+def renew_lease(job_id: str) -> None:
+    """Renouvelle le bail d'un job en cours (appelé depuis le thread du watchdog)."""
+    get_sync_redis().set(lease_key(job_id), "1", ex=settings.JOB_LEASE_SECONDS)
+
+
+def record_abort(job_id: str, reason: str) -> None:
+    """Note la cause d'un arrêt brutal, relue lors de la récupération du job."""
+    get_sync_redis().hset(FAILURES_KEY, job_id, reason)
+
+
+async def reap_orphaned_jobs() -> list:
+    """
+    Récupère les jobs dont le bail a expiré : le processus qui les exécutait est mort.
+
+    Exécuté au plus une fois par bail (JOB_LEASE_SECONDS) sur l'ensemble des workers.
+
+    Returns:
+        list: Couples (job, cause) des jobs libérés ; l'appelant décide du retry ou de la DLQ.
+    """
+    redis = get_redis()
+    if not await redis.set(REAPER_KEY, "1", nx=True, ex=settings.JOB_LEASE_SECONDS):
+        return []
+
+    orphans = []
+    async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+        for job_id, raw in (await redis.hgetall(INFLIGHT_KEY)).items():
+            if await redis.exists(lease_key(job_id)):
+                continue
+            job = json.loads(raw)
+            reason = await redis.hget(FAILURES_KEY, job_id) or "Worker perdu (crash ou OOM)"
+            await redis.hdel(INFLIGHT_KEY, job_id)
+            await redis.hdel(FAILURES_KEY, job_id)
+            await redis.srem(running_key(job["tenant"]), job_id)
+            logger.warning(f"🧟 [Fiabilité] Job orphelin {job_id} récupéré : {reason}")
+            orphans.append((job, reason))
+    return orphans
+
+
+# =============================================================================
+# PRÉEMPTION
+# =============================================================================
+
+def should_yield(job: dict) -> bool:
+    """
+    Indique si un job en cours doit céder sa place à un job plus prioritaire.
+
+    Seules les classes listées dans PREEMPTIBLE_QUEUE_CLASSES sont préemptibles.
+    On ne cède que si un job d'une classe strictement plus prioritaire attend
+    depuis plus de PREEMPTION_GRACE_SECONDS (sinon un worker libre l'aurait déjà pris)
+    et que ce worker pourrait le servir, avec les règles du dequeue : job de son pool,
+    tenant sous son plafond de jobs simultanés (le slot libéré par ce job compte).
+    Sinon le job préempté reprendrait aussitôt, puis céderait à chaque étape.
+
+    Version synchrone : appelée aussi depuis les boucles de transcription.
+    """
+    queue_class = job.get("queue_class", settings.DEFAULT_QUEUE_CLASS)
+    if queue_class not in settings.PREEMPTIBLE_QUEUE_CLASSES:
+        return False
+
+    redis = get_sync_redis()
+    now = time.time()
+
+    for higher_class in settings.QUEUE_CLASSES[:class_rank(queue_class)]:
+        for tenant in redis.lrange(active_key(higher_class), 0, -1):
+            raw_head = redis.lindex(queue_key(higher_class, tenant), 0)
+            if raw_head is None:
+                continue
+            head = json.loads(raw_head)
+            waiting = now - float(head.get("enqueued_at", now))
+            if waiting < settings.PREEMPTION_GRACE_SECONDS or not is_eligible(head):
+                continue
+            running = redis.scard(running_key(tenant))
+            if tenant == job.get("tenant") and redis.sismember(running_key(tenant), job.get("job_id", "")):
+                running -= 1
+            if running < get_max_running(tenant):
+                return True
+    return False
@@ -0,0 +1,227 @@
+"""
+Session vectors : un embedding de voix par tour de parole, pour tous les meetings.
+
+Chaque tour de diarisation d'au moins SESSION_VECTOR_WINDOW_SECONDS donne un vecteur
+(fenêtre extraite au centre du tour, extraction par lots). Les vecteurs servent à
+retrouver les voix inconnues récurrentes (app/services/speaker_clusters.py) et, plus
+tard, à chercher un locuteur dans l'historique.
+
+Format compact : un fichier .npz par meeting, vecteurs normalisés quantifiés en int8
+avec une échelle par vecteur (≈ 260 octets par tour pour 256 dimensions, contre 1 Ko
+en float32 ; similarité cosinus conservée à ~3e-3 près). Un meeting rejoué réécrit son
+propre fichier : l'ajout est idempotent et ne touche jamais aux autres meetings.
+
+Stores :
+    s3     s3://{SESSION_VECTORS_BUCKET}/meetings/{meeting_id}.npz + clusters.npz (production)
+    local  {SESSION_VECTORS_LOCAL_DIR}/... même arborescence (hors ligne : tests, dev)
+"""
+import fcntl
+import io
+import json
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEETINGS_PREFIX = "meetings/"
+CLUSTERS_FILE = "clusters.npz"
+LOCK_KEY = "sms:session_vectors:lock"
+LOCK_TIMEOUT_SECONDS = 60
+
+
+# =============================================================================
+# QUANTIFICATION
+# =============================================================================
+
+def quantize(vectors: np.ndarray):
+    """Vecteurs float -> (int8, échelle par vecteur), après normalisation L2."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+    scales = np.abs(vectors).max(axis=1) / 127.0 + 1e-12
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+
+@dataclass
+class SessionVectors:
+    """Vecteurs des tours d'un meeting (vecteurs normalisés en float32 une fois chargés)."""
+    meeting_id: str
+    labels: List[str]
+    names: List[Optional[str]]
+    starts: np.ndarray
+    ends: np.ndarray
+    vectors: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def to_bytes(self) -> bytes:
+        codes, scales = quantize(self.vectors)
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            codes=codes,
+            scales=scales,
+            starts=np.asarray(self.starts, dtype=np.float32),
+            ends=np.asarray(self.ends, dtype=np.float32),
+            labels=np.asarray(self.labels, dtype=str),
+            names=np.asarray([name or "" for name in self.names], dtype=str),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, meeting_id: str, data: bytes) -> "SessionVectors":
+        arrays = np.load(io.BytesIO(data))
+        return cls(
+            meeting_id=meeting_id,
+            labels=arrays["labels"].tolist(),
+            names=[name or None for name in arrays["names"].tolist()],
+            starts=arrays["starts"],
+            ends=arrays["ends"],
+            vectors=dequantize(arrays["codes"], arrays["scales"]),
+        )
+
+
+# =============================================================================
+# STORES
+# =============================================================================
+
+class SessionVectorStore:
+    """Stockage des session vectors et de l'état du regroupement des voix inconnues."""
+
+    def _read(self, name: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _write(self, name: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _list(self, prefix: str) -> Iterator[str]:
+        raise NotImplementedError
+
+    def lock(self):
+        """Verrou exclusif entre workers (gestionnaire de contexte, mise à jour des clusters)."""
+        raise NotImplementedError
+
+    def append(self, batch: SessionVectors) -> None:
+        self._write(f"{MEETINGS_PREFIX}{batch.meeting_id}.npz", batch.to_bytes())
+
+    def load(self, meeting_id: str) -> Optional[SessionVectors]:
+        data = self._read(f"{MEETINGS_PREFIX}{meeting_id}.npz")
+        return SessionVectors.from_bytes(meeting_id, data) if data is not None else None
+
+    def meetings(self) -> List[str]:
+        return sorted(
+            name[len(MEETINGS_PREFIX):-len(".npz")]
+            for name in self._list(MEETINGS_PREFIX) if name.endswith(".npz")
+        )
+
+    def load_clusters(self) -> dict:
+        """État des clusters de voix inconnues : sommes en matrice float32, le reste en JSON."""
+        data = self._read(CLUSTERS_FILE)
+        if data is None:
+            return {"next_id": 1, "clusters": []}
+        arrays = np.load(io.BytesIO(data))
+        state = json.loads(str(arrays["meta"]))
+        for cluster, vector in zip(state["clusters"], arrays["sums"]):
+            cluster["sum"] = vector
+        return state
+
+    def save_clusters(self, state: dict) -> None:
+        clusters = state["clusters"]
+        meta = {**state, "clusters": [{k: v for k, v in c.items() if k != "sum"} for c in clusters]}
+        sums = np.stack([c["sum"] for c in clusters]).astype(np.float32) if clusters else np.zeros((0, 0), np.float32)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, sums=sums, meta=np.asarray(json.dumps(meta)))
+        self._write(CLUSTERS_FILE, buffer.getvalue())
+
+
+class LocalSessionVectorStore(SessionVectorStore):
+    """Store sur disque local (verrou fcntl) : tests et développement hors ligne."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, MEETINGS_PREFIX), exist_ok=True)
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.root, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.root, name)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _list(self, prefix: str) -> Iterator[str]:
+        for name in os.listdir(os.path.join(self.root, prefix)):
+            yield f"{prefix}{name}"
+
+    @contextmanager
+    def lock(self):
+        with open(os.path.join(self.root, ".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class S3SessionVectorStore(SessionVectorStore):
+    """Store MinIO (verrou Redis partagé par tous les workers)."""
+
+    def __init__(self, bucket: str):
+        from app.services.storage import get_s3_client
+        self.bucket = bucket
+        self.s3 = get_s3_client()
+        try:
+            self.s3.head_bucket(Bucket=bucket)
+        except Exception:
+            self.s3.create_bucket(Bucket=bucket)
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=name)["Body"].read()
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def _write(self, name: str, data: bytes) -> None:
+        self.s3.put_object(Bucket=self.bucket, Key=name, Body=data)
+
+    def _list(self, prefix: str) -> Iterator[str]:
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+    @contextmanager
+    def lock(self):
+        from app.core.redis_client import get_sync_redis
+        with get_sync_redis().lock(LOCK_KEY, timeout=LOCK_TIMEOUT_SECONDS, blocking_timeout=LOCK_TIMEOUT_SECONDS):
+            yield
+
+
+_store = None
+
+
+def get_session_vector_store() -> SessionVectorStore:
+    """Store configuré (SESSION_VECTORS_STORE), créé à la demande."""
+    global _store
+    if _store is None:
+        if settings.SESSION_VECTORS_STORE == "local":
+            _store = LocalSessionVectorStore(settings.SESSION_VECTORS_LOCAL_DIR)
+        else:
+            _store = S3SessionVectorStore(settings.SESSION_VECTORS_BUCKET)
+    return _store
@@ -0,0 +1,104 @@
+"""
+Shortlist d'identités par groupe récurrent (COMOP, points hebdomadaires...).
+
+Les mêmes personnes reviennent d'une semaine à l'autre : l'identification compare
+d'abord chaque locuteur aux identités reconnues dans les derniers meetings du
+groupe, et ne parcourt la banque complète que si le meilleur score de la shortlist
+reste sous SHORTLIST_CONFIDENCE_THRESHOLD (plus strict que le seuil de la banque,
+une shortlist courte donnant moins de concurrents à un faux positif).
+
+L'embedding conservé est celui de la personne telle qu'entendue dans le groupe
+(salle, micro), moyenne mobile des meetings successifs (SHORTLIST_EMBEDDING_ALPHA).
+Seules les SHORTLIST_MAX_IDENTITIES identités vues le plus récemment, depuis moins
+de SHORTLIST_TTL_DAYS, sont gardées.
+
+Structure Redis :
+    sms:shortlist:{group_id}  HASH  person_id -> {"embedding", "last_seen", "meetings"}
+    sms:shortlist:stats       HASH  compteurs (hits, fallbacks)
+"""
+import json
+import logging
+import time
+from typing import Dict, Iterable
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.redis_client import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+SHORTLIST_PREFIX = "sms:shortlist"
+STATS_KEY = f"{SHORTLIST_PREFIX}:stats"
+
+
+def shortlist_key(group_id) -> str:
+    return f"{SHORTLIST_PREFIX}:{group_id}"
+
+
+def load_shortlist(group_ids: Iterable) -> Dict[str, np.ndarray]:
+    """
+    Identités récentes des groupes du meeting.
+
+    Returns:
+        dict: {person_id: embedding} (entrée la plus récente si la personne est dans plusieurs groupes)
+    """
+    redis = get_sync_redis()
+    oldest = time.time() - settings.SHORTLIST_TTL_DAYS * 86400
+    entries = {}
+    for group_id in group_ids:
+        for person_id, raw in redis.hgetall(shortlist_key(group_id)).items():
+            entry = json.loads(raw)
+            if entry["last_seen"] < oldest:
+                continue
+            if person_id not in entries or entry["last_seen"] > entries[person_id]["last_seen"]:
+                entries[person_id] = entry
+    return {person_id: np.asarray(entry["embedding"], dtype=np.float32) for person_id, entry in entries.items()}
+
+
+def record_identities(group_ids: Iterable, seen: Dict[str, np.ndarray]) -> None:
+    """
+    Met à jour la shortlist des groupes avec les identités reconnues dans un meeting.
+
+    Args:
+        group_ids: Groupes récurrents du meeting
+        seen: {person_id: embedding du locuteur dans ce meeting}
+    """
+    redis = get_sync_redis()
+    now = time.time()
+    alpha = settings.SHORTLIST_EMBEDDING_ALPHA
+    for group_id in group_ids:
+        key = shortlist_key(group_id)
+        current = {person_id: json.loads(raw) for person_id, raw in redis.hgetall(key).items()}
+        for person_id, embedding in seen.items():
+            embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+            previous = current.get(person_id)
+            if previous is not None and len(previous["embedding"]) == len(embedding):
+                embedding = alpha * embedding + (1 - alpha) * np.asarray(previous["embedding"], dtype=np.float32)
+            current[person_id] = {
+                "embedding": embedding.tolist(),
+                "last_seen": now,
+                "meetings": (previous or {}).get("meetings", 0) + 1,
+            }
+
+        # Identités trop anciennes ou au-delà de la taille max : retirées
+        oldest = now - settings.SHORTLIST_TTL_DAYS * 86400
+        kept = sorted(
+            (item for item in current.items() if item[1]["last_seen"] >= oldest),
+            key=lambda item: item[1]["last_seen"],
+            reverse=True,
+        )[: settings.SHORTLIST_MAX_IDENTITIES]
+        pipe = redis.pipeline()
+        pipe.delete(key)
+        if kept:
+            pipe.hset(key, mapping={person_id: json.dumps(entry) for person_id, entry in kept})
+            pipe.expire(key, settings.SHORTLIST_TTL_DAYS * 86400)
+        pipe.execute()
+
+
+def record_lookup(hit: bool) -> None:
+    """Compte les locuteurs reconnus par la shortlist vs renvoyés vers la banque complète."""
+    try:
+        get_sync_redis().hincrby(STATS_KEY, "hits" if hit else "fallbacks", 1)
+    except Exception as e:
+        logger.warning(f"⚠️ [Shortlist] Statistique non enregistrée : {e}")
@@ -0,0 +1,180 @@
+"""
+Regroupement incrémental des voix inconnues entre meetings.
+
+Après chaque meeting, chaque locuteur non identifié (au moins UNKNOWN_CLUSTER_MIN_SECONDS
+de parole) est résumé par la moyenne de ses session vectors puis :
+
+1. rattaché au cluster le plus proche si la similarité cosinus dépasse
+   UNKNOWN_CLUSTER_THRESHOLD (le centroïde devient la moyenne pondérée par la durée) ;
+2. sinon, il ouvre un nouveau cluster ;
+3. les clusters dont les centroïdes ont convergé au-delà du seuil sont fusionnés ;
+4. les voix d'un seul meeting absentes depuis UNKNOWN_CLUSTER_TTL_DAYS sont oubliées.
+
+Coût par meeting : O(locuteurs × clusters), sans jamais reclusteriser l'historique.
+Un cluster vu dans UNKNOWN_CLUSTER_MIN_MEETINGS meetings distincts est une voix
+récurrente à nommer ("C'est Albert" sur l'un de ses meetings).
+
+État (clusters.npz du store) :
+    {"next_id": 8, "clusters": [{"id": "U0007", "sum": ndarray (somme pondérée par la durée),
+      "seconds": 412.0, "members": [[meeting_id, label], ...], "last_seen": 1760000000.0}]}
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.session_vectors import SessionVectors, SessionVectorStore
+
+
+def _centroids(clusters: list) -> np.ndarray:
+    sums = np.stack([cluster["sum"] for cluster in clusters])
+    return sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-12)
+
+
+def _merge_converged(clusters: list) -> list:
+    """Fusionne les clusters dont les centroïdes dépassent le seuil (jamais deux voix d'un même meeting)."""
+    while len(clusters) > 1:
+        centroids = _centroids(clusters)
+        scores = np.triu(centroids @ centroids.T, k=1)
+        pairs = np.argwhere(scores >= settings.UNKNOWN_CLUSTER_THRESHOLD)
+        pairs = sorted(pairs.tolist(), key=lambda pair: scores[pair[0], pair[1]], reverse=True)
+        meetings = lambda cluster: {meeting for meeting, _ in cluster["members"]}
+        pair = next((p for p in pairs if not meetings(clusters[p[0]]) & meetings(clusters[p[1]])), None)
+        if pair is None:
+            break
+        i, j = pair
+        keep, drop = (i, j) if clusters[i]["seconds"] >= clusters[j]["seconds"] else (j, i)
+        clusters[keep]["sum"] = clusters[keep]["sum"] + clusters[drop]["sum"]
+        clusters[keep]["seconds"] += clusters[drop]["seconds"]
+        clusters[keep]["members"] += clusters[drop]["members"]
+        clusters[keep]["last_seen"] = max(clusters[keep]["last_seen"], clusters[drop]["last_seen"])
+        del clusters[drop]
+    return clusters
+
+
+def update_clusters(state: dict, meeting_id: str, speakers: Dict[str, Tuple[np.ndarray, float]]) -> Dict[str, str]:
+    """
+    Ajoute les locuteurs inconnus d'un meeting aux clusters (état modifié sur place).
+
+    Args:
+        state: État des clusters (voir en-tête)
+        meeting_id: Meeting traité
+        speakers: {label: (vecteur moyen normalisé, secondes de parole)}
+
+    Returns:
+        dict: {label: id du cluster}
+    """
+    clusters = state["clusters"]
+    # Meeting rejoué : déjà compté, on renvoie son affectation
+    known = {
+        label: cluster["id"]
+        for cluster in clusters for member_meeting, label in cluster["members"]
+        if member_meeting == meeting_id
+    }
+    if known:
+        return known
+
+    now = time.time()
+    assigned = {}
+    for label, (vector, seconds) in speakers.items():
+        if seconds < settings.UNKNOWN_CLUSTER_MIN_SECONDS:
+            continue
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        vector = vector / (np.linalg.norm(vector) + 1e-12)
+        # Deux locuteurs d'un même meeting sont des personnes différentes : pas le même cluster
+        taken = set(assigned.values())
+        candidates = [index for index, cluster in enumerate(clusters) if cluster["id"] not in taken]
+        best, score = None, -1.0
+        if candidates:
+            scores = _centroids([clusters[index] for index in candidates]) @ vector
+            position = int(np.argmax(scores))
+            best, score = candidates[position], float(scores[position])
+
+        if best is not None and score >= settings.UNKNOWN_CLUSTER_THRESHOLD:
+            cluster = clusters[best]
+            cluster["sum"] = cluster["sum"] + seconds * vector
+            cluster["seconds"] += seconds
+            cluster["members"].append([meeting_id, label])
+            cluster["last_seen"] = now
+        else:
+            cluster = {
+                "id": f"U{state['next_id']:04d}",
+                "sum": seconds * vector,
+                "seconds": seconds,
+                "members": [[meeting_id, label]],
+                "last_seen": now,
+            }
+            state["next_id"] += 1
+            clusters.append(cluster)
+        assigned[label] = cluster["id"]
+
+    # Voix entendues dans un seul meeting et plus revenues : invités ponctuels, oubliés
+    oldest = now - settings.UNKNOWN_CLUSTER_TTL_DAYS * 86400
+    clusters = [
+        cluster for cluster in clusters
+        if cluster["last_seen"] >= oldest or len({meeting for meeting, _ in cluster["members"]}) > 1
+    ]
+    state["clusters"] = _merge_converged(clusters)
+    # Après fusion, un label peut appartenir à un cluster absorbé : affectation relue
+    return {
+        label: cluster["id"]
+        for cluster in state["clusters"] for member_meeting, label in cluster["members"]
+        if member_meeting == meeting_id
+    }
+
+
+def add_meeting(store: SessionVectorStore, meeting_id: str, speakers: Dict[str, Tuple[np.ndarray, float]]) -> Dict[str, str]:
+    """Met à jour les clusters du store avec les locuteurs inconnus d'un meeting (sous verrou)."""
+    with store.lock():
+        state = store.load_clusters()
+        assigned = update_clusters(state, meeting_id, speakers)
+        store.save_clusters(state)
+    return assigned
+
+
+def record_meeting(
+    store: SessionVectorStore, meeting_id: str, turns: list, names: Dict[str, Optional[str]], vectors: np.ndarray,
+) -> Dict[str, str]:
+    """
+    Enregistre les session vectors d'un meeting puis rattache ses locuteurs inconnus
+    (moyenne de leurs vecteurs, pondérée par la durée des tours) aux clusters.
+
+    Args:
+        turns: [(tour, label)] dans l'ordre des vecteurs
+        names: {label: nom retenu, None si non identifié}
+        vectors: Un embedding par tour
+
+    Returns:
+        dict: {label: id du cluster de voix inconnue}
+    """
+    store.append(SessionVectors(
+        meeting_id=meeting_id,
+        labels=[label for _, label in turns],
+        names=[names[label] for _, label in turns],
+        starts=np.asarray([turn.start for turn, _ in turns]),
+        ends=np.asarray([turn.end for turn, _ in turns]),
+        vectors=vectors,
+    ))
+    unknown = {}
+    normalized = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+    for (turn, label), vector in zip(turns, normalized):
+        if names[label] is None:
+            total, seconds = unknown.get(label, (0.0, 0.0))
+            unknown[label] = (total + turn.duration * vector, seconds + turn.duration)
+    return add_meeting(store, meeting_id, unknown) if unknown else {}
+
+
+def recurring_clusters(state: dict) -> list:
+    """Voix inconnues vues dans au moins UNKNOWN_CLUSTER_MIN_MEETINGS meetings, les plus fréquentes d'abord."""
+    summaries = [
+        {
+            "id": cluster["id"],
+            "meetings": sorted({meeting for meeting, _ in cluster["members"]}),
+            "seconds": round(cluster["seconds"], 1),
+            "last_seen": cluster["last_seen"],
+        }
+        for cluster in state["clusters"]
+    ]
+    recurring = [s for s in summaries if len(s["meetings"]) >= settings.UNKNOWN_CLUSTER_MIN_MEETINGS]
+    return sorted(recurring, key=lambda s: len(s["meetings"]), reverse=True)
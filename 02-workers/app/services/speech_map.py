@@ -0,0 +1,64 @@
+"""
+Carte de parole d'un meeting : zones où quelqu'un parle (VAD Silero de faster-whisper).
+
+Calculée une fois par meeting après la conversion, puis passée à Whisper sous forme
+de `clip_timestamps` quand le profil de traitement filtre le silence (vad_filter) :
+Whisper ne décode que la parole, sans refaire son propre VAD. La carte fait partie
+du point de reprise du job : une reprise après préemption et la passe de
+raffinement d'un brouillon la réutilisent telle quelle.
+
+Format : [[début, fin], ...] en secondes, zones d'au plus MAX_REGION_SECONDS (une
+fenêtre Whisper), dans l'ordre chronologique.
+"""
+import wave
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+SAMPLE_RATE = 16000
+# Fenêtre de décodage Whisper : une zone plus longue serait tronquée par le décodage par lots
+MAX_REGION_SECONDS = 30
+
+
+def read_wav(wav_path: str) -> np.ndarray:
+    """WAV PCM 16 bits mono 16 kHz (sortie de la conversion) -> float32 dans [-1, 1]."""
+    with wave.open(wav_path) as wav:
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def compute_speech_map(wav_path: str) -> List[List[float]]:
+    """
+    Zones de parole du fichier (VAD Silero, modèle ONNX embarqué par faster-whisper).
+
+    Returns:
+        list: [[début, fin], ...] en secondes
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    options = VadOptions(
+        max_speech_duration_s=MAX_REGION_SECONDS,
+        min_silence_duration_ms=settings.SPEECH_MAP_MIN_SILENCE_MS,
+        speech_pad_ms=settings.SPEECH_MAP_PAD_MS,
+    )
+    chunks = get_speech_timestamps(read_wav(wav_path), options, sampling_rate=SAMPLE_RATE)
+    return [[round(c["start"] / SAMPLE_RATE, 3), round(c["end"] / SAMPLE_RATE, 3)] for c in chunks]
+
+
+def speech_seconds(regions: List[List[float]]) -> float:
+    return sum(end - start for start, end in regions)
+
+
+def clip_timestamps(regions: List[List[float]], start_offset: float = 0.0) -> Optional[List[float]]:
+    """
+    Zones restant à décoder après `start_offset` (reprise), au format faster-whisper
+    [début, fin, début, fin, ...] ; None s'il n'y a plus de parole à transcrire.
+    """
+    clips = []
+    for start, end in regions:
+        if end <= start_offset:
+            continue
+        clips += [max(start, start_offset), end]
+    return clips or None
@@ -1,8 +1,15 @@
 import json
 import boto3
+from botocore.config import Config
 from datetime import datetime
 from app.core.config import settings
 
+# Fichiers du renommage rétroactif (voir app/services/relabel.py)
+RAW_FUSION_FILE = "fusion_raw.json"
+SPEAKERS_FILE = "speakers.json"
+# Conditions du traitement (profil vitesse / qualité appliqué)
+METADATA_FILE = "metadata.json"
+
 
 def get_s3_client():
     """Crée un client S3 boto3 configuré pour MinIO."""
@@ -10,16 +17,26 @@ def get_s3_client():
         "s3",
         endpoint_url=f"http://{settings.MINIO_ENDPOINT}",
         aws_access_key_id=settings.MINIO_ACCESS_KEY,
-        aws_secret_access_key=settings.MINIO_SECRET_KEY
+        aws_secret_access_key=settings.MINIO_SECRET_KEY,
+        # Retries avec backoff exponentiel sur les erreurs transitoires (5xx, throttling, réseau)
+        config=Config(retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"})
     )
 
 
-def save_results(clean_name, annotation, raw_segments, fusion_segments):
+def save_results(clean_name, annotation, raw_segments, fusion_segments, raw_fusion_segments=None, speakers=None,
+                 metadata=None):
     """
     Sauvegarde les résultats (JSON) sur MinIO (S3) via boto3.
     Plus de disque dur local !
     
     Structure S3 : s3://processed/YYYYMMDD_HHMMSS_nomdufichier/
+        diarization.json, transcription.json, fusion.json
+        fusion_raw.json  segments avec les labels de diarisation (SPEAKER_00...)
+        speakers.json    {label: {embedding, seconds, name, person_id, score, source}} (centroïdes)
+        metadata.json    {meeting_id, profile: {name, options, key}} (profil de traitement)
+
+    fusion_raw.json et speakers.json permettent de réécrire fusion.json quand une
+    identité est ajoutée ou renommée (app/services/relabel.py), sans retraiter l'audio.
     """
     
     # 1. Construction du chemin S3 unique (Timestamp)
@@ -68,6 +85,11 @@ def save_results(clean_name, annotation, raw_segments, fusion_segments):
     write_json_to_s3("diarization.json", diarization_data)
     write_json_to_s3("transcription.json", transcription_data)
     write_json_to_s3("fusion.json", fusion_segments)
+    if raw_fusion_segments is not None and speakers is not None:
+        write_json_to_s3(RAW_FUSION_FILE, raw_fusion_segments)
+        write_json_to_s3(SPEAKERS_FILE, speakers)
+    if metadata is not None:
+        write_json_to_s3(METADATA_FILE, metadata)
     
     # On retourne le chemin S3 pour que le Worker puisse le confirmer
     return base_path
\ No newline at end of file
@@ -1,4 +1,161 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from app.core.config import settings
 from app.core.models import load_whisper
+from app.services.speech_map import clip_timestamps
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class TranscriptSegment:
+    """Segment transcrit (sous-ensemble sérialisable d'un segment faster-whisper)."""
+    start: float
+    end: float
+    text: str
+
+    def to_json(self) -> dict:
+        return {"start": self.start, "end": self.end, "text": self.text}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "TranscriptSegment":
+        return cls(data["start"], data["end"], data["text"])
+
+
+# =============================================================================
+# PROFILS VITESSE / QUALITÉ
+# =============================================================================
+
+def processing_profile(name: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    Profil de traitement d'un job (PROCESSING_PROFILES).
+
+    Un profil absent ou inconnu du Worker (configuration API / Worker désalignée)
+    retombe sur DEFAULT_PROCESSING_PROFILE.
+
+    Returns:
+        tuple: (nom du profil, options faster-whisper)
+    """
+    profiles = settings.PROCESSING_PROFILES
+    if name not in profiles:
+        if name:
+            logger.warning(f"⚠️ Profil de traitement inconnu '{name}', profil {settings.DEFAULT_PROCESSING_PROFILE} utilisé")
+        name = settings.DEFAULT_PROCESSING_PROFILE
+    return name, dict(profiles.get(name, {}))
+
+
+def profile_metadata(name: Optional[str] = None) -> dict:
+    """
+    Profil appliqué, tel qu'enregistré avec les résultats (metadata.json).
+
+    La clé dépend des options effectives et non du nom : un profil redéfini
+    (PROCESSING_PROFILES) ne se confond pas avec son ancienne version.
+    """
+    name, options = processing_profile(name)
+    digest = hashlib.sha1(json.dumps(options, sort_keys=True).encode()).hexdigest()[:12]
+    return {"name": name, "options": options, "key": f"{name}-{digest}"}
+
+
+# =============================================================================
+# TRANSCRIPTION
+# =============================================================================
+
+def whisper_segments(model, wav_path: str, options: dict) -> Iterator[TranscriptSegment]:
+    """
+    Décode le fichier avec faster-whisper selon les options d'un profil.
+
+    - clip_timestamps [début, fin, ...] : zones de la carte de parole, seules décodées
+      (le VAD de faster-whisper n'est pas refait) ;
+    - batch_size > 1 : BatchedInferencePipeline, zones décodées par lots (audio
+      chargé en mémoire, ~230 Mo par heure) ;
+    - reprise (clip_timestamps [offset]) avec le VAD, sans carte de parole :
+      faster-whisper ignore le VAD quand clip_timestamps est fourni, la fin du
+      fichier est donc décodée à part et ses horodatages décalés.
+    """
+    options = dict(options)
+    batch_size = int(options.pop("batch_size", 1) or 1)
+    clips = [float(t) for t in options.pop("clip_timestamps", None) or []]
+
+    if len(clips) > 1:
+        options["vad_filter"] = False
+        if batch_size > 1:
+            from faster_whisper import BatchedInferencePipeline, decode_audio
+            regions = [{"start": start, "end": end} for start, end in zip(clips[::2], clips[1::2])]
+            segments, _ = BatchedInferencePipeline(model=model).transcribe(
+                decode_audio(wav_path, sampling_rate=SAMPLE_RATE),
+                batch_size=batch_size, clip_timestamps=regions, **options,
+            )
+        else:
+            segments, _ = model.transcribe(wav_path, clip_timestamps=clips, **options)
+        for segment in segments:
+            yield TranscriptSegment(float(segment.start), float(segment.end), segment.text)
+        return
+
+    offset = clips[0] if clips else 0.0
+    if batch_size <= 1 and not (options.get("vad_filter") and offset > 0):
+        if offset > 0:
+            options["clip_timestamps"] = [offset]
+        segments, _ = model.transcribe(wav_path, **options)
+        for segment in segments:
+            yield TranscriptSegment(float(segment.start), float(segment.end), segment.text)
+        return
+
+    from faster_whisper import decode_audio
+    audio = decode_audio(wav_path, sampling_rate=SAMPLE_RATE)[int(offset * SAMPLE_RATE):]
+    if batch_size > 1:
+        from faster_whisper import BatchedInferencePipeline
+        # Le pipeline par lots n'accepte un audio de plus de 30 s que découpé par le VAD
+        options["vad_filter"] = True
+        segments, _ = BatchedInferencePipeline(model=model).transcribe(audio, batch_size=batch_size, **options)
+    else:
+        segments, _ = model.transcribe(audio, **options)
+    for segment in segments:
+        yield TranscriptSegment(offset + float(segment.start), offset + float(segment.end), segment.text)
+
+
+def iter_transcription(
+    wav_path: str,
+    start_offset: float = 0.0,
+    profile: Optional[str] = None,
+    speech_map: Optional[List[List[float]]] = None,
+) -> Iterator[TranscriptSegment]:
+    """
+    Transcrit le fichier au fil de l'eau (générateur faster-whisper).
+
+    Args:
+        wav_path: Chemin vers le fichier audio WAV à transcrire
+        start_offset: Position (secondes) à partir de laquelle reprendre la transcription
+        profile: Profil de traitement (PROCESSING_PROFILES), DEFAULT_PROCESSING_PROFILE par défaut
+        speech_map: Zones de parole (app/services/speech_map.py) ; seules décodées si
+            le profil filtre le silence (vad_filter)
+
+    Yields:
+        TranscriptSegment: Segments dans l'ordre chronologique
+    """
+    _, options = processing_profile(profile)
+    if speech_map is not None and options.get("vad_filter"):
+        options["clip_timestamps"] = clip_timestamps(speech_map, start_offset)
+        if options["clip_timestamps"] is None:
+            # Plus de parole après le point de reprise (ou fichier sans parole)
+            return
+    elif start_offset > 0:
+        # Reprise après préemption : on ne décode que la fin du fichier
+        options["clip_timestamps"] = [start_offset]
+
+    if settings.INFERENCE_SERVER_ENABLED:
+        # Whisper chargé une seule fois par le serveur d'inférence du nœud
+        from app.inference import client
+        for segment in client.transcribe(wav_path, options):
+            yield TranscriptSegment(segment["start"], segment["end"], segment["text"])
+        return
+
+    yield from whisper_segments(load_whisper(), wav_path, options)
 
 
 def run_transcription(wav_path: str) -> list:
@@ -11,6 +168,4 @@ def run_transcription(wav_path: str) -> list:
     Returns:
         Liste des segments transcrits
     """
-    model = load_whisper()
-    segments, info = model.transcribe(wav_path, beam_size=5)
-    return list(segments)
+    return list(iter_transcription(wav_path))
@@ -0,0 +1,141 @@
+"""
+Lanceur du worker sur nœud CPU : poids des modèles partagés en copy-on-write.
+
+`taskiq worker` démarre WORKER_CONCURRENCY processus en mode spawn (obligatoire
+avec CUDA) : chacun importe torch/pyannote et charge ses propres modèles, la RAM est
+multipliée par N. Sur un nœud CPU, ce lanceur :
+1. importe les bibliothèques lourdes et charge SHARED_MODELS dans le processus parent
+   (torch limité à 1 thread : aucun pool OpenMP ne doit exister avant le fork),
+2. fige le tas Python (gc.freeze) pour que le GC des enfants ne réécrive pas les
+   pages partagées,
+3. démarre les workers Taskiq par fork : les poids et les modules importés restent
+   des pages communes tant qu'ils ne sont pas modifiés (inférence en lecture seule).
+
+Whisper (CTranslate2) n'est pas partageable ainsi : son pool de threads natif est
+créé à la construction du modèle et ne survit pas au fork. Chaque worker le charge
+lui-même (warm-up).
+
+Profil d'exécution CPU (`settings.cpu_profile`, appliqué par `apply_cpu_profile` au
+démarrage de chaque worker, lanceur ou `taskiq worker`) : les cœurs sont répartis
+entre les processus (threads intra/inter-op torch, `cpu_threads`/`num_workers` de
+faster-whisper), avec épinglage optionnel sur des cœurs ou un nœud NUMA
+(CPU_AFFINITY). `scripts/cpu_profile_bench.py` cherche la répartition optimale.
+
+Usage (mêmes arguments que `taskiq worker`) :
+    DEVICE=cpu python -m app.worker.cpu_launcher app.broker:broker --fs-discover --workers 4
+"""
+import gc
+import logging
+import multiprocessing
+import os
+import sys
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _shared_loaders() -> dict:
+    from app.core.models import load_embedding_model, load_pyannote
+
+    return {"pyannote": load_pyannote, "embedding": load_embedding_model}
+
+
+def preload_shared_models(workers: int) -> list:
+    """
+    Charge les modèles partagés dans le processus courant, avant le fork des workers.
+
+    Args:
+        workers: Nombre de processus qui seront forkés (répartition des threads torch)
+
+    Returns:
+        list: Modèles chargés
+
+    Raises:
+        RuntimeError: si le device n'est pas le CPU (un contexte CUDA ne survit pas au fork)
+    """
+    if settings.DEVICE != "cpu":
+        raise RuntimeError(f"Partage copy-on-write réservé au CPU (DEVICE={settings.DEVICE})")
+
+    import torch
+
+    # Pas de GC pendant le chargement : les objets créés restent compacts et non modifiés
+    gc.disable()
+    torch.set_num_threads(1)
+
+    loaders = _shared_loaders()
+    loaded = []
+    for name in settings.SHARED_MODELS:
+        if name not in loaders:
+            logger.warning(f"⚠️ [CPU] Modèle non partageable ignoré : {name}")
+            continue
+        loaders[name]()
+        loaded.append(name)
+
+    # Les enfants ne doivent jamais décharger les modèles hérités (sinon rechargement privé)
+    settings.KEEP_MODELS_LOADED = True
+    # Les enfants forkés héritent de la répartition (profil CPU appliqué à leur démarrage)
+    settings.CPU_WORKERS = workers
+    threads = settings.cpu_profile(0).threads
+
+    def _after_fork_in_child() -> None:
+        gc.enable()
+        torch.set_num_threads(threads)
+
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"🧊 [CPU] Modèles partagés chargés dans le parent : {', '.join(loaded) or 'aucun'} "
+        f"({workers} worker(s), {threads} thread(s) torch chacun)"
+    )
+    return loaded
+
+
+def apply_cpu_profile(profile=None):
+    """
+    Applique le profil CPU au processus courant (avant le chargement de Whisper).
+
+    Returns:
+        CpuProfile: Profil appliqué
+    """
+    profile = profile or settings.cpu_profile()
+    if profile.cpus:
+        os.sched_setaffinity(0, profile.cpus)
+    # Bibliothèques natives chargées plus tard (MKL, OpenMP de CTranslate2)
+    os.environ["OMP_NUM_THREADS"] = str(profile.threads)
+    os.environ["MKL_NUM_THREADS"] = str(profile.threads)
+
+    import torch
+
+    torch.set_num_threads(profile.threads)
+    try:
+        torch.set_num_interop_threads(profile.interop_threads)
+    except RuntimeError:
+        # Déjà fixé (parent du lanceur) ou travail parallèle déjà lancé : on garde la valeur
+        pass
+    logger.info(
+        f"🧮 [CPU] Worker {profile.index + 1}/{profile.workers} : {profile.threads} thread(s) torch, "
+        f"{profile.interop_threads} inter-op, Whisper {profile.whisper_threads}×{profile.whisper_workers}, "
+        f"cœurs {list(profile.cpus) if profile.cpus else 'non épinglés'}"
+    )
+    return profile
+
+
+def main() -> int:
+    from taskiq.cli.worker.args import WorkerArgs
+    from taskiq.cli.worker.run import run_worker
+
+    args = WorkerArgs.from_cli(sys.argv[1:])
+    logging.basicConfig(level=args.log_level, format=args.log_format)
+
+    # Le ProcessManager de Taskiq crée ses workers (et les redémarre) avec la méthode par défaut
+    multiprocessing.set_start_method("fork", force=True)
+    os.environ["CPU_WORKERS"] = str(args.workers)
+    preload_shared_models(args.workers)
+    return run_worker(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
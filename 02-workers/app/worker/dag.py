@@ -0,0 +1,239 @@
+"""
+Graphe d'étapes (DAG) du pipeline.
+
+Chaque étape déclare :
+- ses entrées (étapes dont elle consomme la sortie),
+- sa ressource (io, cpu, gpu) et son besoin mémoire sur cette ressource (Mo),
+- les modèles qu'elle utilise (libérés quand plus aucune étape du processus n'en a besoin),
+- sa clé de checkpoint et ses fonctions de (dé)sérialisation, le cas échéant.
+
+`run_dag` lance chaque étape dès que ses entrées sont prêtes et que le budget mémoire
+de sa ressource (PIPELINE_MEMORY_BUDGET_MB) le permet : après la diarisation,
+l'identification (WeSpeaker sur CPU) tourne pendant la transcription Whisper.
+La même définition pilote les checkpoints (étapes déjà faites restaurées à la
+reprise), les timeouts et la mesure du RTF de chaque étape (PipelineJob), ainsi que
+l'ETA de l'API (graphe publié dans Redis, chemin critique).
+
+Plusieurs jobs peuvent tourner dans le même processus (--max-async-tasks) : une
+étape attend qu'une place de sa ressource se libère avant d'armer son timeout, pour
+ne pas consommer son budget derrière le Whisper ou le Pyannote d'un autre job (le
+watchdog redémarrerait alors le processus, et les deux jobs avec lui).
+
+Les modèles sont des singletons du processus (app.core.models) : chaque étape compte
+parmi les utilisateurs de ses modèles du début de son attente à sa fin, tous jobs
+confondus, et un modèle n'est libéré qu'à zéro utilisateur. Deux étapes qui partagent
+un modèle ne tournent jamais en même temps : le pool cpu (CPU_EXECUTOR_THREADS)
+exécuterait sinon l'identification d'un job et les vecteurs de session d'un autre sur
+la même instance WeSpeaker.
+"""
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.worker.executors import run_cpu, run_inference, run_io
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Étape du pipeline.
+
+    Args:
+        name: Nom (clé de STAGE_TIMEOUTS et du RTF publié)
+        run: Coroutine `run(pipeline_job, inputs)` ; `inputs` = {étape: sortie}
+        inputs: Étapes dont la sortie est requise
+        resource: "io", "cpu" ou "gpu"
+        memory_mb: Mémoire occupée sur la ressource pendant l'étape
+        models: Modèles chargés par l'étape (voir app.core.models.release_models)
+        state_key: Clé de la sortie dans l'état du job (None = pas de checkpoint)
+        save / restore: Sérialisation JSON de la sortie pour le checkpoint
+    """
+    name: str
+    run: Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+    resource: str = "cpu"
+    memory_mb: int = 0
+    models: Tuple[str, ...] = ()
+    state_key: Optional[str] = None
+    save: Optional[Callable[[Any], Any]] = None
+    restore: Optional[Callable[[Any], Any]] = None
+
+
+def dag_inputs(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Dépendances effectives ({étape: [entrées]}) ; chaîne linéaire si les étapes sont séquentielles."""
+    if not settings.PIPELINE_CONCURRENT_STAGES:
+        return {stage.name: [stages[i - 1].name] if i else [] for i, stage in enumerate(stages)}
+    return {stage.name: list(stage.inputs) for stage in stages}
+
+
+def _slots(resource: str) -> int:
+    """Étapes simultanées possibles sur une ressource (threads de son exécuteur)."""
+    if resource == "gpu":
+        return settings.INFERENCE_EXECUTOR_THREADS
+    if resource == "cpu":
+        return settings.CPU_EXECUTOR_THREADS
+    return settings.IO_EXECUTOR_THREADS
+
+
+def _fits(stage: Stage, running: List[Stage]) -> bool:
+    """L'étape peut-elle démarrer à côté des étapes en cours ?"""
+    if not running:
+        return True
+    if not settings.PIPELINE_CONCURRENT_STAGES:
+        return False
+    same = [s for s in running if s.resource == stage.resource]
+    if not same:
+        return True
+    # Une étape en attente d'un thread consommerait son timeout sans avancer
+    if len(same) >= _slots(stage.resource):
+        return False
+    budget = settings.PIPELINE_MEMORY_BUDGET_MB.get(stage.resource)
+    return budget is None or sum(s.memory_mb for s in same) + stage.memory_mb <= budget
+
+
+# Places de chaque ressource, partagées par tous les jobs du processus
+_stage_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _slot(resource: str) -> asyncio.Semaphore:
+    if resource not in _stage_slots:
+        _stage_slots[resource] = asyncio.Semaphore(max(1, _slots(resource)))
+    return _stage_slots[resource]
+
+
+# Accès exclusif à chaque modèle et étapes qui l'utilisent (en cours ou en attente),
+# tous jobs du processus confondus
+_model_locks: Dict[str, asyncio.Lock] = {}
+_model_users: Dict[str, int] = {}
+
+
+def _model_lock(model: str) -> asyncio.Lock:
+    if model not in _model_locks:
+        _model_locks[model] = asyncio.Lock()
+    return _model_locks[model]
+
+
+async def _lock_models(stack: AsyncExitStack, models) -> None:
+    # Ordre fixe : deux étapes à plusieurs modèles ne s'attendent pas mutuellement
+    for model in sorted(models):
+        await stack.enter_async_context(_model_lock(model))
+
+
+async def _run_stage(pipeline_job, stage: Stage, inputs: Dict[str, Any]) -> Any:
+    """
+    Exécute une étape dès qu'une place de sa ressource est libre dans le processus.
+
+    Le timeout est armé et le point de contrôle passé une fois ses modèles et la place
+    obtenus : l'attente derrière l'étape d'un autre job n'entre pas dans le budget de
+    l'étape. Les modèles sont réservés avant la place, pour qu'une étape qui attend un
+    modèle n'occupe pas un thread de la ressource.
+    """
+    for model in stage.models:
+        _model_users[model] = _model_users.get(model, 0) + 1
+    try:
+        async with AsyncExitStack() as stack:
+            await _lock_models(stack, stage.models)
+            await stack.enter_async_context(_slot(stage.resource))
+            if stage.state_key:
+                # Point de préemption : la sortie des étapes terminées est conservée
+                await run_io(pipeline_job.check, stage.name)
+            else:
+                pipeline_job.begin(stage.name)
+                await run_io(pipeline_job.check_cancelled, stage.name, force=True)
+            return await stage.run(pipeline_job, inputs)
+    finally:
+        for model in stage.models:
+            _model_users[model] -= 1
+        # Modèle CPU : ne pas attendre derrière l'étape GPU qui occupe le pool d'inférence
+        await release_unused_models(stage.models, run_cpu if stage.resource == "cpu" else run_inference)
+
+
+async def release_unused_models(models=("whisper", "pyannote", "embedding"), run=run_inference) -> None:
+    """
+    Libère ceux des `models` qu'aucune étape du processus n'utilise ni n'attend.
+
+    La libération se fait sous le verrou du modèle : une étape d'un autre job ne peut
+    pas le charger (ou l'utiliser) pendant qu'il est libéré.
+    """
+    from app.core.models import release_models
+
+    to_release = [model for model in models if not _model_users.get(model)]
+    if not to_release:
+        return
+    async with AsyncExitStack() as stack:
+        await _lock_models(stack, to_release)
+        # Une étape a pu réserver le modèle pendant l'attente du verrou
+        to_release = [model for model in to_release if not _model_users.get(model)]
+        if to_release:
+            await run(release_models, only=to_release)
+
+
+async def run_dag(pipeline_job, stages: List[Stage]) -> Dict[str, Any]:
+    """
+    Exécute le graphe d'étapes d'un job.
+
+    Une fois la place de sa ressource obtenue (`_run_stage`), une étape démarre son
+    timeout et passe un point de contrôle (annulation ; préemption pour les étapes
+    checkpointées). À la fin : libération des modèles devenus inutiles, checkpoint de
+    sa sortie et mesure de sa durée. Si une étape échoue (ou si le job
+    est préempté/annulé), les étapes en cours sont interrompues à leur prochain point
+    de contrôle et attendues avant de propager l'erreur.
+
+    Args:
+        pipeline_job: PipelineJob du job
+        stages: Étapes, dans un ordre topologique (ordre de lancement à égalité)
+
+    Returns:
+        dict: Sortie de chaque étape
+    """
+    dependencies = dag_inputs(stages)
+    outputs: Dict[str, Any] = {}
+    pending = list(stages)
+    running: Dict[asyncio.Task, Stage] = {}
+
+    try:
+        while pending or running:
+            launched = True
+            while launched:
+                launched = False
+                for stage in list(pending):
+                    if not all(dep in outputs for dep in dependencies[stage.name]):
+                        continue
+                    if stage.state_key and pipeline_job.is_done(stage.name):
+                        # Reprise : sortie restaurée depuis le checkpoint
+                        outputs[stage.name] = stage.restore(pipeline_job.state[stage.state_key])
+                        pending.remove(stage)
+                        launched = True
+                        continue
+                    if not _fits(stage, list(running.values())):
+                        continue
+                    inputs = {dep: outputs[dep] for dep in stage.inputs}
+                    running[asyncio.create_task(_run_stage(pipeline_job, stage, inputs))] = stage
+                    pending.remove(stage)
+                    launched = True
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Graphe d'étapes bloqué : {[s.name for s in pending]}")
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                outputs[stage.name] = task.result()
+                if stage.state_key:
+                    pipeline_job.complete(stage.name, **{stage.state_key: stage.save(outputs[stage.name])})
+                pipeline_job.end(stage.name)
+        return outputs
+
+    except BaseException as e:
+        if running:
+            # Les étapes tournent dans des threads : elles s'arrêtent à leur prochain point de contrôle
+            pipeline_job.abort(e)
+            await asyncio.gather(*running, return_exceptions=True)
+        raise
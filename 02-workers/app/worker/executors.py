@@ -0,0 +1,71 @@
+"""
+Exécuteurs des étapes bloquantes du pipeline.
+
+Les tâches Taskiq sont des coroutines : tout appel bloquant exécuté directement
+dans la boucle asyncio fige le processus (jetons, result backend, webhooks, autres
+jobs). Les étapes bloquantes sont donc déléguées à quatre pools de threads :
+
+- io : boto3 (téléchargement, upload, checkpoints), fichiers. Plusieurs jobs
+  du même processus peuvent ainsi recouvrir leurs I/O.
+- inference : Pyannote, WeSpeaker, Whisper et libération VRAM. Un seul thread
+  par défaut : les modèles (singletons de app.core.models) ne sont pas partagés
+  entre appels concurrents et la VRAM ne supporte qu'un job à la fois.
+- cpu : étapes dont le modèle est placé sur CPU (identification WeSpeaker), pour
+  qu'elles avancent pendant qu'une étape GPU occupe le pool d'inférence. Avec
+  plusieurs threads, deux étapes du même modèle ne tournent pas en même temps : le
+  DAG sérialise l'accès à chaque modèle (app.worker.dag), pas ce pool.
+- live : sessions en direct (VAD, Whisper réduit, WeSpeaker), un thread par
+  session simultanée (LIVE_SESSIONS_PER_WORKER) : une session lente ne retarde
+  pas les sous-titres des autres.
+
+Torch et CTranslate2 relâchent le GIL pendant l'inférence : la boucle reste réactive.
+FFmpeg passe par un sous-processus asyncio (voir app.services.audio).
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+
+io_executor = ThreadPoolExecutor(
+    max_workers=settings.IO_EXECUTOR_THREADS,
+    thread_name_prefix="sms-io",
+)
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.INFERENCE_EXECUTOR_THREADS,
+    thread_name_prefix="sms-inference",
+)
+
+cpu_executor = ThreadPoolExecutor(
+    max_workers=settings.CPU_EXECUTOR_THREADS,
+    thread_name_prefix="sms-cpu",
+)
+
+live_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.LIVE_SESSIONS_PER_WORKER),
+    thread_name_prefix="sms-live",
+)
+
+
+async def run_io(func, *args, **kwargs):
+    """Exécute un appel d'I/O bloquant (boto3, disque) hors de la boucle asyncio."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_inference(func, *args, **kwargs):
+    """Exécute un appel de modèle (GPU/CPU) dans le pool d'inférence."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Exécute un calcul CPU (modèle placé sur CPU) hors du pool d'inférence GPU."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_live(func, *args, **kwargs):
+    """Exécute un pas d'une session en direct (VAD, Whisper, WeSpeaker)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(live_executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,250 @@
+"""
+Contexte d'exécution d'un job du pipeline.
+
+Centralise ce qui se passe aux frontières d'étapes (étapes lancées par le DAG,
+app/worker/dag.py, éventuellement plusieurs à la fois) :
+- suivi des étapes terminées et de leurs sorties (sérialisables),
+- point de contrôle d'annulation (le meeting a été supprimé ou le job annulé),
+- point de contrôle de préemption (le job cède sa place à un job plus prioritaire),
+- timeout par étape (vérifié aux mêmes points de contrôle, le watchdog couvre
+  les appels bloqués qui n'en atteignent aucun),
+- sauvegarde / reprise de l'état partiel,
+- mesure de la durée de chaque étape (RTF publié pour les ETA de l'API).
+"""
+import logging
+import time
+
+from app.services.checkpoint import (
+    load_checkpoint,
+    save_checkpoint,
+    save_checkpoint_audio,
+    delete_checkpoint,
+)
+from app.core.config import settings
+from app.services.cancellation import is_cancelled
+from app.services.eta import record_pool_rtf, record_stage_rtf
+from app.services.scheduler import should_yield
+
+logger = logging.getLogger(__name__)
+
+
+class JobPreempted(Exception):
+    """Levée à une frontière d'étape quand le job doit céder sa place."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Job préempté avant l'étape '{stage}'")
+        self.stage = stage
+
+
+class JobCancelled(Exception):
+    """Levée quand le job a été annulé (meeting supprimé) : on libère le worker."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Job annulé (étape '{stage}')")
+        self.stage = stage
+
+
+class JobAborted(Exception):
+    """Levée dans une étape concurrente quand une autre étape du job a échoué ou l'a interrompu."""
+
+    def __init__(self, stage: str, reason: BaseException):
+        super().__init__(f"Étape '{stage}' interrompue ({type(reason).__name__})")
+        self.stage = stage
+
+
+class StageTimeout(Exception):
+    """Levée quand une étape dépasse son budget de temps (erreur transitoire, le job est retenté)."""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"Timeout de l'étape '{stage}' ({budget:.0f}s dépassées)")
+        self.stage = stage
+
+
+def stage_budget(stage: str, audio_seconds: float) -> float:
+    """Budget de temps d'une étape : base configurée + facteur × durée audio."""
+    base = float(settings.STAGE_TIMEOUTS.get(stage, 600))
+    return base + settings.STAGE_TIMEOUT_FACTOR * audio_seconds
+
+
+class PipelineJob:
+    """
+    État d'un job en cours d'exécution.
+
+    Args:
+        job: Payload du job (issu de l'ordonnanceur ou construit pour un appel direct)
+    """
+
+    def __init__(self, job: dict):
+        self.job = job
+        self.meeting_id = job["meeting_id"]
+        self.resumed = False
+        self.state = {"completed": []}
+        self.started = time.monotonic()
+        self._last_cancel_check = 0.0
+        # Durée audio : estimation de l'API, remplacée par la durée réelle après conversion
+        self.audio_seconds = float(job.get("cost", 0.0))
+        # Étapes en cours (plusieurs en parallèle avec le DAG) : {étape: (début, échéance, budget)}
+        self._running = {}
+        self._aborted = None
+        # Espace scratch et WAV converti (partagés par les étapes, conservés à la préemption)
+        self.workspace = None
+        self.audio_wav = None
+
+        if job.get("resume"):
+            checkpoint = load_checkpoint(self.meeting_id)
+            if checkpoint:
+                # Artefacts laissés par un brouillon (hand_over) : les étapes de ce job
+                # tournent en entier, leur RTF reste mesuré
+                self.resumed = not checkpoint.pop("handed_over", False)
+                self.state = checkpoint
+                logger.info(f"⏯️ [JOB {self.meeting_id}] Reprise (étapes déjà faites : {self.state['completed']})")
+
+    # ------------------------------------------------------------------
+    # Étapes
+    # ------------------------------------------------------------------
+
+    def begin(self, stage: str) -> None:
+        """Démarre une étape : arme son timeout (utilisé aussi par le watchdog)."""
+        if stage in self._running:
+            return
+        budget = stage_budget(stage, self.audio_seconds)
+        now = time.monotonic()
+        self._running[stage] = (now, now + budget, budget)
+
+    def end(self, stage: str, completed: bool = True) -> None:
+        """Termine une étape et publie son RTF (sauf reprise : durée partielle)."""
+        started, _, _ = self._running.pop(stage, (None, None, None))
+        if started is None or not completed or self.resumed:
+            return
+        record_stage_rtf(stage, time.monotonic() - started, self.audio_seconds)
+
+    def _next_deadline(self):
+        """(étape, échéance, budget) de l'étape en cours la plus proche de son timeout."""
+        # Copie : le dict est modifié par la boucle asyncio et lu par le watchdog
+        running = list(self._running.items())
+        if not running:
+            return None, None, 0.0
+        stage, (_, deadline, budget) = min(running, key=lambda item: item[1][1])
+        return stage, deadline, budget
+
+    @property
+    def stage(self):
+        return self._next_deadline()[0]
+
+    @property
+    def deadline(self):
+        return self._next_deadline()[1]
+
+    @property
+    def budget(self) -> float:
+        return self._next_deadline()[2]
+
+    def abort(self, reason: BaseException) -> None:
+        """Demande l'arrêt des étapes en cours (vu à leur prochain point de contrôle)."""
+        self._aborted = reason
+
+    def check_timeout(self) -> None:
+        """
+        Raises:
+            StageTimeout: si une étape en cours a dépassé son budget
+        """
+        now = time.monotonic()
+        for stage, (_, deadline, budget) in list(self._running.items()):
+            if now > deadline:
+                raise StageTimeout(stage, budget)
+
+    def is_done(self, stage: str) -> bool:
+        return stage in self.state["completed"]
+
+    def complete(self, stage: str, **outputs) -> None:
+        """Marque une étape comme terminée et mémorise ses sorties (JSON)."""
+        self.state.update(outputs)
+        if stage not in self.state["completed"]:
+            self.state["completed"].append(stage)
+
+    def check_cancelled(self, stage: str = "", force: bool = False) -> None:
+        """
+        Vérifie l'annulation (au plus une fois par CANCEL_CHECK_INTERVAL, sauf `force`)
+        et le timeout de l'étape en cours.
+        Appelée dans les boucles longues : conversion FFmpeg, segments Whisper.
+
+        Raises:
+            JobCancelled: si le meeting a été annulé
+            StageTimeout: si l'étape a dépassé son budget
+            JobAborted: si une autre étape du job a échoué entre-temps
+        """
+        if self._aborted is not None:
+            raise JobAborted(stage, self._aborted)
+        self.check_timeout()
+        now = time.monotonic()
+        if not force and now - self._last_cancel_check < settings.CANCEL_CHECK_INTERVAL:
+            return
+        self._last_cancel_check = now
+        if is_cancelled(self.meeting_id):
+            raise JobCancelled(stage)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def check(self, next_stage: str) -> None:
+        """
+        Point de contrôle entre deux étapes (ou deux fenêtres de transcription).
+
+        Raises:
+            JobCancelled: si le meeting a été annulé
+            JobPreempted: si un job plus prioritaire attend et que la classe est préemptible
+        """
+        self.begin(next_stage)
+        self.check_cancelled(next_stage, force=True)
+
+        # Les appels directs (hors ordonnanceur) ne sont pas préemptibles
+        if self.job.get("job_id") and should_yield(self.job):
+            raise JobPreempted(next_stage)
+
+    # ------------------------------------------------------------------
+    # Suspension / reprise
+    # ------------------------------------------------------------------
+
+    def suspend(self, audio_wav: str = None) -> dict:
+        """
+        Sauvegarde l'état partiel et retourne le payload à remettre en file.
+
+        Args:
+            audio_wav: WAV converti à conserver (évite téléchargement + conversion à la reprise)
+        """
+        if audio_wav and not self.state.get("audio_wav_path"):
+            self.state["audio_wav_path"] = save_checkpoint_audio(self.meeting_id, audio_wav)
+        save_checkpoint(self.meeting_id, self.state)
+        return {**self.job, "resume": True}
+
+    def hand_over(self, audio_wav: str, discard: tuple = ()) -> dict:
+        """
+        Termine le job en laissant ses artefacts au job suivant du même meeting
+        (passe de raffinement d'un brouillon) : WAV converti, métadonnées du fichier
+        et sorties des étapes, sauf celles de `discard`, restent dans le point de reprise.
+
+        Returns:
+            dict: Payload du job suivant (repris depuis ce point)
+        """
+        for stage in list(self._running):
+            self.end(stage)
+        for name in discard:
+            self.state.pop(name, None)
+        self.state["completed"] = [stage for stage in self.state["completed"] if stage not in discard]
+        self.state["handed_over"] = True
+        return self.suspend(audio_wav)
+
+    def finish(self, completed: bool = True) -> None:
+        """
+        Nettoie le point de reprise d'un job repris puis terminé (ou annulé).
+
+        Args:
+            completed: False si le job est interrompu (la dernière étape n'est pas mesurée)
+        """
+        for stage in list(self._running):
+            self.end(stage, completed=completed)
+        if completed and not self.resumed:
+            record_pool_rtf(self.elapsed, self.audio_seconds)
+        if self.resumed or self.state.get("audio_wav_path"):
+            delete_checkpoint(self.meeting_id)
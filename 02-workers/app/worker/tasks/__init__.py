@@ -6,7 +6,13 @@ TaskIQ découvrira automatiquement les tâches via ce module.
 """
 
 # === AUDIO TASKS ===
-from app.worker.tasks.audio_tasks import process_transcription_full
+from app.worker.tasks.audio_tasks import process_transcription_full, dispatch_fair_share_job
+
+# === LIVE TASKS ===
+from app.worker.tasks.live_tasks import process_live_session
+
+# === IDENTITY TASKS ===
+from app.worker.tasks.identity_tasks import relabel_meetings
 
 # === VIDEO TASKS ===
 # Importer les tâches vidéo quand elles seront implémentées:
@@ -18,5 +24,10 @@ from app.worker.tasks.audio_tasks import process_transcription_full
 __all__ = [
     # Audio
     "process_transcription_full",
+    "dispatch_fair_share_job",
+    # Direct
+    "process_live_session",
+    # Identités
+    "relabel_meetings",
     # Video (à ajouter quand implémenté)
 ]
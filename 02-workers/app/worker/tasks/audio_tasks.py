@@ -3,33 +3,79 @@ Audio Tasks - Tâches liées au traitement audio.
 
 Contient:
 - process_transcription_full: Pipeline complet de transcription
+- dispatch_fair_share_job: Jeton d'ordonnancement équitable (tire le prochain job DRR)
 - (Future) process_audio_conversion: Conversion de formats audio
 - (Future) process_diarization_only: Diarisation seule sans transcription
 """
 
+import asyncio
 import logging
 import os
+import time
+import uuid
+from dataclasses import replace
 from pathlib import Path
 import httpx
+import numpy as np
 
 from app.broker import broker
-from app.worker.tasks.base import smart_download, cleanup_files
+from app.core.config import settings
+from app.worker.tasks.base import smart_download, remote_size
+from app.core.scratch import JobWorkspace
 
 # --- Imports des services IA ---
-from app.services.audio import convert_to_wav
-from app.services.diarization import run_diarization
-from app.services.transcription import run_transcription
+from app.services.audio import (
+    convert_to_wav,
+    cleanup_files,
+    probe_media,
+    MediaInfo,
+    UnusableMediaError,
+    WAV_BYTES_PER_SECOND,
+)
+from app.services.channels import channel_turns, channel_label
+from app.services.diarization import run_diarization, SpeakerTimeline
+from app.services.transcription import iter_transcription, processing_profile, profile_metadata, TranscriptSegment
+from app.services.speech_map import compute_speech_map, speech_seconds
 from app.services.fusion import merge_transcription_diarization
 from app.services.storage import save_results
-from app.services.identification import get_voice_bank_embeddings, identify_speaker
-from app.core.models import release_models, load_embedding_model
+from app.services.identification import (
+    batch_embeddings,
+    get_voice_bank_embeddings,
+    identify_speaker,
+    restrict_to_identities,
+)
+from app.services.session_vectors import get_session_vector_store
+from app.services.speaker_clusters import record_meeting
+from app.services.shortlist import load_shortlist, record_identities, record_lookup
+from app.services.scheduler import (
+    dequeue_next_job,
+    pending_jobs_count,
+    promote_delayed_jobs,
+    complete_job,
+    requeue_job,
+    reap_orphaned_jobs,
+    token_queue,
+    update_job_cost,
+)
+from app.services.cancellation import is_cancelled_async, record_cancellation
+from app.services.failures import handle_job_failure, is_transient, record_failure_metric
+from app.worker.pipeline import PipelineJob, JobPreempted, JobCancelled, StageTimeout
+from app.worker.watchdog import watchdog
+from app.worker.executors import run_io, run_inference, run_cpu
+from app.worker.dag import Stage, release_unused_models, run_dag
+from app.core.models import load_embedding_model
 
 logger = logging.getLogger(__name__)
 
 # URL de l'API pour le callback (réseau Docker)
 API_WEBHOOK_URL = os.getenv("API_WEBHOOK_URL", "http://sms_api:8000/api/v1/internal/webhook/transcription-complete")
+# Webhook des métadonnées du fichier (même préfixe que le webhook de fin de job)
+API_MEDIA_WEBHOOK_URL = os.getenv("API_MEDIA_WEBHOOK_URL", API_WEBHOOK_URL.rsplit("/", 1)[0] + "/media-probed")
 INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "sms-internal-worker-key-2026")
 
+# Références des tâches asyncio lancées sans attente (sinon collectables en cours d'exécution)
+_background_tasks = set()
+
 
 # =============================================================================
 # PIPELINE TRANSCRIPTION COMPLET
@@ -37,96 +83,225 @@ INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "sms-internal-worker-key-2026")
 
 @broker.task(task_name="process_transcription_full")
 async def process_transcription_full(file_path: str, meeting_id: str):
+    """
+    Point d'entrée direct (FIFO) du pipeline, conservé pour les appels hors ordonnanceur.
+    L'API passe normalement par `dispatch_fair_share_job`.
+    """
+    return await _run_transcription_pipeline({"file_path": file_path, "meeting_id": meeting_id})
+
+
+@broker.task(task_name="dispatch_fair_share_job")
+async def dispatch_fair_share_job():
+    """
+    Jeton d'ordonnancement : l'API en envoie un par job déposé dans les files
+    virtuelles. Le worker qui le consomme exécute le job choisi par l'ordonnanceur.
+
+    Si tous les tenants ayant du backlog sont à leur plafond de concurrence,
+    le jeton est ré-émis après FAIR_SHARE_RETRY_DELAY (un jeton = un job prêt).
+    S'il ne reste que des jobs différés, le jeton s'arrête : leur promotion à
+    l'échéance émet un jeton par job (`promote_delayed_loop`).
+    Les jobs annulés pendant leur attente sont sautés sans occuper le worker.
+    Les jobs orphelins (worker mort, bail expiré) sont retentés ou envoyés en DLQ.
+    """
+    await _recover_orphaned_jobs()
+
+    job = await dequeue_next_job()
+
+    while job is not None and await is_cancelled_async(job["meeting_id"]):
+        await complete_job(job, 0.0)
+        await record_cancellation(job, running=False)
+        job = await dequeue_next_job()
+
+    if job is None:
+        # Jobs prêts mais tenants au plafond : un slot se libérera à la fin d'un job
+        if await pending_jobs_count() > 0:
+            await asyncio.sleep(settings.FAIR_SHARE_RETRY_DELAY)
+            await _kick_dispatch()
+            return {"status": "deferred"}
+        return {"status": "idle"}
+
+    started = time.monotonic()
+    released = False
+
+    async def release() -> None:
+        # Une seule fois : avant une remise en file (préemption, retry), sinon en fin de jeton
+        nonlocal released
+        if not released:
+            released = True
+            await complete_job(job, time.monotonic() - started)
+
+    try:
+        return await _run_transcription_pipeline(job, release)
+    finally:
+        await release()
+
+
+async def _kick_dispatch(pool: str = None) -> None:
+    """Émet un jeton de dispatch dans la file du pool (celui du worker par défaut)."""
+    await dispatch_fair_share_job.kicker().with_labels(queue_name=token_queue(pool)).kiq()
+
+
+async def promote_delayed_loop() -> None:
+    """
+    Promeut les jobs différés (retries, uploads reportés) arrivés à échéance et émet
+    un jeton par job promu. Lancée au démarrage de chaque worker batch.
+    """
+    while True:
+        await asyncio.sleep(settings.DELAYED_PROMOTION_INTERVAL)
+        try:
+            for job in await promote_delayed_jobs():
+                # Le job peut appartenir à un autre pool que ce worker
+                await _kick_dispatch(job.get("pool"))
+        except Exception as e:
+            logger.warning(f"⚠️ [Scheduler] Promotion des jobs différés en échec : {e}")
+
+
+def start_delayed_promotion() -> None:
+    task = asyncio.create_task(promote_delayed_loop())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _recover_orphaned_jobs() -> None:
+    """
+    Applique la politique d'échec aux jobs dont le worker a disparu (crash, OOM,
+    redémarrage par le watchdog). Leur jeton a été perdu avec le processus : un
+    job retenté passe par la file différée, qui émettra son jeton à l'échéance.
+    """
+    for job, reason in await reap_orphaned_jobs():
+        await record_failure_metric("orphans")
+        # Un checkpoint éventuel (préemption antérieure) sera repris
+        outcome = await handle_job_failure({**job, "resume": True}, reason, transient=True)
+        if outcome != "retry" and not await is_cancelled_async(job["meeting_id"]):
+            await _notify_api_completion(
+                job["meeting_id"], "error", error_message=reason, version=_result_version(job)
+            )
+
+
+async def _release_nothing() -> None:
+    """Appel direct hors ordonnanceur : aucun slot à libérer."""
+
+
+async def _run_transcription_pipeline(job: dict, release=_release_nothing):
     """
     Pipeline V5 (Cloud Native) : 
     S3 (MinIO) -> Download Temp -> IA (Diarization/Whisper) -> Upload S3 -> Clean.
+
+    Les étapes forment un graphe (PIPELINE_STAGES, exécuté par app/worker/dag.py) :
+    après la diarisation, l'identification (WeSpeaker sur CPU) tourne pendant la
+    transcription Whisper.
+
+    Avant chaque étape checkpointée (et toutes les PREEMPTION_WINDOW_SECONDS d'audio
+    pendant la transcription), le job peut céder sa place à un job plus prioritaire :
+    il sauvegarde alors son état, se remet en tête de sa file et reprendra sans
+    refaire les étapes terminées.
     
     Args:
-        file_path (str): Chemin S3 du fichier source (ex: s3://uploads/meeting.mp3)
-        meeting_id (str): ID unique de la réunion
+        job (dict): Payload du job. Clés utilisées :
+            - file_path (str): Chemin S3 du fichier source (ex: s3://uploads/meeting.mp3)
+            - meeting_id (str): ID unique de la réunion
+            - resume (bool): True si le job reprend après une préemption
+            - attempt (int): Nombre de tentatives déjà échouées (retry)
+            - profile (str): Profil vitesse / qualité (PROCESSING_PROFILES), enregistré
+              avec les résultats (metadata.json)
+            - pass (str): "draft" (brouillon rapide, suivi d'une passe de raffinement
+              décrite par "refine" {profile, queue_class}) ou "refine" ; absent = passe unique
+
+    Chaque étape a un budget de temps (STAGE_TIMEOUTS) ; une erreur transitoire
+    (S3, réseau, timeout) remet le job en file avec backoff, une erreur définitive
+    ou des tentatives épuisées l'envoient en dead-letter queue.
+
+    `release` libère le slot du job (sms:fair:running, inflight, bail) avant toute
+    remise en file : un autre worker peut le reprendre dès le jeton émis, et une
+    libération tardive effacerait alors l'état de sa reprise.
         
     Returns:
         dict: Résultat avec status, meeting_id, et result_path
     """
-    local_input_path = None
-    audio_wav = None
+    file_path = job["file_path"]
+    meeting_id = job["meeting_id"]
+    pipeline_job = None
     
     try:
         logger.info(f"🚀 [JOB {meeting_id}] Démarrage Worker V5 (Boto3 Native)")
         logger.info(f"   📥 Source : {file_path}")
+        # Le chargement d'un checkpoint (reprise) lit S3 : hors de la boucle
+        pipeline_job = await run_io(PipelineJob, job)
+        watchdog.watch(pipeline_job)
+        # Fichiers temporaires dans l'espace scratch du job (quota réservé avant écriture)
+        pipeline_job.workspace = await run_io(JobWorkspace, meeting_id)
 
-        # ==================================================================
-        # ÉTAPE 0 : TÉLÉCHARGEMENT DEPUIS MINIO (S3 -> LOCAL)
-        # ==================================================================
-        filename = Path(file_path).name
-        local_input_path = f"/tmp/{meeting_id}_{filename}"
-        
-        smart_download(file_path, local_input_path)
+        # Étapes lancées dès que leurs entrées sont prêtes (identification pendant la transcription)
+        outputs = await run_dag(pipeline_job, _pipeline_stages(job))
+        s3_result_path = outputs["fusion"]
+        if job.get("pass") == "draft":
+            # Brouillon publié : la passe de raffinement reprendra ses artefacts
+            await _enqueue_refine(job, pipeline_job)
+        else:
+            await run_io(pipeline_job.finish)
 
-        # ==================================================================
-        # ÉTAPE 1 : CONVERSION AUDIO (CPU)
-        # ==================================================================
-        audio_wav = convert_to_wav(local_input_path)
+        logger.info(f"✅ [JOB {meeting_id}] Succès ! Résultats : {s3_result_path}")
         
-        # ==================================================================
-        # ÉTAPE 2 : DIARISATION (GPU - Pyannote)
-        # ==================================================================
-        logger.info(f"👥 [JOB {meeting_id}] Étape 2 : Diarisation...")
-        diarization_annotation = run_diarization(audio_wav)
+        # Notify API that transcription is complete
+        await _notify_api_completion(meeting_id, "completed", s3_result_path, version=_result_version(job))
         
+        return {
+            "status": "success", 
+            "meeting_id": meeting_id, 
+            "result_path": s3_result_path
+        }
+
+    except JobCancelled as cancelled:
         # ==================================================================
-        # ÉTAPE 2.5 : IDENTIFICATION DES LOCUTEURS (GPU - WeSpeaker)
+        # ANNULATION : on libère le worker sans notifier l'API (meeting supprimé)
         # ==================================================================
-        speaker_mapping = _identify_speakers(
-            audio_wav, 
-            diarization_annotation, 
-            meeting_id
-        )
-        
-        # Nettoyage VRAM intermédiaire
-        release_models() 
+        await release_unused_models()
+        await run_io(pipeline_job.finish, completed=False)
+        logger.info(f"🛑 [JOB {meeting_id}] {cancelled}")
+        await record_cancellation(job, running=True, elapsed=pipeline_job.elapsed)
+        return {"status": "cancelled", "meeting_id": meeting_id, "stage": cancelled.stage}
 
+    except JobPreempted as preempted:
         # ==================================================================
-        # ÉTAPE 3 : TRANSCRIPTION (GPU - Whisper)
+        # PRÉEMPTION : sauvegarde de l'état et remise en tête de file
         # ==================================================================
-        logger.info(f"✍️ [JOB {meeting_id}] Étape 3 : Transcription...")
-        whisper_segments = run_transcription(audio_wav)
-        release_models() 
+        await release_unused_models()
+        logger.info(f"⏸️ [JOB {meeting_id}] {preempted} : un job prioritaire attend")
+        payload = await run_io(pipeline_job.suspend, pipeline_job.audio_wav)
+        await release()
+        await requeue_job(payload, front=True)
+        await _kick_dispatch(job.get("pool"))
+        return {"status": "preempted", "meeting_id": meeting_id, "stage": preempted.stage}
+
+    except Exception as e:
+        logger.error(f"💥 [JOB {meeting_id}] ÉCHEC : {str(e)}", exc_info=True)
+        await release_unused_models()
 
         # ==================================================================
-        # ÉTAPE 4 : FUSION & SAUVEGARDE (S3)
+        # RETRY (erreur transitoire) OU DEAD-LETTER (erreur définitive)
         # ==================================================================
-        logger.info(f"🔗 [JOB {meeting_id}] Étape 4 : Fusion et Upload S3...")
-        final_data = merge_transcription_diarization(
-            whisper_segments, 
-            diarization_annotation, 
-            speaker_mapping
-        )
+        if await is_cancelled_async(meeting_id):
+            # Meeting supprimé entre-temps : ni retry ni DLQ
+            return {"status": "cancelled", "meeting_id": meeting_id}
 
-        # Sauvegarde via storage.py (écrit sur MinIO)
-        s3_result_path = save_results(
-            clean_name=filename,
-            annotation=diarization_annotation,
-            raw_segments=whisper_segments,
-            fusion_segments=final_data
-        )
+        timed_out = isinstance(e, StageTimeout)
+        if timed_out:
+            await record_failure_metric("timeouts")
 
-        logger.info(f"✅ [JOB {meeting_id}] Succès ! Résultats : {s3_result_path}")
-        
-        # Notify API that transcription is complete
-        await _notify_api_completion(meeting_id, "completed", s3_result_path)
-        
-        return {
-            "status": "success", 
-            "meeting_id": meeting_id, 
-            "result_path": s3_result_path
-        }
+        payload = await run_io(_retry_payload, job, pipeline_job)
+        await release()
+        outcome = await handle_job_failure(
+            payload,
+            str(e),
+            transient=timed_out or is_transient(e),
+            stage=pipeline_job.stage if pipeline_job else None,
+        )
+        if outcome == "retry":
+            # Le jeton courant se termine : la promotion du retry en émettra un nouveau
+            return {"status": "retrying", "message": str(e), "meeting_id": meeting_id}
 
-    except Exception as e:
-        logger.error(f"💥 [JOB {meeting_id}] ÉCHEC : {str(e)}", exc_info=True)
-        
         # Notify API about the error
-        await _notify_api_completion(meeting_id, "error", error_message=str(e))
+        await _notify_api_completion(meeting_id, "error", error_message=str(e), version=_result_version(job))
         
         return {"status": "error", "message": str(e), "meeting_id": meeting_id}
 
@@ -134,18 +309,72 @@ async def process_transcription_full(file_path: str, meeting_id: str):
         # ==================================================================
         # NETTOYAGE (GARBAGE COLLECTION)
         # ==================================================================
-        cleanup_files([local_input_path, audio_wav], meeting_id)
+        if pipeline_job is not None:
+            watchdog.unwatch(pipeline_job)
+            if pipeline_job.workspace is not None:
+                await run_io(pipeline_job.workspace.release)
 
 
 # =============================================================================
 # FONCTIONS HELPER PRIVÉES
 # =============================================================================
 
+def _retry_payload(job: dict, pipeline_job: PipelineJob) -> dict:
+    """
+    Payload de la tentative suivante : si des étapes sont terminées, l'état est
+    sauvegardé comme pour une préemption afin de ne pas les refaire.
+    """
+    if pipeline_job is None or not pipeline_job.state["completed"]:
+        return job
+    try:
+        return pipeline_job.suspend(pipeline_job.audio_wav)
+    except Exception as e:
+        # S3 indisponible : la tentative suivante repartira de zéro
+        logger.warning(f"⚠️ [JOB {job['meeting_id']}] Checkpoint de retry impossible : {e}")
+        return job
+
+
+# Brouillon : artefacts laissés à la passe de raffinement, sauf sa transcription rapide
+DRAFT_DISCARDED_STATE = ("transcription",)
+
+
+def _result_version(job: dict):
+    """Version de la transcription produite par le job : "draft", "final" ou None (passe unique)."""
+    return {"draft": "draft", "refine": "final"}.get(job.get("pass"))
+
+
+async def _enqueue_refine(job: dict, pipeline_job: PipelineJob) -> None:
+    """
+    Met en file la passe de raffinement d'un brouillon (profil et classe de file
+    de job["refine"]). Elle reprend le point de reprise laissé par le brouillon :
+    WAV converti, métadonnées du fichier et carte de parole ne sont pas recalculés.
+    """
+    payload = await run_io(pipeline_job.hand_over, pipeline_job.audio_wav, DRAFT_DISCARDED_STATE)
+    refine = payload.pop("refine", None) or {}
+    for key in ("attempt", "not_before"):
+        payload.pop(key, None)
+    payload.update({
+        "job_id": str(uuid.uuid4()),
+        "pass": "refine",
+        "profile": refine.get("profile"),
+        "queue_class": refine.get("queue_class") or payload.get("queue_class"),
+        "cost": round(pipeline_job.audio_seconds, 1),
+        "enqueued_at": time.time(),
+    })
+    await requeue_job(payload, front=False)
+    await _kick_dispatch(payload.get("pool"))
+    logger.info(
+        f"🔁 [JOB {pipeline_job.meeting_id}] Raffinement en file "
+        f"(profil {payload['profile'] or settings.DEFAULT_PROCESSING_PROFILE}, classe {payload['queue_class']})"
+    )
+
+
 async def _notify_api_completion(
     meeting_id: str, 
     status: str, 
     result_path: str = None, 
-    error_message: str = None
+    error_message: str = None,
+    version: str = None,
 ):
     """
     Notifie l'API que la transcription est terminée via webhook.
@@ -155,91 +384,262 @@ async def _notify_api_completion(
         status: "completed" ou "error"
         result_path: Chemin S3 des résultats (si succès)
         error_message: Message d'erreur (si erreur)
+        version: "draft" ou "final" en mode brouillon puis raffinement (None : passe unique)
     """
+    # meeting_id peut être un UUID ou un int, on essaie de parser
+    try:
+        meeting_id_int = int(meeting_id)
+    except ValueError:
+        logger.warning(f"⚠️ [Webhook] meeting_id '{meeting_id}' n'est pas un int, skip notification")
+        return
+
+    payload = {
+        "meeting_id": meeting_id_int,
+        "status": status,
+        "result_path": result_path,
+        "error_message": error_message,
+        "version": version,
+    }
+    await _post_webhook(API_WEBHOOK_URL, payload, f"meeting {meeting_id} -> {status}")
+
+
+async def _notify_api_media(meeting_id: str, media: MediaInfo) -> None:
+    """
+    Transmet à l'API les métadonnées du fichier source (durée, codec, canaux...),
+    stockées sur le meeting pour l'ordonnancement et les statistiques.
+    """
+    try:
+        meeting_id_int = int(meeting_id)
+    except ValueError:
+        return
+    payload = {"meeting_id": meeting_id_int, **media.to_json()}
+    payload.pop("stream_index")
+    await _post_webhook(API_MEDIA_WEBHOOK_URL, payload, f"meeting {meeting_id} -> média {media.duration_seconds:.0f}s")
+
+
+async def _post_webhook(url: str, payload: dict, description: str) -> None:
+    """POST vers l'API avec retry (backoff) ; un échec n'interrompt jamais le job."""
     try:
-        # meeting_id peut être un UUID ou un int, on essaie de parser
-        try:
-            meeting_id_int = int(meeting_id)
-        except ValueError:
-            logger.warning(f"⚠️ [Webhook] meeting_id '{meeting_id}' n'est pas un int, skip notification")
-            return
-        
-        payload = {
-            "meeting_id": meeting_id_int,
-            "status": status,
-            "result_path": result_path,
-            "error_message": error_message
-        }
-        
         async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                API_WEBHOOK_URL,
-                json=payload,
-                headers={"X-Internal-Key": INTERNAL_API_KEY}
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ [Webhook] API notifiée: meeting {meeting_id} -> {status}")
-            else:
-                logger.warning(f"⚠️ [Webhook] API réponse {response.status_code}: {response.text}")
+            for attempt in range(1, settings.WEBHOOK_MAX_ATTEMPTS + 1):
+                try:
+                    response = await client.post(
+                        url,
+                        json=payload,
+                        headers={"X-Internal-Key": INTERNAL_API_KEY}
+                    )
+                except httpx.TransportError as e:
+                    # API injoignable (redémarrage, réseau) : on retente avec backoff
+                    if attempt == settings.WEBHOOK_MAX_ATTEMPTS:
+                        raise
+                    logger.warning(f"⚠️ [Webhook] Tentative {attempt} échouée ({e}), nouvel essai...")
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+
+                if response.status_code == 200:
+                    logger.info(f"✅ [Webhook] API notifiée: {description}")
+                    return
+                if response.status_code < 500 or attempt == settings.WEBHOOK_MAX_ATTEMPTS:
+                    logger.warning(f"⚠️ [Webhook] API réponse {response.status_code}: {response.text}")
+                    return
+                logger.warning(f"⚠️ [Webhook] API réponse {response.status_code}, nouvel essai...")
+                await asyncio.sleep(2 ** attempt)
                 
     except Exception as e:
         # Ne pas faire échouer la tâche si le webhook échoue
         logger.warning(f"⚠️ [Webhook] Erreur notification API: {e}")
 
 
-def _identify_speakers(audio_wav: str, diarization_annotation, meeting_id: str) -> dict:
+def _transcribe_with_windows(audio_wav: str, pipeline_job: PipelineJob, speech_map: list = None) -> list:
+    """
+    Transcrit par fenêtres de PREEMPTION_WINDOW_SECONDS d'audio.
+    L'annulation est vérifiée à chaque segment (limitée à CANCEL_CHECK_INTERVAL).
+
+    À chaque fin de fenêtre, les segments déjà produits sont mémorisés dans l'état
+    du job puis un point de préemption est vérifié. Une reprise redémarre Whisper
+    à la fin du dernier segment sauvegardé.
+
+    Avec une carte de parole et un profil qui filtre le silence, seules les zones de
+    parole sont décodées.
+
+    Returns:
+        list: Segments TranscriptSegment (partie reprise incluse)
+    """
+    partial = pipeline_job.state.get("transcription", {"segments": [], "offset": 0.0})
+    segments = [TranscriptSegment.from_json(s) for s in partial["segments"]]
+    offset = partial["offset"]
+    next_window = offset + settings.PREEMPTION_WINDOW_SECONDS
+
+    segments_iter = iter_transcription(
+        audio_wav, start_offset=offset, profile=pipeline_job.job.get("profile"), speech_map=speech_map,
+    )
+    for segment in segments_iter:
+        pipeline_job.check_cancelled("transcription")
+        segments.append(segment)
+        if segment.end >= next_window:
+            next_window = segment.end + settings.PREEMPTION_WINDOW_SECONDS
+            pipeline_job.state["transcription"] = {
+                "segments": [s.to_json() for s in segments],
+                "offset": segment.end,
+            }
+            pipeline_job.check("transcription")
+
+    return segments
+
+
+def _save_transcription(segments: list) -> dict:
+    return {"segments": [s.to_json() for s in segments], "offset": segments[-1].end if segments else 0.0}
+
+
+def _restore_transcription(state: dict) -> list:
+    return [TranscriptSegment.from_json(s) for s in state["segments"]]
+
+
+def _identify_speakers(pipeline_job: PipelineJob, diarization_annotation) -> dict:
     """
     Identifie les locuteurs en comparant avec la banque de voix.
+
+    Meeting d'un groupe récurrent : chaque locuteur est d'abord comparé à la shortlist
+    du groupe (identités des meetings récents) ; la banque complète n'est chargée et
+    parcourue que pour les locuteurs que la shortlist ne reconnaît pas avec assez de
+    confiance. Les identités reconnues alimentent ensuite la shortlist.
     
     Args:
-        audio_wav: Chemin du fichier WAV
+        pipeline_job: Job en cours (WAV, espace scratch, points de contrôle)
         diarization_annotation: Annotation de diarisation Pyannote
-        meeting_id: ID du meeting pour les logs
         
     Returns:
         dict: Mapping {speaker_label: nom_identifié} ou None si pas de voice bank
     """
+    meeting_id = pipeline_job.meeting_id
     logger.info(f"🎯 [JOB {meeting_id}] Étape 2.5 : Identification des locuteurs...")
     
-    bank_embeddings = get_voice_bank_embeddings()
-    
-    if not bank_embeddings:
+    speakers = pipeline_job.job.get("channel_speakers") or []
+    if speakers and all(speakers):
+        # Multipiste : chaque canal est nommé à l'upload, rien à identifier
+        logger.info("   ℹ️ Locuteurs nommés par canal, identification sautée")
+        return None
+
+    group_ids = pipeline_job.job.get("shortlist_group_ids") or []
+    shortlist = load_shortlist(group_ids) if group_ids else {}
+    bank_embeddings = None
+
+    def _bank() -> dict:
+        # Banque complète chargée à la demande (S3 + embeddings hors cache)
+        nonlocal bank_embeddings
+        if bank_embeddings is None:
+            bank_embeddings = restrict_to_identities(
+                get_voice_bank_embeddings(), pipeline_job.job.get("expected_identities")
+            )
+        return bank_embeddings
+
+    can_identify = bool(shortlist) or bool(_bank())
+    if not can_identify and not settings.SPEAKER_CENTROIDS_ENABLED:
         logger.info("   ℹ️ Pas de voice bank, utilisation des labels par défaut")
         return None
     
     # Mapper les speakers détectés vers des noms connus
     embedding_model = load_embedding_model()
     speaker_mapping = {}
+    seen = {}
+    # Profil de chaque locuteur (centroïde, nom, score) : sauvegardé avec les résultats
+    # pour renommer les meetings passés sans refaire tourner le pipeline (relabel)
+    profiles = {}
     
+    # Multipiste : les canaux nommés à l'upload n'ont pas à être identifiés
+    named = {channel_label(index, speakers) for index, name in enumerate(speakers) if name}
+    speaker_mapping.update({label: label for label in named})
+
+    turns_by_speaker = {}
     for segment, _, speaker in diarization_annotation.itertracks(yield_label=True):
-        if speaker not in speaker_mapping:
-            speaker_mapping[speaker] = _identify_single_speaker(
-                audio_wav=audio_wav,
-                segment=segment,
-                speaker=speaker,
-                embedding_model=embedding_model,
-                bank_embeddings=bank_embeddings,
-                meeting_id=meeting_id
-            )
+        turns_by_speaker.setdefault(speaker, []).append(segment)
+
+    for speaker, turns in turns_by_speaker.items():
+        if speaker in speaker_mapping:
+            continue
+        # Tourne pendant la transcription : s'arrête si une autre étape a échoué
+        pipeline_job.check_cancelled("identification")
+        speaker_mapping[speaker] = speaker
+        embedding = _speaker_centroid(pipeline_job, speaker, turns, embedding_model)
+        if embedding is None:
+            continue
+
+        name, score, source = None, 0.0, None
+        if shortlist:
+            name, score = identify_speaker(embedding, shortlist, threshold=settings.SHORTLIST_CONFIDENCE_THRESHOLD)
+            record_lookup(hit=name is not None)
+            source = "shortlist"
+        if name is None and _bank():
+            name, score = identify_speaker(embedding, _bank())
+            source = "banque"
+
+        if name:
+            logger.info(f"   ✅ {speaker} -> {name} (score: {score:.2f}, {source})")
+            speaker_mapping[speaker] = name
+            seen[name] = embedding
+        elif can_identify:
+            logger.info(f"   ❓ {speaker} non reconnu (score: {score:.2f})")
+        profiles[speaker] = {
+            "embedding": np.asarray(embedding, dtype=np.float32).reshape(-1).tolist(),
+            "seconds": round(sum(turn.duration for turn in turns), 1),
+            "name": name,
+            "person_id": name,
+            "score": round(float(score), 4),
+            "source": source if name else None,
+        }
+    pipeline_job.state["speaker_profiles"] = profiles
+
+    if group_ids and seen:
+        try:
+            record_identities(group_ids, seen)
+        except Exception as e:
+            logger.warning(f"   ⚠️ Shortlist des groupes {group_ids} non mise à jour : {e}")
     
+    if not can_identify:
+        logger.info("   ℹ️ Pas de voice bank, labels par défaut (centroïdes conservés)")
+        return None
     logger.info(f"   📋 Mapping final: {speaker_mapping}")
     return speaker_mapping
 
 
-def _identify_single_speaker(
+def _speaker_centroid(pipeline_job: PipelineJob, speaker: str, turns: list, embedding_model):
+    """
+    Centroïde d'un locuteur : moyenne des embeddings normalisés de ses
+    SPEAKER_CENTROID_SEGMENTS tours les plus longs.
+
+    Returns:
+        np.ndarray: Centroïde, ou None si aucun embedding n'a pu être extrait
+    """
+    longest = sorted(turns, key=lambda turn: turn.duration, reverse=True)[: settings.SPEAKER_CENTROID_SEGMENTS]
+    vectors = []
+    for index, turn in enumerate(longest):
+        embedding = _speaker_embedding(
+            audio_wav=pipeline_job.audio_wav,
+            segment=turn,
+            speaker=f"{speaker}_{index}",
+            embedding_model=embedding_model,
+            workspace=pipeline_job.workspace,
+        )
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+            vectors.append(embedding / (np.linalg.norm(embedding) + 1e-12))
+    if not vectors:
+        return None
+    return np.mean(vectors, axis=0)
+
+
+def _speaker_embedding(
     audio_wav: str,
     segment,
     speaker: str,
     embedding_model,
-    bank_embeddings: dict,
-    meeting_id: str
-) -> str:
+    workspace: JobWorkspace,
+):
     """
-    Identifie un seul locuteur à partir d'un segment audio.
+    Embedding d'un locuteur à partir d'un segment audio.
     
     Returns:
-        str: Nom identifié ou label original si non reconnu
+        np.ndarray: Embedding du segment, ou None si l'extraction échoue
     """
     try:
         import librosa
@@ -253,27 +653,340 @@ def _identify_single_speaker(
             duration=min(segment.duration, 5.0)  # Max 5 secondes
         )
         
-        # Sauvegarder temporairement
-        temp_segment_path = f"/tmp/{meeting_id}_speaker_{speaker}.wav"
+        # Sauvegarder temporairement (PCM 16 bits : 2 octets par échantillon)
+        temp_segment_path = workspace.path(f"speaker_{speaker}.wav", size_hint=len(audio_segment) * 2 + 44)
         sf.write(temp_segment_path, audio_segment, sr)
         
-        # Calculer l'embedding et identifier
-        unknown_emb = embedding_model(temp_segment_path)
-        identified_name, score = identify_speaker(unknown_emb, bank_embeddings)
+        # Calculer l'embedding
+        embedding = embedding_model(temp_segment_path)
         
         # Nettoyer le fichier temporaire
         os.remove(temp_segment_path)
-        
-        if identified_name:
-            logger.info(f"   ✅ {speaker} -> {identified_name} (score: {score:.2f})")
-            return identified_name
-        else:
-            logger.info(f"   ❓ {speaker} non reconnu (score: {score:.2f})")
-            return speaker
+        return embedding
             
     except Exception as e:
         logger.warning(f"   ⚠️ Erreur identification {speaker}: {e}")
-        return speaker
+        return None
+
+
+# =============================================================================
+# ÉTAPES DU PIPELINE (DAG)
+# =============================================================================
+
+async def _stage_download(pipeline_job: PipelineJob, inputs: dict) -> str:
+    """ÉTAPE 0 : téléchargement depuis MinIO (ou du WAV sauvegardé avec le checkpoint)."""
+    workspace = pipeline_job.workspace
+    if pipeline_job.state.get("audio_wav_path"):
+        # Reprise : le WAV converti a été sauvegardé avec le checkpoint
+        source, name = pipeline_job.state["audio_wav_path"], "checkpoint.wav"
+    else:
+        source, name = pipeline_job.job["file_path"], Path(pipeline_job.job["file_path"]).name
+    size = await run_io(remote_size, source)
+    local_path = await run_io(workspace.path, name, size_hint=size)
+    await run_io(smart_download, source, local_path)
+    return local_path
+
+
+async def _stage_probe(pipeline_job: PipelineJob, inputs: dict) -> MediaInfo:
+    """
+    ÉTAPE 0.5 : inspection du fichier (ffprobe).
+
+    Un fichier sans piste audio ou de durée nulle échoue ici (erreur définitive,
+    DLQ) avant tout chargement de modèle. La durée mesurée remplace l'estimation
+    de l'API pour les budgets des étapes et l'ordonnanceur.
+    """
+    if pipeline_job.state.get("media"):
+        # Reprise : l'entrée est le WAV du checkpoint, on garde les métadonnées d'origine
+        return MediaInfo.from_json(pipeline_job.state["media"])
+
+    media = await probe_media(inputs["download"])
+    speakers = pipeline_job.job.get("channel_speakers")
+    if speakers and media.channels < len(speakers):
+        raise UnusableMediaError(
+            f"{len(speakers)} locuteurs par canal déclarés, mais le fichier a {media.channels} canal(aux)"
+        )
+    logger.info(
+        f"🔎 [JOB {pipeline_job.meeting_id}] {media.container}/{media.codec} "
+        f"{media.sample_rate} Hz, {media.channels} canal(aux), {media.duration_seconds:.1f}s"
+    )
+    pipeline_job.state["media"] = media.to_json()
+    pipeline_job.audio_seconds = media.duration_seconds
+    if pipeline_job.job.get("job_id"):
+        await update_job_cost(pipeline_job.job, media.duration_seconds)
+    # Webhook en arrière-plan : une API lente ne retarde pas la conversion
+    task = asyncio.create_task(_notify_api_media(pipeline_job.meeting_id, media))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return media
+
+
+async def _stage_conversion(pipeline_job: PipelineJob, inputs: dict) -> str:
+    """ÉTAPE 1 : conversion WAV 16 kHz mono (CPU, FFmpeg), sautée si l'entrée est déjà au format."""
+    media = inputs["probe"]
+    if pipeline_job.state.get("audio_wav_path"):
+        audio_wav = inputs["download"]
+    elif media.analysis_ready and not pipeline_job.job.get("channel_speakers"):
+        logger.info(f"⏭️ [JOB {pipeline_job.meeting_id}] Entrée déjà en WAV 16 kHz mono : conversion sautée")
+        audio_wav = inputs["download"]
+    else:
+        local_input_path = inputs["download"]
+        # Taille du WAV : durée mesurée par le probe (marge 10 %)
+        wav_size = int(media.duration_seconds * WAV_BYTES_PER_SECOND * 1.1)
+        wav_path = await run_io(pipeline_job.workspace.path, "audio_16k.wav", size_hint=wav_size)
+        speakers = pipeline_job.job.get("channel_speakers")
+        channels_wav = None
+        if speakers:
+            channels_wav = await run_io(
+                pipeline_job.workspace.path, "audio_16k_channels.wav", size_hint=wav_size * media.channels
+            )
+        audio_wav = await convert_to_wav(
+            local_input_path,
+            on_poll=lambda: pipeline_job.check_cancelled("conversion"),
+            output_path=wav_path,
+            media=media,
+            channels_output_path=channels_wav,
+        )
+        if channels_wav:
+            # Tours calculés ici, tant que les canaux séparés existent : un checkpoint
+            # ne conserve que le WAV mono, les tours voyagent dans l'état du job
+            turns = await run_cpu(
+                channel_turns, channels_wav, speakers,
+                on_block=lambda: pipeline_job.check_cancelled("conversion"),
+            )
+            pipeline_job.state["channel_turns"] = turns.to_json()
+            await run_io(cleanup_files, channels_wav)
+
+    # Durée réelle (WAV PCM 16 bits mono 16 kHz) : base des budgets des étapes suivantes
+    pipeline_job.audio_seconds = max(0.0, (os.path.getsize(audio_wav) - 44) / WAV_BYTES_PER_SECOND)
+    pipeline_job.audio_wav = audio_wav
+    return audio_wav
+
+
+async def _stage_diarization(pipeline_job: PipelineJob, inputs: dict):
+    """ÉTAPE 2 : diarisation (GPU - Pyannote)."""
+    speakers = pipeline_job.job.get("speakers") or {}
+    logger.info(f"👥 [JOB {pipeline_job.meeting_id}] Étape 2 : Diarisation (locuteurs attendus : {speakers or '-'})...")
+    return await run_inference(
+        run_diarization, inputs["conversion"],
+        min_speakers=speakers.get("min"), max_speakers=speakers.get("max"),
+    )
+
+
+async def _stage_channel_turns(pipeline_job: PipelineJob, inputs: dict) -> SpeakerTimeline:
+    """ÉTAPE 2 (multipiste) : un locuteur par canal, tours calculés pendant la conversion."""
+    timeline = SpeakerTimeline.from_json(pipeline_job.state["channel_turns"])
+    logger.info(
+        f"🎚️ [JOB {pipeline_job.meeting_id}] Étape 2 : {len(timeline.turns)} tours sur "
+        f"{len(timeline.labels())} canal(aux), diarisation sautée"
+    )
+    return timeline
+
+
+def _speaker_timeline(inputs: dict) -> SpeakerTimeline:
+    """Qui parle quand : diarisation Pyannote ou tours par canal (multipiste)."""
+    return inputs["diarization"] if "diarization" in inputs else inputs["channel_turns"]
+
+
+async def _stage_identification(pipeline_job: PipelineJob, inputs: dict):
+    """ÉTAPE 2.5 : identification des locuteurs (WeSpeaker, CPU par défaut)."""
+    run = run_inference if settings.IDENTIFICATION_DEVICE == "cuda" else run_cpu
+    return await run(_identify_speakers, pipeline_job, _speaker_timeline(inputs))
+
+
+def _record_session_vectors(pipeline_job: PipelineJob, timeline, speaker_mapping) -> dict:
+    """
+    Session vectors du meeting (un embedding par tour) puis regroupement des voix inconnues.
+
+    Returns:
+        dict: {label: id du cluster de voix inconnue}
+    """
+    window = settings.SESSION_VECTOR_WINDOW_SECONDS
+    turns = [(turn, label) for turn, _, label in timeline.itertracks(yield_label=True) if turn.duration >= window]
+    if not turns:
+        return {}
+
+    vectors = batch_embeddings(
+        pipeline_job.audio_wav,
+        [turn for turn, _ in turns],
+        load_embedding_model(),
+        window_seconds=window,
+        batch_size=settings.SESSION_VECTOR_BATCH_SIZE,
+        on_batch=lambda: pipeline_job.check_cancelled("session_vectors"),
+    )
+    # Nom retenu par l'identification (un label non reconnu est mappé sur lui-même),
+    # ou canal nommé à l'upload
+    named_channels = {name for name in pipeline_job.job.get("channel_speakers") or [] if name}
+    mapping = speaker_mapping or {}
+    names = {
+        label: label if label in named_channels else (mapping.get(label) if mapping.get(label) != label else None)
+        for _, label in turns
+    }
+
+    clusters = record_meeting(get_session_vector_store(), str(pipeline_job.meeting_id), turns, names, vectors)
+    unknown = {label for label, name in names.items() if name is None}
+    logger.info(
+        f"   🧭 {len(turns)} session vector(s), {len(unknown)} locuteur(s) inconnu(s) -> clusters {clusters}"
+    )
+    return clusters
+
+
+async def _stage_session_vectors(pipeline_job: PipelineJob, inputs: dict) -> dict:
+    """ÉTAPE 2.6 : session vectors et regroupement des voix inconnues entre meetings."""
+    if not settings.SESSION_VECTORS_ENABLED:
+        return {}
+    run = run_inference if settings.IDENTIFICATION_DEVICE == "cuda" else run_cpu
+    try:
+        return await run(_record_session_vectors, pipeline_job, _speaker_timeline(inputs), inputs["identification"])
+    except (JobCancelled, JobPreempted, StageTimeout):
+        raise
+    except Exception as e:
+        # Index secondaire : son échec ne doit pas faire échouer la transcription
+        logger.warning(f"   ⚠️ Session vectors non enregistrés : {e}")
+        return {}
+
+
+async def _stage_speech_map(pipeline_job: PipelineJob, inputs: dict):
+    """
+    ÉTAPE 2.9 : carte de parole (VAD Silero, CPU), si le profil filtre le silence
+    ou si le job est un brouillon (la passe de raffinement la reprend).
+    """
+    _, options = processing_profile(pipeline_job.job.get("profile"))
+    if not options.get("vad_filter") and pipeline_job.job.get("pass") != "draft":
+        return None
+    regions = await run_cpu(compute_speech_map, inputs["conversion"])
+    logger.info(
+        f"🗣️ [JOB {pipeline_job.meeting_id}] Carte de parole : {len(regions)} zone(s), "
+        f"{speech_seconds(regions):.0f}s de parole sur {pipeline_job.audio_seconds:.0f}s"
+    )
+    return regions
+
+
+async def _stage_transcription(pipeline_job: PipelineJob, inputs: dict) -> list:
+    """ÉTAPE 3 : transcription (GPU - Whisper), par fenêtres préemptibles."""
+    profile = profile_metadata(pipeline_job.job.get("profile"))
+    logger.info(f"✍️ [JOB {pipeline_job.meeting_id}] Étape 3 : Transcription (profil {profile['name']})...")
+    return await run_inference(_transcribe_with_windows, inputs["conversion"], pipeline_job, inputs["speech_map"])
+
+
+async def _stage_draft_fusion(pipeline_job: PipelineJob, inputs: dict) -> str:
+    """
+    ÉTAPE 4 (brouillon) : résultats sans diarisation ni identification.
+    Multipiste : les tours par canal, calculés pendant la conversion, donnent déjà le locuteur.
+    """
+    logger.info(f"🔗 [JOB {pipeline_job.meeting_id}] Étape 4 : Brouillon et Upload S3...")
+    timeline = SpeakerTimeline.from_json(pipeline_job.state.get("channel_turns") or [])
+    return await run_io(
+        save_results,
+        clean_name=Path(pipeline_job.job["file_path"]).name,
+        annotation=timeline,
+        raw_segments=inputs["transcription"],
+        fusion_segments=merge_transcription_diarization(inputs["transcription"], timeline),
+        metadata={
+            "meeting_id": str(pipeline_job.meeting_id),
+            "version": "draft",
+            "profile": profile_metadata(pipeline_job.job.get("profile")),
+        },
+    )
+
+
+async def _stage_fusion(pipeline_job: PipelineJob, inputs: dict) -> str:
+    """ÉTAPE 4 : fusion et sauvegarde des résultats (S3)."""
+    logger.info(f"🔗 [JOB {pipeline_job.meeting_id}] Étape 4 : Fusion et Upload S3...")
+    final_data = merge_transcription_diarization(
+        inputs["transcription"],
+        _speaker_timeline(inputs),
+        inputs["identification"],
+    )
+    # Segments avec les labels de diarisation : base des renommages ultérieurs (relabel)
+    raw_data = merge_transcription_diarization(inputs["transcription"], _speaker_timeline(inputs))
+    # Voix inconnues : cluster de la voix entre meetings (récurrente ou non)
+    profiles = pipeline_job.state.get("speaker_profiles")
+    for label, cluster_id in (inputs["session_vectors"] or {}).items():
+        if profiles and label in profiles:
+            profiles[label]["cluster"] = cluster_id
+    # Sauvegarde via storage.py (écrit sur MinIO)
+    return await run_io(
+        save_results,
+        clean_name=Path(pipeline_job.job["file_path"]).name,
+        annotation=_speaker_timeline(inputs),
+        raw_segments=inputs["transcription"],
+        fusion_segments=final_data,
+        raw_fusion_segments=raw_data,
+        speakers=profiles,
+        metadata={
+            "meeting_id": str(pipeline_job.meeting_id),
+            "version": _result_version(pipeline_job.job) or "final",
+            "profile": profile_metadata(pipeline_job.job.get("profile")),
+        },
+    )
+
+
+# Ordre = ordre d'exécution quand PIPELINE_CONCURRENT_STAGES est désactivé.
+# Mémoire (Mo) : ordre de grandeur des modèles en float16 / int8.
+PIPELINE_STAGES = [
+    Stage("download", _stage_download, resource="io"),
+    Stage("probe", _stage_probe, inputs=("download",), resource="io"),
+    Stage("conversion", _stage_conversion, inputs=("download", "probe"), resource="cpu", memory_mb=200),
+    Stage(
+        "diarization", _stage_diarization, inputs=("conversion",),
+        resource="gpu", memory_mb=2000, models=("pyannote",),
+        state_key="diarization", save=SpeakerTimeline.to_json, restore=SpeakerTimeline.from_json,
+    ),
+    Stage(
+        "identification", _stage_identification, inputs=("conversion", "diarization"),
+        resource="gpu" if settings.IDENTIFICATION_DEVICE == "cuda" else "cpu",
+        memory_mb=800, models=("embedding",),
+        state_key="speaker_mapping", save=lambda mapping: mapping, restore=lambda mapping: mapping,
+    ),
+    Stage(
+        "session_vectors", _stage_session_vectors, inputs=("conversion", "diarization", "identification"),
+        resource="gpu" if settings.IDENTIFICATION_DEVICE == "cuda" else "cpu",
+        memory_mb=800, models=("embedding",),
+    ),
+    Stage(
+        "speech_map", _stage_speech_map, inputs=("conversion",),
+        resource="cpu", memory_mb=300,
+        state_key="speech_map", save=lambda regions: regions, restore=lambda regions: regions,
+    ),
+    Stage(
+        "transcription", _stage_transcription, inputs=("conversion", "speech_map"),
+        resource="gpu", memory_mb=5000, models=("whisper",),
+        state_key="transcription", save=_save_transcription, restore=_restore_transcription,
+    ),
+    Stage(
+        "fusion", _stage_fusion, inputs=("diarization", "identification", "session_vectors", "transcription"),
+        resource="io",
+    ),
+]
+
+
+def _channel_stage(stage: Stage) -> Stage:
+    """Étape rebranchée sur les tours par canal au lieu de la diarisation."""
+    inputs = tuple("channel_turns" if name == "diarization" else name for name in stage.inputs)
+    return replace(stage, inputs=inputs)
+
+
+# Multipiste (job avec "channel_speakers") : Pyannote ne tourne pas, Whisper transcrit
+# le mixage mono et chaque segment prend le locuteur du canal actif
+CHANNEL_PIPELINE_STAGES = [
+    Stage("channel_turns", _stage_channel_turns, inputs=("conversion",), resource="io")
+    if stage.name == "diarization" else _channel_stage(stage)
+    for stage in PIPELINE_STAGES
+]
+
+
+# Brouillon (job "pass": "draft") : parole seule, sans diarisation ni identification ;
+# la passe de raffinement (pipeline complet) reprend son WAV et sa carte de parole
+DRAFT_STAGES = ("download", "probe", "conversion", "speech_map", "transcription")
+DRAFT_PIPELINE_STAGES = [stage for stage in PIPELINE_STAGES if stage.name in DRAFT_STAGES] + [
+    Stage("fusion", _stage_draft_fusion, inputs=("transcription",), resource="io"),
+]
+
+
+def _pipeline_stages(job: dict) -> list:
+    if job.get("pass") == "draft":
+        return DRAFT_PIPELINE_STAGES
+    return CHANNEL_PIPELINE_STAGES if job.get("channel_speakers") else PIPELINE_STAGES
 
 
 # =============================================================================
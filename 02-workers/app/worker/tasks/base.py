@@ -2,42 +2,24 @@
 Base utilities for worker tasks.
 
 Contient les fonctions partagées entre toutes les tâches:
-- Client S3/MinIO
+- Client S3/MinIO (app.services.storage)
 - Téléchargement/Upload de fichiers
 - Nettoyage des fichiers temporaires
 """
 
 import logging
 import os
-import boto3
 from urllib.parse import urlparse
 from pathlib import Path
 from typing import List, Optional
 
-from app.core.config import settings
+from app.core.scratch import JobWorkspace
+# Client unique, défini côté services : les services l'importent sans passer par les tâches
+from app.services.storage import get_s3_client
 
 logger = logging.getLogger(__name__)
 
 
-# =============================================================================
-# CLIENT S3 (MinIO)
-# =============================================================================
-
-def get_s3_client():
-    """
-    Crée un client S3 boto3 configuré pour MinIO.
-    
-    Returns:
-        boto3.client: Client S3 configuré
-    """
-    return boto3.client(
-        "s3",
-        endpoint_url=f"http://{settings.MINIO_ENDPOINT}",
-        aws_access_key_id=settings.MINIO_ACCESS_KEY,
-        aws_secret_access_key=settings.MINIO_SECRET_KEY
-    )
-
-
 # =============================================================================
 # TÉLÉCHARGEMENT / UPLOAD
 # =============================================================================
@@ -68,6 +50,17 @@ def smart_download(remote_path: str, local_dest: str) -> None:
         shutil.copy(remote_path, local_dest)
 
 
+def remote_size(remote_path: str) -> int:
+    """
+    Taille (octets) d'un fichier S3 ou local, pour réserver le scratch avant le téléchargement.
+    """
+    if remote_path.startswith("s3://"):
+        parsed = urlparse(remote_path)
+        head = get_s3_client().head_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))
+        return int(head["ContentLength"])
+    return os.path.getsize(remote_path)
+
+
 def smart_upload(local_path: str, bucket: str, object_key: str) -> str:
     """
     Upload un fichier vers S3/MinIO.
@@ -113,18 +106,19 @@ def cleanup_files(files: List[Optional[str]], job_id: str = "") -> None:
                 logger.warning(f"   ⚠️ {prefix}Impossible de supprimer {f}: {clean_err}")
 
 
-def get_temp_path(meeting_id: str, filename: str, suffix: str = "") -> str:
+def get_temp_path(meeting_id: str, filename: str, suffix: str = "", size_hint: int = 0) -> str:
     """
-    Génère un chemin temporaire unique pour un fichier.
+    Génère un chemin temporaire dans l'espace scratch du job (espace réservé).
     
     Args:
         meeting_id: ID de la réunion
         filename: Nom du fichier
         suffix: Suffixe optionnel (ex: "_speaker_00")
+        size_hint: Taille prévue du fichier (octets), réservée sur le quota du job
         
     Returns:
         str: Chemin temporaire
     """
     base_name = Path(filename).stem
     extension = Path(filename).suffix
-    return f"/tmp/{meeting_id}_{base_name}{suffix}{extension}"
+    return JobWorkspace(meeting_id).path(f"{base_name}{suffix}{extension}", size_hint=size_hint)
@@ -0,0 +1,28 @@
+"""
+Identity Tasks - Tâches liées aux identités des locuteurs.
+
+Contient:
+- relabel_meetings: Renommage rétroactif des locuteurs des meetings passés
+"""
+import logging
+from typing import Dict, List, Optional
+
+from app.broker import broker
+from app.services.relabel import relabel_results
+from app.worker.executors import run_cpu
+
+logger = logging.getLogger(__name__)
+
+
+@broker.task(task_name="relabel_meetings")
+async def relabel_meetings(identities: Optional[List[str]] = None, renames: Optional[Dict[str, str]] = None):
+    """
+    Met à jour les noms des locuteurs de tous les meetings traités à partir de leurs
+    centroïdes sauvegardés (voir app/services/relabel.py) : aucun audio n'est retraité.
+
+    Args:
+        identities: Identités nouvelles ou modifiées à rechercher (None = toute la banque)
+        renames: Renommages {ancien nom: nouveau nom}
+    """
+    # Calcul des signatures hors cache (modèle d'embedding) puis E/S S3 : hors de la boucle
+    return await run_cpu(relabel_results, identities, renames)
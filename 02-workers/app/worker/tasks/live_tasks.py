@@ -0,0 +1,303 @@
+"""
+Live Tasks - Sessions de transcription en direct.
+
+Contient:
+- process_live_session: Session WebSocket de l'API (sous-titres en direct, puis
+  résultats du meeting au même format que le pipeline batch)
+"""
+import logging
+import time
+import wave
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+from app.broker import broker
+from app.core.config import settings
+from app.core.models import load_embedding_model, load_live_whisper
+from app.core.scratch import JobWorkspace
+from app.services.audio import MediaInfo, stream_decoder, WAV_BYTES_PER_SECOND
+from app.services.cancellation import is_cancelled_async
+from app.services.diarization import SpeakerTimeline, Turn
+from app.services.fusion import merge_transcription_diarization
+from app.services.identification import bank_matrix, best_match, get_voice_bank_embeddings, restrict_to_identities
+from app.services.live import SAMPLE_RATE, LiveTranscriber, OnlineSpeakers, live_options, live_profile
+from app.services.live_sessions import audio_chunks, close_session, publish_event, register_session
+from app.services.scheduler import requeue_job
+from app.services.session_vectors import get_session_vector_store
+from app.services.shortlist import load_shortlist, record_identities
+from app.services.speaker_clusters import record_meeting
+from app.services.storage import save_results
+from app.services.transcription import TranscriptSegment
+from app.worker.executors import run_io, run_live
+from app.worker.tasks.audio_tasks import _kick_dispatch, _notify_api_completion, _notify_api_media
+from app.worker.tasks.base import smart_upload
+from app.worker.warmup import worker_id
+
+logger = logging.getLogger(__name__)
+
+# Seuil de la banque complète (celui d'identify_speaker en batch)
+BANK_THRESHOLD = 0.5
+
+
+# =============================================================================
+# SESSION EN DIRECT
+# =============================================================================
+
+@broker.task(task_name="process_live_session")
+async def process_live_session(session: dict):
+    """
+    Session de transcription en direct, ouverte par le WebSocket de l'API.
+
+    Lit l'audio au fil de l'eau (flux Redis), publie les segments provisoires et
+    validés (app/services/live.py) et enregistre l'audio reçu. À la fin de la session,
+    le meeting reçoit les mêmes résultats qu'un traitement batch : transcription,
+    locuteurs (diarisation en ligne), fusion, speakers.json, session vectors, et le
+    WAV de la session à la place du fichier uploadé.
+
+    Args:
+        session (dict): Clés utilisées :
+            - session_id (str), meeting_id (str)
+            - file_path (str): Chemin S3 de l'enregistrement (s3://uploads/live/...)
+            - encoding (str): "pcm" (16 bits, 16 kHz mono) ou "opus" (Ogg / WebM)
+            - language (str): Langue forcée (défaut LIVE_LANGUAGE, sinon détectée)
+            - shortlist_group_ids, expected_identities: comme pour un job batch
+            - refine (dict): Job batch mis en file à la fin de la session ; sa version
+              remplacera la transcription en direct (None : la version en direct est finale)
+
+    Returns:
+        dict: Résultat avec status, meeting_id et result_path
+    """
+    session_id, meeting_id = session["session_id"], session["meeting_id"]
+    # Annulée par l'API (aucun worker n'a pris la session à temps) ou par l'utilisateur
+    if await is_cancelled_async(meeting_id):
+        logger.info(f"🛑 [LIVE {session_id}] Session annulée avant son démarrage")
+        await close_session(session_id)
+        return {"status": "cancelled", "meeting_id": meeting_id}
+
+    decoder = workspace = recorder = None
+    logger.info(f"🎙️ [LIVE {session_id}] Session du meeting {meeting_id} ({session.get('encoding') or 'pcm'})")
+    try:
+        await register_session(session_id, meeting_id, worker_id())
+        decoder = stream_decoder(session.get("encoding") or "pcm")
+        workspace = await run_io(JobWorkspace, f"live-{session_id}")
+        wav_path = await run_io(
+            workspace.path, "live.wav", size_hint=int(settings.LIVE_MAX_SESSION_SECONDS * WAV_BYTES_PER_SECOND)
+        )
+        # Banque de voix et shortlist lues sur S3 / Redis avant le premier bloc audio
+        engine = await run_io(_session_engine, session)
+        recorder = _open_recorder(wav_path)
+        await decoder.start()
+        await publish_event(session_id, {"type": "ready", "meeting_id": meeting_id})
+
+        async for chunk in audio_chunks(session_id):
+            pcm = await decoder.feed(chunk)
+            if pcm:
+                for event in await run_live(_ingest, engine, recorder, pcm):
+                    await publish_event(session_id, event)
+            if engine.audio_seconds >= settings.LIVE_MAX_SESSION_SECONDS:
+                logger.warning(f"⚠️ [LIVE {session_id}] Durée max atteinte ({settings.LIVE_MAX_SESSION_SECONDS:.0f}s)")
+                break
+
+        # Fin de session : reste du décodeur, puis toute la parole en attente est validée
+        tail = await decoder.close()
+        events = await run_live(_ingest, engine, recorder, tail) if tail else []
+        events += await run_live(engine.finish)
+        for event in events:
+            await publish_event(session_id, event)
+        recorder.close()
+        recorder = None
+        if await is_cancelled_async(meeting_id):
+            logger.info(f"🛑 [LIVE {session_id}] Session annulée : résultats non enregistrés")
+            await publish_event(session_id, {"type": "error", "message": "Session annulée"})
+            return {"status": "cancelled", "meeting_id": meeting_id}
+
+        result_path = await _finalize_session(session, engine, wav_path)
+        await publish_event(session_id, {
+            "type": "completed", "meeting_id": meeting_id, "result_path": result_path, **engine.stats(),
+        })
+        logger.info(f"✅ [LIVE {session_id}] Terminée : {engine.stats()} -> {result_path}")
+        return {"status": "success", "meeting_id": meeting_id, "result_path": result_path}
+
+    except Exception as e:
+        logger.error(f"💥 [LIVE {session_id}] ÉCHEC : {e}", exc_info=True)
+        await publish_event(session_id, {"type": "error", "message": str(e)})
+        await _notify_api_completion(meeting_id, "error", error_message=str(e))
+        return {"status": "error", "message": str(e), "meeting_id": meeting_id}
+
+    finally:
+        if decoder is not None:
+            decoder.kill()
+        if recorder is not None:
+            recorder.close()
+        if workspace is not None:
+            await run_io(workspace.release)
+        await close_session(session_id)
+
+
+# =============================================================================
+# FONCTIONS HELPER PRIVÉES
+# =============================================================================
+
+def _session_engine(session: dict) -> LiveTranscriber:
+    """Transcripteur de la session : Whisper réduit, VAD Silero, WeSpeaker et identification."""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    import torch
+
+    model = load_live_whisper()
+    options = live_options()
+    if session.get("language"):
+        options["language"] = session["language"]
+
+    def transcribe(audio, prompt):
+        segments, info = model.transcribe(audio, initial_prompt=prompt, **options)
+        segments = [(float(s.start), float(s.end), s.text) for s in segments]
+        if options["language"] is None and segments:
+            # Langue détectée sur le premier segment, puis fixée : plus de détection par morceau
+            options["language"] = info.language
+        return segments
+
+    vad_options = VadOptions(
+        min_silence_duration_ms=settings.LIVE_VAD_MIN_SILENCE_MS, speech_pad_ms=settings.LIVE_VAD_PAD_MS,
+    )
+
+    def vad(audio):
+        return [(c["start"], c["end"]) for c in get_speech_timestamps(audio, vad_options, sampling_rate=SAMPLE_RATE)]
+
+    inference = load_embedding_model()
+
+    def embed(audio):
+        batch = torch.from_numpy(np.ascontiguousarray(audio)).reshape(1, 1, -1)
+        return np.asarray(inference.infer(batch), dtype=np.float32).reshape(-1)
+
+    return LiveTranscriber(transcribe, vad, embed, OnlineSpeakers(_identifier(session)))
+
+
+def _identifier(session: dict):
+    """
+    Identification d'un centroïde de la session, comme en batch : shortlist des groupes
+    récurrents (SHORTLIST_CONFIDENCE_THRESHOLD) puis banque de voix restreinte aux
+    identités attendues. Matrices construites une fois pour toute la session.
+
+    Returns:
+        callable: centroïde -> (nom ou None, score, source), None sans aucune signature
+    """
+    group_ids = session.get("shortlist_group_ids") or []
+    shortlist = bank_matrix(load_shortlist(group_ids)) if group_ids else ([], None)
+    bank = bank_matrix(restrict_to_identities(get_voice_bank_embeddings(), session.get("expected_identities")))
+    if not shortlist[0] and not bank[0]:
+        logger.info("   ℹ️ Pas de voice bank, labels de session")
+        return None
+
+    def identify(centroid):
+        name, score = best_match(centroid, *shortlist)
+        if name is not None and score > settings.SHORTLIST_CONFIDENCE_THRESHOLD:
+            return name, score, "shortlist"
+        name, score = best_match(centroid, *bank)
+        if name is not None and score > BANK_THRESHOLD:
+            return name, score, "banque"
+        return None, score, None
+
+    return identify
+
+
+def _open_recorder(wav_path: str):
+    """WAV 16 kHz mono de la session, écrit au fil de l'eau (en-tête complété à la fermeture)."""
+    recorder = wave.open(wav_path, "wb")
+    recorder.setnchannels(1)
+    recorder.setsampwidth(2)
+    recorder.setframerate(SAMPLE_RATE)
+    return recorder
+
+
+def _ingest(engine: LiveTranscriber, recorder, pcm: bytes) -> list:
+    """Enregistre un bloc PCM 16 bits et le passe au transcripteur ; événements produits."""
+    recorder.writeframes(pcm)
+    return engine.feed(np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0)
+
+
+def _record_live_vectors(meeting_id: str, engine: LiveTranscriber) -> dict:
+    """
+    Session vectors des segments assez longs (embedding déjà calculé en direct) puis
+    regroupement des voix inconnues, comme l'étape session_vectors du batch.
+
+    Returns:
+        dict: {label: id du cluster de voix inconnue}
+    """
+    kept = [
+        s for s in engine.segments
+        if s.embedding is not None and s.end - s.start >= settings.SESSION_VECTOR_WINDOW_SECONDS
+    ]
+    if not settings.SESSION_VECTORS_ENABLED or not kept:
+        return {}
+    speakers = engine.speakers.speakers
+    try:
+        return record_meeting(
+            get_session_vector_store(),
+            meeting_id,
+            [(Turn(s.start, s.end), s.label) for s in kept],
+            {s.label: speakers[s.label]["name"] for s in kept},
+            np.stack([s.embedding for s in kept]),
+        )
+    except Exception as e:
+        # Index secondaire : son échec ne doit pas faire échouer la session
+        logger.warning(f"   ⚠️ Session vectors non enregistrés : {e}")
+        return {}
+
+
+async def _finalize_session(session: dict, engine: LiveTranscriber, wav_path: str) -> str:
+    """
+    Résultats du meeting (mêmes fichiers que le batch), enregistrement sur S3,
+    webhooks de l'API, puis passe batch de raffinement éventuelle.
+
+    Returns:
+        str: Chemin S3 des résultats
+    """
+    meeting_id = session["meeting_id"]
+    refine = session.get("refine")
+    speakers = engine.speakers
+    raw_segments = [TranscriptSegment(s.start, s.end, s.text) for s in engine.segments]
+    timeline = SpeakerTimeline((Turn(s.start, s.end), s.label) for s in engine.segments if s.label)
+
+    profiles = speakers.profiles()
+    for label, cluster_id in (await run_io(_record_live_vectors, str(meeting_id), engine)).items():
+        profiles[label]["cluster"] = cluster_id
+    group_ids = session.get("shortlist_group_ids") or []
+    seen = {s["name"]: speakers.centroid(label) for label, s in speakers.speakers.items() if s["name"]}
+    if group_ids and seen:
+        try:
+            await run_io(record_identities, group_ids, seen)
+        except Exception as e:
+            logger.warning(f"   ⚠️ Shortlist des groupes {group_ids} non mise à jour : {e}")
+
+    # Enregistrement de la session : fichier source du meeting (et de la passe de raffinement)
+    location = urlparse(session["file_path"])
+    await run_io(smart_upload, wav_path, location.netloc, location.path.lstrip("/"))
+    result_path = await run_io(
+        save_results,
+        clean_name=Path(session["file_path"]).name,
+        annotation=timeline,
+        raw_segments=raw_segments,
+        fusion_segments=merge_transcription_diarization(raw_segments, timeline, speakers.mapping() or None),
+        raw_fusion_segments=merge_transcription_diarization(raw_segments, timeline),
+        speakers=profiles,
+        metadata={
+            "meeting_id": str(meeting_id),
+            "version": "draft" if refine else "final",
+            "profile": live_profile(),
+            "live": engine.stats(),
+        },
+    )
+
+    await _notify_api_media(meeting_id, MediaInfo(
+        container="wav", codec="pcm_s16le", sample_rate=SAMPLE_RATE, channels=1,
+        duration_seconds=engine.audio_seconds, stream_index=0,
+    ))
+    await _notify_api_completion(meeting_id, "completed", result_path, version="draft" if refine else None)
+    if refine:
+        # Passe batch complète (grand modèle, diarisation Pyannote) sur l'enregistrement
+        await requeue_job({**refine, "cost": round(engine.audio_seconds, 1), "enqueued_at": time.time()}, front=False)
+        await _kick_dispatch(refine.get("pool"))
+        logger.info(f"🔁 [LIVE {session['session_id']}] Raffinement batch en file (classe {refine.get('queue_class')})")
+    return result_path
@@ -0,0 +1,258 @@
+"""
+Démarrage à chaud du worker.
+
+Au démarrage (avant de consommer la file), le worker :
+1. nettoie les répertoires scratch orphelins,
+2. charge les modèles de WARMUP_MODELS et lance une inférence factice sur une
+   seconde de silence (résolution Hugging Face, poids, kernels CUDA, allocations),
+3. calcule les embeddings de l'identity-bank (cache du processus),
+4. mesure son facteur temps réel (Whisper sur WARMUP_CALIBRATION_SECONDS de bruit),
+5. se déclare prêt : fichier WORKER_READY_FILE (healthcheck) et entrée Redis avec
+   la durée du warm-up et ses capacités (pool, device, RTF mesuré), lues par le
+   routage de l'API.
+
+Un worker en direct (LIVE_WORKER) réchauffe le Whisper réduit et le VAD Silero
+(étape "whisper_live") et se déclare dans sms:live:workers avec son nombre de
+sessions simultanées : l'API y lit la capacité en direct, et ne lui envoie pas
+de jobs batch.
+
+Un redémarrage progressif ne fait donc pas payer ces coûts au premier job.
+
+L'entrée Redis est republiée toutes les WORKER_HEARTBEAT_INTERVAL secondes
+("heartbeat_at") : un worker tué sans arrêt propre (OOM, SIGKILL) n'est plus compté
+par l'API au-delà de WORKER_READY_STALE_SECONDS.
+
+Structure Redis :
+    sms:workers:ready   HASH  {hôte}:{pid} -> {"ready_at", "heartbeat_at", "warmup_seconds", "steps",
+                                               "cpu_profile", "pool", "device", "compute_type",
+                                               "calibration_rtf"}
+    sms:live:workers    HASH  {hôte}:{pid} -> {"ready_at", "heartbeat_at", "warmup_seconds", "steps",
+                                               "sessions", "device"}
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+READY_KEY = "sms:workers:ready"
+
+# Une seconde de silence à 16 kHz
+DUMMY_SAMPLES = 16000
+
+# Republication périodique de l'entrée « prêt » (voir _heartbeat)
+_heartbeat_task = None
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _warm_pyannote() -> None:
+    import torch
+    from app.core.models import load_pyannote
+
+    pipeline = load_pyannote()
+    pipeline({"waveform": torch.zeros(1, DUMMY_SAMPLES), "sample_rate": 16000})
+
+
+def _warm_embedding() -> None:
+    import torch
+    from app.core.models import load_embedding_model
+
+    model = load_embedding_model()
+    # Bruit faible : un signal nul peut produire un embedding dégénéré (normalisation)
+    model({"waveform": torch.randn(1, DUMMY_SAMPLES) * 1e-3, "sample_rate": 16000})
+
+
+def _warm_whisper() -> None:
+    if settings.INFERENCE_SERVER_ENABLED:
+        # Whisper vit dans le serveur d'inférence (qui fait son propre warm-up)
+        from app.inference import client
+        client.ping()
+        return
+
+    import numpy as np
+    from app.core.models import load_whisper
+
+    model = load_whisper()
+    segments, _ = model.transcribe(np.zeros(DUMMY_SAMPLES, dtype=np.float32), beam_size=1)
+    list(segments)
+
+
+def _warm_whisper_live() -> None:
+    import numpy as np
+    from faster_whisper.vad import get_vad_model
+    from app.core.models import load_live_whisper
+
+    segments, _ = load_live_whisper().transcribe(np.zeros(DUMMY_SAMPLES, dtype=np.float32), beam_size=1)
+    list(segments)
+    get_vad_model()
+
+
+def _warm_identity_bank() -> None:
+    from app.services.identification import get_voice_bank_embeddings
+
+    bank = get_voice_bank_embeddings()
+    logger.info(f"   👥 Identity-bank en cache : {len(bank)} identité(s)")
+
+
+WARMUP_STEPS = {
+    "pyannote": _warm_pyannote,
+    "embedding": _warm_embedding,
+    "whisper": _warm_whisper,
+    "whisper_live": _warm_whisper_live,
+}
+
+
+def calibrate_rtf() -> float:
+    """
+    RTF de Whisper mesuré sur WARMUP_CALIBRATION_SECONDS de bruit (après warm-up).
+
+    Minore le RTF d'un vrai job (peu de texte décodé) mais compare les nœuds entre eux.
+
+    Returns:
+        float: Secondes de calcul par seconde d'audio, None si la mesure est désactivée
+    """
+    if settings.WARMUP_CALIBRATION_SECONDS <= 0 or settings.INFERENCE_SERVER_ENABLED:
+        return None
+    import numpy as np
+    from app.core.models import load_whisper
+
+    samples = int(settings.WARMUP_CALIBRATION_SECONDS * 16000)
+    audio = (np.random.default_rng(0).standard_normal(samples) * 1e-2).astype(np.float32)
+    started = time.monotonic()
+    segments, _ = load_whisper().transcribe(audio, beam_size=1)
+    list(segments)
+    return round((time.monotonic() - started) / settings.WARMUP_CALIBRATION_SECONDS, 4)
+
+
+def run_warmup() -> dict:
+    """
+    Exécute le warm-up (bloquant, à lancer dans le pool d'inférence).
+
+    Returns:
+        dict: Durée de chaque étape (secondes) ; une étape en échec est journalisée
+              sans empêcher le démarrage (le job la rechargera à froid).
+    """
+    steps = {}
+    plan = [(name, WARMUP_STEPS[name]) for name in settings.WARMUP_MODELS if name in WARMUP_STEPS]
+    if settings.WARMUP_IDENTITY_BANK:
+        plan.append(("identity_bank", _warm_identity_bank))
+
+    for name, step in plan:
+        started = time.monotonic()
+        try:
+            step()
+            steps[name] = round(time.monotonic() - started, 2)
+            logger.info(f"🔥 [Warm-up] {name} prêt en {steps[name]:.1f}s")
+        except Exception as e:
+            logger.warning(f"⚠️ [Warm-up] {name} en échec : {e}")
+    return steps
+
+
+async def warm_up() -> None:
+    """Warm-up complet puis déclaration « prêt » (appelé au démarrage du worker)."""
+    from app.core.scratch import sweep_orphans_once, publish_usage
+    from app.services.eta import publish_dag
+    from app.worker.executors import run_inference, run_io
+    from app.worker.tasks.audio_tasks import PIPELINE_STAGES
+
+    # Un fichier « prêt » laissé par un processus précédent ne doit pas couvrir ce warm-up
+    if os.path.exists(settings.WORKER_READY_FILE):
+        os.remove(settings.WORKER_READY_FILE)
+
+    started = time.monotonic()
+    cpu_profile = None
+    if settings.DEVICE == "cpu":
+        from app.worker.cpu_launcher import apply_cpu_profile
+        # Threads et cœurs fixés avant le chargement des modèles
+        cpu_profile = apply_cpu_profile().to_json()
+    await run_io(sweep_orphans_once)
+    await run_io(publish_usage)
+    await run_io(publish_dag, PIPELINE_STAGES)
+    steps = await run_inference(run_warmup)
+    duration = time.monotonic() - started
+    calibration_rtf = None
+    if "whisper" in steps:
+        try:
+            calibration_rtf = await run_inference(calibrate_rtf)
+        except Exception as e:
+            logger.warning(f"⚠️ [Warm-up] Mesure du RTF en échec : {e}")
+
+    if settings.LIVE_WORKER:
+        await _mark_live_ready(duration, steps)
+        return
+
+    await _publish_ready(READY_KEY, {
+        "warmup_seconds": round(duration, 2),
+        "steps": steps,
+        "cpu_profile": cpu_profile,
+        # Capacités annoncées au routage de l'API
+        "pool": settings.WORKER_POOL,
+        "device": settings.DEVICE,
+        "compute_type": settings.COMPUTE_TYPE,
+        "calibration_rtf": calibration_rtf,
+    })
+    with open(settings.WORKER_READY_FILE, "w") as f:
+        f.write(worker_id())
+    logger.info(f"✅ [Warm-up] Worker prêt en {duration:.1f}s (pool {settings.WORKER_POOL}, RTF {calibration_rtf})")
+
+
+async def _mark_live_ready(duration: float, steps: dict) -> None:
+    """Déclare un worker en direct : capacité en sessions lue par l'API à l'ouverture d'un WebSocket."""
+    from app.services.live_sessions import WORKERS_KEY
+
+    await _publish_ready(WORKERS_KEY, {
+        "warmup_seconds": round(duration, 2),
+        "steps": steps,
+        "sessions": settings.LIVE_SESSIONS_PER_WORKER,
+        "device": settings.DEVICE,
+    })
+    with open(settings.WORKER_READY_FILE, "w") as f:
+        f.write(worker_id())
+    logger.info(f"✅ [Warm-up] Worker en direct prêt en {duration:.1f}s ({settings.LIVE_SESSIONS_PER_WORKER} sessions)")
+
+
+async def _publish_ready(key: str, entry: dict) -> None:
+    """Publie l'entrée « prêt » du worker puis la republie périodiquement."""
+    global _heartbeat_task
+
+    now = time.time()
+    entry = {"ready_at": now, "heartbeat_at": now, **entry}
+    await get_redis().hset(key, worker_id(), json.dumps(entry))
+    _heartbeat_task = asyncio.create_task(_heartbeat(key, entry))
+
+
+async def _heartbeat(key: str, entry: dict) -> None:
+    """Rafraîchit "heartbeat_at" : l'API ignore les entrées non rafraîchies (worker tué)."""
+    while True:
+        await asyncio.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+        entry["heartbeat_at"] = time.time()
+        try:
+            await get_redis().hset(key, worker_id(), json.dumps(entry))
+        except Exception as e:
+            logger.warning(f"⚠️ [Warm-up] Heartbeat non publié : {e}")
+
+
+async def mark_stopped() -> None:
+    """Retire le worker de la liste des workers prêts (arrêt propre)."""
+    from app.services.live_sessions import WORKERS_KEY
+
+    global _heartbeat_task
+    # Arrêté avant la désinscription : un dernier heartbeat recréerait l'entrée
+    if _heartbeat_task is not None:
+        _heartbeat_task.cancel()
+        _heartbeat_task = None
+    if os.path.exists(settings.WORKER_READY_FILE):
+        os.remove(settings.WORKER_READY_FILE)
+    try:
+        await get_redis().hdel(WORKERS_KEY if settings.LIVE_WORKER else READY_KEY, worker_id())
+    except Exception as e:
+        logger.warning(f"⚠️ [Warm-up] Désinscription impossible : {e}")
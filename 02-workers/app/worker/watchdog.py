@@ -0,0 +1,80 @@
+"""
+Watchdog des jobs en cours.
+
+Un thread par processus worker :
+- renouvelle le bail Redis de chaque job suivi (un bail expiré signale un worker mort,
+  le job est alors récupéré par `reap_orphaned_jobs`),
+- surveille le timeout de l'étape en cours. Les timeouts sont normalement levés aux
+  points de contrôle du pipeline (StageTimeout) ; si un appel reste bloqué au-delà du
+  budget + WATCHDOG_GRACE_SECONDS (FFmpeg, modèle figé, I/O), on ne peut pas
+  l'interrompre depuis Python : le watchdog note la cause et termine le processus,
+  que Taskiq redémarre. Le job est retenté (ou envoyé en DLQ) après expiration du bail.
+"""
+import logging
+import os
+import threading
+import time
+
+from app.core.config import settings
+from app.services.scheduler import renew_lease, record_abort
+
+logger = logging.getLogger(__name__)
+
+# Code de sortie du processus quand le watchdog l'arrête
+WATCHDOG_EXIT_CODE = 70
+
+
+class Watchdog:
+    """Suivi des PipelineJob du processus courant (thread démarré au premier job)."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, pipeline_job) -> None:
+        with self._lock:
+            self._jobs[id(pipeline_job)] = pipeline_job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sms-watchdog", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, pipeline_job) -> None:
+        with self._lock:
+            self._jobs.pop(id(pipeline_job), None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(settings.WATCHDOG_INTERVAL)
+            with self._lock:
+                jobs = list(self._jobs.values())
+
+            for pipeline_job in jobs:
+                job_id = pipeline_job.job.get("job_id")
+                if job_id:
+                    try:
+                        renew_lease(job_id)
+                    except Exception as e:
+                        logger.warning(f"⚠️ [Watchdog] Bail du job {job_id} non renouvelé : {e}")
+
+                deadline = pipeline_job.deadline
+                if deadline is not None and time.monotonic() > deadline + settings.WATCHDOG_GRACE_SECONDS:
+                    self._abort(pipeline_job)
+
+    def _abort(self, pipeline_job) -> None:
+        """Étape bloquée hors de tout point de contrôle : redémarrage du processus."""
+        reason = (
+            f"Timeout de l'étape '{pipeline_job.stage}' ({pipeline_job.budget:.0f}s), "
+            f"worker redémarré par le watchdog"
+        )
+        logger.critical(f"⏱️ [Watchdog] [JOB {pipeline_job.meeting_id}] {reason}")
+        job_id = pipeline_job.job.get("job_id")
+        if job_id:
+            try:
+                record_abort(job_id, reason)
+            except Exception as e:
+                logger.warning(f"⚠️ [Watchdog] Cause non enregistrée : {e}")
+        os._exit(WATCHDOG_EXIT_CODE)
+
+
+watchdog = Watchdog()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Cherche la répartition des cœurs qui maximise le débit d'un nœud CPU.
+
+Pour chaque répartition candidate (N processus × T threads, N × T ≤ cœurs), lance N
+processus qui appliquent le profil CPU du worker (app/worker/cpu_launcher.py :
+threads torch, threads faster-whisper, épinglage CPU_AFFINITY) puis traitent en
+boucle le même audio pendant --seconds. Le débit du nœud est la somme des secondes
+d'audio traitées par seconde ; la meilleure répartition est affichée avec les
+variables d'environnement correspondantes.
+
+Charges :
+    whisper   transcription faster-whisper (store de modèles requis)
+    pyannote  diarisation Pyannote (store de modèles requis)
+    stub      multiplications matricielles numpy (sans modèle, pour tester le banc)
+
+Usage :
+    DEVICE=cpu python scripts/cpu_profile_bench.py --workload whisper --audio sample.wav
+    DEVICE=cpu python scripts/cpu_profile_bench.py --workers 1,2,4,8 --affinity cores
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+SAMPLE_RATE = 16000
+
+
+def _candidates(cores: int, requested: str) -> list:
+    """Répartitions (processus, threads) testées : diviseurs du nombre de cœurs par défaut."""
+    if requested:
+        workers = sorted({int(w) for w in requested.split(",") if w})
+    else:
+        workers = [w for w in range(1, cores + 1) if cores % w == 0]
+    return [(w, max(1, cores // w)) for w in workers if w <= cores]
+
+
+def _load_audio(path: str, seconds: float):
+    import numpy as np
+
+    if path:
+        import soundfile as sf
+        audio, sr = sf.read(path, dtype="float32")
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if sr != SAMPLE_RATE:
+            raise SystemExit(f"❌ {path} : {sr} Hz, WAV 16 kHz attendu")
+        return audio
+    # Bruit faible : Whisper décode peu de texte mais exécute encodeur et décodeur
+    return (np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE)) * 1e-2).astype("float32")
+
+
+def _workload(name: str, audio):
+    """Fonction qui traite `audio` une fois (modèles chargés au préalable)."""
+    if name == "whisper":
+        from app.core.models import load_whisper
+        model = load_whisper()
+
+        def run():
+            segments, _ = model.transcribe(audio, beam_size=1)
+            for _ in segments:
+                pass
+        return run
+
+    if name == "pyannote":
+        import torch
+        from app.core.models import load_pyannote
+        pipeline = load_pyannote()
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+        return lambda: pipeline({"waveform": waveform, "sample_rate": SAMPLE_RATE})
+
+    import numpy as np
+    matrix = np.random.default_rng(0).standard_normal((512, 512)).astype("float32")
+    # ~ une seconde d'audio = 20 produits 512×512 (ordre de grandeur d'un petit encodeur)
+    steps = max(1, int(len(audio) / SAMPLE_RATE * 20))
+
+    def run():
+        for _ in range(steps):
+            matrix @ matrix
+    return run
+
+
+def _bench_process(index: int, workers: int, args, barrier, results) -> None:
+    # Profil fixé avant tout import de torch / numpy (pools de threads natifs)
+    os.environ["CPU_WORKERS"] = str(workers)
+    os.environ["CPU_THREADS_PER_WORKER"] = str(args.threads_override or 0)
+    from app.core.config import settings
+    profile = settings.cpu_profile(index, workers)
+    os.environ["OMP_NUM_THREADS"] = str(profile.threads)
+    os.environ["OPENBLAS_NUM_THREADS"] = str(profile.threads)
+    if args.workload == "stub":
+        if profile.cpus:
+            os.sched_setaffinity(0, profile.cpus)
+    else:
+        from app.worker.cpu_launcher import apply_cpu_profile
+        apply_cpu_profile(profile)
+
+    audio = _load_audio(args.audio, args.audio_seconds)
+    run = _workload(args.workload, audio)
+    run()  # warm-up hors mesure
+    barrier.wait()
+
+    started, processed = time.monotonic(), 0.0
+    while time.monotonic() - started < args.seconds:
+        run()
+        processed += len(audio) / SAMPLE_RATE
+    results.put((index, processed, time.monotonic() - started))
+
+
+def bench(workers: int, threads: int, args) -> float:
+    """Débit du nœud (secondes d'audio / seconde) pour N processus × T threads."""
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    args.threads_override = threads
+    processes = [
+        ctx.Process(target=_bench_process, args=(index, workers, args, barrier, results))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measures = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(processed / elapsed for _, processed, elapsed in measures)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", choices=["whisper", "pyannote", "stub"], default="whisper")
+    parser.add_argument("--audio", default="", help="WAV 16 kHz mono (défaut : bruit)")
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="Durée du bruit généré")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Durée de mesure par répartition")
+    parser.add_argument("--workers", default="", help="Nombres de processus testés, ex: 1,2,4")
+    parser.add_argument("--affinity", choices=["none", "cores", "numa"], default=os.getenv("CPU_AFFINITY", "none"))
+    args = parser.parse_args()
+
+    os.environ["DEVICE"] = "cpu"
+    os.environ["CPU_AFFINITY"] = args.affinity
+    cores = len(os.sched_getaffinity(0))
+    candidates = _candidates(cores, args.workers)
+    print(f"🧮 {cores} cœur(s), charge {args.workload}, épinglage {args.affinity}, {args.seconds:.0f}s par mesure\n")
+
+    results = []
+    for workers, threads in candidates:
+        throughput = bench(workers, threads, args)
+        results.append((throughput, workers, threads))
+        print(f"   {workers:>3} processus × {threads:>3} thread(s) : {throughput:8.2f} s d'audio / s")
+
+    if not results:
+        print("❌ Aucune répartition à tester")
+        return 1
+    throughput, workers, threads = max(results)
+    print(f"\n✅ Meilleure répartition : {workers} processus × {threads} thread(s) ({throughput:.2f} s d'audio / s)")
+    print(f"   CPU_WORKERS={workers} CPU_THREADS_PER_WORKER={threads} CPU_AFFINITY={args.affinity}")
+    print(f"   DEVICE=cpu python -m app.worker.cpu_launcher app.broker:broker --fs-discover --workers {workers}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
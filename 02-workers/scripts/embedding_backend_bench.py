@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Concordance et débit des backends du modèle d'embedding WeSpeaker (torch / ONNX).
+
+Calcule les embeddings d'un même lot de fenêtres audio avec le Model Pyannote
+(torch) puis avec le graphe ONNX exporté (float32 et int8) :
+
+- concordance : similarité cosinus entre l'embedding torch et l'embedding ONNX de
+  chaque fenêtre (min / moyenne) ; le script échoue (code 1) si le minimum passe
+  sous --min-cosine (float32) ou --min-cosine-int8 ;
+- débit : embeddings par seconde, au même nombre de threads.
+
+Usage :
+    DEVICE=cpu python scripts/embedding_backend_bench.py --audio sample.wav --threads 4
+    python scripts/embedding_backend_bench.py --random-weights   # sans store (test du banc)
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+SAMPLE_RATE = 16000
+
+
+def _windows(path: str, count: int, seconds: float):
+    """`count` fenêtres de `seconds` tirées de l'audio (bruit coloré sans fichier)."""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    frames = int(seconds * SAMPLE_RATE)
+    if path:
+        import soundfile as sf
+        audio, sr = sf.read(path, dtype="float32", always_2d=True)
+        if sr != SAMPLE_RATE:
+            raise SystemExit(f"❌ {path} : {sr} Hz, WAV 16 kHz attendu")
+        audio = audio[:, 0]
+        if len(audio) < frames:
+            raise SystemExit(f"❌ {path} : plus court que la fenêtre ({seconds}s)")
+        starts = rng.integers(0, len(audio) - frames + 1, size=count)
+        chunks = np.stack([audio[start:start + frames] for start in starts])
+    else:
+        # Bruit filtré (spectre variable d'une fenêtre à l'autre) plutôt que bruit blanc
+        noise = rng.standard_normal((count, frames)).astype("float32")
+        kernels = rng.uniform(0.0, 1.0, size=(count, 32)).astype("float32")
+        chunks = np.stack([np.convolve(n, k, mode="same") for n, k in zip(noise, kernels)])
+        chunks /= np.abs(chunks).max(axis=1, keepdims=True) * 4
+    return chunks[:, None, :].astype("float32")
+
+
+def _load_model(random_weights: bool):
+    from pyannote.audio import Model
+
+    if random_weights:
+        from pyannote.audio.models.embedding import WeSpeakerResNet34
+        return WeSpeakerResNet34().eval()
+    from app.core import model_store
+    with model_store.torch_load_mmap():
+        return Model.from_pretrained(model_store.embedding_checkpoint()).eval()
+
+
+def _throughput(run, batches, seconds: float) -> float:
+    """Embeddings par seconde sur des passes répétées du lot (après une passe de chauffe)."""
+    run(batches[0])
+    started, done = time.monotonic(), 0
+    while time.monotonic() - started < seconds:
+        for batch in batches:
+            run(batch)
+            done += len(batch)
+    return done / (time.monotonic() - started)
+
+
+def _cosines(reference, other):
+    import numpy as np
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    other = other / np.linalg.norm(other, axis=1, keepdims=True)
+    return (reference * other).sum(axis=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", default="", help="WAV 16 kHz (défaut : bruit filtré)")
+    parser.add_argument("--windows", type=int, default=128, help="Fenêtres comparées")
+    parser.add_argument("--window-seconds", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="Threads (défaut : profil CPU du worker)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Durée de mesure du débit par backend")
+    parser.add_argument("--min-cosine", type=float, default=0.999, help="Concordance minimale ONNX float32")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98, help="Concordance minimale ONNX int8")
+    parser.add_argument("--random-weights", action="store_true", help="WeSpeaker non entraîné (sans store)")
+    args = parser.parse_args()
+
+    import numpy as np
+    import torch
+    from app.core.config import settings
+    from app.core.embedding_backend import OnnxEmbedding, export_onnx, onnx_forward
+
+    threads = args.threads or settings.cpu_profile().threads
+    torch.set_num_threads(threads)
+    model = _load_model(args.random_weights)
+    chunks = torch.from_numpy(_windows(args.audio, args.windows, args.window_seconds))
+    batches = list(torch.split(chunks, args.batch_size))
+
+    def run_torch(batch):
+        with torch.inference_mode():
+            return model(batch).numpy()
+
+    print(f"🧮 {len(chunks)} fenêtres de {args.window_seconds}s, lots de {args.batch_size}, {threads} thread(s)\n")
+    reference = np.concatenate([run_torch(batch) for batch in batches])
+    results = {"torch": (None, _throughput(run_torch, batches, args.seconds))}
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, quantize, minimum in (("onnx", False, args.min_cosine), ("onnx-int8", True, args.min_cosine_int8)):
+            path = os.path.join(tmp, f"{label}.onnx")
+            export_onnx(model, path, quantize=quantize)
+            forward = onnx_forward(model, OnnxEmbedding(path, threads))
+            run_onnx = lambda batch: forward(batch).numpy()  # noqa: E731
+            cosines = _cosines(reference, np.concatenate([run_onnx(batch) for batch in batches]))
+            results[label] = (cosines, _throughput(run_onnx, batches, args.seconds))
+            if cosines.min() < minimum:
+                failed = True
+                print(f"❌ {label} : cosinus min {cosines.min():.4f} < {minimum}")
+
+    base = results["torch"][1]
+    for label, (cosines, throughput) in results.items():
+        agreement = "référence" if cosines is None else f"cos min {cosines.min():.4f} / moy {cosines.mean():.4f}"
+        print(f"   {label:<10} {throughput:8.1f} embeddings/s  (×{throughput / base:.2f})  {agreement}")
+    if not failed:
+        print("\n✅ Concordance ONNX / torch dans les seuils")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Remplit le store local des modèles (MODEL_STORE_DIR) avant un déploiement hors ligne.
+
+Télécharge la révision configurée (MODEL_REVISIONS, sinon main) de chaque modèle,
+fige le commit obtenu dans le manifeste et prépare la configuration Pyannote sur
+chemins locaux. Relancer le script ne retélécharge que les modèles dont la
+révision demandée a changé.
+
+Usage :
+    python scripts/fetch_models.py              # tous les modèles
+    python scripts/fetch_models.py whisper      # un seul modèle
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.core import model_store  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="*", help=f"Modèles parmi : {', '.join(sorted(model_store.MODEL_REPOS))}")
+    args = parser.parse_args()
+    unknown = set(args.models) - set(model_store.MODEL_REPOS)
+    if unknown:
+        parser.error(f"modèle(s) inconnu(s) : {', '.join(sorted(unknown))}")
+
+    if settings.MODEL_STORE_OFFLINE:
+        print("❌ MODEL_STORE_OFFLINE=true : désactiver le mode hors ligne pour remplir le store")
+        return 1
+
+    for name in args.models or sorted(model_store.MODEL_REPOS):
+        model_store.fetch(name)
+    if not args.models or {"pyannote", "segmentation", "embedding"} & set(args.models):
+        model_store.diarization_config()
+
+    print(f"\n📦 Store : {settings.MODEL_STORE_DIR}")
+    for name, entry in sorted(model_store.read_manifest().items()):
+        print(f"   {name:<13} {entry['repo']:<45} {entry['revision'][:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
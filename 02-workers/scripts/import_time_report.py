@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Rapport des temps d'import (python -X importtime) du Worker ou de l'API.
+
+Mesure le démarrage à froid du point d'entrée (broker Taskiq ou app FastAPI),
+affiche les modules les plus coûteux et vérifie :
+- que le temps total reste sous le budget,
+- qu'aucun module lourd (torch, faster_whisper, pyannote...) n'est importé au démarrage.
+
+Usage :
+    python scripts/import_time_report.py worker
+    python scripts/import_time_report.py api --budget-ms 2500 --top 20
+
+Code de sortie 1 si le budget est dépassé ou si un module interdit est importé
+(utilisable en CI). Les dépendances du projet doivent être installées.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+TARGETS = {
+    "worker": {
+        "cwd": REPO_ROOT / "02-workers",
+        "module": "app.broker",
+        "budget_ms": 2000,
+        "forbidden": ["torch", "faster_whisper", "ctranslate2", "pyannote", "librosa", "scipy"],
+    },
+    "api": {
+        "cwd": REPO_ROOT / "03-interface" / "backend",
+        "module": "app.main",
+        "budget_ms": 3000,
+        "forbidden": ["torch"],
+    },
+}
+
+
+def measure(cwd: Path, module: str) -> list:
+    """
+    Importe `module` dans un interpréteur neuf avec -X importtime.
+
+    Returns:
+        list: (self_us, cumulative_us, profondeur, nom) pour chaque module importé
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-3000:], file=sys.stderr)
+        raise SystemExit(f"❌ Import de {module} en échec")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Profondeur 0 pour les imports de premier niveau, deux espaces de plus par niveau
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--budget-ms", type=float, help="Budget de démarrage (défaut selon la cible)")
+    parser.add_argument("--top", type=int, default=15, help="Nombre de modules affichés")
+    args = parser.parse_args()
+
+    target = TARGETS[args.target]
+    budget_ms = args.budget_ms or target["budget_ms"]
+    entries = measure(target["cwd"], target["module"])
+
+    # Les modules de profondeur 0 (imports de premier niveau) couvrent tout le temps mesuré
+    total_ms = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0) / 1000
+    imported = {name for *_, name in entries}
+    forbidden = sorted(
+        name for name in imported
+        if any(name == heavy or name.startswith(heavy + ".") for heavy in target["forbidden"])
+    )
+
+    print(f"⏱️  import {target['module']} : {total_ms:.0f} ms (budget {budget_ms:.0f} ms), {len(entries)} modules")
+    print(f"\n{'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+    for self_us, cumulative_us, _, name in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>12.1f} {self_us / 1000:>12.1f}  {name}")
+
+    failed = False
+    if forbidden:
+        roots = sorted({name.split(".")[0] for name in forbidden})
+        print(f"\n❌ Modules lourds importés au démarrage : {', '.join(roots)}")
+        failed = True
+    if total_ms > budget_ms:
+        print(f"\n❌ Budget dépassé de {total_ms - budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Démarrage sous le budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
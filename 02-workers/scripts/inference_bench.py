@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai du serveur d'inférence avec le backend CPU factice (stub).
+
+Démarre un serveur en mémoire sur un socket temporaire, simule N jobs concurrents
+qui envoient des chunks de segmentation et d'embedding comme la diarisation, plus
+une transcription en flux chacun, puis affiche la distribution des tailles de batch,
+le délai d'attente en file et le débit.
+
+Échec (code 1) si une requête échoue ou si aucun batch ne regroupe plusieurs jobs
+alors que des jobs concurrents étaient actifs.
+
+Usage :
+    python scripts/inference_bench.py --jobs 8 --requests 50 --max-wait-ms 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=8, help="Jobs concurrents")
+    parser.add_argument("--requests", type=int, default=50, help="Requêtes forward par job et par modèle")
+    parser.add_argument("--chunks", type=int, default=4, help="Chunks par requête")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--max-items", type=int, default=64)
+    args = parser.parse_args()
+
+    # La configuration est lue à l'import : socket temporaire et paramètres du banc
+    os.environ["INFERENCE_SOCKET"] = os.path.join(tempfile.mkdtemp(prefix="sms-inference-"), "bench.sock")
+    os.environ["INFERENCE_BATCH_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    os.environ["INFERENCE_BATCH_MAX_ITEMS"] = str(args.max_items)
+
+    import numpy as np
+    from app.core.config import settings
+    from app.inference import client
+    from app.inference.backends import StubBackend
+    from app.inference.server import InferenceServer
+
+    server = InferenceServer(StubBackend(), settings.INFERENCE_SOCKET, publish=False)
+    ready = threading.Event()
+
+    def _serve() -> None:
+        async def _run():
+            started = asyncio.Event()
+            task = asyncio.create_task(server.serve(started))
+            await started.wait()
+            ready.set()
+            await task
+        asyncio.run(_run())
+
+    threading.Thread(target=_serve, name="inference-server", daemon=True).start()
+    if not ready.wait(30):
+        print("❌ Le serveur n'a pas démarré")
+        return 1
+
+    def job(index: int) -> int:
+        rng = np.random.default_rng(index)
+        for _ in range(args.requests):
+            chunks = rng.standard_normal((args.chunks, 1, 16000), dtype=np.float32)
+            scores = client.forward("segmentation", chunks)
+            assert len(scores) == args.chunks
+            embeddings = client.forward("embedding", chunks, np.ones((args.chunks, 589), dtype=np.float32))
+            # Chaque job doit recevoir ses propres résultats, pas ceux d'un autre job du batch
+            assert np.allclose(embeddings[:, 0], chunks.reshape(args.chunks, -1).mean(axis=1), atol=1e-5)
+        return sum(1 for _ in client.transcribe("/nonexistent.wav", {}))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        segments = list(pool.map(job, range(args.jobs)))
+    elapsed = time.monotonic() - started
+
+    stats = client.stats()
+    print(f"⏱️  {args.jobs} jobs × {args.requests} requêtes × 2 modèles en {elapsed:.2f}s "
+          f"({sum(segments)} segments transcrits)")
+    for name, model_stats in stats["models"].items():
+        print(f"\n📦 {name}")
+        print(f"   batches : {model_stats['batches']} (taille moyenne {model_stats['mean_batch_size']})")
+        print(f"   tailles : {json.dumps(model_stats['batch_sizes'])}")
+        print(f"   attente : p50 {model_stats['queue_delay_ms']['p50']} ms, "
+              f"p95 {model_stats['queue_delay_ms']['p95']} ms")
+        print(f"   débit   : {model_stats['items_per_second']} éléments/s")
+    print(f"\n🎙️ transcription : {json.dumps(stats['transcription'])}")
+
+    merged = all(m["mean_batch_size"] > args.chunks for m in stats["models"].values())
+    if args.jobs > 1 and not merged:
+        print("\n❌ Aucun regroupement entre jobs")
+        return 1
+    print("\n✅ Requêtes de jobs différents regroupées en batches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
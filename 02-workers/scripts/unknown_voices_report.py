@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Voix inconnues récurrentes (clusters de session vectors, voir app/services/speaker_clusters.py).
+
+Liste les voix non identifiées entendues dans plusieurs meetings, avec leurs
+meetings et labels : nommer l'une d'elles ("C'est Albert" sur l'un de ses meetings)
+la propage à tous les autres par le relabel.
+
+Usage :
+    python scripts/unknown_voices_report.py
+    SESSION_VECTORS_STORE=local SESSION_VECTORS_LOCAL_DIR=/tmp/sv python scripts/unknown_voices_report.py --all
+    python scripts/unknown_voices_report.py --demo   # store local temporaire, voix synthétiques
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def _demo(store) -> None:
+    """Remplit le store de 12 meetings synthétiques : 2 voix récurrentes + 1 invité par meeting."""
+    import numpy as np
+    from app.services.session_vectors import SessionVectors
+    from app.services.speaker_clusters import add_meeting
+
+    rng = np.random.default_rng(0)
+    recurring = {"alice": rng.standard_normal(256), "bruno": rng.standard_normal(256)}
+    for index in range(12):
+        voices = dict(recurring, invite=rng.standard_normal(256))
+        labels, vectors = [], []
+        for speaker_index, (voice, base) in enumerate(voices.items()):
+            for _ in range(10):
+                labels.append(f"SPEAKER_{speaker_index:02d}")
+                vectors.append(base + 0.6 * rng.standard_normal(256))
+        vectors = np.asarray(vectors, dtype=np.float32)
+        meeting_id = f"demo-{index}"
+        store.append(SessionVectors(
+            meeting_id, labels, [None] * len(labels),
+            np.arange(len(labels), dtype=float) * 3, np.arange(len(labels), dtype=float) * 3 + 2.5, vectors,
+        ))
+        loaded = store.load(meeting_id)
+        unknown = {
+            label: (loaded.vectors[[i for i, l in enumerate(loaded.labels) if l == label]].mean(axis=0), 25.0)
+            for label in sorted(set(loaded.labels))
+        }
+        add_meeting(store, meeting_id, unknown)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="Toutes les voix, même vues une seule fois")
+    parser.add_argument("--demo", action="store_true", help="Store local temporaire rempli de voix synthétiques")
+    args = parser.parse_args()
+
+    if args.demo:
+        os.environ["SESSION_VECTORS_STORE"] = "local"
+        os.environ["SESSION_VECTORS_LOCAL_DIR"] = tempfile.mkdtemp(prefix="session-vectors-")
+
+    from app.core.config import settings
+    from app.services.session_vectors import get_session_vector_store
+    from app.services.speaker_clusters import recurring_clusters
+
+    store = get_session_vector_store()
+    if args.demo:
+        _demo(store)
+    if args.all:
+        settings.UNKNOWN_CLUSTER_MIN_MEETINGS = 1
+
+    state = store.load_clusters()
+    clusters = recurring_clusters(state)
+    print(f"🧭 {len(store.meetings())} meeting(s), {len(state['clusters'])} voix inconnue(s), "
+          f"{len(clusters)} vue(s) dans ≥ {settings.UNKNOWN_CLUSTER_MIN_MEETINGS} meetings\n")
+    for cluster in clusters:
+        print(f"   {cluster['id']} : {len(cluster['meetings'])} meeting(s), {cluster['seconds']:.0f}s de parole")
+        print(f"      {', '.join(cluster['meetings'][:10])}{' ...' if len(cluster['meetings']) > 10 else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
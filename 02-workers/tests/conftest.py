@@ -0,0 +1,267 @@
+"""
+Fixtures partagées des tests du Worker.
+
+Redis et MinIO sont remplacés par des doubles en mémoire (FakeRedis, sa version
+asynchrone AsyncFakeRedis, FakeS3) : les tests tournent sans service externe, les
+modèles sont remplacés par des étapes ou backends factices dans chaque test.
+"""
+import io
+import json
+import time
+
+import pytest
+
+from app.core import redis_client
+
+
+class FakeRedis:
+    """Sous-ensemble synchrone de redis.Redis (decode_responses=True) utilisé par le Worker."""
+
+    def __init__(self):
+        self.data = {}
+
+    # --- Chaînes ---
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        return key in self.data
+
+    # --- Listes ---
+    def _list(self, key):
+        return self.data.setdefault(key, [])
+
+    def rpush(self, key, *values):
+        self._list(key).extend(str(v) for v in values)
+        return len(self.data[key])
+
+    def lpush(self, key, *values):
+        for value in values:
+            self._list(key).insert(0, str(value))
+        return len(self.data[key])
+
+    def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    def lindex(self, key, index):
+        items = self.data.get(key, [])
+        return items[index] if -len(items) <= index < len(items) else None
+
+    def llen(self, key):
+        return len(self.data.get(key, []))
+
+    def lpos(self, key, value):
+        items = self.data.get(key, [])
+        return items.index(value) if value in items else None
+
+    def lpop(self, key):
+        items = self.data.get(key, [])
+        return items.pop(0) if items else None
+
+    def lmove(self, source, destination, src="LEFT", dest="RIGHT"):
+        items = self.data.get(source, [])
+        if not items:
+            return None
+        value = items.pop(0 if src == "LEFT" else -1)
+        target = self._list(destination)
+        target.insert(0, value) if dest == "LEFT" else target.append(value)
+        return value
+
+    def lrem(self, key, count, value):
+        items = self.data.get(key, [])
+        removed = 0
+        while value in items and (count == 0 or removed < abs(count)):
+            items.remove(value)
+            removed += 1
+        return removed
+
+    # --- Hashes ---
+    def _hash(self, key):
+        return self.data.setdefault(key, {})
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        self._hash(key).update({k: str(v) for k, v in values.items()})
+        return len(values)
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def hvals(self, key):
+        return list(self.data.get(key, {}).values())
+
+    def hdel(self, key, *fields):
+        values = self.data.get(key, {})
+        return sum(1 for field in fields if values.pop(field, None) is not None)
+
+    def hincrby(self, key, field, amount=1):
+        values = self._hash(key)
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def hincrbyfloat(self, key, field, amount=1.0):
+        values = self._hash(key)
+        values[field] = str(float(values.get(field, 0.0)) + amount)
+        return float(values[field])
+
+    # --- Ensembles ---
+    def sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        before = len(values)
+        values.update(str(m) for m in members)
+        return len(values) - before
+
+    def srem(self, key, *members):
+        values = self.data.get(key, set())
+        return sum(1 for m in members if str(m) in values and not values.discard(str(m)))
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def sismember(self, key, member):
+        return str(member) in self.data.get(key, set())
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    # --- Ensembles triés ---
+    def zadd(self, key, mapping):
+        values = self.data.setdefault(key, {})
+        added = sum(1 for member in mapping if member not in values)
+        values.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    def zrem(self, key, *members):
+        values = self.data.get(key, {})
+        return sum(1 for member in members if values.pop(member, None) is not None)
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zrange(self, key, start, end, withscores=False):
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        items = items[start:] if end == -1 else items[start:end + 1]
+        return items if withscores else [member for member, _ in items]
+
+    def zcount(self, key, low, high):
+        return len(self.zrangebyscore(key, low, high))
+
+    def zrangebyscore(self, key, low, high):
+        low = float("-inf") if low == "-inf" else float(low)
+        high = float("inf") if high == "+inf" else float(high)
+        return [member for member, score in self.zrange(key, 0, -1, withscores=True) if low <= score <= high]
+
+
+class _FakeLock:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class AsyncFakeRedis:
+    """Client asynchrone (redis.asyncio) sur les mêmes données qu'un FakeRedis."""
+
+    def __init__(self, sync: FakeRedis):
+        self.sync = sync
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return _FakeLock()
+
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+
+        async def _call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return _call
+
+
+class FakeS3:
+    """Sous-ensemble du client boto3 S3 utilisé par les checkpoints et le stockage."""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.encode("utf-8")
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None):
+        with open(Filename, "rb") as f:
+            self.objects[(Bucket, Key)] = f.read()
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def json(self, bucket, key):
+        return json.loads(self.objects[(bucket, key)].decode("utf-8"))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Client Redis synchrone du processus remplacé par un FakeRedis vide."""
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "_sync_client", fake)
+    return fake
+
+
+@pytest.fixture
+def fake_async_redis(monkeypatch, fake_redis):
+    """Client Redis asynchrone du processus, sur les données de `fake_redis`."""
+    fake = AsyncFakeRedis(fake_redis)
+    monkeypatch.setattr(redis_client, "_client", fake)
+    return fake
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    """Client S3 des checkpoints remplacé par un FakeS3 vide."""
+    from app.services import checkpoint
+
+    fake = FakeS3()
+    monkeypatch.setattr(checkpoint, "get_s3_client", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def queued_job(fake_redis):
+    """Dépose un job en queue de la file d'un tenant, en attente depuis `waited` secondes."""
+    from app.services.scheduler import active_key, queue_key
+
+    def _queue(queue_class: str, tenant: str = "group:1", waited: float = 60.0, **extra) -> dict:
+        job = {"job_id": f"{queue_class}-{tenant}", "meeting_id": "0", "tenant": tenant,
+               "queue_class": queue_class, "enqueued_at": time.time() - waited, **extra}
+        fake_redis.rpush(queue_key(queue_class, tenant), json.dumps(job))
+        if fake_redis.lpos(active_key(queue_class), tenant) is None:
+            fake_redis.rpush(active_key(queue_class), tenant)
+        return job
+
+    return _queue
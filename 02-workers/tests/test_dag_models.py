@@ -0,0 +1,80 @@
+"""
+Modèles partagés par les jobs d'un même processus (singletons de app.core.models).
+
+Les étapes sont factices : elles notent combien d'étapes utilisent le modèle en même temps.
+"""
+import asyncio
+
+import pytest
+
+from app.core import models
+from app.core.config import settings
+from app.worker import dag
+from app.worker.dag import Stage, run_dag
+from app.worker.pipeline import PipelineJob
+
+
+@pytest.fixture(autouse=True)
+def dag_settings(monkeypatch, fake_redis, fake_s3):
+    monkeypatch.setattr(settings, "PIPELINE_CONCURRENT_STAGES", True)
+    monkeypatch.setattr(settings, "CPU_EXECUTOR_THREADS", 2)
+    monkeypatch.setattr(dag, "_stage_slots", {})
+    monkeypatch.setattr(dag, "_model_locks", {})
+    monkeypatch.setattr(dag, "_model_users", {})
+
+
+@pytest.fixture
+def released(monkeypatch):
+    calls = []
+    monkeypatch.setattr(models, "release_models", lambda only=None: calls.append(list(only)))
+    return calls
+
+
+def _embedding_stage(name: str, usage: dict, seconds: float = 0.02) -> Stage:
+    async def run(pipeline_job, inputs):
+        usage["active"] += 1
+        usage["max"] = max(usage["max"], usage["active"])
+        await asyncio.sleep(seconds)
+        usage["active"] -= 1
+        return name
+    return Stage(name=name, run=run, resource="cpu", models=("embedding",))
+
+
+def _job(meeting_id: str) -> PipelineJob:
+    return PipelineJob({"meeting_id": meeting_id, "tenant": "group:1", "queue_class": "normal"})
+
+
+def test_shared_model_serialized_and_released_once(released):
+    usage = {"active": 0, "max": 0}
+
+    async def scenario():
+        await asyncio.gather(
+            run_dag(_job("1"), [_embedding_stage("identification", usage)]),
+            run_dag(_job("2"), [_embedding_stage("session_vectors", usage)]),
+        )
+
+    asyncio.run(scenario())
+
+    # Une seule étape à la fois sur l'instance WeSpeaker, malgré deux threads cpu
+    assert usage["max"] == 1
+    # Libéré après la dernière étape seulement : l'autre job l'attendait encore
+    assert released == [["embedding"]]
+    assert dag._model_users["embedding"] == 0
+
+
+def test_model_not_released_while_other_job_uses_it(released):
+    usage = {"active": 0, "max": 0}
+
+    async def scenario():
+        other = asyncio.create_task(run_dag(_job("2"), [_embedding_stage("session_vectors", usage, 0.1)]))
+        await asyncio.sleep(0.01)
+        # Fin d'un autre job (échec, annulation) pendant l'étape : libère ce qui est inutilisé
+        await dag.release_unused_models()
+        releases_during_use = list(released)
+        await other
+        return releases_during_use
+
+    releases_during_use = asyncio.run(scenario())
+
+    assert ["embedding"] not in releases_during_use
+    assert released[-1] == ["embedding"]
@@ -0,0 +1,76 @@
+"""
+Concordance des backends d'embedding WeSpeaker : torch (Model Pyannote) et ONNX Runtime.
+
+Le graphe est exporté depuis le checkpoint du store dans un répertoire temporaire,
+puis les embeddings des mêmes fenêtres audio sont comparés fenêtre par fenêtre
+(similarité cosinus minimale). Ignoré sans onnxruntime, sans pyannote.audio ou sans
+le checkpoint dans le store (scripts/fetch_models.py).
+
+Débit des deux backends : scripts/embedding_backend_bench.py.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+
+# Similarité cosinus minimale entre l'embedding torch et l'embedding ONNX d'une fenêtre
+MIN_COSINE = 0.999
+MIN_COSINE_INT8 = 0.98
+
+SAMPLE_RATE = 16000
+WINDOWS = 8
+WINDOW_SECONDS = 2.0
+
+
+def _clip() -> np.ndarray:
+    """Fenêtres de bruit filtré, spectre différent d'une fenêtre à l'autre (déterministe)."""
+    rng = np.random.default_rng(0)
+    frames = int(WINDOW_SECONDS * SAMPLE_RATE)
+    noise = rng.standard_normal((WINDOWS, frames)).astype("float32")
+    kernels = rng.uniform(0.0, 1.0, size=(WINDOWS, 32)).astype("float32")
+    chunks = np.stack([np.convolve(n, k, mode="same") for n, k in zip(noise, kernels)])
+    chunks /= np.abs(chunks).max(axis=1, keepdims=True) * 4
+    return chunks[:, None, :].astype("float32")
+
+
+def _cosines(reference: np.ndarray, other: np.ndarray) -> np.ndarray:
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    other = other / np.linalg.norm(other, axis=1, keepdims=True)
+    return (reference * other).sum(axis=1)
+
+
+@pytest.fixture(scope="module")
+def embedding_model():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("pyannote.audio")
+    from app.core import model_store
+
+    entry = model_store.read_manifest().get("embedding")
+    checkpoint = entry and os.path.join(entry["path"], model_store.TORCH_CHECKPOINT)
+    if not checkpoint or not os.path.exists(checkpoint):
+        pytest.skip(f"Checkpoint WeSpeaker absent de {settings.MODEL_STORE_DIR}")
+
+    from pyannote.audio import Model
+
+    with model_store.torch_load_mmap():
+        return Model.from_pretrained(checkpoint).eval()
+
+
+@pytest.mark.parametrize("quantize, minimum", [(False, MIN_COSINE), (True, MIN_COSINE_INT8)],
+                         ids=["float32", "int8"])
+def test_onnx_embeddings_match_torch(embedding_model, tmp_path, quantize, minimum):
+    import torch
+    from app.core.embedding_backend import OnnxEmbedding, export_onnx, onnx_forward
+
+    chunks = torch.from_numpy(_clip())
+    with torch.inference_mode():
+        reference = embedding_model(chunks).numpy()
+
+    path = str(tmp_path / "embedding.onnx")
+    export_onnx(embedding_model, path, quantize=quantize)
+    onnx = onnx_forward(embedding_model, OnnxEmbedding(path, threads=1))(chunks).numpy()
+
+    cosines = _cosines(reference, onnx)
+    assert cosines.min() >= minimum, f"cosinus min {cosines.min():.4f} < {minimum} (moy {cosines.mean():.4f})"
@@ -0,0 +1,163 @@
+"""
+Dequeue équitable : priorité stricte entre classes, Deficit Round Robin entre tenants.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.scheduler import (
+    DELAYED_KEY,
+    INFLIGHT_KEY,
+    active_key,
+    deficit_key,
+    dequeue_next_job,
+    lease_key,
+    promote_delayed_jobs,
+    queue_key,
+    running_key,
+)
+
+
+@pytest.fixture(autouse=True)
+def fair_share_settings(monkeypatch, fake_async_redis):
+    monkeypatch.setattr(settings, "QUEUE_CLASSES", ["urgent", "normal", "bulk"])
+    monkeypatch.setattr(settings, "FAIR_SHARE_QUANTUM_SECONDS", 600.0)
+    monkeypatch.setattr(settings, "FAIR_SHARE_WEIGHTS", {})
+    monkeypatch.setattr(settings, "FAIR_SHARE_DEFAULT_WEIGHT", 1.0)
+    monkeypatch.setattr(settings, "FAIR_SHARE_MAX_RUNNING", {})
+    monkeypatch.setattr(settings, "FAIR_SHARE_DEFAULT_MAX_RUNNING", 2)
+    monkeypatch.setattr(settings, "ROUTING_ENABLED", False)
+
+
+def _dequeue():
+    return asyncio.run(dequeue_next_job())
+
+
+def test_tenant_credited_then_served(fake_redis, queued_job):
+    queued_job("normal", tenant="group:1", job_id="a1", cost=300.0)
+
+    job = _dequeue()
+
+    assert job["job_id"] == "a1"
+    assert fake_redis.sismember(running_key("group:1"), "a1")
+    assert fake_redis.hget(INFLIGHT_KEY, "a1") is not None
+    assert fake_redis.exists(lease_key("a1"))
+    # File vidée : le tenant quitte le tourniquet et perd le reste de son crédit
+    assert fake_redis.lrange(active_key("normal"), 0, -1) == []
+    assert fake_redis.hget(deficit_key("normal"), "group:1") is None
+
+
+def test_tenant_keeps_credit_across_jobs(fake_redis, queued_job):
+    queued_job("normal", tenant="group:1", job_id="a1", cost=300.0)
+    queued_job("normal", tenant="group:1", job_id="a2", cost=600.0)
+
+    # Crédité d'un quantum (600 s) au premier passage, servi : il garde le reste
+    assert _dequeue()["job_id"] == "a1"
+    assert float(fake_redis.hget(deficit_key("normal"), "group:1")) == 300.0
+
+
+def test_tenants_rotate(monkeypatch, fake_redis, queued_job):
+    monkeypatch.setattr(settings, "FAIR_SHARE_DEFAULT_MAX_RUNNING", 10)
+    for i in range(2):
+        queued_job("normal", tenant="group:1", job_id=f"a{i}", cost=600.0)
+        queued_job("normal", tenant="group:2", job_id=f"b{i}", cost=600.0)
+
+    served = [_dequeue()["job_id"] for _ in range(4)]
+
+    assert served == ["a0", "b0", "a1", "b1"]
+
+
+def test_capped_tenant_skipped_without_credit(fake_redis, queued_job):
+    queued_job("normal", tenant="group:1", job_id="a1", cost=60.0)
+    queued_job("normal", tenant="group:2", job_id="b1", cost=60.0)
+    fake_redis.sadd(running_key("group:1"), "x", "y")
+
+    assert _dequeue()["job_id"] == "b1"
+    assert fake_redis.hget(deficit_key("normal"), "group:1") is None
+    assert fake_redis.lrange(active_key("normal"), 0, -1) == ["group:1"]
+
+
+def test_all_tenants_capped(fake_redis, queued_job):
+    queued_job("normal", tenant="group:1", job_id="a1", cost=60.0)
+    fake_redis.sadd(running_key("group:1"), "x", "y")
+
+    assert _dequeue() is None
+    assert fake_redis.llen(queue_key("normal", "group:1")) == 1
+
+
+def test_higher_class_served_first(fake_redis, queued_job):
+    queued_job("bulk", tenant="group:1", job_id="bulk-1", cost=60.0)
+    queued_job("urgent", tenant="group:2", job_id="urgent-1", cost=60.0)
+
+    assert _dequeue()["job_id"] == "urgent-1"
+
+
+def test_tenant_without_backlog_leaves_ring(fake_redis):
+    fake_redis.rpush(active_key("normal"), "group:1")
+    fake_redis.hset(deficit_key("normal"), "group:1", 120.0)
+
+    assert _dequeue() is None
+    assert fake_redis.lrange(active_key("normal"), 0, -1) == []
+    assert fake_redis.hget(deficit_key("normal"), "group:1") is None
+
+
+def test_resumed_job_served_without_credit(fake_redis, queued_job):
+    queued_job("normal", tenant="group:1", job_id="a1", cost=3600.0, resume=True)
+
+    assert _dequeue()["job_id"] == "a1"
+    assert fake_redis.hget(deficit_key("normal"), "group:1") is None
+
+
+def _delayed(job_id: str, due_in: float):
+    job = {"job_id": job_id, "meeting_id": job_id, "tenant": "group:1", "queue_class": "normal", "cost": 60.0}
+    return job, time.time() + due_in
+
+
+def test_due_delayed_job_promoted(fake_redis):
+    for job_id, due_in in (("due", -1.0), ("later", 3600.0)):
+        job, due = _delayed(job_id, due_in)
+        fake_redis.zadd(DELAYED_KEY, {json.dumps(job): due})
+
+    promoted = asyncio.run(promote_delayed_jobs())
+
+    assert [job["job_id"] for job in promoted] == ["due"]
+    assert fake_redis.zcard(DELAYED_KEY) == 1
+    assert _dequeue()["job_id"] == "due"
+
+
+def test_idle_token_stops_when_only_delayed_jobs(monkeypatch, fake_redis):
+    from app.worker.tasks import audio_tasks
+
+    kicks = []
+
+    async def _kick(pool=None):
+        kicks.append(pool)
+
+    monkeypatch.setattr(audio_tasks, "_kick_dispatch", _kick)
+    monkeypatch.setattr(settings, "FAIR_SHARE_RETRY_DELAY", 0.0)
+    job, due = _delayed("later", 3600.0)
+    fake_redis.zadd(DELAYED_KEY, {json.dumps(job): due})
+
+    # Pas de ré-émission en boucle jusqu'à l'échéance : la promotion émettra le jeton
+    assert asyncio.run(audio_tasks.dispatch_fair_share_job()) == {"status": "idle"}
+    assert kicks == []
+
+
+def test_capped_tenant_token_reissued(monkeypatch, fake_redis, queued_job):
+    from app.worker.tasks import audio_tasks
+
+    kicks = []
+
+    async def _kick(pool=None):
+        kicks.append(pool)
+
+    monkeypatch.setattr(audio_tasks, "_kick_dispatch", _kick)
+    monkeypatch.setattr(settings, "FAIR_SHARE_RETRY_DELAY", 0.0)
+    queued_job("normal", tenant="group:1", job_id="a1", cost=60.0)
+    fake_redis.sadd(running_key("group:1"), "x", "y")
+
+    assert asyncio.run(audio_tasks.dispatch_fair_share_job()) == {"status": "deferred"}
+    assert kicks == [None]
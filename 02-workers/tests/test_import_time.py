@@ -0,0 +1,61 @@
+"""
+Démarrage à froid du Worker : budget d'import et modules lourds paresseux.
+
+Chaque mesure tourne dans un interpréteur neuf (le processus pytest a déjà importé
+une partie de l'application). Budget par défaut aligné sur
+scripts/import_time_report.py, ajustable par IMPORT_TIME_BUDGET_MS (machines de CI lentes).
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+WORKER_ROOT = Path(__file__).resolve().parents[1]
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+# Importés seulement au chargement d'un modèle (warm-up ou premier job)
+HEAVY_MODULES = ["torch", "faster_whisper", "ctranslate2", "pyannote", "librosa", "scipy"]
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    result = subprocess.run([sys.executable, *args], cwd=WORKER_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-3000:]
+    return result
+
+
+def _import_time_ms(module: str) -> float:
+    """Temps d'import cumulé de `module` (somme des imports de premier niveau, -X importtime)."""
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Profondeur 0 : un seul espace avant le nom
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+    return total_us / 1000
+
+
+def test_broker_import_within_budget():
+    total_ms = _import_time_ms("app.broker")
+
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"import app.broker : {total_ms:.0f} ms pour un budget de {IMPORT_TIME_BUDGET_MS:.0f} ms "
+        f"(détail : python scripts/import_time_report.py worker)"
+    )
+
+
+def test_broker_and_tasks_do_not_import_heavy_modules():
+    code = (
+        "import json, sys\n"
+        "import app.broker, app.worker.tasks\n"
+        "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))\n"
+    )
+    imported = set(json.loads(_python("-c", code).stdout))
+
+    assert not imported & set(HEAVY_MODULES), (
+        f"Modules lourds importés au démarrage : {', '.join(sorted(imported & set(HEAVY_MODULES)))}"
+    )
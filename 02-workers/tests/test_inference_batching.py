@@ -0,0 +1,108 @@
+"""
+Batching dynamique du serveur d'inférence (app/inference/server.py) sur le backend CPU factice.
+
+Le backend factice renvoie pour chaque élément un embedding égal à la moyenne de
+son entrée : chaque appelant soumet une valeur distincte et doit la retrouver.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.inference.backends import StubBackend
+from app.inference.server import DynamicBatcher
+
+WINDOW = 160
+
+
+class RecordingBackend(StubBackend):
+    """StubBackend sans coût simulé qui note la taille de chaque batch."""
+
+    def __init__(self):
+        super().__init__(overhead=0.0, per_item=0.0)
+        self.batch_sizes = []
+
+    def forward(self, model, inputs, weights=None):
+        self.batch_sizes.append(len(inputs))
+        return super().forward(model, inputs, weights)
+
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+
+def _inputs(value: float, items: int, window: int = WINDOW) -> np.ndarray:
+    return np.full((items, 1, window), value, dtype=np.float32)
+
+
+def _serve(backend, requests, max_items: int, max_wait: float):
+    """Soumet toutes les requêtes en même temps ; renvoie les sorties dans l'ordre des requêtes."""
+    async def scenario():
+        executor = ThreadPoolExecutor(max_workers=1)
+        batcher = DynamicBatcher(
+            "embedding",
+            lambda inputs, weights: backend.forward("embedding", inputs, weights),
+            executor,
+            max_items,
+            max_wait,
+        )
+        runner = asyncio.create_task(batcher.run())
+        try:
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(r) for r in requests)), 5)
+        finally:
+            runner.cancel()
+            executor.shutdown(wait=True)
+
+    return asyncio.run(scenario())
+
+
+def test_batch_leaves_when_full(backend):
+    started = time.monotonic()
+    _serve(backend, [_inputs(i, 2) for i in range(4)], max_items=8, max_wait=10.0)
+
+    # Batch complet : pas d'attente de la fenêtre max_wait
+    assert backend.batch_sizes == [8]
+    assert time.monotonic() - started < 1.0
+
+
+def test_batches_capped_at_max_items(backend):
+    _serve(backend, [_inputs(i, 3) for i in range(5)], max_items=8, max_wait=0.05)
+
+    assert sorted(backend.batch_sizes, reverse=True) == [6, 6, 3]
+    assert max(backend.batch_sizes) <= 8
+
+
+def test_oversized_request_runs_alone(backend):
+    outputs = _serve(backend, [_inputs(1, 20), _inputs(2, 1)], max_items=8, max_wait=0.05)
+
+    assert backend.batch_sizes == [20, 1]
+    assert [len(o) for o in outputs] == [20, 1]
+
+
+def test_partial_batch_flushed_after_max_wait(backend):
+    started = time.monotonic()
+    outputs = _serve(backend, [_inputs(7, 1)], max_items=64, max_wait=0.1)
+    elapsed = time.monotonic() - started
+
+    assert backend.batch_sizes == [1]
+    assert 0.1 <= elapsed < 1.0
+    assert outputs[0].shape == (1, StubBackend.EMBEDDING_DIM)
+
+
+def test_results_routed_to_each_caller(backend):
+    sizes = [1, 4, 2, 3, 1, 5]
+    requests = [_inputs(value, items) for value, items in enumerate(sizes)]
+    # Forme différente : batch séparé, jamais concaténée aux autres
+    requests.append(_inputs(99, 2, window=2 * WINDOW))
+
+    outputs = _serve(backend, requests, max_items=8, max_wait=0.05)
+
+    for value, (request, output) in enumerate(zip(requests[:-1], outputs[:-1])):
+        assert output.shape == (len(request), StubBackend.EMBEDDING_DIM)
+        assert np.all(output == value)
+    assert np.all(outputs[-1] == 99)
+    assert sum(backend.batch_sizes) == sum(sizes) + 2
+    assert max(backend.batch_sizes) <= 8
@@ -0,0 +1,237 @@
+"""
+Préemption aux frontières d'étapes (classes préemptibles, points de reprise).
+
+Les étapes sont factices : elles comptent leurs exécutions et peuvent déposer un
+job plus prioritaire dans la file pendant qu'elles tournent.
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.scheduler import running_key, should_yield
+from app.worker import dag
+from app.worker.dag import Stage, run_dag
+from app.worker.pipeline import JobPreempted, PipelineJob
+
+
+@pytest.fixture(autouse=True)
+def preemption_settings(monkeypatch, fake_redis, fake_s3):
+    monkeypatch.setattr(settings, "QUEUE_CLASSES", ["urgent", "normal", "bulk"])
+    monkeypatch.setattr(settings, "PREEMPTIBLE_QUEUE_CLASSES", ["bulk"])
+    monkeypatch.setattr(settings, "PREEMPTION_GRACE_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "PIPELINE_CONCURRENT_STAGES", False)
+    # Places des ressources liées à la boucle asyncio de chaque test
+    monkeypatch.setattr(dag, "_stage_slots", {})
+    monkeypatch.setattr(dag, "_model_locks", {})
+
+
+def _job(queue_class: str = "bulk", **extra) -> dict:
+    return {"job_id": "job-42", "meeting_id": "42", "tenant": "group:2", "queue_class": queue_class,
+            "cost": 60.0, **extra}
+
+
+def _stages(calls: dict, on_run: dict = None):
+    """Deux étapes checkpointées ; on_run[nom] est appelé pendant l'étape."""
+    def make(name, inputs=()):
+        async def run(pipeline_job, inputs_):
+            calls[name] = calls.get(name, 0) + 1
+            if on_run and name in on_run:
+                on_run[name]()
+            return f"{name}-output"
+        return Stage(name=name, run=run, inputs=inputs, resource="io", state_key=f"{name}_out",
+                     save=lambda output: output, restore=lambda state: state)
+
+    return [make("diarization"), make("transcription", ("diarization",))]
+
+
+def test_should_yield_when_higher_class_waits(queued_job):
+    queued_job("urgent", waited=60)
+
+    assert should_yield(_job("bulk"))
+
+
+def test_should_not_yield_within_grace_period(queued_job):
+    # Un worker libre prendra le job urgent de lui-même
+    queued_job("urgent", waited=1)
+
+    assert not should_yield(_job("bulk"))
+
+
+def test_opt_out_class_never_yields(monkeypatch, queued_job):
+    queued_job("urgent", waited=60)
+
+    assert not should_yield(_job("normal"))
+    monkeypatch.setattr(settings, "PREEMPTIBLE_QUEUE_CLASSES", [])
+    assert not should_yield(_job("bulk"))
+
+
+def test_check_raises_job_preempted(queued_job):
+    queued_job("urgent", waited=60)
+    pipeline_job = PipelineJob(_job("bulk"))
+
+    with pytest.raises(JobPreempted) as preempted:
+        pipeline_job.check("transcription")
+    assert preempted.value.stage == "transcription"
+
+
+def test_check_without_job_id_is_not_preemptible(queued_job):
+    # Appel direct hors ordonnanceur
+    queued_job("urgent", waited=60)
+    job = _job("bulk")
+    del job["job_id"]
+
+    PipelineJob(job).check("transcription")
+
+
+def test_checkpoint_written_under_meeting_prefix(tmp_path, fake_s3):
+    wav = tmp_path / "audio.wav"
+    wav.write_bytes(b"RIFF")
+    pipeline_job = PipelineJob(_job("bulk"))
+    pipeline_job.complete("diarization", diarization_out="diarization-output")
+
+    payload = pipeline_job.suspend(str(wav))
+
+    state = fake_s3.json(settings.MINIO_BUCKET_RESULTS, f"{settings.CHECKPOINT_PREFIX}/42/state.json")
+    assert state["completed"] == ["diarization"]
+    assert state["diarization_out"] == "diarization-output"
+    assert state["audio_wav_path"] == f"s3://{settings.MINIO_BUCKET_RESULTS}/{settings.CHECKPOINT_PREFIX}/42/audio.wav"
+    assert (settings.MINIO_BUCKET_RESULTS, f"{settings.CHECKPOINT_PREFIX}/42/audio.wav") in fake_s3.objects
+    assert payload["resume"] is True and payload["job_id"] == "job-42"
+
+
+def test_resume_skips_finished_stages(queued_job, fake_redis, fake_s3):
+    calls = {}
+    # Un job urgent arrive pendant la diarisation : préemption avant la transcription
+    stages = _stages(calls, on_run={"diarization": lambda: queued_job("urgent", waited=60)})
+    first = PipelineJob(_job("bulk"))
+
+    with pytest.raises(JobPreempted) as preempted:
+        asyncio.run(run_dag(first, stages))
+    assert preempted.value.stage == "transcription"
+    payload = first.suspend()
+    assert calls == {"diarization": 1}
+
+    # Le job urgent a été servi : la reprise repart du point de reprise
+    fake_redis.data.clear()
+    resumed = PipelineJob(payload)
+    assert resumed.resumed
+    outputs = asyncio.run(run_dag(resumed, _stages(calls)))
+
+    assert calls == {"diarization": 1, "transcription": 1}
+    assert outputs == {"diarization": "diarization-output", "transcription": "transcription-output"}
+    resumed.finish()
+    assert (settings.MINIO_BUCKET_RESULTS, f"{settings.CHECKPOINT_PREFIX}/42/state.json") not in fake_s3.objects
+
+
+def test_capped_tenant_does_not_preempt(monkeypatch, fake_redis, queued_job):
+    # Le tenant du job urgent est à son plafond : aucun worker ne pourrait le servir
+    monkeypatch.setattr(settings, "FAIR_SHARE_MAX_RUNNING", {"group:1": 1})
+    queued_job("urgent", tenant="group:1", waited=60)
+    fake_redis.sadd(running_key("group:1"), "other-job")
+
+    assert not should_yield(_job("bulk"))
+
+
+def test_slot_freed_by_yielding_job_counts(monkeypatch, fake_redis, queued_job):
+    # Le job préemptible occupe lui-même le slot du tenant : céder le libère
+    monkeypatch.setattr(settings, "FAIR_SHARE_MAX_RUNNING", {"group:2": 1})
+    queued_job("urgent", tenant="group:2", waited=60)
+    fake_redis.sadd(running_key("group:2"), "job-42")
+
+    assert should_yield(_job("bulk"))
+
+
+def test_job_of_other_pool_does_not_preempt(monkeypatch, queued_job):
+    monkeypatch.setattr(settings, "ROUTING_ENABLED", True)
+    monkeypatch.setenv("WORKER_POOL", "cpu")
+    queued_job("urgent", waited=60, pool="gpu")
+
+    assert not should_yield(_job("bulk"))
+
+
+async def _release_nothing():
+    pass
+
+
+class _Workspace:
+    def __init__(self, meeting_id):
+        pass
+
+    def release(self):
+        pass
+
+
+class _Watchdog:
+    def watch(self, pipeline_job):
+        pass
+
+    def unwatch(self, pipeline_job):
+        pass
+
+
+@pytest.fixture
+def dispatch(monkeypatch, fake_async_redis, fake_redis, queued_job):
+    """
+    Jeton de dispatch sur un job "bulk" dont le DAG lève `error` ; renvoie les
+    événements (remise en file, jeton, libération) et l'état du slot à chaque remise en file.
+    """
+    from app.services.scheduler import INFLIGHT_KEY, complete_job
+    from app.worker.tasks import audio_tasks
+
+    events = []
+    monkeypatch.setattr(audio_tasks, "JobWorkspace", _Workspace)
+    monkeypatch.setattr(audio_tasks, "watchdog", _Watchdog())
+    monkeypatch.setattr(audio_tasks, "release_unused_models", _release_nothing)
+
+    def slot_state():
+        return {"running": fake_redis.smembers(running_key("group:2")),
+                "inflight": fake_redis.hget(INFLIGHT_KEY, "job-42")}
+
+    async def _complete(job, served_seconds):
+        events.append(("complete", None))
+        await complete_job(job, served_seconds)
+
+    async def _requeue(job, front=True):
+        events.append(("requeue", slot_state()))
+
+    async def _failure(job, error, transient, stage=None):
+        events.append(("retry", slot_state()))
+        return "retry"
+
+    async def _kick(pool=None):
+        events.append(("kick", None))
+
+    monkeypatch.setattr(audio_tasks, "complete_job", _complete)
+    monkeypatch.setattr(audio_tasks, "requeue_job", _requeue)
+    monkeypatch.setattr(audio_tasks, "handle_job_failure", _failure)
+    monkeypatch.setattr(audio_tasks, "_kick_dispatch", _kick)
+
+    def _run(error: Exception):
+        async def _dag(pipeline_job, stages):
+            raise error
+
+        monkeypatch.setattr(audio_tasks, "run_dag", _dag)
+        queued_job("bulk", tenant="group:2", job_id="job-42", meeting_id="42", cost=60.0, file_path="s3://uploads/a.wav")
+        result = asyncio.run(audio_tasks.dispatch_fair_share_job())
+        return result, events
+
+    return _run
+
+
+def test_preempted_job_released_before_requeue(dispatch):
+    result, events = dispatch(JobPreempted("transcription"))
+
+    assert result["status"] == "preempted"
+    assert [name for name, _ in events] == ["complete", "requeue", "kick"]
+    # Slot libéré avant que le job ne redevienne visible des autres workers
+    assert events[1][1] == {"running": set(), "inflight": None}
+
+
+def test_retried_job_released_before_retry(dispatch):
+    result, events = dispatch(ConnectionError("S3 indisponible"))
+
+    assert result["status"] == "retrying"
+    # Pas de jeton : la promotion du retry à l'échéance en émettra un
+    assert [name for name, _ in events] == ["complete", "retry"]
+    assert events[1][1] == {"running": set(), "inflight": None}
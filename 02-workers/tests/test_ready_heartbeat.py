@@ -0,0 +1,31 @@
+"""
+Entrée « prêt » du worker (sms:workers:ready) : republiée périodiquement, retirée à l'arrêt.
+"""
+import asyncio
+import json
+
+from app.core.config import settings
+from app.worker import warmup
+
+
+def test_heartbeat_refreshes_then_stops(monkeypatch, fake_async_redis, fake_redis, tmp_path):
+    monkeypatch.setattr(settings, "WORKER_HEARTBEAT_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "WORKER_READY_FILE", str(tmp_path / "ready"))
+    monkeypatch.setattr(settings, "LIVE_WORKER", False)
+
+    async def scenario():
+        await warmup._publish_ready(warmup.READY_KEY, {"pool": "cpu"})
+        published = json.loads(fake_redis.hget(warmup.READY_KEY, warmup.worker_id()))
+        await asyncio.sleep(0.05)
+        refreshed = json.loads(fake_redis.hget(warmup.READY_KEY, warmup.worker_id()))
+        await warmup.mark_stopped()
+        await asyncio.sleep(0.03)
+        return published, refreshed
+
+    published, refreshed = asyncio.run(scenario())
+
+    assert refreshed["heartbeat_at"] > published["heartbeat_at"]
+    assert refreshed["ready_at"] == published["ready_at"]
+    assert refreshed["pool"] == "cpu"
+    # Heartbeat arrêté avant la désinscription : l'entrée n'est pas recréée
+    assert fake_redis.hget(warmup.READY_KEY, warmup.worker_id()) is None
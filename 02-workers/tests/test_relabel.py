@@ -0,0 +1,36 @@
+"""
+Renommage rétroactif des profils de speakers.json (nom affiché et identité person_id).
+"""
+from app.services.identification import bank_matrix
+from app.services.relabel import apply_speaker_names, relabel_speakers
+
+
+def _manual(name="Émile Durand", person_id="emile-durand"):
+    return {"embedding": [1.0, 0.0], "name": name, "person_id": person_id, "score": 1.0, "source": "manual"}
+
+
+def test_match_keeps_manual_display_name():
+    speakers = {"SPEAKER_00": _manual()}
+    names, matrix = bank_matrix({"emile-durand": [1.0, 0.0], "albert": [0.9, 0.1]})
+
+    assert not relabel_speakers(speakers, names, matrix, {})
+    assert apply_speaker_names([{"speaker": "SPEAKER_00"}], speakers) == [{"speaker": "Émile Durand"}]
+
+
+def test_rename_applies_to_person_id():
+    speakers = {"SPEAKER_00": _manual(), "SPEAKER_01": _manual("Albert", "albert")}
+
+    assert relabel_speakers(speakers, [], None, {"emile-durand": "emile-martin"})
+    assert speakers["SPEAKER_00"]["person_id"] == "emile-martin"
+    assert speakers["SPEAKER_00"]["name"] == "emile-martin"
+    assert speakers["SPEAKER_01"]["name"] == "Albert"
+
+
+def test_match_on_profile_without_person_id():
+    # Profil écrit avant person_id : le nom est l'identité
+    speakers = {"SPEAKER_00": {"embedding": [0.0, 1.0], "name": "albert", "score": 0.6, "source": "banque"}}
+    names, matrix = bank_matrix({"albert": [0.1, 0.9], "bea": [0.0, 1.0]})
+
+    assert relabel_speakers(speakers, names, matrix, {})
+    assert speakers["SPEAKER_00"]["person_id"] == "bea"
+    assert speakers["SPEAKER_00"]["source"] == "relabel"
@@ -0,0 +1,144 @@
+"""
+Partage copy-on-write des modèles entre workers CPU (PSS).
+
+Charge SHARED_MODELS comme le lanceur CPU (app/worker/cpu_launcher.py), mesure le
+processus parent (= une copie : interpréteur, bibliothèques, poids), puis forke N
+enfants qui exécutent chacun une inférence (diarisation + embedding) sur du bruit.
+La PSS (Proportional Set Size) répartit chaque page partagée entre les processus
+qui la mappent : la somme des PSS est la mémoire réellement consommée.
+
+Seuil : PSS totale ≤ PSS d'une copie + WORKERS × ACTIVATION_MB.
+
+Ignoré hors Linux, sans torch / pyannote.audio ou sans les modèles dans le store
+(scripts/fetch_models.py). Le chargement a lieu dans un processus forké : le gel du
+GC et les hooks de fork du lanceur ne touchent pas le processus pytest.
+"""
+import gc
+import json
+import os
+import signal
+
+import pytest
+
+from app.core.config import settings
+
+WORKERS = 4
+# Durée du signal de chaque job (secondes)
+AUDIO_SECONDS = 30.0
+# Mémoire privée tolérée par job (activations, tampons), en Mo
+ACTIVATION_MB = 400.0
+
+SAMPLE_RATE = 16000
+
+# Entrées du manifeste nécessaires à chaque modèle partagé
+STORE_ENTRIES = {
+    "pyannote": ("pyannote", "segmentation", "embedding"),
+    "embedding": ("embedding",),
+}
+
+
+def pss_mb(pid: int) -> float:
+    """PSS d'un processus (Mo), lue dans /proc/{pid}/smaps_rollup."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_job(seconds: float) -> None:
+    """Inférence représentative d'un job sur les modèles hérités du parent."""
+    import torch
+    from app.core.models import load_embedding_model, load_pyannote
+
+    waveform = torch.randn(1, int(seconds * SAMPLE_RATE)) * 1e-2
+    if "pyannote" in settings.SHARED_MODELS:
+        load_pyannote()({"waveform": waveform, "sample_rate": SAMPLE_RATE})
+    if "embedding" in settings.SHARED_MODELS:
+        load_embedding_model()({"waveform": waveform, "sample_rate": SAMPLE_RATE})
+
+
+def measure(workers: int, seconds: float) -> dict:
+    """Charge les modèles partagés, forke les workers et relève les PSS."""
+    from app.worker.cpu_launcher import preload_shared_models
+
+    preload_shared_models(workers)
+    one_copy = pss_mb(os.getpid())
+
+    children = []
+    for _ in range(workers):
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            run_job(seconds)
+            gc.collect()
+            os.write(ready_w, b"1")
+            signal.pause()
+            os._exit(0)
+        os.close(ready_w)
+        children.append((pid, ready_r))
+
+    try:
+        for _, ready_r in children:
+            if os.read(ready_r, 1) != b"1":
+                raise RuntimeError("Un worker de test s'est arrêté avant la mesure")
+        per_child = [pss_mb(pid) for pid, _ in children]
+        total = pss_mb(os.getpid()) + sum(per_child)
+    finally:
+        for pid, _ in children:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+    return {"one_copy": one_copy, "per_child": per_child, "total": total}
+
+
+def _missing_models() -> list:
+    from app.core.model_store import read_manifest
+
+    manifest = read_manifest()
+    needed = {entry for name in settings.SHARED_MODELS for entry in STORE_ENTRIES.get(name, ())}
+    return sorted(
+        name for name in needed
+        if not (manifest.get(name) and os.path.isdir(manifest[name]["path"]))
+    )
+
+
+@pytest.fixture
+def shared_models_available():
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        pytest.skip("PSS lue dans /proc/{pid}/smaps_rollup (Linux uniquement)")
+    pytest.importorskip("torch")
+    pytest.importorskip("pyannote.audio")
+    missing = _missing_models()
+    if missing:
+        pytest.skip(f"Modèles absents de {settings.MODEL_STORE_DIR} : {', '.join(missing)}")
+
+
+def test_workers_share_one_copy_of_models(shared_models_available):
+    # Mesure dans un enfant forké : le processus pytest garde son GC et ses modèles
+    result_r, result_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(result_r)
+        code = 0
+        try:
+            settings.DEVICE = "cpu"
+            payload = measure(WORKERS, AUDIO_SECONDS)
+        except BaseException as e:
+            payload, code = {"error": repr(e)}, 1
+        with os.fdopen(result_w, "w") as f:
+            json.dump(payload, f)
+        os._exit(code)
+
+    os.close(result_w)
+    with os.fdopen(result_r) as f:
+        raw = f.read()
+    os.waitpid(pid, 0)
+    result = json.loads(raw)
+    assert "error" not in result, result.get("error")
+
+    budget = result["one_copy"] + WORKERS * ACTIVATION_MB
+    assert result["total"] <= budget, (
+        f"Partage insuffisant : PSS totale {result['total']:.0f} Mo pour un budget de {budget:.0f} Mo "
+        f"(1 copie de {result['one_copy']:.0f} Mo + {WORKERS} × {ACTIVATION_MB:.0f} Mo)"
+    )
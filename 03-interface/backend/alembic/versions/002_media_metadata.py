@@ -0,0 +1,35 @@
+"""Media metadata on meeting (ffprobe: duration, container, codec, sample rate, channels)
+
+Revision ID: 002_media_metadata
+Revises: 001_initial
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_media_metadata'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # === MEETING: MEDIA METADATA (set by the Worker before processing) ===
+    op.add_column('meeting', sa.Column('duration_seconds', sa.Float(), nullable=True))
+    op.add_column('meeting', sa.Column('media_container', sa.String(50), nullable=True))
+    op.add_column('meeting', sa.Column('audio_codec', sa.String(50), nullable=True))
+    op.add_column('meeting', sa.Column('sample_rate', sa.Integer(), nullable=True))
+    op.add_column('meeting', sa.Column('channels', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('meeting', 'channels')
+    op.drop_column('meeting', 'sample_rate')
+    op.drop_column('meeting', 'audio_codec')
+    op.drop_column('meeting', 'media_container')
+    op.drop_column('meeting', 'duration_seconds')
@@ -0,0 +1,30 @@
+"""Processing profiles (speed / quality tier) on group and meeting
+
+Revision ID: 003_processing_profiles
+Revises: 002_media_metadata
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_processing_profiles'
+down_revision: Union[str, None] = '002_media_metadata'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # === GROUP: DEFAULT PROFILE OF ITS MEETINGS ===
+    op.add_column('group', sa.Column('processing_profile', sa.String(50), nullable=True))
+    # === MEETING: PROFILE SENT TO THE WORKER ===
+    op.add_column('meeting', sa.Column('processing_profile', sa.String(50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('meeting', 'processing_profile')
+    op.drop_column('group', 'processing_profile')
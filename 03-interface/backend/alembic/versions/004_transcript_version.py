@@ -0,0 +1,27 @@
+"""Transcript version on meeting (draft published first, then replaced by the final pass)
+
+Revision ID: 004_transcript_version
+Revises: 003_processing_profiles
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_transcript_version'
+down_revision: Union[str, None] = '003_processing_profiles'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # === MEETING: VERSION OF THE AVAILABLE TRANSCRIPT ("draft" or "final") ===
+    op.add_column('meeting', sa.Column('transcript_version', sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('meeting', 'transcript_version')
@@ -0,0 +1,185 @@
+"""
+Endpoints d'administration (superuser uniquement).
+Supervision de l'ordonnancement des tâches du Worker.
+"""
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_db, get_current_active_superuser
+from app.models.user import User
+from app.models.meeting import Meeting
+from app.services.scheduler import (
+    get_queue_metrics,
+    get_cancellation_metrics,
+    get_reliability_metrics,
+    get_scratch_metrics,
+    get_worker_metrics,
+    get_model_load_metrics,
+    get_inference_metrics,
+    list_dead_letters,
+    get_dead_letter,
+    replay_dead_letter,
+    delete_dead_letter,
+)
+from app.services.routing import get_pools
+from app.services.speakers import kick_relabel
+from app.schemas.speaker import RelabelIn, RelabelOut
+
+router = APIRouter()
+
+
+@router.get("/queue")
+async def get_queue_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Métriques de l'ordonnanceur équitable par tenant (groupe ou propriétaire) :
+    backlog (jobs et secondes d'audio estimées), jobs en cours, secondes servies,
+    crédit DRR courant et poids appliqué.
+    """
+    return await get_queue_metrics()
+
+
+@router.get("/cancellations")
+async def get_cancellation_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Bilan des annulations : jobs sautés en file, jobs interrompus en cours,
+    secondes de calcul récupérées et secondes déjà perdues avant l'arrêt.
+    """
+    return await get_cancellation_metrics()
+
+
+@router.get("/reliability")
+async def get_reliability_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Fiabilité du Worker : retries programmés, timeouts d'étape, jobs orphelins
+    récupérés (worker mort) et jobs en dead-letter queue.
+    """
+    return await get_reliability_metrics()
+
+
+@router.get("/workers")
+async def get_workers_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """Workers prêts à consommer la file, avec la durée de leur warm-up (modèles, identity-bank)."""
+    return await get_worker_metrics()
+
+
+@router.get("/models")
+async def get_models_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Chargements de modèles par nœud Worker : durée et octets lus sur disque du dernier
+    chargement (~0 quand le page cache sert les poids), nombre de chargements, commit figé.
+    """
+    return await get_model_load_metrics()
+
+
+@router.get("/inference")
+async def get_inference_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Serveurs d'inférence partagés par nœud : distribution des tailles de batch,
+    délai d'attente en file (p50/p95) et débit par modèle, flux Whisper actifs.
+    """
+    return await get_inference_metrics()
+
+
+@router.get("/pools")
+async def get_pools_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Pools de workers (routage GPU / CPU) : workers prêts, RTF (mesuré, extrapolé de
+    la calibration ou par défaut), backlog et attente estimée.
+    """
+    return await get_pools()
+
+
+@router.post("/relabel", response_model=RelabelOut)
+async def relabel_meetings(
+    payload: RelabelIn,
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Renommage rétroactif des locuteurs de tous les meetings traités, à partir de
+    leurs centroïdes sauvegardés (aucun audio retraité). `identities` limite la
+    recherche à ces identités de la banque (toutes par défaut), `renames` renomme
+    une identité partout ({ancien: nouveau}). Résultat : GET /process/status/{task_id}.
+    """
+    task = await kick_relabel(identities=payload.identities, renames=payload.renames)
+    print(f"🏷️ [API] Relabel lancé : {task.task_id}")
+    return RelabelOut(task_id=task.task_id)
+
+
+@router.get("/scratch")
+async def get_scratch_status(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Espace scratch des Workers par nœud : octets réservés par les jobs, occupés,
+    libres et quota, pour chaque racine (tmpfs / NVMe).
+    """
+    return await get_scratch_metrics()
+
+
+@router.get("/dead-letters")
+async def get_dead_letters(
+    current_user: User = Depends(get_current_active_superuser),
+) -> List[Dict[str, Any]]:
+    """Jobs en échec définitif : payload, dernière erreur, étape et nombre de tentatives."""
+    return await list_dead_letters()
+
+
+@router.get("/dead-letters/{dlq_id}")
+async def get_dead_letter_entry(
+    dlq_id: str,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    entry = await get_dead_letter(dlq_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Entrée DLQ introuvable")
+    return entry
+
+
+@router.post("/dead-letters/{dlq_id}/replay")
+async def replay_dead_letter_entry(
+    dlq_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Rejoue un job de la DLQ (ex: après correction du fichier ou d'un bug Worker).
+    Le meeting repasse en "pending", sauf pour une passe de raffinement : son
+    brouillon reste consultable jusqu'à la nouvelle version.
+    """
+    job = await replay_dead_letter(dlq_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Entrée DLQ introuvable")
+
+    meeting = await db.get(Meeting, int(job["meeting_id"]))
+    if meeting is not None and job.get("pass") != "refine":
+        meeting.status = "pending"
+        meeting.transcription_text = None
+        meeting.transcript_version = None
+        await db.commit()
+
+    print(f"🔁 [API] Job DLQ {dlq_id} rejoué : meeting {job['meeting_id']}")
+    return job
+
+
+@router.delete("/dead-letters/{dlq_id}", status_code=204)
+async def delete_dead_letter_entry(
+    dlq_id: str,
+    current_user: User = Depends(get_current_active_superuser),
+):
+    if not await delete_dead_letter(dlq_id):
+        raise HTTPException(status_code=404, detail="Entrée DLQ introuvable")
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 
+from app.core.config import settings
 from app.core.deps import get_db, get_current_user, get_current_active_superuser
 from app.models.user import User
 from app.models.group import Group
@@ -25,6 +26,14 @@ from app.services.group import (
 router = APIRouter()
 
 
+def _check_processing_profile(profile) -> None:
+    if profile is not None and profile not in settings.PROCESSING_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Profil de traitement inconnu. Valeurs acceptées: {', '.join(settings.PROCESSING_PROFILES)}"
+        )
+
+
 @router.get("/", response_model=List[GroupRead])
 async def list_groups(
     skip: int = Query(0, ge=0),
@@ -81,6 +90,7 @@ async def create_group_endpoint(
     """
     Crée un nouveau groupe (admin seulement).
     """
+    _check_processing_profile(group_in.processing_profile)
     # Vérifie que le nom n'existe pas déjà
     from app.services.group import get_group_by_name
     existing = await get_group_by_name(db, group_in.name)
@@ -100,6 +110,7 @@ async def update_group_endpoint(
     """
     Met à jour un groupe (admin seulement).
     """
+    _check_processing_profile(group_in.processing_profile)
     group = await get_group(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Groupe introuvable")
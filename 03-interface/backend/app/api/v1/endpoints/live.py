@@ -0,0 +1,294 @@
+"""
+Endpoints de transcription en direct.
+Relaie l'audio d'un client WebSocket vers un worker en direct et ses sous-titres vers le client.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.deps import get_db, get_current_user, user_from_token
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.models.meeting import Meeting
+from app.models.group import Group
+from app.services.group import processing_profile
+from app.services.live import end_audio, expire_session, live_capacity, push_audio, read_events, start_session
+from app.services.scheduler import build_job, cancel_job, tenant_for_meeting
+from app.services.speakers import speaker_hints
+
+router = APIRouter()
+
+# Attente max d'une lecture du flux d'événements (ms)
+EVENTS_BLOCK_MS = 1000
+
+
+@router.get("/capacity")
+async def get_live_capacity(
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, int]:
+    """Places de sessions en direct : workers prêts, places annoncées, sessions en cours, places libres."""
+    return await live_capacity()
+
+
+@router.websocket("/ws")
+async def live_transcription(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="Token JWT (les navigateurs n'envoient pas d'en-tête sur un WebSocket)"),
+    title: Optional[str] = Query(None, description="Titre du meeting"),
+    group_ids: Optional[str] = Query(None, description="IDs de groupes, ex: 1,2. Défaut : groupes de l'utilisateur"),
+    encoding: str = Query("pcm", description="pcm (16 bits, 16 kHz mono) ou opus (Ogg / WebM)"),
+    language: Optional[str] = Query(None, description="Langue forcée (ex: fr). Défaut : détectée"),
+    profile: Optional[str] = Query(None, description="Profil de la passe de raffinement (fast, balanced, accurate)"),
+    refine: Optional[bool] = Query(None, description="Passe batch complète après la session. Défaut : LIVE_REFINE"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Transcription en direct d'un flux audio.
+
+    Protocole :
+    1. Le client ouvre /api/v1/live/ws?token=...&encoding=pcm et reçoit
+       {"type": "session", "session_id", "meeting_id"} puis {"type": "ready"} quand un
+       worker en direct a pris la session.
+    2. Il envoie l'audio en messages binaires (PCM 16 bits 16 kHz mono, ou Opus en
+       Ogg / WebM tel que produit par MediaRecorder), et reçoit au fil de l'eau :
+       - {"type": "partial", "start", "end", "text"} : texte provisoire, remplacé au suivant
+       - {"type": "final", "id", "start", "end", "text", "label", "speaker"} : segment validé
+       - {"type": "speaker", "label", "name", "score"} : locuteur identifié (segments passés inclus)
+    3. Il envoie {"type": "end"} (ou ferme le WebSocket) : le worker valide la parole en
+       attente, enregistre le meeting (mêmes résultats qu'un upload) et le client reçoit
+       {"type": "completed", "meeting_id", "result_path", ...} avant la fermeture.
+
+    Le meeting est créé dès l'ouverture (status "processing") avec l'enregistrement de
+    la session comme fichier source. Avec la passe de raffinement, la transcription en
+    direct est publiée comme un brouillon (transcript_version = "draft") puis remplacée
+    par la passe batch complète (classe REFINE_QUEUE_CLASS).
+
+    La session DB de la requête est fermée une fois le meeting créé ; la mise à jour
+    finale éventuelle (aucun worker) ouvre sa propre session.
+
+    Fermetures : 1008 (token, groupes ou paramètres invalides), 1013 (aucune place
+    de session en direct, réessayer plus tard).
+    """
+    await websocket.accept()
+
+    try:
+        current_user = await user_from_token(db, token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    if encoding not in settings.LIVE_ENCODINGS:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Encodage non supporté. Valeurs acceptées: {', '.join(settings.LIVE_ENCODINGS)}",
+        )
+        return
+
+    if profile is not None and profile not in settings.PROCESSING_PROFILES:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Profil de traitement inconnu. Valeurs acceptées: {', '.join(settings.PROCESSING_PROFILES)}",
+        )
+        return
+
+    groups = await _session_groups(db, current_user, group_ids)
+    if isinstance(groups, str):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=groups)
+        return
+
+    capacity = await live_capacity()
+    if capacity["available"] <= 0:
+        print(f"⛔ [API] Session en direct refusée (places: {capacity['active']}/{capacity['slots']})")
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Aucune place de transcription en direct")
+        return
+
+    # === CREATE MEETING IN DATABASE ===
+    session_id = uuid.uuid4().hex
+    s3_path = f"s3://{settings.MINIO_BUCKET_AUDIO}/live/{session_id}.wav"
+    meeting = Meeting(
+        title=title or f"Direct du {datetime.now():%d/%m/%Y %H:%M}",
+        original_filename=f"live-{session_id}.wav",
+        s3_path=s3_path,
+        status="processing",
+        owner_id=current_user.id,
+        processing_profile=processing_profile(groups, profile),
+    )
+    meeting.groups = groups
+    db.add(meeting)
+    await db.commit()
+    await db.refresh(meeting)
+
+    hints = speaker_hints(groups)
+    two_pass = settings.LIVE_REFINE if refine is None else refine
+    refine_job = None
+    if two_pass:
+        # Durée inconnue à l'ouverture : pas de débordement CPU, pool préféré
+        pool = settings.ROUTING_PRIMARY_POOL if settings.ROUTING_ENABLED else None
+        refine_job = build_job(
+            meeting,
+            file_path=s3_path,
+            tenant=tenant_for_meeting(meeting, [g.id for g in groups]),
+            cost=0.0,
+            queue_class=settings.REFINE_QUEUE_CLASS,
+            pool=pool,
+            speaker_hints=hints,
+            profile=meeting.processing_profile,
+        )
+        refine_job["pass"] = "refine"
+
+    # La session DB de la requête n'est pas gardée pendant toute la session en direct
+    # (des heures) : une connexion du pool par WebSocket ouvert sinon
+    await db.close()
+
+    await start_session({
+        "session_id": session_id,
+        "meeting_id": str(meeting.id),
+        "file_path": s3_path,
+        "encoding": encoding,
+        "language": language,
+        "shortlist_group_ids": hints.get("shortlist_group_ids"),
+        "expected_identities": hints.get("expected_identities"),
+        "refine": refine_job,
+    })
+    print(
+        f"🎙️ [API] Session en direct {session_id} (meeting {meeting.id}, user: {current_user.email}, "
+        f"{encoding}, raffinement: {'oui' if two_pass else 'non'})"
+    )
+    await websocket.send_json({"type": "session", "session_id": session_id, "meeting_id": meeting.id})
+
+    # === RELAIS CLIENT <-> WORKER ===
+    receiver = asyncio.create_task(_receive_audio(websocket, session_id))
+    relay = asyncio.create_task(_relay_events(websocket, session_id))
+    try:
+        done, _ = await asyncio.wait({receiver, relay}, return_when=asyncio.FIRST_COMPLETED)
+        if receiver in done:
+            # Fin de l'audio : le worker termine la session même si le client est parti
+            await end_audio(session_id)
+            if receiver.result():
+                await relay
+            else:
+                relay.cancel()
+        else:
+            receiver.cancel()
+            await end_audio(session_id)
+
+        if relay.done() and not relay.cancelled() and relay.result() == "timeout":
+            # Aucun worker n'a pris la session : elle ne sera pas traitée plus tard
+            await cancel_job(meeting.id)
+            async with AsyncSessionLocal() as session:
+                failed = await session.get(Meeting, meeting.id)
+                failed.status = "error"
+                await session.commit()
+            print(f"❌ [API] Session en direct {session_id} : aucun worker en {settings.LIVE_START_TIMEOUT_SECONDS:.0f}s")
+    finally:
+        await expire_session(session_id)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            # Déjà fermé (client parti)
+            pass
+
+
+# =============================================================================
+# FONCTIONS HELPER PRIVÉES
+# =============================================================================
+
+async def _session_groups(db: AsyncSession, current_user: User, group_ids: Optional[str]):
+    """
+    Groupes du meeting (membres chargés) : ceux demandés, sinon ceux de l'utilisateur.
+
+    Returns:
+        list | str: Groupes, ou la raison du refus
+    """
+    user = (await db.execute(
+        select(User).options(selectinload(User.groups)).where(User.id == current_user.id)
+    )).scalar_one()
+
+    try:
+        parsed_group_ids: List[int] = [int(x) for x in (group_ids or "").strip("[]").split(",") if x.strip()]
+    except ValueError:
+        return f"Format invalide. Utilisez '1,2'. Reçu: {group_ids}"
+    if not parsed_group_ids:
+        parsed_group_ids = [g.id for g in user.groups]
+
+    # SÉCURITÉ : l'utilisateur doit être membre des groupes assignés
+    user_group_ids = {g.id for g in user.groups}
+    for gid in parsed_group_ids:
+        if gid not in user_group_ids:
+            return f"Vous ne pouvez pas assigner le groupe {gid}: vous n'en êtes pas membre"
+    if not parsed_group_ids:
+        return "Au moins un groupe valide est requis"
+
+    result = await db.execute(
+        select(Group).options(selectinload(Group.members)).where(Group.id.in_(parsed_group_ids))
+    )
+    return list(result.scalars().all())
+
+
+async def _receive_audio(websocket: WebSocket, session_id: str) -> bool:
+    """
+    Audio du client vers le flux de la session, jusqu'à {"type": "end"} ou la déconnexion.
+
+    Returns:
+        bool: True si le client attend la fin de la session (fin demandée), False s'il est parti
+    """
+    while True:
+        try:
+            message = await websocket.receive()
+        except (WebSocketDisconnect, RuntimeError):
+            return False
+        if message["type"] == "websocket.disconnect":
+            return False
+        if message.get("bytes"):
+            if len(message["bytes"]) > settings.LIVE_MAX_MESSAGE_BYTES:
+                await websocket.send_json({"type": "error", "message": "Message audio trop volumineux"})
+                continue
+            await push_audio(session_id, message["bytes"])
+        elif message.get("text"):
+            try:
+                command = json.loads(message["text"])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(command, dict) and command.get("type") == "end":
+                return True
+
+
+async def _relay_events(websocket: WebSocket, session_id: str) -> str:
+    """
+    Événements du worker vers le client, jusqu'à la fin de la session.
+
+    Returns:
+        str: "completed", "error", "timeout" (aucun worker n'a pris la session) ou
+             "disconnected" (client parti)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_START_TIMEOUT_SECONDS
+    last_id, started = "0", False
+    while True:
+        events = await read_events(session_id, last_id, EVENTS_BLOCK_MS)
+        if not started and not events and loop.time() >= deadline:
+            await _send(websocket, {"type": "error", "message": "Aucun worker de transcription en direct disponible"})
+            return "timeout"
+        for last_id, event in events:
+            started = True
+            if not await _send(websocket, event):
+                return "disconnected"
+            if event.get("type") in ("completed", "error"):
+                return event["type"]
+
+
+async def _send(websocket: WebSocket, event: Dict[str, Any]) -> bool:
+    """Envoie un événement au client ; False s'il est déconnecté."""
+    try:
+        await websocket.send_json(event)
+        return True
+    except (WebSocketDisconnect, RuntimeError):
+        return False
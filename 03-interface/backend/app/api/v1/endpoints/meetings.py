@@ -11,13 +11,17 @@ from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.meeting import Meeting, can_user_access_meeting
 from app.schemas.meeting import MeetingOut, MeetingWithContext, MeetingUpdate
+from app.schemas.speaker import SpeakerIdentityIn, SpeakerIdentityOut
 from app.services.meeting import (
     get_meeting, 
     get_meetings_for_user, 
     update_meeting, 
-    delete_meeting
+    delete_meeting,
+    has_active_job,
 )
 from app.services.s3_service import get_transcript_from_s3
+from app.services.scheduler import cancel_job
+from app.services.speakers import assign_speaker_identity, kick_relabel
 
 router = APIRouter()
 
@@ -154,6 +158,8 @@ async def delete_meeting_endpoint(
     Supprime un meeting.
     
     Seul le propriétaire ou un superuser peut supprimer.
+    Si la transcription est encore en file ou en cours (y compris la passe de raffinement
+    d'un brouillon publié), le job est annulé côté Worker.
     """
     meeting = await get_meeting(db, meeting_id)
     
@@ -168,7 +174,11 @@ async def delete_meeting_endpoint(
     )
     user = user_query.scalar_one()
     
+    job_active = has_active_job(meeting)
     await delete_meeting(db, meeting, user)
+
+    if job_active:
+        await cancel_job(meeting_id)
     return None
 
 
@@ -258,6 +268,55 @@ async def get_meeting_transcript(
         "meeting_id": meeting.id,
         "title": meeting.title,
         "status": meeting.status,
+        # "draft" : brouillon rapide, remplacé par la version "final" une fois raffiné
+        "transcript_version": meeting.transcript_version,
         "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
         "segments": segments
     }
+
+
+@router.post("/{meeting_id}/speakers/{speaker_label}/identity", response_model=SpeakerIdentityOut)
+async def assign_meeting_speaker_identity(
+    meeting_id: int,
+    speaker_label: str,
+    payload: SpeakerIdentityIn,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    "C'est Albert" : nomme un locuteur d'un meeting terminé.
+
+    La transcription du meeting est mise à jour immédiatement, la signature du
+    locuteur rejoint l'identity-bank, puis les autres meetings sont renommés en
+    tâche de fond (centroïdes sauvegardés, sans retraiter l'audio).
+    """
+    meeting = await get_meeting(db, meeting_id)
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting introuvable")
+
+    user_query = await db.execute(
+        select(User)
+        .options(selectinload(User.groups))
+        .where(User.id == current_user.id)
+    )
+    user = user_query.scalar_one()
+    if not can_user_access_meeting(user, meeting) and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce meeting")
+    if meeting.status != "completed" or not meeting.transcription_text:
+        raise HTTPException(status_code=400, detail=f"Meeting non terminé. Status actuel: {meeting.status}")
+
+    try:
+        person_id = assign_speaker_identity(meeting.transcription_text, speaker_label, payload.name)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    task = await kick_relabel(identities=[person_id])
+    print(f"🏷️ [API] Meeting {meeting_id} : {speaker_label} -> {person_id} (relabel {task.task_id})")
+    return SpeakerIdentityOut(
+        meeting_id=meeting_id,
+        speaker_label=speaker_label,
+        person_id=person_id,
+        relabel_task_id=task.task_id,
+    )
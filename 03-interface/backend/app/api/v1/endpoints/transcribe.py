@@ -4,44 +4,43 @@ Gère l'upload de fichiers vers S3 et le dispatch des tâches de traitement.
 """
 import uuid
 import json
-import boto3
-from typing import Optional, List
-from botocore.exceptions import ClientError
-from urllib.parse import urlparse
+import time
+from typing import Any, Dict, Optional, List
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 
-from app.worker.broker import broker, kicker
+from app.worker.broker import broker
 from app.core.config import settings
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
-from app.models.meeting import Meeting
+from app.models.meeting import Meeting, can_user_access_meeting
 from app.models.group import Group
-from app.schemas.meeting import MeetingOut
+from app.schemas.meeting import MeetingOut, MeetingUploadOut, EtaOut
+from app.services.scheduler import enqueue_job, estimate_audio_seconds, tenant_for_meeting, cancel_job
+from app.services.eta import estimate_eta, admission_decision
+from app.services.routing import choose_pool
+from app.services.speakers import speaker_hints
+from app.services.group import processing_profile
+from app.services.meeting import get_meeting, has_active_job
+from app.services.s3_service import get_s3_client, get_transcript_from_s3
 
 router = APIRouter()
 
+# Message du polling par status de meeting (hors "completed")
+STATUS_MESSAGES = {
+    "pending": "La tâche est en attente de traitement...",
+    "processing": "La transcription est en cours...",
+    "cancelled": "La transcription a été annulée",
+    "error": "Erreur lors du traitement",
+}
+
 # Extensions supportées
 ALLOWED_EXTENSIONS = ('.mp4', '.mov', '.mp3', '.m4a', '.wav', '.webm', '.ogg')
 
-# --- CONFIGURATION BOTO3 (MinIO) ---
-s3_client = boto3.client(
-    "s3",
-    endpoint_url=f"http://{settings.MINIO_ENDPOINT}",
-    aws_access_key_id=settings.MINIO_ACCESS_KEY,
-    aws_secret_access_key=settings.MINIO_SECRET_KEY
-)
-
-# Création du bucket au démarrage si inexistant
-try:
-    s3_client.create_bucket(Bucket=settings.MINIO_BUCKET_AUDIO)
-except ClientError:
-    pass  # Bucket existe déjà
 
-
-@router.post("/", response_model=MeetingOut)
+@router.post("/", response_model=MeetingUploadOut)
 async def start_transcription(
     file: UploadFile = File(..., description="Fichier audio/vidéo à transcrire"),
     title: Optional[str] = Form(None, description="Titre du meeting (optionnel)"),
@@ -50,6 +49,39 @@ async def start_transcription(
         description="JSON array des IDs de groupes. Exemple: [1, 2]",
         examples=["[1]", "[1, 2, 3]"]
     ),
+    priority: Optional[str] = Form(
+        None,
+        description="Classe de priorité (urgent, normal, bulk). Défaut: normal",
+    ),
+    deadline_minutes: Optional[float] = Form(
+        None,
+        description="Délai souhaité (minutes) avant la fin du traitement, utilisé par le routage",
+        gt=0,
+    ),
+    channel_speakers: Optional[str] = Form(
+        None,
+        description=(
+            "Enregistrement multipiste : JSON array d'un locuteur par canal (null = à identifier). "
+            "La diarisation est alors sautée"
+        ),
+        examples=['["Alice", "Bob"]', '["Alice", null, null]'],
+    ),
+    min_speakers: Optional[int] = Form(
+        None, description="Nombre minimal de locuteurs attendus (borne la diarisation)", ge=1,
+    ),
+    max_speakers: Optional[int] = Form(
+        None,
+        description="Nombre maximal de locuteurs attendus. Défaut : membres des groupes récurrents + invités",
+        ge=1,
+    ),
+    profile: Optional[str] = Form(
+        None,
+        description="Profil vitesse / qualité (fast, balanced, accurate). Défaut : profil des groupes",
+    ),
+    draft: Optional[bool] = Form(
+        None,
+        description="Publie d'abord un brouillon rapide, remplacé par la version complète. Défaut : DRAFT_BY_DEFAULT",
+    ),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -59,15 +91,37 @@ async def start_transcription(
     1. Valide le format du fichier
     2. Upload vers S3 (MinIO)
     3. Crée le Meeting en base avec les groupes assignés
-    4. Dispatch la tâche au Worker via Redis
+    4. Choisit le pool de workers (GPU / CPU) selon la durée, l'échéance et le backlog
+    5. Dépose le job dans la file équitable de son tenant (groupe ou propriétaire)
+
+    Avant l'upload, l'attente est estimée (backlog × RTF mesuré par étape) :
+    au-delà de ADMISSION_MAX_QUEUE_WAIT_SECONDS, les uploads basse priorité sont
+    refusés (503 + Retry-After) ou différés selon ADMISSION_POLICY.
     
     Args:
         file: Fichier audio/vidéo
         title: Titre optionnel du meeting
         group_ids: JSON array des IDs de groupes, ex: "[1, 2]"
+        priority: Classe de file ; les jobs "bulk" peuvent être préemptés par les "urgent"
+        deadline_minutes: Échéance souhaitée ; un job qui ne la tiendrait pas sur les
+            accélérateurs peut être routé vers les workers CPU
+        channel_speakers: Un micro par canal : nom du locuteur de chaque canal (null si
+            inconnu, identifié par la banque de voix). Les tours de parole sont lus dans
+            l'énergie des canaux au lieu de passer par Pyannote
+        min_speakers / max_speakers: Bornes du nombre de locuteurs. Sans max_speakers,
+            les membres des groupes récurrents fixent la borne haute et restreignent
+            les identités candidates de l'identification
+        profile: Profil de traitement (taille du beam, batching, VAD, langue, définis
+            côté Worker). Sans profil, le plus précis des profils des groupes, sinon
+            DEFAULT_PROCESSING_PROFILE
+        draft: Brouillon puis raffinement : une passe rapide (DRAFT_PROCESSING_PROFILE,
+            parole seule, sans identification) est publiée dès qu'elle est finie
+            (transcript_version = "draft"), puis la passe complète au profil du meeting
+            (classe REFINE_QUEUE_CLASS) la remplace en reprenant son audio décodé et
+            sa carte de parole
     
     Returns:
-        Objet Meeting créé
+        Objet Meeting créé, avec l'ETA estimée
     """
     # Validation du format
     if not file.filename.lower().endswith(ALLOWED_EXTENSIONS):
@@ -76,6 +130,35 @@ async def start_transcription(
             detail=f"Format non supporté. Extensions acceptées: {', '.join(ALLOWED_EXTENSIONS)}"
         )
 
+    if priority is not None and priority not in settings.QUEUE_CLASSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Priorité inconnue. Valeurs acceptées: {', '.join(settings.QUEUE_CLASSES)}"
+        )
+
+    if profile is not None and profile not in settings.PROCESSING_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Profil de traitement inconnu. Valeurs acceptées: {', '.join(settings.PROCESSING_PROFILES)}"
+        )
+
+    if min_speakers and max_speakers and min_speakers > max_speakers:
+        raise HTTPException(status_code=400, detail="min_speakers doit être inférieur ou égal à max_speakers")
+
+    parsed_channel_speakers = None
+    if channel_speakers:
+        try:
+            parsed_channel_speakers = json.loads(channel_speakers)
+        except json.JSONDecodeError:
+            parsed_channel_speakers = None
+        if (not isinstance(parsed_channel_speakers, list) or not parsed_channel_speakers
+                or not all(name is None or isinstance(name, str) for name in parsed_channel_speakers)):
+            raise HTTPException(
+                status_code=400,
+                detail=f"channel_speakers invalide. Utilisez '[\"Alice\", null]'. Reçu: {channel_speakers}"
+            )
+        parsed_channel_speakers = [name.strip() if name else None for name in parsed_channel_speakers]
+
     # Charge l'utilisateur avec ses groupes
     user_query = await db.execute(
         select(User)
@@ -135,7 +218,9 @@ async def start_transcription(
     # Récupère les objets groupe
     if parsed_group_ids:
         result = await db.execute(
-            select(Group).where(Group.id.in_(parsed_group_ids))
+            select(Group)
+            .options(selectinload(Group.members))
+            .where(Group.id.in_(parsed_group_ids))
         )
         valid_groups = list(result.scalars().all())
     
@@ -145,6 +230,21 @@ async def start_transcription(
             detail="Au moins un groupe valide est requis"
         )
 
+    # === ADMISSION (avant l'upload : inutile de stocker un fichier refusé) ===
+    audio_seconds = estimate_audio_seconds(file.size, file.filename)
+    eta = await estimate_eta(audio_seconds, priority)
+    admission, admission_delay = admission_decision(eta, priority)
+
+    if admission == "reject":
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                f"File de traitement saturée (attente estimée {eta['queue_wait_seconds'] / 60:.0f} min). "
+                f"Réessayez plus tard ou utilisez une priorité plus élevée."
+            ),
+            headers={"Retry-After": str(int(admission_delay))},
+        )
+
     # Generate unique meeting ID
     safe_filename = file.filename.replace(" ", "_")
     object_name = f"{uuid.uuid4()}_{safe_filename}"
@@ -155,7 +255,7 @@ async def start_transcription(
     try:
         await file.seek(0)
         
-        s3_client.upload_fileobj(
+        get_s3_client().upload_fileobj(
             file.file,
             settings.MINIO_BUCKET_AUDIO,
             object_name,
@@ -169,6 +269,8 @@ async def start_transcription(
         print(f"❌ [API] Erreur S3 : {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur S3: {str(e)}")
 
+    two_pass = settings.DRAFT_BY_DEFAULT if draft is None else draft
+
     # === CREATE MEETING IN DATABASE ===
     meeting = Meeting(
         title=title or file.filename,
@@ -176,6 +278,7 @@ async def start_transcription(
         s3_path=s3_path,
         status="pending",
         owner_id=current_user.id,
+        processing_profile=processing_profile(valid_groups, profile),
     )
     meeting.groups = valid_groups
     
@@ -186,10 +289,33 @@ async def start_transcription(
     group_names = [g.name for g in valid_groups]
     print(f"💾 [API] Meeting créé en DB: ID={meeting.id}, groupes={group_names}")
 
-    # === DISPATCH VERS REDIS ===
+    # === DISPATCH VERS REDIS (File équitable par tenant) ===
     try:
-        task = await kicker.kiq(file_path=s3_path, meeting_id=str(meeting.id))
-        print(f"🚀 [API] Tâche envoyée (task_id: {task.task_id}, meeting_id: {meeting.id})")
+        tenant = tenant_for_meeting(meeting, [g.id for g in valid_groups])
+        deadline_seconds = deadline_minutes * 60 if deadline_minutes else None
+        pool, route_reason = await choose_pool(audio_seconds, deadline_seconds)
+        job = await enqueue_job(
+            meeting,
+            file_path=s3_path,
+            tenant=tenant,
+            cost=audio_seconds,
+            queue_class=priority,
+            delay=admission_delay if admission == "defer" else 0.0,
+            pool=pool,
+            deadline_at=time.time() + deadline_seconds if deadline_seconds else None,
+            channel_speakers=parsed_channel_speakers,
+            speaker_hints=speaker_hints(valid_groups, min_speakers, max_speakers),
+            profile=settings.DRAFT_PROCESSING_PROFILE if two_pass else meeting.processing_profile,
+            refine={
+                "profile": meeting.processing_profile,
+                "queue_class": settings.REFINE_QUEUE_CLASS,
+            } if two_pass else None,
+        )
+        print(
+            f"🚀 [API] Job en file (tenant: {tenant}, job_id: {job['job_id']}, meeting_id: {meeting.id}, "
+            f"admission: {admission}, pool: {pool or '-'} ({route_reason}), profil: {meeting.processing_profile}, "
+            f"brouillon: {'oui' if two_pass else 'non'}, ETA: {eta['eta_seconds']:.0f}s)"
+        )
         
     except Exception as e:
         # Rollback: delete meeting if dispatch fails
@@ -198,94 +324,113 @@ async def start_transcription(
         print(f"❌ [API] Erreur Broker : {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur Broker: {str(e)}")
 
+    response = MeetingUploadOut.model_validate(meeting)
+    response.eta = EtaOut(**eta, admission=admission, pool=pool)
+    return response
+
+
+@router.post("/{meeting_id}/cancel", response_model=MeetingOut)
+async def cancel_transcription(
+    meeting_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Annule la transcription d'un meeting (en file ou en cours).
+
+    Le Worker saute le job s'il n'a pas démarré, sinon il l'interrompt à la
+    prochaine vérification (FFmpeg tué, fichiers temporaires nettoyés).
+    Seul le propriétaire ou un superuser peut annuler.
+
+    Brouillon publié : seule la passe de raffinement est annulée, le brouillon reste
+    la transcription du meeting (status "completed", transcript_version "draft").
+    """
+    meeting = await get_meeting(db, meeting_id)
+
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting introuvable")
+
+    if meeting.owner_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Non autorisé à annuler ce meeting")
+
+    if not has_active_job(meeting):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rien à annuler. Status actuel: {meeting.status}"
+        )
+
+    await cancel_job(meeting.id)
+    if meeting.status in ("pending", "processing"):
+        meeting.status = "cancelled"
+        await db.commit()
+        await db.refresh(meeting)
+        print(f"🛑 [API] Transcription annulée : meeting {meeting.id}")
+    else:
+        print(f"🛑 [API] Raffinement annulé, brouillon conservé : meeting {meeting.id}")
     return meeting
 
 
+@router.get("/{meeting_id}/status")
+async def get_transcription_status(
+    meeting_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Permet au Frontend de demander : 'C'est fini ?' pour un meeting.
+
+    Le statut est celui du meeting (mis à jour par le webhook du Worker), pas celui
+    d'une tâche Taskiq : le jeton de dispatch envoyé à l'upload est interchangeable
+    et sert le prochain job choisi par l'ordonnanceur, pas forcément celui-ci.
+    Si terminée, renvoie les segments de fusion.json.
+    """
+    meeting = await get_meeting(db, meeting_id)
+
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting introuvable")
+
+    user = (await db.execute(
+        select(User).options(selectinload(User.groups)).where(User.id == current_user.id)
+    )).scalar_one()
+    if not can_user_access_meeting(user, meeting) and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Vous n'avez pas accès à ce meeting")
+
+    response: Dict[str, Any] = {
+        "status": meeting.status,
+        "meeting_id": meeting.id,
+        # "draft" : brouillon publié, passe de raffinement en file ou en cours
+        "transcript_version": meeting.transcript_version,
+    }
+    if meeting.status != "completed":
+        response["message"] = STATUS_MESSAGES.get(meeting.status, f"Status actuel: {meeting.status}")
+        return response
+
+    try:
+        segments = get_transcript_from_s3(meeting.transcription_text)
+    except Exception as e:
+        print(f"⚠️ [API] Erreur récupération S3 (meeting {meeting.id}): {e}")
+        segments = None
+    if segments is None:
+        return {**response, "status": "error", "message": "Fichier résultat introuvable dans S3"}
+    return {**response, "result": segments}
+
+
 @router.get("/status/{task_id}")
 async def get_task_status(task_id: str):
     """
-    Permet au Frontend de demander : 'C'est fini ?'
-    Interroge Redis pour voir l'état de la tâche.
-    Si terminée, va chercher le JSON fusion.json dans S3 et le renvoie.
+    Statut d'une tâche Taskiq lancée directement par l'API (ex: relabel des identités).
+
+    Les transcriptions se suivent par meeting (GET /process/{meeting_id}/status) :
+    le résultat d'un jeton de dispatch est celui du job qu'il a servi, quel que soit
+    son tenant, et n'est donc pas exposé ici.
     """
     try:
         # Taskiq RedisAsyncResultBackend : get_result retourne un TaskiqResult
         taskiq_result = await broker.result_backend.get_result(task_id)
-        
-        # Si pas de résultat, la tâche est encore en cours
-        if taskiq_result is None:
-            return {
-                "status": "processing",
-                "task_id": task_id,
-                "message": "La transcription est en cours..."
-            }
-        
-        # Essaye d'accéder au résultat (peut lever une exception si pas prêt)
-        try:
-            task_result = taskiq_result.return_value
-        except (AttributeError, Exception):
-            # Pas encore prêt
-            return {
-                "status": "processing",
-                "task_id": task_id,
-                "message": "La transcription est en cours..."
-            }
-        
-        # Si le résultat est None, encore en cours
-        if task_result is None:
-            return {
-                "status": "processing",
-                "task_id": task_id,
-                "message": "La transcription est en cours..."
-            }
-        # task_result = {"status": "success", "meeting_id": "...", "result_path": "s3://processed/..."}
-        
-        # Vérifie si c'est une erreur du worker
-        if task_result.get("status") == "error":
-            return {
-                "status": "error",
-                "task_id": task_id,
-                "message": task_result.get("message", "Erreur inconnue")
-            }
-        
-        # Essaye de récupérer le JSON depuis S3
-        try:
-            s3_folder_url = task_result.get("result_path")
-            
-            if not s3_folder_url:
-                return {"status": "completed", "task_id": task_id, "result": []}
-            
-            # Parse l'URL s3://bucket/dossier
-            parsed = urlparse(s3_folder_url)
-            bucket_name = parsed.netloc
-            folder_path = parsed.path.lstrip('/')
-            
-            # Construit le chemin vers fusion.json
-            file_key = f"{folder_path}/fusion.json"
-            
-            print(f"📂 [API] Lecture S3: {bucket_name}/{file_key}")
-            
-            # Télécharge le contenu JSON
-            s3_response = s3_client.get_object(Bucket=bucket_name, Key=file_key)
-            json_content = json.loads(s3_response['Body'].read().decode('utf-8'))
-            
-            return {
-                "status": "completed",
-                "task_id": task_id,
-                "result": json_content  # Array direct [{speaker, start, end, text}, ...]
-            }
-            
-        except Exception as e:
-            print(f"⚠️ [API] Erreur récupération S3 ({task_id}): {e}")
-            return {
-                "status": "error",
-                "task_id": task_id,
-                "message": "Fichier résultat introuvable dans S3"
-            }
-        
+        task_result = taskiq_result.return_value if taskiq_result is not None else None
     except Exception as e:
         error_message = str(e)
-        
+
         # "Cannot get result" signifie que la tâche est en queue mais pas encore traitée
         if "Cannot get result" in error_message or "not found" in error_message.lower():
             print(f"⏳ [API] Tâche en attente : {task_id}")
@@ -294,11 +439,38 @@ async def get_task_status(task_id: str):
                 "task_id": task_id,
                 "message": "La tâche est en attente de traitement..."
             }
-        
+
         # Vraie erreur
         print(f"❌ [API] Erreur status : {error_message}")
         return {
             "status": "unknown",
             "task_id": task_id,
             "error": error_message
-        }
\ No newline at end of file
+        }
+
+    # Si pas de résultat, la tâche est encore en cours
+    if task_result is None:
+        return {
+            "status": "processing",
+            "task_id": task_id,
+            "message": "La tâche est en cours..."
+        }
+
+    # Jeton de dispatch de l'ordonnanceur : job d'un tenant quelconque
+    if isinstance(task_result, dict) and (
+        "meeting_id" in task_result or task_result.get("status") in ("deferred", "idle")
+    ):
+        raise HTTPException(
+            status_code=404,
+            detail="Tâche d'ordonnancement : suivre la transcription par GET /process/{meeting_id}/status",
+        )
+
+    # Vérifie si c'est une erreur du worker
+    if isinstance(task_result, dict) and task_result.get("status") == "error":
+        return {
+            "status": "error",
+            "task_id": task_id,
+            "message": task_result.get("message", "Erreur inconnue")
+        }
+
+    return {"status": "completed", "task_id": task_id, "result": task_result}
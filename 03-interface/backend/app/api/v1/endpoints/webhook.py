@@ -12,6 +12,7 @@ from fastapi import Depends
 from app.core.config import settings
 from app.core.deps import get_db
 from app.models.meeting import Meeting
+from app.services.scheduler import is_cancelled
 
 router = APIRouter()
 
@@ -26,6 +27,18 @@ class TranscriptionCompletePayload(BaseModel):
     status: str  # "completed" ou "error"
     result_path: Optional[str] = None  # s3://processed/...
     error_message: Optional[str] = None
+    # "draft" / "final" en mode brouillon puis raffinement (None : passe unique)
+    version: Optional[str] = None
+
+
+class MediaProbedPayload(BaseModel):
+    """Payload envoyé par le Worker après inspection (ffprobe) du fichier source."""
+    meeting_id: int
+    container: str
+    codec: str
+    sample_rate: int
+    channels: int
+    duration_seconds: float
 
 
 @router.post("/transcription-complete")
@@ -38,6 +51,13 @@ async def transcription_complete(
     Appelé par le Worker quand la transcription est terminée.
     
     Met à jour le Meeting dans la base avec le nouveau statut et le chemin du résultat.
+
+    Brouillon puis raffinement : le brouillon est publié comme une transcription
+    terminée (transcript_version = "draft") ; la version finale le remplace en un seul
+    commit (chemin du résultat + version). Un raffinement en échec laisse le brouillon
+    en place, et un webhook de brouillon arrivé après la version finale est ignoré.
+    Le résultat d'un raffinement est aussi ignoré si le meeting a été supprimé ou si
+    le raffinement a été annulé entre-temps (le brouillon reste la transcription).
     
     Sécurité : Requiert le header X-Internal-Key correspondant à INTERNAL_API_KEY.
     """
@@ -52,8 +72,24 @@ async def transcription_complete(
     meeting = result.scalar_one_or_none()
     
     if not meeting:
+        if payload.version == "final":
+            print(f"⏭️ [Webhook] Meeting {payload.meeting_id} supprimé : raffinement ignoré")
+            return {"success": True, "meeting_id": payload.meeting_id, "status": "deleted"}
         raise HTTPException(status_code=404, detail=f"Meeting {payload.meeting_id} introuvable")
-    
+
+    if payload.version == "final" and meeting.transcript_version == "draft" and await is_cancelled(meeting.id):
+        print(f"⏭️ [Webhook] Meeting {payload.meeting_id} : raffinement annulé, résultat ignoré")
+        return {"success": True, "meeting_id": payload.meeting_id, "status": meeting.status}
+
+    if payload.version == "draft" and meeting.transcript_version == "final":
+        print(f"⏭️ [Webhook] Meeting {payload.meeting_id} : brouillon ignoré, version finale déjà publiée")
+        return {"success": True, "meeting_id": payload.meeting_id, "status": meeting.status}
+
+    if payload.status == "error" and meeting.transcript_version == "draft":
+        print(f"⚠️ [Webhook] Meeting {payload.meeting_id} : raffinement en échec, brouillon conservé "
+              f"({payload.error_message})")
+        return {"success": True, "meeting_id": payload.meeting_id, "status": meeting.status}
+
     # Met à jour le meeting
     meeting.status = payload.status
     
@@ -61,16 +97,55 @@ async def transcription_complete(
         # Stocke le chemin du résultat dans un champ (on pourrait ajouter result_path au modèle Meeting plus tard)
         # Pour l'instant, on le stocke dans transcription_text comme référence
         meeting.transcription_text = f"Résultat : {payload.result_path}"
+        meeting.transcript_version = payload.version or "final"
     
     if payload.error_message:
         meeting.transcription_text = f"Erreur : {payload.error_message}"
     
     await db.commit()
     
-    print(f"✅ [Webhook] Meeting {payload.meeting_id} mis à jour avec le statut : {payload.status}")
+    print(f"✅ [Webhook] Meeting {payload.meeting_id} mis à jour avec le statut : {payload.status}"
+          f"{f' ({payload.version})' if payload.version else ''}")
     
     return {
         "success": True,
         "meeting_id": payload.meeting_id,
         "status": payload.status
     }
+
+
+@router.post("/media-probed")
+async def media_probed(
+    payload: MediaProbedPayload,
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Appelé par le Worker après inspection du fichier, avant tout traitement.
+
+    Stocke la durée réelle et le format du fichier sur le Meeting (ordonnancement, statistiques).
+
+    Sécurité : Requiert le header X-Internal-Key correspondant à INTERNAL_API_KEY.
+    """
+    if x_internal_key != INTERNAL_API_KEY:
+        raise HTTPException(status_code=401, detail="Clé API interne invalide")
+
+    result = await db.execute(
+        select(Meeting).where(Meeting.id == payload.meeting_id)
+    )
+    meeting = result.scalar_one_or_none()
+
+    if not meeting:
+        raise HTTPException(status_code=404, detail=f"Meeting {payload.meeting_id} introuvable")
+
+    meeting.duration_seconds = payload.duration_seconds
+    meeting.media_container = payload.container
+    meeting.audio_codec = payload.codec
+    meeting.sample_rate = payload.sample_rate
+    meeting.channels = payload.channels
+    await db.commit()
+
+    print(f"🔎 [Webhook] Meeting {payload.meeting_id} : {payload.container}/{payload.codec}, "
+          f"{payload.duration_seconds:.1f}s")
+
+    return {"success": True, "meeting_id": payload.meeting_id}
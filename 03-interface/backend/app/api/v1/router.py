@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import transcribe, auth, meetings, users, webhook, groups
+from app.api.v1.endpoints import transcribe, auth, meetings, users, webhook, groups, admin, live
 
 api_router = APIRouter()
 
@@ -12,6 +12,9 @@ api_router.include_router(users.router, prefix="/users", tags=["Users"])
 # Routes de Process (IA)
 api_router.include_router(transcribe.router, prefix="/process", tags=["Processing"])
 
+# Routes de transcription en direct (WebSocket /api/v1/live/ws)
+api_router.include_router(live.router, prefix="/live", tags=["Live"])
+
 # Routes Groupes (CRUD + membres)
 api_router.include_router(groups.router, prefix="/groups", tags=["Groups"])
 
@@ -20,3 +23,6 @@ api_router.include_router(meetings.router, prefix="/meetings", tags=["Meetings"]
 
 # Routes Webhook internes (appelées par le Worker)
 api_router.include_router(webhook.router, prefix="/internal/webhook", tags=["Internal"])
+
+# Routes d'administration (supervision de l'ordonnancement)
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -37,12 +37,24 @@ async def get_current_user(
     Récupère l'utilisateur authentifié depuis le token JWT.
     Lève une erreur 401 si le token est invalide ou l'utilisateur introuvable.
     """
+    return await user_from_token(db, token)
+
+
+async def user_from_token(db: AsyncSession, token: Optional[str]) -> User:
+    """
+    Utilisateur actif d'un token JWT (en-tête Authorization, ou paramètre de requête
+    pour un WebSocket où le navigateur ne peut pas envoyer d'en-tête).
+    Lève une erreur 401 si le token est invalide, 403 si l'utilisateur est inactif.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    if not token:
+        raise credentials_exception
+
     try:
         payload = jwt.decode(
             token, 
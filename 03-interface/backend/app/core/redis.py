@@ -0,0 +1,17 @@
+"""
+Client Redis asynchrone de l'API.
+Utilisé pour l'état d'ordonnancement partagé avec le Worker (files par tenant, métriques).
+"""
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_client = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Retourne le client Redis partagé (créé à la demande)."""
+    global _client
+    if _client is None:
+        _client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
@@ -5,8 +5,6 @@ from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.worker.broker import broker
 from app.api.v1.router import api_router
-from app.db.session import engine
-from app.db.base import Base
 
 # IMPORTANT : Import des modèles pour que SQLAlchemy les connaisse
 from app.models import user, meeting, group
@@ -20,11 +18,8 @@ async def lifespan(app: FastAPI):
     await broker.startup()
     print("🔗 [API] Connectée à Redis.")
 
-    # 2. Création des tables SQL dans Postgres
-    async with engine.begin() as conn:
-        # Cette ligne crée les tables si elles n'existent pas
-        await conn.run_sync(Base.metadata.create_all)
-    print("🗄️ [API] Tables SQL synchronisées (Users, Meetings, Groups).")
+    # Le schéma SQL (alembic upgrade head) et les buckets S3 sont préparés par start.sh
+    # avant le lancement d'Uvicorn : aucun effet de bord lourd au démarrage de l'API.
 
     yield
     
@@ -81,6 +81,8 @@ class Group(Base):
         index=True
     )
     is_active = Column(Boolean, default=True, nullable=False)
+    # Profil vitesse / qualité des meetings du groupe (None = profil par défaut)
+    processing_profile = Column(String(50), nullable=True)
 
     # Relations (Many-to-Many)
     members = relationship(
@@ -1,7 +1,7 @@
 """
 Modèle Meeting avec visibilité basée sur les groupes.
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -29,7 +29,20 @@ class Meeting(Base):
     # Informations du fichier
     original_filename = Column(String(500), nullable=False)
     s3_path = Column(String(1000), nullable=False)
+
+    # Métadonnées média (ffprobe, renseignées par le Worker avant traitement)
+    duration_seconds = Column(Float, nullable=True)
+    media_container = Column(String(50), nullable=True)
+    audio_codec = Column(String(50), nullable=True)
+    sample_rate = Column(Integer, nullable=True)
+    channels = Column(Integer, nullable=True)
     
+    # Profil vitesse / qualité demandé au Worker (fast, balanced, accurate)
+    processing_profile = Column(String(50), nullable=True)
+    # Version de la transcription disponible : "draft" (brouillon rapide, raffinement
+    # en cours ou échoué) ou "final"
+    transcript_version = Column(String(20), nullable=True)
+
     # Statut du workflow
     status = Column(String(50), default="pending", index=True)
     
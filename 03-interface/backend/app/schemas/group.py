@@ -21,6 +21,8 @@ class GroupBase(BaseModel):
     name: str
     description: Optional[str] = None
     type: GroupType = GroupType.DEPARTMENT
+    # Profil vitesse / qualité des meetings du groupe (PROCESSING_PROFILES)
+    processing_profile: Optional[str] = None
 
 
 class GroupCreate(GroupBase):
@@ -34,6 +36,7 @@ class GroupUpdate(BaseModel):
     description: Optional[str] = None
     type: Optional[GroupType] = None
     is_active: Optional[bool] = None
+    processing_profile: Optional[str] = None
 
 
 # ============================================================
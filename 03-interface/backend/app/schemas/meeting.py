@@ -40,11 +40,38 @@ class MeetingOut(MeetingBase):
     status: str
     created_at: datetime
     owner_id: Optional[int] = None
+    # Métadonnées média (connues une fois le fichier inspecté par le Worker)
+    duration_seconds: Optional[float] = None
+    media_container: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    processing_profile: Optional[str] = None
+    # "draft" : brouillon rapide publié, remplacé par la version "final" une fois raffiné
+    transcript_version: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
+class EtaOut(BaseModel):
+    """Estimation du délai de traitement d'un upload."""
+    audio_seconds: float
+    queue_wait_seconds: float
+    processing_seconds: float
+    eta_seconds: float
+    estimated_completion_at: datetime
+    # "accept" ou "defer" (upload basse priorité reporté, backlog au-dessus du plafond)
+    admission: str = "accept"
+    # Pool de workers choisi par le routage ("gpu", "cpu") ; None sans routage
+    pool: Optional[str] = None
+
+
+class MeetingUploadOut(MeetingOut):
+    """Meeting créé par un upload, avec son ETA."""
+    eta: Optional[EtaOut] = None
+
+
 class MeetingWithContext(MeetingOut):
     """Meeting avec ses groupes."""
     groups: List[GroupMinimal] = []
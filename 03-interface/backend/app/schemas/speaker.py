@@ -0,0 +1,27 @@
+"""
+Schémas Pydantic pour le nommage des locuteurs et le renommage rétroactif.
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+
+
+class SpeakerIdentityIn(BaseModel):
+    """"C'est Albert" : nom donné à un locuteur d'un meeting traité."""
+    name: str = Field(..., min_length=1, max_length=255)
+
+
+class SpeakerIdentityOut(BaseModel):
+    meeting_id: int
+    speaker_label: str
+    person_id: str
+    relabel_task_id: str
+
+
+class RelabelIn(BaseModel):
+    """Renommage rétroactif (admin) : identités à rechercher et renommages {ancien: nouveau}."""
+    identities: Optional[List[str]] = None
+    renames: Dict[str, str] = {}
+
+
+class RelabelOut(BaseModel):
+    task_id: str
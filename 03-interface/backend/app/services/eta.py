@@ -0,0 +1,148 @@
+"""
+Estimation du délai de traitement (ETA) et contrôle d'admission des uploads.
+
+L'ETA combine :
+- le travail en attente devant le job : jobs des classes de priorité supérieure ou
+  égale (durée audio × RTF cumulé des étapes), retries différés compris,
+- le travail restant des jobs en cours (estimé depuis leur démarrage),
+- le nombre de slots de traitement parallèles (ETA_WORKER_SLOTS),
+- le temps de traitement du job lui-même.
+
+Les RTF par étape sont mesurés par le Worker (voir 02-workers/app/services/eta.py).
+Le Worker publie aussi le graphe de ses étapes : les étapes concurrentes
+(identification pendant la transcription) comptent pour la plus longue, le RTF d'un
+job est celui du chemin critique (somme des étapes si le graphe est inconnu).
+Le DRR entre tenants n'est pas modélisé : l'attente est celle d'une file FIFO
+par classe, ce qui majore l'attente des petits tenants et minore celle des gros.
+"""
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.scheduler import DELAYED_KEY, active_key, queue_key
+
+RTF_KEY = "sms:eta:rtf"
+DAG_KEY = "sms:eta:dag"
+INFLIGHT_KEY = "sms:fair:inflight"
+
+
+async def get_stage_rtf() -> Dict[str, float]:
+    """RTF par étape : mesures du Worker, valeurs par défaut pour les étapes jamais mesurées."""
+    measured = await get_redis().hgetall(RTF_KEY)
+    rtf = {stage: float(value) for stage, value in settings.ETA_DEFAULT_RTF.items()}
+    rtf.update({stage: float(value) for stage, value in measured.items()})
+    return rtf
+
+
+def critical_path_rtf(rtf: Dict[str, float], dag: Dict[str, list]) -> float:
+    """
+    RTF du chemin critique du graphe d'étapes.
+
+    Args:
+        rtf: RTF par étape
+        dag: Entrées de chaque étape ({étape: [étapes amont]})
+    """
+    finish: Dict[str, float] = {}
+
+    def _finish(stage: str, visiting: frozenset) -> float:
+        if stage not in finish:
+            if stage in visiting:
+                raise ValueError(f"Cycle dans le graphe d'étapes ({stage})")
+            upstream = [_finish(dep, visiting | {stage}) for dep in dag.get(stage, []) if dep in dag]
+            finish[stage] = max(upstream, default=0.0) + rtf.get(stage, 0.0)
+        return finish[stage]
+
+    return max((_finish(stage, frozenset()) for stage in dag), default=0.0)
+
+
+async def get_pipeline_rtf() -> float:
+    """Secondes de traitement par seconde d'audio pour un job complet."""
+    rtf = await get_stage_rtf()
+    raw = await get_redis().hgetall(DAG_KEY)
+    if not raw:
+        return sum(rtf.values())
+    dag = {stage: json.loads(inputs) for stage, inputs in raw.items()}
+    # Étapes mesurées absentes du graphe publié (ancien worker) : comptées en série
+    extra = sum(value for stage, value in rtf.items() if stage not in dag)
+    return critical_path_rtf(rtf, dag) + extra
+
+
+async def estimate_eta(audio_seconds: float, queue_class: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Estime l'attente en file et la durée de traitement d'un nouveau job.
+
+    Args:
+        audio_seconds: Durée audio estimée du job
+        queue_class: Classe de priorité du job
+
+    Returns:
+        dict: audio_seconds, queue_wait_seconds, processing_seconds, eta_seconds,
+              estimated_completion_at
+    """
+    redis = get_redis()
+    queue_class = queue_class or settings.DEFAULT_QUEUE_CLASS
+    total_rtf = await get_pipeline_rtf()
+
+    # Classes servies avant ou avec celle du job (priorité stricte)
+    if queue_class in settings.QUEUE_CLASSES:
+        classes_ahead = settings.QUEUE_CLASSES[:settings.QUEUE_CLASSES.index(queue_class) + 1]
+    else:
+        classes_ahead = list(settings.QUEUE_CLASSES)
+
+    queued_audio = 0.0
+    for cls in classes_ahead:
+        for tenant in await redis.lrange(active_key(cls), 0, -1):
+            for raw in await redis.lrange(queue_key(cls, tenant), 0, -1):
+                queued_audio += float(json.loads(raw).get("cost", 0.0))
+    for raw in await redis.zrange(DELAYED_KEY, 0, -1):
+        job = json.loads(raw)
+        if job.get("queue_class", settings.DEFAULT_QUEUE_CLASS) in classes_ahead:
+            queued_audio += float(job.get("cost", 0.0))
+
+    now = time.time()
+    running_remaining = 0.0
+    for raw in await redis.hvals(INFLIGHT_KEY):
+        job = json.loads(raw)
+        expected = float(job.get("cost", 0.0)) * total_rtf
+        running_remaining += max(0.0, expected - (now - float(job.get("started_at", now))))
+
+    slots = max(1, settings.ETA_WORKER_SLOTS)
+    queue_wait = (queued_audio * total_rtf + running_remaining) / slots
+    processing = audio_seconds * total_rtf
+    eta = queue_wait + processing
+
+    return {
+        "audio_seconds": round(audio_seconds, 1),
+        "queue_wait_seconds": round(queue_wait, 1),
+        "processing_seconds": round(processing, 1),
+        "eta_seconds": round(eta, 1),
+        "estimated_completion_at": datetime.now(timezone.utc) + timedelta(seconds=eta),
+    }
+
+
+def admission_decision(eta: Dict[str, Any], queue_class: Optional[str] = None) -> Tuple[str, float]:
+    """
+    Décide de l'admission d'un upload selon l'attente estimée.
+
+    Seules les classes ADMISSION_LOW_PRIORITY_CLASSES sont concernées ; les autres
+    sont toujours acceptées.
+
+    Returns:
+        tuple: ("accept" | "defer" | "reject", secondes de report ou de Retry-After)
+    """
+    queue_class = queue_class or settings.DEFAULT_QUEUE_CLASS
+    ceiling = settings.ADMISSION_MAX_QUEUE_WAIT_SECONDS
+    if ceiling <= 0 or queue_class not in settings.ADMISSION_LOW_PRIORITY_CLASSES:
+        return "accept", 0.0
+
+    excess = eta["queue_wait_seconds"] - ceiling
+    if excess <= 0:
+        return "accept", 0.0
+
+    # Le job ne sera remis en file qu'une fois le backlog redescendu sous le plafond
+    if settings.ADMISSION_POLICY == "reject":
+        return "reject", excess
+    return "defer", excess
@@ -6,11 +6,25 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
 from app.models.group import Group
 from app.models.user import User
 from app.schemas.group import GroupCreate, GroupUpdate
 
 
+def processing_profile(groups: List[Group], requested: Optional[str] = None) -> str:
+    """
+    Profil vitesse / qualité d'un meeting : celui demandé à l'upload, sinon le plus
+    précis des profils de ses groupes, sinon DEFAULT_PROCESSING_PROFILE.
+    """
+    if requested:
+        return requested
+    profiles = [group.processing_profile for group in groups if group.processing_profile in settings.PROCESSING_PROFILES]
+    if not profiles:
+        return settings.DEFAULT_PROCESSING_PROFILE
+    return max(profiles, key=settings.PROCESSING_PROFILES.index)
+
+
 async def get_group(db: AsyncSession, group_id: int) -> Optional[Group]:
     """Récupère un groupe par son ID."""
     result = await db.execute(select(Group).where(Group.id == group_id))
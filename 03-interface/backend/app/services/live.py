@@ -0,0 +1,84 @@
+"""
+Sessions de transcription en direct côté API (WebSocket /api/v1/live/ws).
+
+L'API ne transcrit rien : elle crée le meeting, envoie la session dans la file des
+workers en direct (LIVE_WORKER, file Taskiq sms:live), puis fait le relais entre le
+client et le worker par deux flux Redis par session : l'audio reçu du client d'un
+côté, les événements du worker (segments provisoires et validés, locuteurs) de l'autre.
+
+Capacité : chaque worker en direct annonce son nombre de sessions simultanées au
+démarrage ; une session est refusée si toutes les places sont prises.
+
+Les clés Redis ci-dessous doivent rester alignées avec 02-workers/app/services/live_sessions.py.
+"""
+import base64
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.scheduler import get_ready_workers
+from app.worker.broker import live_session_kicker
+
+LIVE_QUEUE = "sms:live"
+SESSIONS_KEY = "sms:live:sessions"
+WORKERS_KEY = "sms:live:workers"
+
+
+def audio_key(session_id: str) -> str:
+    return f"{LIVE_QUEUE}:{session_id}:audio"
+
+
+def events_key(session_id: str) -> str:
+    return f"{LIVE_QUEUE}:{session_id}:events"
+
+
+async def live_capacity() -> Dict[str, int]:
+    """
+    Places de sessions en direct : annoncées par les workers prêts, moins les sessions
+    en cours. Une session sans heartbeat depuis LIVE_SESSION_STALE_SECONDS, ou un
+    worker depuis WORKER_READY_STALE_SECONDS (worker tué), ne compte plus.
+
+    Returns:
+        dict: {"workers", "slots", "active", "available"}
+    """
+    redis = get_redis()
+    workers = list((await get_ready_workers(WORKERS_KEY)).values())
+    slots = sum(int(info.get("sessions", 1)) for info in workers)
+    now = time.time()
+    active = sum(
+        1 for raw in await redis.hvals(SESSIONS_KEY)
+        if now - float(json.loads(raw).get("last_seen", 0)) <= settings.LIVE_SESSION_STALE_SECONDS
+    )
+    return {"workers": len(workers), "slots": slots, "active": active, "available": max(0, slots - active)}
+
+
+async def start_session(session: Dict[str, Any]):
+    """Envoie la session aux workers en direct (voir 02-workers/app/worker/tasks/live_tasks.py)."""
+    return await live_session_kicker.kicker().with_labels(queue_name=LIVE_QUEUE).kiq(session)
+
+
+async def push_audio(session_id: str, data: bytes) -> None:
+    # Client Redis en decode_responses : l'audio voyage en base64
+    await get_redis().xadd(audio_key(session_id), {"data": base64.b64encode(data).decode()})
+
+
+async def end_audio(session_id: str) -> None:
+    """Fin de l'audio : le worker valide la parole en attente puis enregistre le meeting."""
+    await get_redis().xadd(audio_key(session_id), {"end": "1"})
+
+
+async def read_events(session_id: str, last_id: str, block_ms: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Événements du worker publiés après `last_id` (attente max `block_ms`)."""
+    entries = await get_redis().xread({events_key(session_id): last_id}, count=100, block=block_ms)
+    if not entries:
+        return []
+    return [(entry_id, json.loads(fields["event"])) for entry_id, fields in entries[0][1]]
+
+
+async def expire_session(session_id: str) -> None:
+    """Laisse expirer les flux d'une session terminée ou abandonnée."""
+    redis = get_redis()
+    for key in (audio_key(session_id), events_key(session_id)):
+        await redis.expire(key, settings.LIVE_STREAM_TTL_SECONDS)
@@ -13,6 +13,16 @@ from app.models.user import User
 from app.schemas.meeting import MeetingCreate, MeetingUpdate
 
 
+def has_active_job(meeting: Meeting) -> bool:
+    """
+    Un job du Worker peut-il encore écrire des résultats pour ce meeting ?
+
+    Vrai en file ou en cours, et aussi pour un brouillon publié (status "completed",
+    transcript_version "draft") : sa passe de raffinement est en file ou en cours.
+    """
+    return meeting.status in ("pending", "processing") or meeting.transcript_version == "draft"
+
+
 async def get_meeting(db: AsyncSession, meeting_id: int) -> Optional[Meeting]:
     """Récupère un meeting par son ID avec les relations chargées."""
     result = await db.execute(
@@ -0,0 +1,136 @@
+"""
+Routage des jobs vers un pool de workers (accélérateurs ou CPU).
+
+Chaque worker annonce au démarrage son pool, son device et un RTF mesuré
+(sms:workers:ready, voir 02-workers/app/worker/warmup.py) ; le RTF réel d'un job
+complet est ensuite mesuré par pool (sms:eta:pool_rtf). Pour chaque upload :
+
+1. un seul pool disponible : il reçoit le job ;
+2. audio plus long que ROUTING_OVERFLOW_MAX_AUDIO_SECONDS : pool préféré
+   (un nœud CPU mettrait des heures sur un enregistrement de 3 h) ;
+3. échéance demandée : le pool préféré s'il la tient, sinon le débordement s'il la tient ;
+4. attente du pool préféré au-delà de ROUTING_PRIMARY_BACKLOG_THRESHOLD_SECONDS :
+   débordement vers le CPU s'il termine plus tôt ;
+5. sinon le pool préféré.
+
+Le job porte son pool ("pool") et son jeton part dans la file Taskiq de ce pool.
+"""
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.scheduler import DELAYED_KEY, active_key, get_ready_workers, queue_key
+
+POOL_RTF_KEY = "sms:eta:pool_rtf"
+INFLIGHT_KEY = "sms:fair:inflight"
+
+
+def _job_pool(job: Dict[str, Any]) -> str:
+    # Jobs antérieurs au routage : servis par le pool préféré
+    return job.get("pool") or settings.ROUTING_PRIMARY_POOL
+
+
+async def get_pools() -> Dict[str, Dict[str, Any]]:
+    """
+    État de chaque pool : workers prêts, RTF, backlog et attente estimée.
+
+    Un worker sans heartbeat depuis WORKER_READY_STALE_SECONDS n'est pas compté.
+
+    Returns:
+        dict: {pool: {"workers", "rtf", "rtf_source", "backlog_seconds", "wait_seconds"}}
+    """
+    redis = get_redis()
+    pools: Dict[str, Dict[str, Any]] = {}
+    calibrations: Dict[str, list] = {}
+    for info in (await get_ready_workers()).values():
+        pool = info.get("pool") or settings.ROUTING_PRIMARY_POOL
+        pools.setdefault(pool, {"workers": 0, "queued_seconds": 0.0, "running_remaining": 0.0})
+        pools[pool]["workers"] += 1
+        if info.get("calibration_rtf"):
+            calibrations.setdefault(pool, []).append(float(info["calibration_rtf"]))
+
+    # RTF : mesuré sur les jobs du pool, sinon extrapolé d'un pool mesuré via les
+    # RTF de calibration annoncés au démarrage, sinon valeur par défaut
+    measured = {pool: float(rtf) for pool, rtf in (await redis.hgetall(POOL_RTF_KEY)).items()}
+    calibration = {pool: sum(values) / len(values) for pool, values in calibrations.items()}
+    reference = next((p for p in measured if p in calibration), None)
+    for pool, state in pools.items():
+        if pool in measured:
+            state["rtf"], state["rtf_source"] = measured[pool], "measured"
+        elif reference and pool in calibration:
+            state["rtf"] = measured[reference] * calibration[pool] / calibration[reference]
+            state["rtf_source"] = "calibration"
+        else:
+            state["rtf"] = float(settings.ROUTING_DEFAULT_POOL_RTF.get(pool, 1.0))
+            state["rtf_source"] = "default"
+
+    def _add_queued(job: Dict[str, Any]) -> None:
+        state = pools.get(_job_pool(job))
+        if state is not None:
+            state["queued_seconds"] += float(job.get("cost", 0.0))
+
+    for queue_class in settings.QUEUE_CLASSES:
+        for tenant in await redis.lrange(active_key(queue_class), 0, -1):
+            for raw in await redis.lrange(queue_key(queue_class, tenant), 0, -1):
+                _add_queued(json.loads(raw))
+    for raw in await redis.zrange(DELAYED_KEY, 0, -1):
+        _add_queued(json.loads(raw))
+
+    now = time.time()
+    for raw in await redis.hvals(INFLIGHT_KEY):
+        job = json.loads(raw)
+        state = pools.get(_job_pool(job))
+        if state is not None:
+            expected = float(job.get("cost", 0.0)) * state["rtf"]
+            state["running_remaining"] += max(0.0, expected - (now - float(job.get("started_at", now))))
+
+    for state in pools.values():
+        state["backlog_seconds"] = round(state.pop("queued_seconds"), 1)
+        state["wait_seconds"] = round(
+            (state["backlog_seconds"] * state["rtf"] + state.pop("running_remaining")) / state["workers"], 1
+        )
+        state["rtf"] = round(state["rtf"], 4)
+    return pools
+
+
+async def choose_pool(audio_seconds: float, deadline_seconds: Optional[float] = None) -> Tuple[Optional[str], str]:
+    """
+    Choisit le pool d'un nouveau job.
+
+    Args:
+        audio_seconds: Durée audio estimée
+        deadline_seconds: Délai souhaité avant la fin du traitement (None = pas d'échéance)
+
+    Returns:
+        tuple: (pool ou None sans routage, raison du choix)
+    """
+    if not settings.ROUTING_ENABLED:
+        return None, "routage désactivé"
+
+    primary, overflow = settings.ROUTING_PRIMARY_POOL, settings.ROUTING_OVERFLOW_POOL
+    pools = await get_pools()
+    if overflow not in pools:
+        return primary, "seul pool disponible" if primary in pools else "aucun worker annoncé"
+    if primary not in pools:
+        return overflow, "seul pool disponible"
+    if audio_seconds > settings.ROUTING_OVERFLOW_MAX_AUDIO_SECONDS:
+        return primary, f"audio > {settings.ROUTING_OVERFLOW_MAX_AUDIO_SECONDS:.0f}s"
+
+    finish = {
+        pool: pools[pool]["wait_seconds"] + audio_seconds * pools[pool]["rtf"]
+        for pool in (primary, overflow)
+    }
+    if deadline_seconds is not None:
+        if finish[primary] <= deadline_seconds:
+            return primary, "échéance tenue"
+        if finish[overflow] <= deadline_seconds:
+            return overflow, "échéance tenue uniquement en débordement"
+        best = min(finish, key=finish.get)
+        return best, "échéance non tenable : fin la plus proche"
+
+    if (pools[primary]["wait_seconds"] > settings.ROUTING_PRIMARY_BACKLOG_THRESHOLD_SECONDS
+            and finish[overflow] < finish[primary]):
+        return overflow, f"attente {primary} {pools[primary]['wait_seconds']:.0f}s"
+    return primary, "pool préféré"
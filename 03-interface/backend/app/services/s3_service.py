@@ -2,6 +2,8 @@
 S3 Service - Helper functions for interacting with MinIO/S3 storage.
 """
 import json
+from functools import lru_cache
+
 import boto3
 from botocore.exceptions import ClientError
 from typing import Optional, List, Dict, Any
@@ -9,8 +11,14 @@ from typing import Optional, List, Dict, Any
 from app.core.config import settings
 
 
+@lru_cache(maxsize=1)
 def get_s3_client():
-    """Create a boto3 S3 client configured for MinIO."""
+    """
+    Return the boto3 S3 client configured for MinIO.
+
+    Created on first use (not at import time) and shared afterwards:
+    boto3 clients are thread-safe.
+    """
     return boto3.client(
         "s3",
         endpoint_url=f"http://{settings.MINIO_ENDPOINT}",
@@ -19,6 +27,22 @@ def get_s3_client():
     )
 
 
+def ensure_buckets() -> None:
+    """
+    Create the upload and results buckets if they do not exist.
+
+    Explicit init step (run by start.sh before Uvicorn), kept out of module import.
+    """
+    s3_client = get_s3_client()
+    for bucket in (settings.MINIO_BUCKET_AUDIO, settings.MINIO_BUCKET_RESULTS):
+        try:
+            s3_client.create_bucket(Bucket=bucket)
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code', '')
+            if code not in ('BucketAlreadyOwnedByYou', 'BucketAlreadyExists'):
+                raise
+
+
 def parse_s3_path(s3_path: str) -> tuple[str, str]:
     """
     Parse an S3 path into bucket and key.
@@ -81,3 +105,30 @@ def get_transcript_from_s3(s3_path: str) -> Optional[List[Dict[str, Any]]]:
         if error_code == 'NoSuchKey':
             return None
         raise
+
+
+def get_result_json(s3_path: str, filename: str) -> Optional[Any]:
+    """
+    Fetch a JSON file stored next to fusion.json (e.g. speakers.json).
+
+    Returns None if the file does not exist (meetings processed before it was written).
+    """
+    bucket, base_key = parse_s3_path(s3_path)
+    try:
+        response = get_s3_client().get_object(Bucket=bucket, Key=f"{base_key}/{filename}")
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code', '') == 'NoSuchKey':
+            return None
+        raise
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+
+def put_result_json(s3_path: str, filename: str, data: Any) -> None:
+    """Write a JSON file in a meeting's result folder."""
+    bucket, base_key = parse_s3_path(s3_path)
+    get_s3_client().put_object(
+        Bucket=bucket,
+        Key=f"{base_key}/{filename}",
+        Body=json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'),
+        ContentType='application/json',
+    )
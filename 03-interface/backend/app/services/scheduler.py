@@ -0,0 +1,399 @@
+"""
+Ordonnancement équitable côté API : dépôt des jobs dans les files virtuelles par tenant.
+
+Le Worker tire ensuite les jobs par classe de priorité puis en Deficit Round Robin entre
+tenants (voir 02-workers/app/services/scheduler.py).
+Les clés Redis ci-dessous doivent rester alignées avec celles du Worker.
+"""
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.meeting import Meeting
+from app.worker.broker import dispatch_kicker
+
+KEY_PREFIX = "sms:fair"
+SERVED_KEY = f"{KEY_PREFIX}:served_seconds"
+WEIGHTS_KEY = f"{KEY_PREFIX}:weights"
+LOCK_KEY = f"{KEY_PREFIX}:lock"
+CANCEL_METRICS_KEY = "sms:cancel:metrics"
+DLQ_KEY = "sms:dlq"
+DLQ_METRICS_KEY = "sms:dlq:metrics"
+DELAYED_KEY = f"{KEY_PREFIX}:delayed"
+SCRATCH_USAGE_KEY = "sms:scratch:usage"
+WORKERS_READY_KEY = "sms:workers:ready"
+MODEL_LOADS_KEY = "sms:models:loads"
+INFERENCE_STATS_KEY = "sms:inference:stats"
+POOL_QUEUE_PREFIX = "sms:pool"
+DEFAULT_TOKEN_QUEUE = "taskiq"
+
+# Débit approximatif (octets/seconde d'audio) par extension, pour estimer le coût d'un job
+# avant que le Worker n'ait sondé le fichier.
+BYTES_PER_SECOND = {
+    ".wav": 32000,     # PCM 16 bits mono 16 kHz (cas le plus fréquent)
+    ".mp3": 16000,     # ~128 kbps
+    ".m4a": 16000,
+    ".ogg": 12000,
+    ".webm": 12000,
+    ".mp4": 250000,    # vidéo ~2 Mbps
+    ".mov": 250000,
+}
+DEFAULT_BYTES_PER_SECOND = 16000
+
+
+def active_key(queue_class: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:active"
+
+
+def queue_key(queue_class: str, tenant: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:queue:{tenant}"
+
+
+def deficit_key(queue_class: str) -> str:
+    return f"{KEY_PREFIX}:{queue_class}:deficit"
+
+
+def running_key(tenant: str) -> str:
+    return f"{KEY_PREFIX}:running:{tenant}"
+
+
+def cancel_key(meeting_id: int) -> str:
+    return f"sms:cancel:{meeting_id}"
+
+
+def token_queue(pool: Optional[str]) -> str:
+    """File Taskiq des jetons de dispatch du pool (file unique sans routage)."""
+    if not settings.ROUTING_ENABLED or not pool:
+        return DEFAULT_TOKEN_QUEUE
+    return f"{POOL_QUEUE_PREFIX}:{pool}"
+
+
+async def kick_dispatch(pool: Optional[str] = None):
+    """Envoie un jeton de dispatch aux workers du pool."""
+    return await dispatch_kicker.kicker().with_labels(queue_name=token_queue(pool)).kiq()
+
+
+def estimate_audio_seconds(size_bytes: Optional[int], filename: str) -> float:
+    """Estime la durée audio d'un upload à partir de sa taille et de son extension."""
+    if not size_bytes:
+        return 60.0
+    extension = "." + filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    rate = BYTES_PER_SECOND.get(extension, DEFAULT_BYTES_PER_SECOND)
+    return max(1.0, size_bytes / rate)
+
+
+def tenant_for_meeting(meeting: Meeting, group_ids: List[int]) -> str:
+    """
+    Détermine le tenant d'un meeting selon FAIR_SHARE_TENANT_MODE.
+
+    - "group" : le groupe de plus petit ID parmi ceux assignés (stable)
+    - "owner" : le propriétaire du meeting
+    """
+    if settings.FAIR_SHARE_TENANT_MODE == "group" and group_ids:
+        return f"group:{min(group_ids)}"
+    return f"owner:{meeting.owner_id}"
+
+
+# =============================================================================
+# ENQUEUE
+# =============================================================================
+
+def build_job(
+    meeting: Meeting,
+    file_path: str,
+    tenant: str,
+    cost: float,
+    queue_class: Optional[str] = None,
+    pool: Optional[str] = None,
+    deadline_at: Optional[float] = None,
+    channel_speakers: Optional[List[Optional[str]]] = None,
+    speaker_hints: Optional[Dict[str, Any]] = None,
+    profile: Optional[str] = None,
+    refine: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Payload d'un job du pipeline batch (arguments détaillés dans `enqueue_job`).
+
+    Utilisé tel quel par les sessions en direct : leur passe de raffinement est mise
+    en file par le Worker à la fin de la session (app/api/v1/endpoints/live.py).
+    """
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "meeting_id": str(meeting.id),
+        "file_path": file_path,
+        "tenant": tenant,
+        "queue_class": queue_class or settings.DEFAULT_QUEUE_CLASS,
+        "cost": round(cost, 1),
+        "enqueued_at": time.time(),
+    }
+    if pool:
+        job["pool"] = pool
+    if deadline_at:
+        job["deadline_at"] = deadline_at
+    if channel_speakers:
+        job["channel_speakers"] = channel_speakers
+    if speaker_hints:
+        job.update(speaker_hints)
+    if profile:
+        job["profile"] = profile
+    if refine:
+        job["pass"] = "draft"
+        job["refine"] = refine
+    return job
+
+
+async def enqueue_job(
+    meeting: Meeting,
+    file_path: str,
+    tenant: str,
+    cost: float,
+    queue_class: Optional[str] = None,
+    delay: float = 0.0,
+    pool: Optional[str] = None,
+    deadline_at: Optional[float] = None,
+    channel_speakers: Optional[List[Optional[str]]] = None,
+    speaker_hints: Optional[Dict[str, Any]] = None,
+    profile: Optional[str] = None,
+    refine: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Dépose le job dans la file virtuelle du tenant puis envoie un jeton de dispatch.
+
+    Args:
+        queue_class: Classe de priorité (QUEUE_CLASSES), DEFAULT_QUEUE_CLASS par défaut
+        delay: Report (secondes) avant l'entrée en file (contrôle d'admission) ;
+               le job attend dans les retries différés, promus par le Worker
+        pool: Pool de workers choisi par le routage (None = tout worker)
+        deadline_at: Échéance souhaitée (timestamp), conservée pour les métriques
+        channel_speakers: Locuteur de chaque canal (multipiste) : le Worker saute la diarisation
+        speaker_hints: Locuteurs attendus ("speakers" {min, max}, "expected_identities"),
+               voir app/services/speakers.py
+        profile: Profil vitesse / qualité (PROCESSING_PROFILES) ; le Worker applique
+               DEFAULT_PROCESSING_PROFILE s'il est absent
+        refine: Passe de raffinement ({"profile", "queue_class"}) : le job est alors un
+               brouillon, et le Worker met la passe complète en file une fois le brouillon publié
+
+    Returns:
+        dict: Le payload du job (contient job_id). Le jeton de dispatch n'appartient pas
+        au job (il sert le prochain job choisi par le Worker) : le statut se suit par
+        meeting (GET /process/{meeting_id}/status)
+    """
+    redis = get_redis()
+    queue_class = queue_class or settings.DEFAULT_QUEUE_CLASS
+    job = build_job(
+        meeting, file_path, tenant, cost, queue_class=queue_class, pool=pool, deadline_at=deadline_at,
+        channel_speakers=channel_speakers, speaker_hints=speaker_hints, profile=profile, refine=refine,
+    )
+
+    # Même verrou que le dequeue Worker : évite qu'un tenant sorte du tourniquet
+    # au moment où on lui ajoute un job
+    if delay > 0:
+        # Job différé : le Worker émet son jeton à l'échéance (promotion de sms:fair:delayed)
+        job["not_before"] = job["enqueued_at"] + delay
+        await redis.zadd(DELAYED_KEY, {json.dumps(job): job["not_before"]})
+    else:
+        async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+            await redis.rpush(queue_key(queue_class, tenant), json.dumps(job))
+            if await redis.lpos(active_key(queue_class), tenant) is None:
+                await redis.rpush(active_key(queue_class), tenant)
+        await kick_dispatch(pool)
+    return job
+
+
+# =============================================================================
+# ANNULATION
+# =============================================================================
+
+async def cancel_job(meeting_id: int) -> None:
+    """
+    Marque le job d'un meeting comme annulé.
+
+    Le Worker saute le job s'il est encore en file, ou l'interrompt à la prochaine
+    vérification (entre étapes, pendant FFmpeg ou la transcription) s'il tourne.
+    """
+    redis = get_redis()
+    await redis.set(cancel_key(meeting_id), str(time.time()), ex=settings.CANCEL_MARKER_TTL)
+
+
+async def is_cancelled(meeting_id: int) -> bool:
+    """Le job du meeting a-t-il été annulé (marqueur posé par `cancel_job`) ?"""
+    return bool(await get_redis().exists(cancel_key(meeting_id)))
+
+
+# =============================================================================
+# DEAD-LETTER QUEUE
+# =============================================================================
+
+async def list_dead_letters() -> List[Dict[str, Any]]:
+    """Entrées de la DLQ (jobs en échec définitif), les plus récentes d'abord."""
+    raw = await get_redis().hvals(DLQ_KEY)
+    entries = [json.loads(entry) for entry in raw]
+    return sorted(entries, key=lambda entry: entry["failed_at"], reverse=True)
+
+
+async def get_dead_letter(dlq_id: str) -> Optional[Dict[str, Any]]:
+    raw = await get_redis().hget(DLQ_KEY, dlq_id)
+    return json.loads(raw) if raw else None
+
+
+async def replay_dead_letter(dlq_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Remet un job de la DLQ dans la file de son tenant (compteur de tentatives remis à zéro).
+
+    Returns:
+        dict: Le payload rejoué ou None si l'entrée n'existe pas
+    """
+    redis = get_redis()
+    entry = await get_dead_letter(dlq_id)
+    if entry is None:
+        return None
+
+    job = {**entry["job"], "attempt": 0, "enqueued_at": time.time()}
+    job.pop("last_error", None)
+    queue_class = job.get("queue_class", settings.DEFAULT_QUEUE_CLASS)
+
+    async with redis.lock(LOCK_KEY, timeout=30, blocking_timeout=30):
+        await redis.rpush(queue_key(queue_class, job["tenant"]), json.dumps(job))
+        if await redis.lpos(active_key(queue_class), job["tenant"]) is None:
+            await redis.rpush(active_key(queue_class), job["tenant"])
+        await redis.hdel(DLQ_KEY, dlq_id)
+
+    await kick_dispatch(job.get("pool"))
+    return job
+
+
+async def delete_dead_letter(dlq_id: str) -> bool:
+    """Supprime définitivement une entrée de la DLQ."""
+    return bool(await get_redis().hdel(DLQ_KEY, dlq_id))
+
+
+# =============================================================================
+# MÉTRIQUES
+# =============================================================================
+
+async def get_reliability_metrics() -> Dict[str, Any]:
+    """Retries, timeouts d'étape, jobs orphelins récupérés et taille de la DLQ (compteurs Worker)."""
+    redis = get_redis()
+    raw = await redis.hgetall(DLQ_METRICS_KEY)
+    return {
+        "retries": int(raw.get("retries", 0)),
+        "timeouts": int(raw.get("timeouts", 0)),
+        "orphans": int(raw.get("orphans", 0)),
+        "dead_letters_total": int(raw.get("dead_letters", 0)),
+        "dead_letters_pending": await redis.hlen(DLQ_KEY),
+        "retries_scheduled": await redis.zcard(DELAYED_KEY),
+    }
+
+
+async def get_cancellation_metrics() -> Dict[str, Any]:
+    """Jobs annulés (en file / en cours) et secondes de calcul récupérées (estimation Worker)."""
+    raw = await get_redis().hgetall(CANCEL_METRICS_KEY)
+    return {
+        "cancelled_queued": int(raw.get("cancelled_queued", 0)),
+        "cancelled_running": int(raw.get("cancelled_running", 0)),
+        "reclaimed_seconds": round(float(raw.get("reclaimed_seconds", 0.0)), 1),
+        "wasted_seconds": round(float(raw.get("wasted_seconds", 0.0)), 1),
+    }
+
+
+async def get_scratch_metrics() -> Dict[str, Any]:
+    """Usage du scratch publié par chaque nœud Worker (octets réservés, utilisés, libres par racine)."""
+    raw = await get_redis().hgetall(SCRATCH_USAGE_KEY)
+    return {node: json.loads(usage) for node, usage in raw.items()}
+
+
+async def get_ready_workers(key: str = WORKERS_READY_KEY) -> Dict[str, Dict[str, Any]]:
+    """
+    Workers prêts annoncés dans `key` (sms:workers:ready ou sms:live:workers).
+
+    Un worker republie son entrée périodiquement ("heartbeat_at") ; une entrée non
+    rafraîchie depuis WORKER_READY_STALE_SECONDS (worker tué sans arrêt propre) est ignorée.
+    """
+    now = time.time()
+    workers = {}
+    for worker, raw in (await get_redis().hgetall(key)).items():
+        info = json.loads(raw)
+        if now - float(info.get("heartbeat_at", info.get("ready_at", 0))) <= settings.WORKER_READY_STALE_SECONDS:
+            workers[worker] = info
+    return workers
+
+
+async def get_worker_metrics() -> Dict[str, Any]:
+    """Workers prêts (warm-up terminé) : heure de disponibilité et durée du warm-up par étape."""
+    return await get_ready_workers()
+
+
+async def get_model_load_metrics() -> Dict[str, Any]:
+    """Dernier chargement de chaque modèle par nœud : durée, octets lus sur disque, révision figée."""
+    raw = await get_redis().hgetall(MODEL_LOADS_KEY)
+    metrics: Dict[str, Any] = {}
+    for field, info in raw.items():
+        node, model = field.rsplit(":", 1)
+        metrics.setdefault(node, {})[model] = json.loads(info)
+    return metrics
+
+
+async def get_inference_metrics() -> Dict[str, Any]:
+    """Serveur d'inférence de chaque nœud : tailles de batch, attente en file, débit par modèle."""
+    raw = await get_redis().hgetall(INFERENCE_STATS_KEY)
+    return {node: json.loads(stats) for node, stats in raw.items()}
+
+
+async def get_queue_metrics() -> Dict[str, Any]:
+    """
+    Backlog, jobs en cours et secondes servies par tenant (backlog détaillé par classe).
+
+    Returns:
+        dict: {"tenants": {tenant: {...}}, "total_backlog_jobs": int, "total_backlog_seconds": float}
+    """
+    redis = get_redis()
+    served = await redis.hgetall(SERVED_KEY)
+    weights = await redis.hgetall(WEIGHTS_KEY)
+
+    active = {}
+    deficits = {}
+    for queue_class in settings.QUEUE_CLASSES:
+        active[queue_class] = await redis.lrange(active_key(queue_class), 0, -1)
+        deficits[queue_class] = await redis.hgetall(deficit_key(queue_class))
+
+    tenants = set(served)
+    for class_tenants in active.values():
+        tenants |= set(class_tenants)
+
+    metrics = {}
+    total_jobs = 0
+    total_seconds = 0.0
+
+    for tenant in sorted(tenants):
+        by_class = {}
+        for queue_class in settings.QUEUE_CLASSES:
+            queued = [json.loads(raw) for raw in await redis.lrange(queue_key(queue_class, tenant), 0, -1)]
+            if not queued:
+                continue
+            by_class[queue_class] = {
+                "backlog_jobs": len(queued),
+                "backlog_seconds": round(sum(float(job.get("cost", 0.0)) for job in queued), 1),
+                "deficit": round(float(deficits[queue_class].get(tenant, 0.0)), 1),
+            }
+
+        backlog_jobs = sum(c["backlog_jobs"] for c in by_class.values())
+        backlog_seconds = sum(c["backlog_seconds"] for c in by_class.values())
+        metrics[tenant] = {
+            "backlog_jobs": backlog_jobs,
+            "backlog_seconds": round(backlog_seconds, 1),
+            "backlog_by_class": by_class,
+            "running": await redis.scard(running_key(tenant)),
+            "served_seconds": round(float(served.get(tenant, 0.0)), 1),
+            "weight": float(weights[tenant]) if tenant in weights else None,
+        }
+        total_jobs += backlog_jobs
+        total_seconds += backlog_seconds
+
+    return {
+        "tenants": metrics,
+        "total_backlog_jobs": total_jobs,
+        "total_backlog_seconds": round(total_seconds, 1),
+    }
@@ -0,0 +1,192 @@
+"""
+Indices sur les locuteurs attendus d'un meeting, déduits de ses groupes.
+
+Les groupes dont les membres sont connus (SPEAKER_HINT_GROUP_TYPES, par défaut les
+réunions récurrentes comme le COMOP) bornent le nombre de locuteurs de la
+diarisation et restreignent les identités candidates de l'identification.
+Les groupes larges (départements, "Tous") ne donnent pas d'indice.
+
+Les groupes récurrents sont aussi transmis au Worker, qui identifie d'abord les
+locuteurs parmi les personnes reconnues dans leurs meetings récents (shortlist).
+
+Correspondance membre -> identité de l'identity-bank (dossier {person_id}) :
+email, partie locale de l'email, nom complet ou prénom, normalisés par `identity_key`.
+
+Identités nommées a posteriori ("C'est Albert") : le Worker sauvegarde pour chaque
+meeting le centroïde de chaque locuteur (speakers.json) et la fusion avant nommage
+(fusion_raw.json). Nommer un locuteur écrit sa signature dans l'identity-bank
+(voice/embedding.json, moyenne mobile IDENTITY_EMBEDDING_ALPHA si elle existe déjà),
+réécrit fusion.json du meeting, puis la tâche `relabel_meetings` propage l'identité
+aux autres meetings sans retraiter l'audio.
+"""
+import json
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.models.group import Group, GroupType
+from app.services.routing import get_pools
+from app.services.s3_service import get_result_json, get_s3_client, put_result_json
+from app.services.scheduler import token_queue
+from app.worker.broker import relabel_kicker
+
+# Fichiers écrits par le Worker à côté de fusion.json (02-workers/app/services/storage.py)
+SPEAKERS_FILE = "speakers.json"
+RAW_FUSION_FILE = "fusion_raw.json"
+
+
+def identity_key(value: str) -> str:
+    """Forme normalisée d'un nom ("Émile Durand" -> "emile-durand"), alignée avec le Worker."""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9@.]+", "-", ascii_value.lower()).strip("-")
+
+
+def _member_keys(user) -> set:
+    keys = set()
+    if user.email:
+        keys |= {identity_key(user.email), identity_key(user.email.split("@")[0])}
+    if user.full_name:
+        keys |= {identity_key(user.full_name), identity_key(user.full_name.split()[0])}
+    return keys
+
+
+def speaker_hints(
+    groups: List[Group],
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Locuteurs attendus d'un meeting, à transmettre au Worker dans le payload du job.
+
+    Args:
+        groups: Groupes du meeting (membres chargés)
+        min_speakers / max_speakers: Bornes saisies à l'upload (prioritaires)
+
+    Returns:
+        dict: {"speakers": {"min", "max"}, "expected_identities": [...], "shortlist_group_ids": [...]}
+              (clés absentes sans indice)
+    """
+    members = {
+        user.id: user
+        for group in groups
+        if group.type in settings.SPEAKER_HINT_GROUP_TYPES
+        for user in group.members
+        if user.is_active
+    }
+
+    hints: Dict[str, Any] = {}
+    if members and max_speakers is None:
+        # Marge pour les invités extérieurs au groupe
+        max_speakers = max(len(members) + settings.SPEAKER_HINT_EXTRA_SPEAKERS, min_speakers or 1)
+    speakers = {key: value for key, value in (("min", min_speakers), ("max", max_speakers)) if value}
+    if speakers:
+        hints["speakers"] = speakers
+    if members:
+        hints["expected_identities"] = sorted(set().union(*(_member_keys(user) for user in members.values())))
+    # Groupes récurrents : le Worker tient une shortlist des identités de leurs derniers meetings
+    recurring = sorted(group.id for group in groups if group.type == GroupType.RECURRING.value)
+    if recurring:
+        hints["shortlist_group_ids"] = recurring
+    return hints
+
+
+def apply_speaker_names(raw_segments: list, speakers: dict) -> list:
+    """fusion.json : segments bruts avec le nom de chaque label (label conservé si inconnu)."""
+    return [
+        {**segment, "speaker": (speakers.get(segment["speaker"]) or {}).get("name") or segment["speaker"]}
+        for segment in raw_segments
+    ]
+
+
+def save_identity_embedding(person_id: str, name: str, embedding: List[float]) -> Dict[str, Any]:
+    """
+    Écrit la signature vocale d'une identité (identity-bank/{user}/{person_id}/voice/embedding.json).
+
+    Signature existante : moyenne mobile, la voix évolue (micro, rhume) sans perdre l'historique.
+    """
+    s3 = get_s3_client()
+    key = f"{settings.IDENTITY_BANK_USER_ID}/{person_id}/voice/embedding.json"
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        previous = json.loads(s3.get_object(Bucket=settings.IDENTITY_BANK_BUCKET, Key=key)["Body"].read())
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code", "") != "NoSuchKey":
+            raise
+        previous = None
+
+    alpha = settings.IDENTITY_EMBEDDING_ALPHA
+    if previous and len(previous.get("embedding", [])) == len(embedding):
+        embedding = [(1 - alpha) * old + alpha * new for old, new in zip(previous["embedding"], embedding)]
+    profile = {
+        "name": name,
+        "embedding": embedding,
+        "sample_count": (previous or {}).get("sample_count", 0) + 1,
+        "created_at": (previous or {}).get("created_at", now),
+        "last_updated": now,
+    }
+    s3.put_object(
+        Bucket=settings.IDENTITY_BANK_BUCKET,
+        Key=key,
+        Body=json.dumps(profile).encode("utf-8"),
+        ContentType="application/json",
+    )
+    return profile
+
+
+def assign_speaker_identity(s3_path: str, speaker_label: str, name: str) -> str:
+    """
+    Nomme un locuteur d'un meeting traité et met à jour son fusion.json.
+
+    Args:
+        s3_path: Dossier de résultats du meeting
+        speaker_label: Label de diarisation (ex: "SPEAKER_02")
+        name: Nom saisi par l'utilisateur (nom affiché, person_id déduit par `identity_key`)
+
+    Returns:
+        str: Identité (person_id) attribuée
+
+    Raises:
+        LookupError: Meeting sans profils de locuteurs ou label inconnu
+    """
+    speakers = get_result_json(s3_path, SPEAKERS_FILE)
+    raw_segments = get_result_json(s3_path, RAW_FUSION_FILE)
+    if speakers is None or raw_segments is None:
+        raise LookupError("Meeting traité avant la sauvegarde des profils de locuteurs : relancer le traitement")
+    profile = speakers.get(speaker_label)
+    if profile is None:
+        raise LookupError(f"Locuteur {speaker_label} inconnu pour ce meeting")
+
+    name = name.strip()
+    person_id = identity_key(name)
+    if not person_id:
+        raise ValueError("Nom vide")
+    if profile.get("embedding"):
+        save_identity_embedding(person_id, name, profile["embedding"])
+    # Nom affiché dans fusion.json, identité de la banque à part (matches et renommages)
+    # Nom confirmé : jamais remplacé par un match automatique lors des relabels
+    profile.update(name=name, person_id=person_id, score=1.0, source="manual")
+
+    put_result_json(s3_path, "fusion.json", apply_speaker_names(raw_segments, speakers))
+    put_result_json(s3_path, SPEAKERS_FILE, speakers)
+    return person_id
+
+
+async def kick_relabel(identities: Optional[List[str]] = None, renames: Optional[Dict[str, str]] = None):
+    """
+    Lance le renommage rétroactif sur les Workers (calcul CPU : pool de débordement s'il est actif).
+
+    Returns:
+        Tâche Taskiq (task_id pour suivre le résultat)
+    """
+    pools = await get_pools() if settings.ROUTING_ENABLED else {}
+    pool = next(
+        (p for p in (settings.ROUTING_OVERFLOW_POOL, settings.ROUTING_PRIMARY_POOL) if p in pools),
+        settings.ROUTING_PRIMARY_POOL,
+    )
+    return await relabel_kicker.kicker().with_labels(queue_name=token_queue(pool)).kiq(
+        identities=identities, renames=renames
+    )
@@ -13,3 +13,25 @@ broker = ListQueueBroker(
 @broker.task(task_name="process_transcription_full")
 def kicker(file_path: str, meeting_id: str):
     pass
+
+
+# Jeton d'ordonnancement équitable : le Worker tire le job à exécuter
+# depuis les files virtuelles par tenant (voir app/services/scheduler.py)
+@broker.task(task_name="dispatch_fair_share_job")
+def dispatch_kicker():
+    pass
+
+
+
+# Renommage rétroactif des locuteurs à partir des centroïdes sauvegardés
+# (voir 02-workers/app/services/relabel.py)
+@broker.task(task_name="relabel_meetings")
+def relabel_kicker(identities=None, renames=None):
+    pass
+
+
+# Session de transcription en direct : envoyée dans la file des workers en direct
+# (sms:live, voir app/services/live.py et 02-workers/app/worker/tasks/live_tasks.py)
+@broker.task(task_name="process_live_session")
+def live_session_kicker(session: dict):
+    pass
@@ -30,6 +30,14 @@ asyncio.run(main())
 "
 echo "✅ Database initialized!"
 
+# Create S3 buckets (kept out of the API import path)
+echo "🪣 Ensuring S3 buckets..."
+python -c "
+from app.services.s3_service import ensure_buckets
+ensure_buckets()
+"
+echo "✅ Buckets ready!"
+
 # Start the application
 echo "🎯 Starting Uvicorn server..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload